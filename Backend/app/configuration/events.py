@@ -1,7 +1,18 @@
 """``on_startup`` function will be called when server trying to start."""
 
+from dependency_injector.wiring import Provide, inject
 
-async def on_startup() -> None:
+from app.internal.services import Services
+from app.internal.services.api_key import ApiKeyService
+from app.internal.services.detection import DetectionService
+from app.pkg.utils.password import PasswordHasher
+
+
+@inject
+async def on_startup(
+    api_key_service: ApiKeyService = Provide[Services.api_key_service],
+    detection_service: DetectionService = Provide[Services.detection_service],
+) -> None:
     """Run code on server startup.
 
     Warnings:
@@ -12,11 +23,27 @@ async def on_startup() -> None:
         None
     """
 
+    await api_key_service.start()
+    await detection_service.start()
 
-async def on_shutdown() -> None:
+
+@inject
+async def on_shutdown(
+    password_hasher: PasswordHasher = Provide[Services.password_hasher],
+    import_password_hasher: PasswordHasher = Provide[
+        Services.import_password_hasher
+    ],
+    api_key_service: ApiKeyService = Provide[Services.api_key_service],
+    detection_service: DetectionService = Provide[Services.detection_service],
+) -> None:
     """Run code on server shutdown. Use this function for close all
     connections, etc.
 
     Returns:
         None
     """
+
+    await api_key_service.stop()
+    await detection_service.stop()
+    password_hasher.shutdown()
+    import_password_hasher.shutdown()
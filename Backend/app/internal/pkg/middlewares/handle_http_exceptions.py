@@ -81,7 +81,11 @@ def handle_api_exceptions(request: Request, exc: BaseAPIException):
 
     logger.info(exc)
 
-    return JSONResponse(status_code=exc.status_code, content={"message": exc.message})
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"message": exc.message},
+        headers=exc.headers,
+    )
 
 
 def handle_internal_exception(request: Request, exc: Exception):
@@ -0,0 +1,94 @@
+"""Authentication dependency for JWT-based authentication."""
+
+from typing import Callable, Optional
+
+from dependency_injector.wiring import Provide, inject
+from fastapi import Depends, Security
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from app.internal.services import Services
+from app.pkg import models
+from app.pkg.models.app.user_roles import UserRoleEnum
+from app.pkg.models.exceptions.jwt import InsufficientRole, InvalidToken
+from app.pkg.utils.jwt import JWTManager
+
+__all__ = ["jwt_verification", "jwt_role_verification"]
+
+bearer_header = HTTPBearer(auto_error=False)
+
+
+@inject
+async def jwt_verification(
+    credentials: Optional[HTTPAuthorizationCredentials] = Security(bearer_header),
+    jwt_manager: JWTManager = Depends(Provide[Services.jwt_manager]),
+) -> models.TokenClaims:
+    """This function is used for routers that need to be protected by JWT
+    authentication.
+
+    Notes:
+        Only signature and claims of access token are checked, the database
+        is not queried.
+
+    Args:
+        credentials:
+            Access token from ``Authorization: Bearer`` header.
+        jwt_manager:
+            Verifier of tokens.
+
+    Examples:
+        You can use this function in your specific router like this::
+
+            >>> from fastapi import APIRouter, Depends
+            >>>
+            >>> router = APIRouter()
+            >>>
+            >>> @router.get("/test")
+            ... async def test(
+            ...     claims: models.TokenClaims = Depends(jwt_verification),
+            ... ):
+            ...     return {"user_id": claims.user_id}
+
+    Raises:
+        InvalidToken:
+            If header is missing or token is invalid.
+        TokenExpired:
+            If token has expired.
+
+    Returns:
+        Claims of access token.
+    """
+
+    if credentials is None:
+        raise InvalidToken
+    return jwt_manager.decode(credentials.credentials)
+
+
+def jwt_role_verification(*roles: UserRoleEnum) -> Callable:
+    """Build dependency which allows only users with one of ``roles``.
+
+    Examples:
+        ::
+
+            >>> @router.delete(
+            ...     "/{city_id:int}/",
+            ...     dependencies=[Depends(jwt_role_verification(UserRoleEnum.ADMIN))],
+            ... )
+
+    Raises:
+        InsufficientRole:
+            If role of user is not in ``roles``.
+
+    Returns:
+        Dependency which returns claims of access token.
+    """
+
+    allowed = frozenset(int(role) for role in roles)
+
+    async def verify(
+        claims: models.TokenClaims = Depends(jwt_verification),
+    ) -> models.TokenClaims:
+        if claims.role_id not in allowed:
+            raise InsufficientRole
+        return claims
+
+    return verify
@@ -1,29 +1,40 @@
 """Authentication middleware for token-based authentication."""
 
-from fastapi import Security
+from dependency_injector.wiring import Provide, inject
+from fastapi import Depends, Security
 from fastapi.security import APIKeyHeader
 
-from app.pkg.models.exceptions.token_verification import InvalidCredentials
-from app.pkg.settings import settings
+from app.internal.services import Services
+from app.internal.services.api_key import ApiKeyService
+from app.pkg import models
 
-__all__ = ["token_based_verification"]
+__all__ = ["token_based_verification", "expensive_token_based_verification"]
 
 x_api_key_header = APIKeyHeader(name="X-ACCESS-TOKEN")
 
 
+@inject
 async def token_based_verification(
     api_key_header: str = Security(x_api_key_header),
+    api_key_service: ApiKeyService = Depends(Provide[Services.api_key_service]),
 ):
     """This function is used for routers that need to be protected by token-
     based authentication.
 
     Notes:
-        Token for access to API is X-ACCESS-TOKEN from header and gets from
+        Token for access to API is X-ACCESS-TOKEN from header. Valid tokens
+        are active keys of ``api_keys`` table and
         :attr:`.Settings.API.X_ACCESS_TOKEN`.
 
+        Requests are limited by read budget of the key. Use
+        :func:`.expensive_token_based_verification` for upload and detection
+        routes.
+
     Args:
         api_key_header:
             X-ACCESS-TOKEN from header.
+        api_key_service:
+            Registry of API keys.
 
     Examples:
         You can use this function in your specific router like this::
@@ -48,13 +59,40 @@ async def token_based_verification(
 
     Raises:
         InvalidCredentials:
-            If X-ACCESS-TOKEN from header not equal X_ACCESS_TOKEN from settings.
+            If X-ACCESS-TOKEN from header is not a valid key.
+        RateLimitExceeded:
+            If read budget of the key is exhausted. ``Retry-After`` header
+            contains seconds to wait.
 
     See Also: https://fastapi.tiangolo.com/tutorial/security/first-steps/
 
     Returns:
         None
     """
-    value = settings.API.X_ACCESS_TOKEN.get_secret_value()
-    if api_key_header != value:
-        raise InvalidCredentials
+    await api_key_service.authorize(api_key_header, models.RateLimitScope.READ)
+
+
+@inject
+async def expensive_token_based_verification(
+    api_key_header: str = Security(x_api_key_header),
+    api_key_service: ApiKeyService = Depends(Provide[Services.api_key_service]),
+):
+    """Same as :func:`.token_based_verification`, but requests are limited
+    by expensive budget of the key.
+
+    Use it for routes which load detection workers or upload files.
+
+    Raises:
+        InvalidCredentials:
+            If X-ACCESS-TOKEN from header is not a valid key.
+        RateLimitExceeded:
+            If expensive budget of the key is exhausted.
+
+    Returns:
+        None
+    """
+
+    await api_key_service.authorize(
+        api_key_header,
+        models.RateLimitScope.EXPENSIVE,
+    )
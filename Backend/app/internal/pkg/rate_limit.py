@@ -0,0 +1,108 @@
+"""Token buckets shared by all workers through postgresql."""
+
+import asyncio
+
+import asyncpg
+import psycopg2
+
+from app.internal.repository.postgresql.connection import get_connection
+from app.pkg.logger import get_logger
+from app.pkg.models.exceptions.repository import PoolTimeout
+from app.pkg.ratelimit import (
+    BaseRateLimiter,
+    InMemoryRateLimiter,
+    RateLimitDecision,
+)
+
+__all__ = ["PostgresRateLimiter"]
+
+logger = get_logger(__name__)
+
+#: Tuple[Type[Exception], ...]: Errors of database or connection, which let
+#  ``fallback`` limit the request.
+_ERRORS = (
+    OSError,
+    asyncio.TimeoutError,
+    psycopg2.Error,
+    asyncpg.PostgresError,
+    PoolTimeout,
+)
+
+
+class PostgresRateLimiter(BaseRateLimiter):
+    """Token buckets in ``rate_limit_buckets`` table.
+
+    Notes:
+        Refill and take run in one ``insert ... on conflict do update``
+        statement, so concurrent requests of all uvicorn workers are
+        serialized by the row lock and share one limit. The table is
+        unlogged: buckets are lost on crash of the server, which only makes
+        them full again.
+
+        Every request costs one statement on the primary. If it fails, e.g.
+        the pool is exhausted, the request is limited by ``fallback`` of the
+        worker instead, so the limiter never rejects requests because of the
+        database.
+
+    Attributes:
+        fallback: Limiter used when the database is not available.
+    """
+
+    fallback: BaseRateLimiter
+
+    def __init__(self, fallback: BaseRateLimiter = None):
+        self.fallback = fallback or InMemoryRateLimiter()
+
+    async def acquire(
+        self,
+        key: str,
+        rate: float,
+        burst: int,
+        cost: float = 1.0,
+    ) -> RateLimitDecision:
+        q = """
+            insert into rate_limit_buckets as b (
+                bucket_key, tokens, allowed, updated_at
+            ) values (
+                %(key)s,
+                %(burst)s::float8 - %(cost)s::float8,
+                %(burst)s::float8 >= %(cost)s::float8,
+                now()
+            )
+            on conflict (bucket_key) do update
+            set (tokens, allowed, updated_at) = (
+                select
+                    case
+                        when refill.tokens >= %(cost)s::float8
+                        then refill.tokens - %(cost)s::float8
+                        else refill.tokens
+                    end,
+                    refill.tokens >= %(cost)s::float8,
+                    greatest(b.updated_at, now())
+                from (
+                    select least(
+                        %(burst)s::float8,
+                        b.tokens + greatest(
+                            0, extract(epoch from now() - b.updated_at)
+                        ) * %(rate)s::float8
+                    ) as tokens
+                ) as refill
+            )
+            returning tokens, allowed
+        """
+        params = {"key": key, "rate": rate, "burst": burst, "cost": cost}
+        try:
+            async with get_connection() as cur:
+                await cur.execute(q, params)
+                row = await cur.fetchone()
+        except _ERRORS as error:
+            logger.warning("Shared rate limiter is not available: %s", error)
+            return await self.fallback.acquire(key, rate, burst, cost)
+
+        if row["allowed"]:
+            return RateLimitDecision(allowed=True, remaining=row["tokens"])
+        return RateLimitDecision(
+            allowed=False,
+            remaining=row["tokens"],
+            retry_after=(cost - row["tokens"]) / rate,
+        )
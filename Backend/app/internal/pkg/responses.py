@@ -0,0 +1,72 @@
+"""Streamed responses for large collections of models."""
+
+from typing import AsyncIterator, List
+
+from starlette.responses import StreamingResponse
+
+from app.pkg.models.base import BaseModel, BaseEnum
+
+__all__ = ["StreamFormat", "stream_models"]
+
+#: int: Count of serialized models sent to client in one chunk.
+CHUNK_SIZE = 256
+
+
+class StreamFormat(BaseEnum):
+    """Wire format of streamed collection."""
+
+    #: One JSON object per line.
+    NDJSON = "ndjson"
+    #: Regular JSON array, sent in chunks.
+    JSON = "json"
+
+
+def stream_models(
+    models: AsyncIterator[BaseModel],
+    fmt: StreamFormat = StreamFormat.NDJSON,
+) -> StreamingResponse:
+    """Build ``StreamingResponse`` that serializes ``models`` while they are
+    read from database.
+
+    Args:
+        models: Async iterator of models.
+        fmt: Format of response body.
+
+    Examples:
+        ::
+
+            >>> @router.get("/stream")
+            ... async def stream_cities(city_service: CityService = Depends(...)):
+            ...     return stream_models(city_service.stream_all_cities())
+
+    Returns:
+        ``StreamingResponse`` with chunked body.
+    """
+
+    if fmt == StreamFormat.JSON:
+        return StreamingResponse(_json_array(models), media_type="application/json")
+    return StreamingResponse(_ndjson(models), media_type="application/x-ndjson")
+
+
+async def _ndjson(models: AsyncIterator[BaseModel]) -> AsyncIterator[str]:
+    async for chunk in _chunks(models):
+        yield "".join(f"{item}\n" for item in chunk)
+
+
+async def _json_array(models: AsyncIterator[BaseModel]) -> AsyncIterator[str]:
+    separator = "["
+    async for chunk in _chunks(models):
+        yield separator + ",".join(chunk)
+        separator = ","
+    yield "[]" if separator == "[" else "]"
+
+
+async def _chunks(models: AsyncIterator[BaseModel]) -> AsyncIterator[List[str]]:
+    chunk: List[str] = []
+    async for model in models:
+        chunk.append(model.model_dump_json())
+        if len(chunk) >= CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
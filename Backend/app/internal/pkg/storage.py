@@ -0,0 +1,95 @@
+"""Files of uploads shared by API servers and workers."""
+
+import asyncio
+import os
+import pathlib
+import shutil
+import uuid
+from typing import BinaryIO
+
+__all__ = ["FileStorage"]
+
+#: int: Bytes copied to storage at once.
+_COPY_BLOCK = 1024 * 1024
+
+
+class FileStorage:
+    """Uploaded files in a directory shared by API servers and workers, e.g.
+    a volume of NFS or of a bucket mounted on every host.
+
+    Notes:
+        A file is referenced by its name relative to ``root``, so the
+        directory may be mounted at different paths on different hosts.
+        Files are written under a temporary name, synced and renamed, so a
+        reader never sees a partial file. Blocking calls run in the default
+        executor, so the event loop does not wait for the disk.
+
+    Attributes:
+        root: Directory of files. Created on the first save.
+    """
+
+    root: pathlib.Path
+
+    def __init__(self, root: pathlib.Path):
+        self.root = root
+
+    async def save(self, file: BinaryIO) -> str:
+        """Copy file to storage.
+
+        Args:
+            file: Readable file positioned at the start of data, e.g.
+                spooled upload.
+
+        Returns:
+            Name of saved file.
+        """
+
+        name = uuid.uuid4().hex
+        await asyncio.get_running_loop().run_in_executor(
+            None,
+            self.__write,
+            file,
+            name,
+        )
+        return name
+
+    def open(self, name: str) -> BinaryIO:
+        """Open saved file for reading.
+
+        Raises:
+            FileNotFoundError: If there is no file with this name.
+        """
+
+        return open(self.path(name), "rb")
+
+    async def delete(self, name: str) -> None:
+        """Delete saved file. A missing file is not an error."""
+
+        await asyncio.get_running_loop().run_in_executor(
+            None,
+            lambda: self.path(name).unlink(missing_ok=True),
+        )
+
+    def path(self, name: str) -> pathlib.Path:
+        """Path of file by its name.
+
+        Raises:
+            ValueError: If ``name`` is not a plain name of file in storage.
+        """
+
+        if not name or name != pathlib.Path(name).name or name.startswith("."):
+            raise ValueError(f"Invalid name of stored file: {name!r}")
+        return self.root / name
+
+    def __write(self, file: BinaryIO, name: str) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        partial = self.root / f".{name}.partial"
+        try:
+            with open(partial, "wb") as output:
+                shutil.copyfileobj(file, output, _COPY_BLOCK)
+                output.flush()
+                os.fsync(output.fileno())
+            partial.rename(self.path(name))
+        except BaseException:
+            partial.unlink(missing_ok=True)
+            raise
@@ -0,0 +1,267 @@
+"""Streamed parsing of large uploaded collections of records and files."""
+
+import asyncio
+import csv
+import hashlib
+import json
+import pathlib
+import tempfile
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterable, AsyncIterator, BinaryIO, Dict, Optional, Tuple
+
+from app.pkg.models.base import BaseEnum
+from app.pkg.models.exceptions.upload import UploadTooLarge
+
+__all__ = [
+    "UploadFormat",
+    "Record",
+    "SpooledBody",
+    "read_records",
+    "read_body",
+    "spool_body",
+]
+
+#: int: Bytes of spooled body written to disk at once.
+_WRITE_BLOCK = 1024 * 1024
+
+
+class UploadFormat(BaseEnum):
+    """Wire format of uploaded collection."""
+
+    #: Comma separated values with a header line.
+    CSV = "csv"
+    #: One JSON object per line.
+    NDJSON = "ndjson"
+
+    @classmethod
+    def from_content_type(
+        cls,
+        content_type: Optional[str],
+    ) -> Optional["UploadFormat"]:
+        """Get format by ``Content-Type`` header.
+
+        Returns:
+            Format or None if content type is not supported.
+        """
+
+        media_type = (content_type or "").split(";", 1)[0].strip().lower()
+        return _MEDIA_TYPES.get(media_type)
+
+
+_MEDIA_TYPES = {
+    "text/csv": UploadFormat.CSV,
+    "application/csv": UploadFormat.CSV,
+    "application/x-ndjson": UploadFormat.NDJSON,
+    "application/jsonl": UploadFormat.NDJSON,
+}
+
+
+@dataclass(frozen=True)
+class Record:
+    """Parsed line of upload.
+
+    Attributes:
+        line: Number of line in upload, starting from 1.
+        data: Fields of record. None if the line could not be parsed.
+        error: Reason why the line could not be parsed.
+    """
+
+    line: int
+    data: Optional[Dict[str, str]] = None
+    error: Optional[str] = None
+
+
+async def read_records(
+    chunks: AsyncIterable[bytes],
+    fmt: UploadFormat,
+) -> AsyncIterator[Record]:
+    """Parse records from body while it is received.
+
+    Notes:
+        Body is never kept in memory as a whole: records are yielded line
+        by line, so a broken line does not stop parsing of the next ones.
+        Quoted CSV values must not contain line breaks. Empty lines are
+        skipped.
+
+    Args:
+        chunks: Chunks of body, e.g. ``request.stream()``.
+        fmt: Format of body.
+
+    Examples:
+        ::
+
+            >>> async for record in read_records(request.stream(), UploadFormat.CSV):
+            ...     if record.error:
+            ...         print(record.line, record.error)
+
+    Returns:
+        Async iterator of records.
+    """
+
+    header: Optional[Tuple[str, ...]] = None
+    async for number, line in _lines(chunks):
+        if not line.strip():
+            continue
+
+        if fmt == UploadFormat.NDJSON:
+            yield _ndjson_record(number, line)
+            continue
+
+        values = next(csv.reader([line]))
+        if header is None:
+            header = tuple(value.strip() for value in values)
+            continue
+        if len(values) != len(header):
+            yield Record(
+                line=number,
+                error=f"Expected {len(header)} values, got {len(values)}",
+            )
+            continue
+        yield Record(line=number, data=dict(zip(header, values)))
+
+
+async def read_body(
+    chunks: AsyncIterable[bytes],
+    max_bytes: int,
+    digest: Optional["hashlib._Hash"] = None,
+) -> bytes:
+    """Receive body up to ``max_bytes``.
+
+    Notes:
+        Receiving stops on the first chunk above the limit, so a client can
+        not make the server buffer more than ``max_bytes``.
+
+    Args:
+        chunks: Chunks of body, e.g. ``request.stream()``.
+        max_bytes: Max size of body.
+        digest: Hash updated by every chunk while body is received, so the
+            body is not read again to hash it.
+
+    Raises:
+        UploadTooLarge: If body is larger than ``max_bytes``.
+
+    Returns:
+        Body.
+    """
+
+    body = bytearray()
+    async for chunk in chunks:
+        body += chunk
+        if len(body) > max_bytes:
+            raise UploadTooLarge
+        if digest is not None:
+            digest.update(chunk)
+    return bytes(body)
+
+
+@dataclass(frozen=True)
+class SpooledBody:
+    """Body received to a temporary file.
+
+    Attributes:
+        file: Readable file positioned at the start of body.
+        size: Size of body in bytes.
+        sha256: SHA-256 of body.
+    """
+
+    file: BinaryIO
+    size: int
+    sha256: bytes
+
+
+@asynccontextmanager
+async def spool_body(
+    chunks: AsyncIterable[bytes],
+    max_bytes: int,
+    content_length: Optional[int] = None,
+    max_memory: int = 1024 * 1024,
+    directory: Optional[pathlib.Path] = None,
+) -> AsyncIterator[SpooledBody]:
+    """Receive body to a temporary file up to ``max_bytes``.
+
+    Notes:
+        Bodies up to ``max_memory`` bytes stay in memory, larger ones are
+        written to an anonymous file of ``directory`` by blocks of
+        :data:`_WRITE_BLOCK` bytes in the default executor, so memory of the
+        process does not grow with size of upload and the event loop does
+        not wait for the disk. Body is hashed while it is received. The file
+        is deleted on exit.
+
+        A body with ``Content-Length`` above the limit is rejected before
+        receiving, a chunked body on the first chunk above the limit.
+
+    Args:
+        chunks: Chunks of body, e.g. ``request.stream()``.
+        max_bytes: Max size of body.
+        content_length: Declared size of body, e.g. ``Content-Length``.
+        max_memory: Max size of body kept in memory.
+        directory: Directory of temporary files. System default if not set.
+
+    Examples:
+        ::
+
+            >>> async with spool_body(request.stream(), 2**28) as body:
+            ...     image = decode_image(body.file)
+
+    Raises:
+        UploadTooLarge: If body is larger than ``max_bytes``.
+
+    Returns:
+        Received body.
+    """
+
+    if content_length is not None and content_length > max_bytes:
+        raise UploadTooLarge
+
+    loop = asyncio.get_running_loop()
+    with tempfile.SpooledTemporaryFile(max_size=max_memory, dir=directory) as file:
+        digest = hashlib.sha256()
+        size = 0
+        pending = bytearray()
+        async for chunk in chunks:
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLarge
+            digest.update(chunk)
+            if size <= max_memory:
+                file.write(chunk)
+                continue
+            # The first write above ``max_memory`` moves the body to disk.
+            pending += chunk
+            if len(pending) >= _WRITE_BLOCK:
+                block, pending = pending, bytearray()
+                await loop.run_in_executor(None, file.write, block)
+        if pending:
+            await loop.run_in_executor(None, file.write, pending)
+        file.seek(0)
+        yield SpooledBody(file=file, size=size, sha256=digest.digest())
+
+
+def _ndjson_record(number: int, line: str) -> Record:
+    try:
+        data = json.loads(line)
+    except ValueError as error:
+        return Record(line=number, error=f"Invalid JSON: {error}")
+    if not isinstance(data, dict):
+        return Record(line=number, error="Expected JSON object")
+    return Record(line=number, data=data)
+
+
+async def _lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[Tuple[int, str]]:
+    """Split chunks of body to numbered lines."""
+
+    number, tail = 0, b""
+    async for chunk in chunks:
+        *lines, tail = (tail + chunk).split(b"\n")
+        for line in lines:
+            number += 1
+            yield number, _decode(line)
+    if tail:
+        yield number + 1, _decode(tail)
+
+
+def _decode(line: bytes) -> str:
+    """Decode line. Byte order mark of spreadsheet exports is dropped."""
+
+    return line.rstrip(b"\r").decode("utf-8-sig", errors="replace")
@@ -2,12 +2,20 @@
 
 from dependency_injector import containers, providers
 
+from app.internal.repository.postgresql.api_key import ApiKeyRepository
 from app.internal.repository.postgresql.city import CityRepository
+from app.internal.repository.postgresql.detection_job import DetectionJobRepository
+from app.internal.repository.postgresql.detection_result import (
+    DetectionResultRepository,
+)
 from app.internal.repository.postgresql.user import UserRepository
 
 
 class Repositories(containers.DeclarativeContainer):
     """Container for postgresql repositories."""
 
+    api_key_repository = providers.Factory(ApiKeyRepository)
     city_repository = providers.Factory(CityRepository)
+    detection_job_repository = providers.Factory(DetectionJobRepository)
+    detection_result_repository = providers.Factory(DetectionResultRepository)
     user_repository = providers.Factory(UserRepository)
@@ -0,0 +1,30 @@
+"""Repository for API keys."""
+
+from typing import List
+
+from app.internal.repository.postgresql.connection import get_connection
+from app.internal.repository.postgresql.handlers.collect_response import (
+    collect_response,
+)
+from app.internal.repository.repository import Repository
+from app.pkg import models
+
+__all__ = ["ApiKeyRepository"]
+
+
+class ApiKeyRepository(Repository):
+    """API key repository implementation."""
+
+    @collect_response(trusted=True)
+    async def read_all_active(self) -> List[models.ApiKey]:
+        q = """
+            select
+                id, name, key_hash,
+                read_rate, read_burst,
+                expensive_rate, expensive_burst
+            from api_keys
+            where is_active
+        """
+        async with get_connection() as cur:
+            await cur.execute(q)
+            return await cur.fetchall()
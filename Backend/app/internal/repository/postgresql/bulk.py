@@ -0,0 +1,124 @@
+"""Helpers for bulk writes through a staging table.
+
+Examples:
+    Bulk write is a three-step operation inside one transaction::
+
+        >>> async def create_many(cmds) -> None:
+        ...     async with get_connection() as cur, transaction(cur):
+        ...         await cur.execute(
+        ...             "create temp table _staging (name text) on commit drop",
+        ...         )
+        ...         async for batch in iterate_batches(cmds):
+        ...             await copy_records(cur, "_staging", ("name",), batch)
+        ...         await cur.execute(
+        ...             "insert into t(name) select name from _staging "
+        ...             "on conflict do nothing returning id, name",
+        ...         )
+        ...         return await cur.fetchall()
+"""
+
+import json
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Iterable,
+    List,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from aiopg.pool import Cursor
+
+from app.internal.repository.postgresql.unit_of_work import transaction
+from app.pkg.connectors.postgresql.asyncpg_pool import AsyncpgCursor
+from app.pkg.models.base import Model
+
+__all__ = ["iterate_batches", "copy_records", "transaction", "Commands"]
+
+#: Iterable or async iterable of commands accepted by bulk methods.
+Commands = Union[Iterable[Model], AsyncIterable[Model]]
+
+#: int: Default count of rows sent to postgres in one COPY.
+BATCH_SIZE = 5000
+
+
+async def iterate_batches(
+    cmds: Commands,
+    size: int = BATCH_SIZE,
+) -> AsyncIterator[List[Model]]:
+    """Split iterable or async iterable of commands to lists of ``size``
+    items.
+
+    Args:
+        cmds: Iterable or async iterable of commands.
+        size: Max count of commands in one batch.
+
+    Returns:
+        Async iterator of batches.
+    """
+
+    batch: List[Model] = []
+    if isinstance(cmds, AsyncIterable):
+        async for cmd in cmds:
+            batch.append(cmd)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+    else:
+        for cmd in cmds:
+            batch.append(cmd)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+
+    if batch:
+        yield batch
+
+
+async def copy_records(
+    cur: Union[Cursor, AsyncpgCursor],
+    table: str,
+    columns: Tuple[str, ...],
+    cmds: Sequence[Model],
+) -> None:
+    """Copy commands into ``table``.
+
+    Notes:
+        ``asyncpg`` streams rows with binary ``COPY``. ``psycopg2`` does not
+        support ``COPY`` on async connections, so for ``aiopg`` the whole
+        batch is sent as one ``jsonb`` parameter and expanded on the server
+        side by ``jsonb_populate_recordset``. Both variants cost one round-trip
+        per batch.
+
+    Args:
+        cur: Cursor of the connection that owns ``table``.
+        table: Target table name. Must not come from user input.
+        columns: Columns of ``table`` filled from commands.
+        cmds: Commands to copy.
+
+    Returns:
+        None
+    """
+
+    rows = [cmd.to_dict(show_secrets=True) for cmd in cmds]
+
+    if isinstance(cur, AsyncpgCursor):
+        await cur.connection.copy_records_to_table(
+            table,
+            records=[_record(row, columns) for row in rows],
+            columns=columns,
+        )
+        return
+
+    fields = ", ".join(columns)
+    await cur.execute(
+        f"insert into {table} ({fields}) "  # nosec B608
+        f"select {fields} from jsonb_populate_recordset(null::{table}, %(rows)s)",
+        {"rows": json.dumps([{c: row[c] for c in columns} for row in rows])},
+    )
+
+
+def _record(row: dict, columns: Tuple[str, ...]) -> Tuple[Any, ...]:
+    return tuple(row[column] for column in columns)
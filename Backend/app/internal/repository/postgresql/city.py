@@ -1,13 +1,22 @@
 """Repository for cities."""
 
-from typing import List
+from typing import AsyncIterator, List
 
+from app.internal.repository.postgresql.bulk import (
+    Commands,
+    copy_records,
+    iterate_batches,
+    transaction,
+)
 from app.internal.repository.postgresql.connection import get_connection
 from app.internal.repository.postgresql.handlers.collect_response import (
     collect_response,
+    collect_stream,
 )
+from app.internal.repository.postgresql.server_cursor import fetch_batches
 from app.internal.repository.repository import Repository
 from app.pkg import models
+from app.pkg.models.core.postgresql import PostgresRoute
 
 __all__ = ["CityRepository"]
 
@@ -15,6 +24,9 @@ __all__ = ["CityRepository"]
 class CityRepository(Repository):
     """City repository implementation."""
 
+    #: Tuple[str, ...]: Columns filled by bulk methods.
+    _bulk_columns = ("name", "code", "country_id")
+
     @collect_response
     async def create(self, cmd: models.CreateCityCommand) -> models.City:
         q = """
@@ -30,43 +42,150 @@ class CityRepository(Repository):
             return await cur.fetchone()
 
     @collect_response
-    async def read(self, query: models.ReadCityQuery) -> models.City:
+    async def create_many(
+        self,
+        cmds: Commands[models.CreateCityCommand],
+    ) -> List[models.City]:
+        q = """
+            insert into cities(
+                name, code, country_id
+            )
+            select name, code, country_id from _cities_staging
+            on conflict do nothing
+            returning id, name, code, country_id
+        """
+        async with get_connection() as cur, transaction(cur):
+            await self.__copy_to_staging(cur, cmds)
+            await cur.execute(q)
+            return await cur.fetchall()
+
+    @collect_response
+    async def upsert_many(
+        self,
+        cmds: Commands[models.CreateCityCommand],
+    ) -> List[models.City]:
+        """Create cities or update cities with the same code.
+
+        Notes:
+            The last command of a code wins, then the last command of a name
+            among the rest. A command whose name belongs to a city with
+            another code is skipped, so one such command does not abort the
+            whole batch by the unique constraint of ``name``.
+        """
+
+        q = """
+            with last_by_code as (
+                select distinct on (code)
+                    name, code, country_id, position
+                from _cities_staging
+                order by code, position desc
+            ), last_by_name as (
+                select distinct on (name)
+                    name, code, country_id
+                from last_by_code
+                order by name, position desc
+            )
+            insert into cities(
+                name, code, country_id
+            )
+            select name, code, country_id
+            from last_by_name
+            where not exists (
+                select 1
+                from cities
+                where cities.name = last_by_name.name
+                    and cities.code <> last_by_name.code
+            )
+            on conflict (code) do update
+            set
+                name = excluded.name,
+                country_id = excluded.country_id
+            returning id, name, code, country_id
+        """
+        async with get_connection() as cur, transaction(cur):
+            await self.__copy_to_staging(cur, cmds)
+            await cur.execute(q)
+            return await cur.fetchall()
+
+    async def __copy_to_staging(self, cur, cmds: Commands) -> None:
+        # ``position`` keeps order of commands for "last wins" of upserts.
+        q = """
+            create temp table _cities_staging(
+                name text, code text, country_id int, position bigserial
+            ) on commit drop
+        """
+        await cur.execute(q)
+        async for batch in iterate_batches(cmds):
+            await copy_records(cur, "_cities_staging", self._bulk_columns, batch)
+
+    @collect_response
+    async def read(
+        self,
+        query: models.ReadCityQuery,
+        route: PostgresRoute = PostgresRoute.REPLICA,
+    ) -> models.City:
         q = """
             select
                 id, name, code, country_id
             from cities
             where id = %(id)s
         """
-        async with get_connection() as cur:
+        async with get_connection(route=route) as cur:
             await cur.execute(q, query.to_dict())
             return await cur.fetchone()
 
-    @collect_response
+    @collect_response(trusted=True)
     async def read_by_country(
         self,
         query: models.ReadCityByCountryQuery,
+        route: PostgresRoute = PostgresRoute.REPLICA,
     ) -> List[models.City]:
         q = """
             select
                 id, name, code, country_id
             from cities
-            where country_id = %(country_id)s
+            where country_id = %(country_id)s and id > %(after_id)s
+            order by id
+            limit %(limit)s
         """
-        async with get_connection() as cur:
+        async with get_connection(route=route) as cur:
             await cur.execute(q, query.to_dict())
             return await cur.fetchall()
 
-    @collect_response
-    async def read_all(self) -> List[models.City]:
+    @collect_response(trusted=True)
+    async def read_all(
+        self,
+        query: models.ReadAllCitiesQuery,
+        route: PostgresRoute = PostgresRoute.REPLICA,
+    ) -> List[models.City]:
         q = """
             select
                 id, name, code, country_id
             from cities
+            where id > %(after_id)s
+            order by id
+            limit %(limit)s
         """
-        async with get_connection() as cur:
-            await cur.execute(q)
+        async with get_connection(route=route) as cur:
+            await cur.execute(q, query.to_dict())
             return await cur.fetchall()
 
+    @collect_stream
+    async def stream_all(
+        self,
+        batch_size: int = 500,
+        route: PostgresRoute = PostgresRoute.REPLICA,
+    ) -> AsyncIterator[models.City]:
+        q = """
+            select
+                id, name, code, country_id
+            from cities
+            order by id
+        """
+        async with get_connection(route=route) as cur:
+            async for rows in fetch_batches(cur, q, batch_size=batch_size):
+                yield rows
+
     @collect_response
     async def update(self, cmd: models.UpdateCityCommand) -> models.City:
         q = """
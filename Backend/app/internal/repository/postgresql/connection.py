@@ -1,30 +1,95 @@
 """Create connection to postgresql."""
 
-from contextlib import asynccontextmanager
-from typing import Optional, Union
+import asyncio
+import inspect
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, List, Optional, Sequence, Union
 
+import asyncpg
+import psycopg2
 from aiopg import Pool
 from aiopg.pool import Cursor
 from dependency_injector.wiring import Provide, inject
 from psycopg2.extensions import cursor  # type: ignore
 from psycopg2.extras import RealDictCursor  # type: ignore
 
+from app.pkg import metrics
 from app.pkg.connectors import Connectors
+from app.pkg.connectors.postgresql.asyncpg_pool import AsyncpgCursor, AsyncpgPool
+from app.pkg.connectors.postgresql.replicas import ReplicaSet
+from app.pkg.models.core.postgresql import PostgresRoute
+from app.pkg.models.exceptions.repository import PoolTimeout
+from app.pkg.settings import settings
 
-__all__ = ["get_connection", "acquire_connection"]
+__all__ = [
+    "get_connection",
+    "acquire_connection",
+    "last_description",
+    "shared_cursor",
+    "repository_call",
+    "statement_observers",
+]
+
+#: ContextVar: Description of the last cursor released in the current context.
+#  :func:`.collect_response` reads it to find ``bytea`` columns of the result.
+last_description: ContextVar[Optional[Sequence[Any]]] = ContextVar(
+    "last_description",
+    default=None,
+)
+
+#: ContextVar: Cursor of :func:`.unit_of_work` of the current context.
+#  :func:`.get_connection` returns it instead of acquiring a new connection.
+shared_cursor: ContextVar[Optional[Union[Cursor, AsyncpgCursor]]] = ContextVar(
+    "shared_cursor",
+    default=None,
+)
+
+#: ContextVar: Qualified name of the repository method running in the current
+#  context, e.g. ``CityRepository.read``. Set by :func:`.handle_exception`.
+repository_call: ContextVar[Optional[str]] = ContextVar(
+    "repository_call",
+    default=None,
+)
+
+#: List[Callable]: Called with qualified name of repository method, query,
+#  parameters and duration in seconds of every statement executed inside a
+#  repository call. :mod:`.profiling` registers the slow query log here.
+statement_observers: List[Callable[[str, Any, Any, float], None]] = []
+
+#: Errors of acquiring a connection of replica, after which a read query is
+#  sent to the primary.
+_REPLICA_ERRORS = (
+    OSError,
+    asyncio.TimeoutError,
+    PoolTimeout,
+    psycopg2.OperationalError,
+    asyncpg.PostgresConnectionError,
+    asyncpg.CannotConnectNowError,
+    asyncpg.TooManyConnectionsError,
+    asyncpg.InterfaceError,
+)
 
 
 @asynccontextmanager
 @inject
 async def get_connection(
-    pool: Pool = Provide[Connectors.postgresql.connector],
+    route: PostgresRoute = PostgresRoute.PRIMARY,
+    pool: Union[Pool, AsyncpgPool] = Provide[Connectors.postgresql.connector],
+    replicas: ReplicaSet = Provide[Connectors.postgresql.replicas],
     return_pool: bool = False,
-) -> Union[Cursor, Pool]:
+) -> Union[Cursor, AsyncpgCursor, Pool, AsyncpgPool]:
     """Get async connection pool to postgresql.
 
     Args:
+        route:
+            Pool of connection. Use :attr:`.PostgresRoute.REPLICA` for read
+            queries which may see data a bit behind the primary.
         pool:
             postgresql connection pool.
+        replicas:
+            Pools of read replicas.
         return_pool:
             if True, return pool, else return connection.
 
@@ -38,33 +103,84 @@ async def get_connection(
             ...     async with get_connection() as c:
             ...         await c.execute("SELECT * FROM users")
 
+        Read queries can be routed to a replica::
+
+            >>> async def read_users() -> None:
+            ...     async with get_connection(route=PostgresRoute.REPLICA) as c:
+            ...         await c.execute("SELECT * FROM users")
+
+    Notes:
+        Replica is selected by :meth:`.ReplicaSet.select`. If there is no
+        healthy replica or a connection of the selected replica can not be
+        acquired, the replica is marked as failed and the query goes to the
+        primary. Errors raised after a connection is acquired are not retried.
+
+        Inside :func:`.unit_of_work` cursor of unit of work is returned and
+        ``route`` is ignored.
+
     Returns:
         Async connection to postgresql.
     """
 
-    if not isinstance(pool, Pool):
+    if not return_pool and (shared := shared_cursor.get()) is not None:
+        try:
+            yield shared
+        finally:
+            last_description.set(shared.description)
+        return
+
+    if inspect.isawaitable(pool):
         pool = await pool
 
     if return_pool:
         yield pool
         return
 
-    async with acquire_connection(pool=pool, cursor_factory=None) as cur:
+    async with AsyncExitStack() as stack:
+        cur = None
+        if route == PostgresRoute.REPLICA:
+            if inspect.isawaitable(replicas):
+                replicas = await replicas
+            cur = await _acquire_replica(stack, replicas)
+        if cur is None:
+            cur = await stack.enter_async_context(acquire_connection(pool=pool))
         yield cur
 
 
+async def _acquire_replica(
+    stack: AsyncExitStack,
+    replicas: ReplicaSet,
+) -> Optional[Union[Cursor, AsyncpgCursor]]:
+    """Acquire connection of healthy replica.
+
+    Returns:
+        Cursor of replica or None if there is no available replica.
+    """
+
+    while (replica := replicas.select()) is not None:
+        try:
+            return await stack.enter_async_context(acquire_connection(pool=replica))
+        except _REPLICA_ERRORS:
+            replicas.mark_failed(replica)
+    return None
+
+
 @asynccontextmanager
 async def acquire_connection(
-    pool: Pool,
+    pool: Union[Pool, AsyncpgPool],
     cursor_factory: Optional[cursor] = None,
-) -> Cursor:
+    timeout: float = settings.POSTGRES.ACQUIRE_TIMEOUT,
+) -> Union[Cursor, AsyncpgCursor]:
     """Acquire connection from pool.
 
     Args:
         pool:
             Getings from :func:`.get_connection` postgresql pool.
         cursor_factory:
-            cursor factory.
+            cursor factory. Ignored by ``asyncpg`` pool, which always returns
+            rows as dicts.
+        timeout:
+            Max time in seconds of waiting for a free connection.
 
     Examples:
         If you have a function that contains a query in postgresql,
@@ -80,6 +196,14 @@ async def acquire_connection(
             ...         async with acquire_connection(__pool) as _cursor:
             ...             await _cursor.execute(q)
 
+    Notes:
+        Wait time of a free connection, acquire timeouts and execution time
+        of every query of the cursor are recorded to :mod:`app.pkg.metrics`.
+
+    Raises:
+        PoolTimeout: when there is no free connection in pool after
+            ``timeout`` seconds.
+
     Returns:
         Async connection to postgresql.
     """
@@ -87,6 +211,52 @@ async def acquire_connection(
     if cursor_factory is None:
         cursor_factory = RealDictCursor
 
-    async with pool.acquire() as conn:
+    started = time.perf_counter()
+    metrics.ACQUIRE_WAITING.inc()
+    try:
+        conn = await asyncio.wait_for(pool.acquire(), timeout=timeout)
+    except asyncio.TimeoutError as e:
+        metrics.ACQUIRE_TIMEOUTS.inc()
+        raise PoolTimeout from e
+    finally:
+        metrics.ACQUIRE_WAITING.dec()
+        metrics.ACQUIRE_WAIT.observe(time.perf_counter() - started)
+
+    try:
         acquire_cursor = await conn.cursor(cursor_factory=cursor_factory)
-        yield acquire_cursor
+        _observe_queries(acquire_cursor)
+        try:
+            yield acquire_cursor
+        finally:
+            last_description.set(acquire_cursor.description)
+    finally:
+        await pool.release(conn)
+
+
+def _observe_queries(cur: Union[Cursor, AsyncpgCursor]) -> None:
+    """Record execution time and text of every query of ``cur``.
+
+    Notes:
+        ``execute`` is replaced on the instance, so the cursor keeps its
+        class and ``isinstance`` checks of repositories still work. Queries
+        of repository calls are passed to :data:`.statement_observers`.
+    """
+
+    execute = cur.execute
+
+    async def observed_execute(
+        operation: Any,
+        parameters: Any = None,
+        **kwargs: Any,
+    ) -> Any:
+        started = time.perf_counter()
+        try:
+            return await execute(operation, parameters, **kwargs)
+        finally:
+            duration = time.perf_counter() - started
+            metrics.QUERY_DURATION.observe(duration)
+            if (tag := repository_call.get()) is not None:
+                for observer in statement_observers:
+                    observer(tag, operation, parameters, duration)
+
+    cur.execute = observed_execute
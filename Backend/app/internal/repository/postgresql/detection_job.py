@@ -0,0 +1,217 @@
+"""Repository for asynchronous detection jobs."""
+
+from typing import List
+
+from app.internal.repository.postgresql.connection import get_connection
+from app.internal.repository.postgresql.handlers.collect_response import (
+    collect_response,
+)
+from app.internal.repository.repository import Repository
+from app.pkg import models
+
+__all__ = ["DetectionJobRepository"]
+
+#: str: Columns of :class:`.DetectionJob`. ``jsonb`` is read as text, because
+#  ``asyncpg`` and ``psycopg2`` decode it differently.
+_JOB_COLUMNS = """
+    id, status, conf, progress, attempts, error, result::text as result,
+    created_at, started_at, finished_at
+"""
+
+
+class DetectionJobRepository(Repository):
+    """Detection job repository implementation.
+
+    Notes:
+        Jobs are claimed by ``FOR UPDATE SKIP LOCKED``, so concurrent workers
+        never wait for each other and never get the same job. Every method of
+        a running job checks ``attempts`` of the claim, and a job requeued
+        after a missed heartbeat is left alone by the worker which lost it.
+
+        Images are files of :class:`.FileStorage`, rows keep only their
+        names. Files are deleted by workers, not by this repository.
+    """
+
+    @collect_response
+    async def create(
+        self,
+        cmd: models.CreateDetectionJobCommand,
+    ) -> models.CreateDetectionJobResponse:
+        q = """
+            insert into detection_jobs (conf, image_path, image_sha256)
+            values (%(conf)s, %(image_path)s, %(image_sha256)s)
+            returning id, status, created_at
+        """
+        async with get_connection() as cur:
+            await cur.execute(q, cmd.to_dict())
+            return await cur.fetchone()
+
+    @collect_response
+    async def read(self, query: models.ReadDetectionJobQuery) -> models.DetectionJob:
+        q = f"""
+            select {_JOB_COLUMNS}
+            from detection_jobs
+            where id = %(id)s
+        """  # nosec B608
+        async with get_connection() as cur:
+            await cur.execute(q, query.to_dict())
+            return await cur.fetchone()
+
+    @collect_response
+    async def claim(
+        self,
+        cmd: models.ClaimDetectionJobCommand,
+    ) -> models.DetectionJobInput:
+        """Take the oldest queued job.
+
+        Raises:
+            EmptyResult: If there are no queued jobs.
+        """
+
+        q = """
+            update detection_jobs set
+                status = 'running',
+                attempts = attempts + 1,
+                progress = 0,
+                worker = %(worker)s,
+                started_at = now(),
+                heartbeat_at = now()
+            where id = (
+                select id from detection_jobs
+                where status = 'queued'
+                order by created_at
+                limit 1
+                for update skip locked
+            )
+            returning id, conf, attempts, image_path, image_sha256
+        """
+        async with get_connection() as cur:
+            await cur.execute(q, cmd.to_dict())
+            return await cur.fetchone()
+
+    @collect_response
+    async def update_progress(
+        self,
+        cmd: models.UpdateDetectionJobProgressCommand,
+    ) -> models.ReadDetectionJobQuery:
+        """Save progress of a running job and extend its claim.
+
+        Raises:
+            EmptyResult: If the job is not running under this claim anymore.
+        """
+
+        q = """
+            update detection_jobs set
+                progress = %(progress)s,
+                heartbeat_at = now()
+            where id = %(id)s and attempts = %(attempts)s and status = 'running'
+            returning id
+        """
+        async with get_connection() as cur:
+            await cur.execute(q, cmd.to_dict())
+            return await cur.fetchone()
+
+    @collect_response
+    async def complete(
+        self,
+        cmd: models.CompleteDetectionJobCommand,
+    ) -> models.ReadDetectionJobQuery:
+        """Save result of a running job.
+
+        Raises:
+            EmptyResult: If the job is not running under this claim anymore.
+        """
+
+        q = """
+            update detection_jobs set
+                status = 'succeeded',
+                progress = 1,
+                result = %(result)s::jsonb,
+                error = null,
+                finished_at = now()
+            where id = %(id)s and attempts = %(attempts)s and status = 'running'
+            returning id
+        """
+        async with get_connection() as cur:
+            await cur.execute(
+                q,
+                {
+                    "id": str(cmd.id),
+                    "attempts": cmd.attempts,
+                    "result": cmd.result.model_dump_json(),
+                },
+            )
+            return await cur.fetchone()
+
+    @collect_response
+    async def fail(
+        self,
+        cmd: models.FailDetectionJobCommand,
+    ) -> models.ReadDetectionJobQuery:
+        """Queue a running job again or fail it.
+
+        Raises:
+            EmptyResult: If the job is not running under this claim anymore.
+        """
+
+        q = """
+            update detection_jobs set
+                status = case when %(retry)s then 'queued' else 'failed' end,
+                error = %(error)s,
+                finished_at = case when %(retry)s then null else now() end
+            where id = %(id)s and attempts = %(attempts)s and status = 'running'
+            returning id
+        """
+        async with get_connection() as cur:
+            await cur.execute(q, cmd.to_dict())
+            return await cur.fetchone()
+
+    @collect_response
+    async def requeue_stale(
+        self,
+        cmd: models.RequeueStaleDetectionJobsCommand,
+    ) -> List[models.DetectionJobImage]:
+        """Queue again running jobs without heartbeat for ``stale_after``
+        seconds. Jobs run ``max_attempts`` times fail instead.
+
+        Raises:
+            EmptyResult: If there are no stale jobs.
+        """
+
+        q = """
+            update detection_jobs set
+                status = case
+                    when attempts >= %(max_attempts)s then 'failed'
+                    else 'queued'
+                end,
+                error = 'Worker stopped responding.',
+                finished_at = case
+                    when attempts >= %(max_attempts)s then now()
+                end
+            where status = 'running' and heartbeat_at
+                < now() - make_interval(secs => %(stale_after)s::integer)
+            returning id, status, image_path
+        """
+        async with get_connection() as cur:
+            await cur.execute(q, cmd.to_dict())
+            return await cur.fetchall()
+
+    @collect_response
+    async def delete_finished(
+        self,
+        cmd: models.DeleteFinishedDetectionJobsCommand,
+    ) -> List[models.DetectionJobImage]:
+        """Delete jobs finished more than ``older_than`` seconds ago.
+
+        Raises:
+            EmptyResult: If there are no such jobs.
+        """
+
+        q = """
+            delete from detection_jobs
+            where finished_at < now() - make_interval(secs => %(older_than)s::integer)
+            returning id, status, image_path
+        """
+        async with get_connection() as cur:
+            await cur.execute(q, cmd.to_dict())
+            return await cur.fetchall()
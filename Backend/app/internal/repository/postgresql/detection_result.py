@@ -0,0 +1,87 @@
+"""Repository for cached results of ship detection."""
+
+from app.internal.repository.postgresql.connection import get_connection
+from app.internal.repository.postgresql.handlers.collect_response import (
+    collect_response,
+)
+from app.internal.repository.repository import Repository
+from app.pkg import models
+from app.pkg.models.core.postgresql import PostgresRoute
+
+__all__ = ["DetectionResultRepository"]
+
+
+class DetectionResultRepository(Repository):
+    """Detection result repository implementation.
+
+    Notes:
+        Results are immutable for a key, so reads go to a replica, and a
+        result saved twice by concurrent requests is simply overwritten.
+    """
+
+    @collect_response
+    async def read(
+        self,
+        query: models.DetectionResultKey,
+    ) -> models.CachedDetectionResult:
+        q = """
+            select result::text as result
+            from detection_results
+            where image_sha256 = %(image_sha256)s
+                and model_version = %(model_version)s
+                and settings_fingerprint = %(settings_fingerprint)s
+                and imgsz = %(imgsz)s
+                and conf = %(conf)s
+        """
+        async with get_connection(route=PostgresRoute.REPLICA) as cur:
+            await cur.execute(q, query.to_dict())
+            return await cur.fetchone()
+
+    @collect_response
+    async def create(
+        self,
+        cmd: models.CreateDetectionResultCommand,
+    ) -> models.DetectionResultKey:
+        q = """
+            insert into detection_results (
+                image_sha256, model_version, settings_fingerprint, imgsz, conf,
+                result
+            ) values (
+                %(image_sha256)s, %(model_version)s, %(settings_fingerprint)s,
+                %(imgsz)s, %(conf)s, %(result)s::jsonb
+            )
+            on conflict (image_sha256, model_version, settings_fingerprint, imgsz, conf)
+                do update set result = excluded.result
+            returning image_sha256, model_version, settings_fingerprint, imgsz, conf
+        """
+        async with get_connection() as cur:
+            await cur.execute(
+                q,
+                {
+                    "image_sha256": cmd.image_sha256,
+                    "model_version": cmd.model_version,
+                    "settings_fingerprint": cmd.settings_fingerprint,
+                    "imgsz": cmd.imgsz,
+                    "conf": cmd.conf,
+                    "result": cmd.result.model_dump_json(),
+                },
+            )
+            return await cur.fetchone()
+
+    @collect_response
+    async def delete_by_model_version(
+        self,
+        cmd: models.PurgeDetectionResultsCommand,
+    ) -> models.PurgeDetectionResultsResponse:
+        q = """
+            with deleted as (
+                delete from detection_results
+                where model_version = %(model_version)s
+                returning 1
+            )
+            select %(model_version)s::text as model_version, count(*) as deleted
+            from deleted
+        """
+        async with get_connection() as cur:
+            await cur.execute(q, cmd.to_dict())
+            return await cur.fetchone()
@@ -1,26 +1,130 @@
 """Collect response from aiopg and convert it to an annotated model."""
 
+import typing
 from functools import wraps
-from typing import List, Type, Union
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    FrozenSet,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
 
 import pydantic
-from psycopg2.extras import RealDictRow  # type: ignore
 
+from app.internal.repository.postgresql.connection import last_description
 from app.internal.repository.postgresql.handlers.handle_exception import (
     handle_exception,
+    handle_stream_exception,
 )
 from app.pkg.models.base import Model
 from app.pkg.models.exceptions.repository import EmptyResult
 
-__all__ = ["collect_response"]
+__all__ = ["collect_response", "collect_stream"]
+
+#: int: OID of postgres ``bytea`` type.
+BYTEA_OID = 17
+
+Row = Dict[str, Any]
+
+
+class _Converter:
+    """Row to model converter compiled once per decorated function.
+
+    Attributes:
+        many:
+            True if return annotation is ``List[Model]``.
+        model:
+            Model class of a single row.
+        adapter:
+            Cached ``TypeAdapter`` of return annotation.
+        trusted:
+            If True, rows are converted to models without validation.
+        fields:
+            Names of model fields, set as ``fields_set`` of trusted models.
+    """
+
+    many: bool
+    model: Type[Model]
+    adapter: pydantic.TypeAdapter
+    trusted: bool
+    fields: FrozenSet[str]
+
+    def __init__(self, fn: Callable[..., Any], trusted: bool):
+        annotation = typing.get_type_hints(fn)["return"]
+        self.many = typing.get_origin(annotation) in (list, List)
+        self.model = typing.get_args(annotation)[0] if self.many else annotation
+        self.adapter = pydantic.TypeAdapter(annotation)
+        self.trusted = trusted
+        self.fields = frozenset(self.model.model_fields)
+        self._bytea: Dict[Tuple[Tuple[str, int], ...], FrozenSet[str]] = {}
+
+    def __call__(self, response: Union[Row, List[Row]]) -> Union[Model, List[Model]]:
+        rows = response if self.many else (response,)
+        bytea = self.__resolve_bytea(last_description.get(), rows[0])
+        if bytea:
+            for row in rows:
+                _convert_memory_viewer(row, bytea)
+
+        if not self.trusted:
+            return self.adapter.validate_python(response)
+
+        if self.many:
+            return [self.__construct(row) for row in response]
+        return self.__construct(response)
+
+    def __construct(self, row: Row) -> Model:
+        """Build model from trusted row without validation.
+
+        Notes:
+            Row must contain every field of model, so ``fields_set`` is not
+            computed row by row.
+        """
+
+        return self.model.model_construct(_fields_set=set(self.fields), **row)
+
+    def __resolve_bytea(
+        self,
+        description: Optional[Sequence[Any]],
+        row: Row,
+    ) -> FrozenSet[str]:
+        """Find ``bytea`` columns in cursor description.
+
+        Notes:
+            Columns are cached per description, so a function running
+            different queries gets columns of the query of this call. If a
+            description is not available, columns are detected by
+            ``memoryview`` values of the first row.
+        """
+
+        if description is None:
+            return frozenset(k for k, v in row.items() if isinstance(v, memoryview))
+        key = tuple((column.name, column.type_code) for column in description)
+        if (bytea := self._bytea.get(key)) is None:
+            bytea = frozenset(
+                name for name, type_code in key if type_code == BYTEA_OID
+            )
+            self._bytea[key] = bytea
+        return bytea
 
 
-def collect_response(fn):
+def collect_response(fn=None, *, trusted: bool = False):
     """Convert response from aiopg to an annotated model.
 
     Args:
         fn:
             Target function that contains a query in postgresql.
+        trusted:
+            Skip validation and build models like ``model_construct`` does.
+            Use it only for queries which return rows of our own schema with
+            types matching the model, e.g. ``returning id, name`` of the table
+            the model describes.
 
     Examples:
         If you have a function that contains a query in postgresql,
@@ -37,11 +141,21 @@ def collect_response(fn):
             ...        await cur.execute(q, query.to_dict(show_secrets=True))
             ...        return await cur.fetchone()
 
+        For hot read paths validation can be skipped::
+
+            >>> @collect_response(trusted=True)
+            ... async def read_all() -> List[City]:
+            ...     ...
+
     Warnings:
         The function must return a single row or a list of rows in format like::
 
             >>> ({"key": "value"}, ...)
 
+    Notes:
+        Return annotation, ``TypeAdapter`` and list/single flag are resolved
+        once at decoration time. Rows are converted in place.
+
     Returns:
         The model that is specified in type hints of `fn`.
 
@@ -49,8 +163,13 @@ def collect_response(fn):
         EmptyResult: when a query of `fn` returns None.
     """
 
-    @wraps(fn)
+    if fn is None:
+        return lambda f: collect_response(f, trusted=trusted)
+
+    convert = _Converter(fn, trusted=trusted)
+
     @handle_exception
+    @wraps(fn)
     async def inner(
         *args: object,
         **kwargs: object,
@@ -75,48 +194,70 @@ def collect_response(fn):
         if not response:
             raise EmptyResult
 
-        return pydantic.validate_python(
-            (ann := fn.__annotations__["return"]),
-            await __convert_response(response=response, annotations=str(ann)),
-        )
+        return convert(response)
 
     return inner
 
 
-async def __convert_response(response: RealDictRow, annotations: str):
-    """Converts the response of the request to List of models or to a single
-    model.
+def collect_stream(fn):
+    """Convert batches of rows yielded by ``fn`` to a stream of annotated
+    models.
 
     Args:
-        response:
-            Response of an aiopg query.
-        annotations:
-            Annotations of `fn`.
+        fn:
+            Target async generator that yields batches of rows.
+
+    Examples:
+        Rows are converted one by one, so only one batch is held in memory::
+
+            >>> from app.pkg.models import City
+            >>> from app.internal.repository.postgresql.server_cursor import (
+            ...     fetch_batches,
+            ... )
+            >>>
+            >>> @collect_stream
+            ... async def stream_all() -> AsyncIterator[City]:
+            ...    async with get_connection() as cur:
+            ...        async for rows in fetch_batches(cur, "select * from cities"):
+            ...            yield rows
 
     Returns:
-        List[`Model`] if List is specified in the type annotations,
-        or a single `Model` if `Model` is specified in the type annotations.
+        Async generator of models that is specified in type hints of `fn`.
     """
 
-    r = response.copy()
+    model: Type[Model] = typing.get_args(typing.get_type_hints(fn)["return"])[0]
 
-    if annotations.replace("typing.", "").startswith("List"):
-        return [await __convert_memory_viewer(item) for item in r]
-    return await __convert_memory_viewer(r)
+    @handle_stream_exception
+    @wraps(fn)
+    async def inner(*args: object, **kwargs: object) -> AsyncIterator[Model]:
+        bytea: Optional[FrozenSet[str]] = None
+        async for rows in fn(*args, **kwargs):
+            for row in rows:
+                if bytea is None:
+                    bytea = frozenset(
+                        k for k, v in row.items() if isinstance(v, memoryview)
+                    )
+                yield model.model_validate(_convert_memory_viewer(row, bytea))
+
+    return inner
 
 
-async def __convert_memory_viewer(r: RealDictRow):
+def _convert_memory_viewer(row: Row, columns: FrozenSet[str]) -> Row:
     """Convert memory viewer in bytes.
 
     Notes:
         aiopg returns memory viewer in query response,
         when in database type of cell `bytes`.
 
+    Args:
+        row: Row of query response. Converted in place.
+        columns: Names of ``bytea`` columns.
+
     Returns:
-        `RealDictRow` with converted memory viewer in bytes.
+        `row` with converted memory viewer in bytes.
     """
 
-    for key, value in r.items():
-        if isinstance(value, memoryview):
-            r[key] = value.tobytes()
-    return r
+    for key in columns:
+        if isinstance(value := row.get(key), memoryview):
+            row[key] = value.tobytes()
+    return row
@@ -1,14 +1,17 @@
 """Handle Postgresql Query Exceptions."""
 
-from typing import Callable
+from functools import wraps
+from typing import AsyncIterator, Callable, Type, Union
 
+import asyncpg
 import psycopg2
 
+from app.internal.repository.postgresql.connection import repository_call
 from app.pkg.models.base import Model
 from app.pkg.models.exceptions.association import __aiopg__, __constrains__
 from app.pkg.models.exceptions.repository import DriverError
 
-__all__ = ["handle_exception"]
+__all__ = ["handle_exception", "handle_stream_exception"]
 
 
 def handle_exception(func: Callable[..., Model]):
@@ -34,6 +37,10 @@ def handle_exception(func: Callable[..., Model]):
             ...     async with get_connection() as cur:
             ...         await cur.execute(q, cmd.to_dict(show_secrets=True))
 
+    Notes:
+        Duration of every statement of the call is recorded to
+        :data:`.slow_query_log` with qualified name of ``func`` as a tag.
+
     Returns:
         Result of call function.
 
@@ -43,6 +50,7 @@ def handle_exception(func: Callable[..., Model]):
         DriverError: Any error during execution query on a database.
     """
 
+    @wraps(func)
     async def wrapper(*args: object, **kwargs: object) -> Model:
         """Inner function. Catching Postgresql Query Exceptions.
 
@@ -61,15 +69,67 @@ def handle_exception(func: Callable[..., Model]):
             Result of call function.
         """
 
+        token = repository_call.set(func.__qualname__)
         try:
             return await func(*args, **kwargs)
-        except psycopg2.Error as error:
-            if exc := __constrains__.get(error.diag.constraint_name):
-                raise exc from error
+        except (psycopg2.Error, asyncpg.PostgresError) as error:
+            raise _convert_exception(error) from error
+        finally:
+            repository_call.reset(token)
+
+    return wrapper
+
+
+def handle_stream_exception(func: Callable[..., AsyncIterator[Model]]):
+    """Same as :func:`.handle_exception` for async generators.
+
+    Args:
+        func:
+            async generator function object.
 
-            if exc := __aiopg__.get(error.pgcode):
-                raise exc from error
+    Returns:
+        Async generator that yields items of ``func``.
 
-            raise DriverError(details=error.diag.message_detail) from error
+    Raises:
+        UniqueViolation: The query violates the domain uniqueness constraints
+            of the database set.
+        DriverError: Any error during execution query on a database.
+    """
+
+    @wraps(func)
+    async def wrapper(*args: object, **kwargs: object) -> AsyncIterator[Model]:
+        try:
+            async for item in func(*args, **kwargs):
+                yield item
+        except (psycopg2.Error, asyncpg.PostgresError) as error:
+            raise _convert_exception(error) from error
 
     return wrapper
+
+
+def _convert_exception(
+    error: Union[psycopg2.Error, asyncpg.PostgresError],
+) -> Union[Type[Exception], Exception]:
+    """Find an api exception associated with driver error.
+
+    Args:
+        error: Exception raised by ``psycopg2`` or ``asyncpg``.
+
+    Returns:
+        Exception associated with constraint name or error code of ``error``,
+        or :class:`.DriverError`.
+    """
+
+    if isinstance(error, asyncpg.PostgresError):
+        constraint, code, details = error.constraint_name, error.sqlstate, error.detail
+    else:
+        constraint, code = error.diag.constraint_name, error.pgcode
+        details = error.diag.message_detail
+
+    if exc := __constrains__.get(constraint):
+        return exc
+
+    if exc := __aiopg__.get(code):
+        return exc
+
+    return DriverError(details=details)
@@ -0,0 +1,216 @@
+"""Slow query log of repository calls.
+
+Every statement executed by a call wrapped by :func:`.handle_exception` is
+measured around ``execute`` of the cursor, so waiting for a connection and
+conversion of rows are not counted. Statements longer than
+:attr:`.Settings.POSTGRES.SLOW_QUERY_THRESHOLD_MS` are logged and kept
+in a top of the slowest statements. Plan of a slow statement is captured
+by ``EXPLAIN (ANALYZE, BUFFERS)`` on a separate connection in background, so
+the profiled request is not delayed.
+"""
+
+import asyncio
+import contextvars
+import json
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Set, Tuple
+
+import asyncpg
+import psycopg2
+
+from app.internal.repository.postgresql.connection import (
+    get_connection,
+    statement_observers,
+)
+from app.pkg.logger import get_logger
+from app.pkg.models.app.profiling import SlowQuery
+from app.pkg.models.base import BaseAPIException
+from app.pkg.settings import settings
+
+__all__ = ["SlowQueryLog", "slow_query_log"]
+
+logger = get_logger(__name__)
+
+_Key = Tuple[str, str]
+
+
+class SlowQueryLog:
+    """Top of the slowest statements of repository calls.
+
+    Notes:
+        Statements are grouped by repository method and text. Only text of
+        statement is logged and kept, parameters are used for EXPLAIN only
+        and may contain secrets.
+
+    Attributes:
+        threshold: Min duration of logged statement in seconds. 0 disables
+            the log.
+        top_n: Max count of kept statements.
+        explain: Capture plans of slow ``select`` statements.
+        explain_writes: Capture plans of slow writes too.
+        explain_interval: Min seconds between two EXPLAIN of one statement.
+    """
+
+    threshold: float
+    top_n: int
+    explain: bool
+    explain_writes: bool
+    explain_interval: float
+
+    def __init__(
+        self,
+        threshold_ms: int,
+        top_n: int,
+        explain: bool = True,
+        explain_writes: bool = False,
+        explain_interval: float = 300,
+    ):
+        self.threshold = threshold_ms / 1000
+        self.top_n = top_n
+        self.explain = explain
+        self.explain_writes = explain_writes
+        self.explain_interval = explain_interval
+        self._entries: Dict[_Key, SlowQuery] = {}
+        self._explained_at: Dict[_Key, float] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    def record(self, tag: str, query: Any, params: Any, duration: float) -> None:
+        """Record statement of repository method.
+
+        Args:
+            tag: Qualified name of method, e.g. ``CityRepository.read``.
+            query: Text of statement.
+            params: Parameters of statement.
+            duration: Duration of execution of statement in seconds.
+        """
+
+        if not self.threshold or duration < self.threshold:
+            return
+
+        query = query.decode() if isinstance(query, bytes) else str(query)
+        repository, _, method = tag.rpartition(".")
+        key = (tag, query)
+
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = SlowQuery(
+                repository=repository,
+                method=method,
+                query=query,
+                duration_ms=duration * 1000,
+                calls=1,
+                last_seen_at=datetime.now(timezone.utc),
+            )
+            self._entries[key] = entry
+            self.__evict()
+        else:
+            entry.calls += 1
+            entry.duration_ms = max(entry.duration_ms, duration * 1000)
+            entry.last_seen_at = datetime.now(timezone.utc)
+
+        logger.warning(
+            "Slow query %s",
+            json.dumps(
+                {
+                    "repository": repository,
+                    "method": method,
+                    "duration_ms": round(duration * 1000, 3),
+                    "query": " ".join(query.split()),
+                },
+            ),
+        )
+
+        if key in self._entries and self.__should_explain(key, query):
+            self._explained_at[key] = time.monotonic()
+            task = asyncio.get_running_loop().create_task(
+                self.__explain(key, query, params),
+                context=contextvars.Context(),
+            )
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def top(self) -> List[SlowQuery]:
+        """Get the slowest statements.
+
+        Returns:
+            Statements sorted by duration, the slowest first.
+        """
+
+        return sorted(
+            self._entries.values(),
+            key=lambda entry: entry.duration_ms,
+            reverse=True,
+        )
+
+    def reset(self) -> None:
+        """Drop all recorded statements."""
+
+        self._entries.clear()
+        self._explained_at.clear()
+
+    def __evict(self) -> None:
+        """Drop the fastest statement when the top is full."""
+
+        if len(self._entries) > self.top_n:
+            fastest = min(self._entries, key=lambda k: self._entries[k].duration_ms)
+            del self._entries[fastest]
+            self._explained_at.pop(fastest, None)
+
+    def __should_explain(self, key: _Key, query: str) -> bool:
+        if not self.explain or not query.strip():
+            return False
+
+        statement = query.split(None, 1)[0].lower()
+        if statement != "select" and not (
+            self.explain_writes and statement in ("insert", "update", "delete", "with")
+        ):
+            return False
+
+        explained_at = self._explained_at.get(key)
+        return explained_at is None or (
+            time.monotonic() - explained_at >= self.explain_interval
+        )
+
+    async def __explain(self, key: _Key, query: str, params: Any) -> None:
+        """Capture plan of ``query`` on a separate connection.
+
+        Notes:
+            Task runs in an empty context, so :func:`.get_connection` acquires
+            a new primary connection even if the profiled call was inside
+            :func:`.unit_of_work`. Statement is executed in a transaction
+            which is always rolled back.
+        """
+
+        try:
+            async with get_connection() as cur:
+                await cur.execute("begin")
+                try:
+                    await cur.execute(
+                        f"explain (analyze, buffers) {query}",  # nosec B608
+                        params,
+                    )
+                    rows = await cur.fetchall()
+                finally:
+                    await cur.execute("rollback")
+            plan = "\n".join(next(iter(row.values())) for row in rows)
+        except (psycopg2.Error, asyncpg.PostgresError, BaseAPIException) as error:
+            plan = f"EXPLAIN failed: {error}"
+
+        if (entry := self._entries.get(key)) is not None:
+            entry.plan = plan
+        logger.info(
+            "Plan of slow query %s",
+            json.dumps({"method": key[0], "query": query, "plan": plan}),
+        )
+
+
+#: SlowQueryLog: Slow query log of the current process.
+slow_query_log = SlowQueryLog(
+    threshold_ms=settings.POSTGRES.SLOW_QUERY_THRESHOLD_MS,
+    top_n=settings.POSTGRES.SLOW_QUERY_TOP_N,
+    explain=settings.POSTGRES.SLOW_QUERY_EXPLAIN,
+    explain_writes=settings.POSTGRES.SLOW_QUERY_EXPLAIN_WRITES,
+    explain_interval=settings.POSTGRES.SLOW_QUERY_EXPLAIN_INTERVAL,
+)
+statement_observers.append(slow_query_log.record)
@@ -0,0 +1,66 @@
+"""Server-side cursors for reading large results in batches."""
+
+import uuid
+from typing import Any, AsyncIterator, Dict, List, Mapping, Optional, Union
+
+from aiopg.pool import Cursor
+
+from app.internal.repository.postgresql.bulk import transaction
+from app.pkg.connectors.postgresql.asyncpg_pool import AsyncpgCursor, compile_query
+
+__all__ = ["fetch_batches"]
+
+#: int: Default count of rows fetched from server-side cursor in one round-trip.
+BATCH_SIZE = 500
+
+
+async def fetch_batches(
+    cur: Union[Cursor, AsyncpgCursor],
+    query: str,
+    params: Optional[Mapping[str, Any]] = None,
+    batch_size: int = BATCH_SIZE,
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Execute ``query`` through a named server-side cursor and yield rows in
+    batches.
+
+    Only ``batch_size`` rows are held in memory at once. The connection is
+    held in a transaction until the iterator is exhausted or closed.
+
+    Args:
+        cur: Cursor of acquired connection.
+        query: Query with pyformat placeholders.
+        params: Query parameters.
+        batch_size: Count of rows fetched in one round-trip.
+
+    Examples:
+        ::
+
+            >>> async def read_all():
+            ...     async with get_connection() as cur:
+            ...         async for rows in fetch_batches(cur, "select * from t"):
+            ...             for row in rows:
+            ...                 yield row
+
+    Returns:
+        Async iterator of row batches.
+    """
+
+    batch_size = int(batch_size)
+
+    async with transaction(cur):
+        if isinstance(cur, AsyncpgCursor):
+            sql, keys = compile_query(query)
+            args = [params[key] for key in keys] if keys else []
+            server_cursor = await cur.connection.cursor(sql, *args)
+            while rows := await server_cursor.fetch(batch_size):
+                yield [dict(row) for row in rows]
+            return
+
+        name = f"_stream_{uuid.uuid4().hex}"
+        await cur.execute(f"declare {name} no scroll cursor for {query}", params)
+        while True:
+            await cur.execute(f"fetch forward {batch_size} from {name}")
+            if not (rows := await cur.fetchall()):
+                break
+            yield rows
+        await cur.execute(f"close {name}")
@@ -0,0 +1,191 @@
+"""Unit of work: one connection and one transaction shared by repository
+calls.
+
+Examples:
+    Every repository call inside :func:`.unit_of_work` uses the same
+    connection, so a service method acquires one connection from pool and its
+    statements are committed or rolled back together::
+
+        >>> async def move_city(self, cmd) -> models.City:
+        ...     async with unit_of_work():
+        ...         city = await self.repository.read(query=cmd)
+        ...         return await self.repository.update(cmd=cmd)
+"""
+
+import itertools
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import (
+    Any,
+    AsyncIterator,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from aiopg.pool import Cursor
+
+from app.internal.repository.postgresql.connection import (
+    get_connection,
+    shared_cursor,
+)
+from app.pkg.connectors.postgresql.asyncpg_pool import AsyncpgCursor
+
+__all__ = [
+    "UnitOfWork",
+    "unit_of_work",
+    "current_unit_of_work",
+    "transaction",
+    "Statement",
+]
+
+#: Query with pyformat placeholders and its parameters.
+Statement = Tuple[str, Optional[Union[Mapping[str, Any], Sequence[Any]]]]
+
+_current: ContextVar[Optional["UnitOfWork"]] = ContextVar(
+    "unit_of_work",
+    default=None,
+)
+
+
+class UnitOfWork:
+    """Connection and transaction shared by repository calls.
+
+    Warnings:
+        Connection runs one statement at a time. Repository calls inside unit
+        of work must be awaited one by one, not in ``asyncio.gather``. Use
+        :meth:`.pipeline` for independent statements.
+
+    Attributes:
+        cursor: Cursor of connection of unit of work.
+    """
+
+    cursor: Union[Cursor, AsyncpgCursor]
+
+    def __init__(self, cursor: Union[Cursor, AsyncpgCursor]):
+        self.cursor = cursor
+        self._savepoints = itertools.count()
+
+    @asynccontextmanager
+    async def savepoint(self) -> AsyncIterator["UnitOfWork"]:
+        """Run statements in savepoint. If the block raises, only its
+        statements are rolled back and the exception is re-raised.
+
+        Examples:
+            ::
+
+                >>> async with unit_of_work() as work:
+                ...     await repository.create(cmd=cmd)
+                ...     try:
+                ...         async with work.savepoint():
+                ...             await repository.create(cmd=optional_cmd)
+                ...     except UniqueViolation:
+                ...         pass
+        """
+
+        name = f"_uow_savepoint_{next(self._savepoints)}"
+        await self.cursor.execute(f"savepoint {name}")
+        try:
+            yield self
+        except BaseException:
+            await self.cursor.execute(f"rollback to savepoint {name}")
+            raise
+        await self.cursor.execute(f"release savepoint {name}")
+
+    async def pipeline(self, statements: Sequence[Statement]) -> None:
+        """Execute independent statements with minimal count of round-trips.
+        Results of statements are discarded.
+
+        Notes:
+            ``aiopg`` sends all statements as one query string with
+            parameters bound on the client side. ``asyncpg`` has no
+            multi-statement queries with parameters, so consecutive
+            executions of the same query are pipelined by ``executemany``
+            and different queries cost one round-trip each.
+
+        Args:
+            statements: Queries with parameters.
+
+        Returns:
+            None
+        """
+
+        if not statements:
+            return
+
+        if isinstance(self.cursor, AsyncpgCursor):
+            for query, group in itertools.groupby(statements, key=lambda s: s[0]):
+                await self.cursor.executemany(query, [params for _, params in group])
+            return
+
+        await self.cursor.execute(
+            b"; ".join(self.cursor.mogrify(q, params) for q, params in statements),
+        )
+
+
+def current_unit_of_work() -> Optional[UnitOfWork]:
+    """Get unit of work of the current context.
+
+    Returns:
+        Active unit of work or None.
+    """
+
+    return _current.get()
+
+
+@asynccontextmanager
+async def unit_of_work() -> AsyncIterator[UnitOfWork]:
+    """Share one connection and transaction between repository calls.
+
+    Notes:
+        :func:`.get_connection` returns cursor of unit of work while it is
+        active, so repositories need no changes. Nested unit of work runs in
+        a savepoint of the outer one. Reads go to the primary, because they
+        must see writes of the transaction.
+
+    Returns:
+        Active unit of work.
+    """
+
+    if (work := _current.get()) is not None:
+        async with work.savepoint():
+            yield work
+        return
+
+    async with get_connection() as cur, transaction(cur):
+        work = UnitOfWork(cur)
+        work_token = _current.set(work)
+        cursor_token = shared_cursor.set(cur)
+        try:
+            yield work
+        finally:
+            shared_cursor.reset(cursor_token)
+            _current.reset(work_token)
+
+
+@asynccontextmanager
+async def transaction(cur: Union[Cursor, AsyncpgCursor]):
+    """Run statements of ``cur`` in one transaction.
+
+    Notes:
+        Inside :func:`.unit_of_work` statements run in a savepoint of its
+        transaction.
+
+    Args:
+        cur: Cursor of acquired connection.
+    """
+
+    if (work := _current.get()) is not None and work.cursor is cur:
+        async with work.savepoint():
+            yield cur
+        return
+
+    await cur.execute("begin")
+    try:
+        yield cur
+    except BaseException:
+        await cur.execute("rollback")
+        raise
+    await cur.execute("commit")
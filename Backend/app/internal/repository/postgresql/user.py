@@ -1,8 +1,14 @@
 import logging
+from typing import List
 
+from app.internal.repository.postgresql.bulk import copy_records, transaction
 from app.internal.repository.postgresql.connection import get_connection
+from app.internal.repository.postgresql.handlers.collect_response import (
+    collect_response,
+)
 from app.internal.repository.repository import Repository
 from app.pkg import models
+from app.pkg.models.core.postgresql import PostgresRoute
 
 __all__ = ["UserRepository"]
 
@@ -12,6 +18,10 @@ logger = logging.getLogger(__name__)
 class UserRepository(Repository):
     """User repository implementation."""
 
+    #: Tuple[str, ...]: Columns filled by bulk methods.
+    _bulk_columns = ("email", "password")
+
+    @collect_response
     async def create(self, cmd: models.CreateUserCommand) -> models.User:
         q = """
             INSERT INTO users (email, password) 
@@ -22,3 +32,60 @@ class UserRepository(Repository):
         async with get_connection() as cur:
             await cur.execute(q, cmd.to_dict(show_secrets=True))
             return await cur.fetchone()
+
+    @collect_response(trusted=True)
+    async def create_many(
+        self,
+        cmds: List[models.CreateUserCommand],
+    ) -> List[models.ImportedUser]:
+        """Create users in one transaction. Users with existing email are
+        skipped, so emails of ``cmds`` which are not returned are
+        conflicts. Returned rows are not validated again."""
+
+        q = """
+            insert into users (email, password)
+            select email, convert_to(password, 'UTF8') from _users_staging
+            on conflict (email) do nothing
+            returning id, email
+        """
+        async with get_connection() as cur, transaction(cur):
+            await self.__copy_to_staging(cur, cmds)
+            await cur.execute(q)
+            return await cur.fetchall()
+
+    async def __copy_to_staging(
+        self,
+        cur,
+        cmds: List[models.CreateUserCommand],
+    ) -> None:
+        q = """
+            create temp table _users_staging(
+                email text, password text
+            ) on commit drop
+        """
+        await cur.execute(q)
+        await copy_records(cur, "_users_staging", self._bulk_columns, cmds)
+
+    @collect_response
+    async def read(self, query: models.ReadUserQuery) -> models.User:
+        q = """
+            select
+                id, email, role_id, is_activated, password
+            from users
+            where id = %(id)s
+        """
+        async with get_connection(route=PostgresRoute.REPLICA) as cur:
+            await cur.execute(q, query.to_dict())
+            return await cur.fetchone()
+
+    @collect_response
+    async def read_by_email(self, query: models.ReadUserByEmailQuery) -> models.User:
+        q = """
+            select
+                id, email, role_id, is_activated, password
+            from users
+            where email = %(email)s
+        """
+        async with get_connection() as cur:
+            await cur.execute(q, query.to_dict())
+            return await cur.fetchone()
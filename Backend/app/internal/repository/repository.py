@@ -1,7 +1,15 @@
 """Abstract repository interface."""
 
 from abc import ABC
-from typing import List, TypeVar
+from typing import (
+    AsyncIterable,
+    AsyncIterator,
+    Iterable,
+    List,
+    Optional,
+    TypeVar,
+    Union,
+)
 
 from app.pkg.models.base import Model
 
@@ -65,6 +73,38 @@ class Repository(ABC):
         """
         raise NotImplementedError
 
+    async def create_many(
+        self,
+        cmds: Union[Iterable[Model], AsyncIterable[Model]],
+    ) -> List[Model]:
+        """Create many models in one round-trip per batch.
+
+        Args:
+            cmds: Iterable or async iterable of commands for create models.
+
+        Notes: Rows which violate unique constraints are skipped.
+
+        Returns:
+            List of created models.
+        """
+
+        raise NotImplementedError
+
+    async def upsert_many(
+        self,
+        cmds: Union[Iterable[Model], AsyncIterable[Model]],
+    ) -> List[Model]:
+        """Create many models or update existing ones by natural key.
+
+        Args:
+            cmds: Iterable or async iterable of commands for create models.
+
+        Returns:
+            List of created or updated models.
+        """
+
+        raise NotImplementedError
+
     async def read(self, query: Model) -> Model:
         """Read model.
 
@@ -78,8 +118,24 @@ class Repository(ABC):
 
         raise NotImplementedError
 
-    async def read_all(self) -> List[Model]:
-        """Read all rows."""
+    async def read_all(self, query: Optional[Model] = None) -> List[Model]:
+        """Read all rows.
+
+        Args:
+            query (Model): Optional query with pagination parameters.
+        """
+
+        raise NotImplementedError
+
+    def stream_all(self, batch_size: int) -> AsyncIterator[Model]:
+        """Read all rows as a stream of models.
+
+        Args:
+            batch_size: Count of rows fetched from database in one round-trip.
+
+        Returns:
+            Async iterator of models.
+        """
 
         raise NotImplementedError
 
@@ -6,7 +6,12 @@ from fastapi import APIRouter
 
 from app.pkg.models.core.routes import Routes
 from app.internal.routes import (
-    user
+    admin,
+    city,
+    detection,
+    detection_job,
+    metrics,
+    user,
 )
 
 __all__ = [
@@ -16,6 +21,11 @@ __all__ = [
 __routes__ = Routes(
     routers=(
         (
+            admin.router,
+            city.router,
+            detection.router,
+            detection_job.router,
+            metrics.router,
             user.router,
         )
     ),
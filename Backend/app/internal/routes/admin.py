@@ -0,0 +1,87 @@
+"""Routes for administration of API server."""
+
+from typing import List
+
+from dependency_injector.wiring import Provide, inject
+from fastapi import APIRouter, Depends, Query, status
+
+from app.internal.pkg.middlewares.jwt_verification import jwt_role_verification
+from app.internal.pkg.middlewares.token_based_verification import (
+    token_based_verification,
+)
+from app.internal.services import Services
+from app.internal.services.detection import DetectionService
+from app.internal.services.profiling import ProfilingService
+from app.pkg import models
+from app.pkg.models.app.user_roles import UserRoleEnum
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+    dependencies=[
+        Depends(token_based_verification),
+        Depends(jwt_role_verification(UserRoleEnum.ADMIN)),
+    ],
+)
+
+
+@router.get(
+    "/slow-queries/",
+    response_model=List[models.SlowQuery],
+    status_code=status.HTTP_200_OK,
+    description="Read the slowest repository calls of this process",
+)
+@inject
+async def read_slow_queries(
+    profiling_service: ProfilingService = Depends(Provide[Services.profiling_service]),
+):
+    return await profiling_service.read_slow_queries()
+
+
+@router.delete(
+    "/slow-queries/",
+    status_code=status.HTTP_204_NO_CONTENT,
+    description="Reset slow query log of this process",
+)
+@inject
+async def reset_slow_queries(
+    profiling_service: ProfilingService = Depends(Provide[Services.profiling_service]),
+):
+    await profiling_service.reset_slow_queries()
+
+
+@router.delete(
+    "/detection-cache/",
+    response_model=models.PurgeDetectionResultsResponse,
+    status_code=status.HTTP_200_OK,
+    description="Delete cached results of detection by a model version",
+)
+@inject
+async def purge_detection_cache(
+    model_version: str = Query(
+        ...,
+        min_length=1,
+        description="Version of model, ``model_version`` of detection response",
+    ),
+    detection_service: DetectionService = Depends(
+        Provide[Services.detection_service],
+    ),
+):
+    return await detection_service.purge_results(
+        cmd=models.PurgeDetectionResultsCommand(model_version=model_version),
+    )
+
+
+@router.get(
+    "/detection-cache/stats/",
+    status_code=status.HTTP_200_OK,
+    description="Get hit, miss and eviction counters of in-process cache of "
+    "detection results",
+)
+@inject
+async def read_detection_cache_stats(
+    detection_service: DetectionService = Depends(
+        Provide[Services.detection_service],
+    ),
+):
+    return detection_service.result_cache_stats()
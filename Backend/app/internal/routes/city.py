@@ -1,51 +1,95 @@
-'''"""Routes for city module."""
+"""Routes for city module."""
 
 
-from typing import List
+from typing import Optional
 
 from dependency_injector.wiring import Provide, inject
-from fastapi import Depends, status
+from fastapi import APIRouter, Depends, Query, status
 
 from app.internal.pkg.middlewares.token_based_verification import (
     token_based_verification,
 )
-from app.internal.routes import city_router
+from app.internal.pkg.responses import StreamFormat, stream_models
 from app.internal.services import Services
 from app.internal.services.city import CityService
 from app.pkg import models
+from app.pkg.utils.cursor import decode_cursor
 
+router = APIRouter(prefix="/city", tags=["city"])
 
-@city_router.get(
+
+@router.get(
     "/",
-    response_model=List[models.City],
+    response_model=models.CityPage,
     status_code=status.HTTP_200_OK,
-    description="Get all city",
+    description="Get page of all cities",
     dependencies=[Depends(token_based_verification)],
 )
 @inject
 async def read_all_city(
+    cursor: Optional[str] = Query(None, description="Cursor of the next page."),
+    limit: int = Query(100, ge=1, le=1000),
+    city_service: CityService = Depends(Provide[Services.city_service]),
+):
+    return await city_service.read_all_cities(
+        query=models.ReadAllCitiesQuery(
+            after_id=decode_cursor(cursor, models.CityCursor).id,
+            limit=limit,
+        ),
+    )
+
+
+@router.get(
+    "/stream/",
+    status_code=status.HTTP_200_OK,
+    description="Stream all cities as NDJSON or chunked JSON array",
+    dependencies=[Depends(token_based_verification)],
+)
+@inject
+async def stream_all_city(
+    fmt: StreamFormat = Query(StreamFormat.NDJSON, alias="format"),
+    batch_size: int = Query(500, ge=1, le=10000),
+    city_service: CityService = Depends(Provide[Services.city_service]),
+):
+    return stream_models(city_service.stream_all_cities(batch_size=batch_size), fmt)
+
+
+@router.get(
+    "/cache/stats/",
+    status_code=status.HTTP_200_OK,
+    description="Get hit, miss and eviction counters of cache of cities",
+    dependencies=[Depends(token_based_verification)],
+)
+@inject
+async def read_city_cache_stats(
     city_service: CityService = Depends(Provide[Services.city_service]),
 ):
-    return await city_service.read_all_cities()
+    return city_service.cache_stats()
 
 
-@city_router.get(
+@router.get(
     "/{country_id:int}/",
-    response_model=List[models.City],
+    response_model=models.CityPage,
     status_code=status.HTTP_200_OK,
-    description="Read specific city",
+    description="Read page of cities by country",
 )
 @inject
 async def read_city_by_country(
     country_id: int,
+    cursor: Optional[str] = Query(None, description="Cursor of the next page."),
+    limit: int = Query(100, ge=1, le=1000),
     city_service: CityService = Depends(Provide[Services.city_service]),
 ):
     return await city_service.read_cities_by_country(
-        query=models.ReadCityByCountryQuery(country_id=country_id),
+        query=models.ReadCityByCountryQuery(
+            country_id=country_id,
+            after_id=decode_cursor(cursor, models.CityCursor).id,
+            limit=limit,
+        ),
     )
 
 
-@city_router.post(
+@router.post(
     "/",
     response_model=models.City,
     status_code=status.HTTP_201_CREATED,
@@ -60,7 +104,7 @@ async def create_city(
     return await city_service.create_city(cmd=cmd)
 
 
-@city_router.put(
+@router.put(
     "/",
     response_model=models.City,
     status_code=status.HTTP_200_OK,
@@ -75,7 +119,7 @@ async def update_city(
     return await city_service.update_city(cmd=cmd)
 
 
-@city_router.delete(
+@router.delete(
     "/{city_id:int}/",
     response_model=models.City,
     status_code=status.HTTP_200_OK,
@@ -88,4 +132,3 @@ async def delete_city(
     city_service: CityService = Depends(Provide[Services.city_service]),
 ):
     return await city_service.delete_city(cmd=models.DeleteCityCommand(id=city_id))
-'''
\ No newline at end of file
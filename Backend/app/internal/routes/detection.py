@@ -0,0 +1,66 @@
+"""Routes for detection of ships on images."""
+
+from typing import Optional
+
+from dependency_injector.wiring import Provide, inject
+from fastapi import APIRouter, Depends, Query, Request, status
+
+from app.internal.pkg.middlewares.token_based_verification import (
+    expensive_token_based_verification,
+)
+from app.internal.pkg.uploads import spool_body
+from app.internal.services import Services
+from app.internal.services.detection import DetectionService
+from app.pkg import models
+from app.pkg.settings import settings
+
+router = APIRouter(
+    prefix="/detect",
+    tags=["detection"],
+    dependencies=[Depends(expensive_token_based_verification)],
+)
+
+
+@router.post(
+    "/",
+    response_model=models.DetectionResponse,
+    status_code=status.HTTP_200_OK,
+    description=(
+        "Find ships on image. Body is the image file, e.g. JPEG, PNG or "
+        "GeoTIFF, received to a temporary file"
+    ),
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "image/*": {"schema": {"type": "string", "format": "binary"}},
+            },
+        },
+    },
+)
+@inject
+async def detect(
+    request: Request,
+    conf: Optional[float] = Query(
+        None,
+        gt=0,
+        lt=1,
+        description="Min confidence of boxes. Default of server if not set.",
+    ),
+    detection_service: DetectionService = Depends(
+        Provide[Services.detection_service],
+    ),
+):
+    content_length = request.headers.get("content-length")
+    async with spool_body(
+        request.stream(),
+        settings.DETECTION.MAX_IMAGE_BYTES,
+        content_length=int(content_length) if content_length else None,
+        max_memory=settings.DETECTION.SPOOL_MAX_MEMORY,
+        directory=settings.DETECTION.SPOOL_DIR,
+    ) as body:
+        return await detection_service.detect(
+            body.file,
+            conf=conf,
+            digest=body.sha256,
+        )
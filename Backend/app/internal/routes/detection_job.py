@@ -0,0 +1,92 @@
+"""Routes for asynchronous detection jobs."""
+
+from typing import Optional
+
+from dependency_injector.wiring import Provide, inject
+from fastapi import APIRouter, Depends, Query, Request, status
+from pydantic import UUID4
+
+from app.internal.pkg.middlewares.token_based_verification import (
+    expensive_token_based_verification,
+    token_based_verification,
+)
+from app.internal.pkg.uploads import spool_body
+from app.internal.services import Services
+from app.internal.services.detection_job import DetectionJobService
+from app.pkg import models
+from app.pkg.settings import settings
+
+router = APIRouter(prefix="/detect/jobs", tags=["detection"])
+
+
+@router.post(
+    "/",
+    response_model=models.CreateDetectionJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    description=(
+        "Queue detection of ships on image. Body is the image file, e.g. JPEG, "
+        "PNG or GeoTIFF, received to a temporary file and saved to storage of "
+        "jobs. Poll the returned job for result"
+    ),
+    dependencies=[Depends(expensive_token_based_verification)],
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "image/*": {"schema": {"type": "string", "format": "binary"}},
+            },
+        },
+    },
+)
+@inject
+async def create_detection_job(
+    request: Request,
+    conf: Optional[float] = Query(
+        None,
+        gt=0,
+        lt=1,
+        description="Min confidence of boxes. Default of server if not set.",
+    ),
+    detection_job_service: DetectionJobService = Depends(
+        Provide[Services.detection_job_service],
+    ),
+):
+    content_length = request.headers.get("content-length")
+    async with spool_body(
+        request.stream(),
+        settings.DETECTION.MAX_IMAGE_BYTES,
+        content_length=int(content_length) if content_length else None,
+        max_memory=settings.DETECTION.SPOOL_MAX_MEMORY,
+        directory=settings.DETECTION.SPOOL_DIR,
+    ) as body:
+        return await detection_job_service.create_job(
+            body.file,
+            digest=body.sha256,
+            conf=conf,
+        )
+
+
+@router.get(
+    "/{job_id}/",
+    response_model=models.DetectionJob,
+    status_code=status.HTTP_200_OK,
+    description="Read status, progress and result of detection job",
+    dependencies=[Depends(token_based_verification)],
+)
+@inject
+async def read_detection_job(
+    job_id: UUID4,
+    wait: float = Query(
+        0,
+        ge=0,
+        le=settings.DETECTION_JOBS.MAX_WAIT,
+        description="Max seconds to wait for the job to finish. 0 returns at once.",
+    ),
+    detection_job_service: DetectionJobService = Depends(
+        Provide[Services.detection_job_service],
+    ),
+):
+    return await detection_job_service.read_job(
+        query=models.ReadDetectionJobQuery(id=job_id),
+        wait=wait,
+    )
@@ -0,0 +1,16 @@
+"""Routes for prometheus metrics."""
+
+from fastapi import APIRouter, Response, status
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get(
+    "/metrics",
+    status_code=status.HTTP_200_OK,
+    description="Prometheus metrics of application",
+    include_in_schema=False,
+)
+async def read_metrics():
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
@@ -1,8 +1,16 @@
-from fastapi import APIRouter, Depends, status
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query, Request, status
 
 from app.pkg import models
+from app.pkg.models.exceptions.upload import UnsupportedUploadFormat
 
 from dependency_injector.wiring import Provide, inject
+from app.internal.pkg.middlewares.jwt_verification import jwt_verification
+from app.internal.pkg.middlewares.token_based_verification import (
+    expensive_token_based_verification,
+)
+from app.internal.pkg.uploads import UploadFormat, read_records
 from app.internal.services import Services
 from app.internal.services.user import UserService
 import psycopg2
@@ -22,4 +30,75 @@ async def create_user(
     cmd: models.CreateUserRequest,
     user_service: UserService = Depends(Provide[Services.user_service])
 ):
-    return await user_service.create_user(cmd)
\ No newline at end of file
+    return await user_service.create_user(cmd)
+
+
+@router.post(
+    "/login/",
+    response_model=models.TokenPair,
+    status_code=status.HTTP_200_OK,
+    description="Issue access and refresh tokens by email and password",
+)
+@inject
+async def login(
+    request: models.LoginRequest,
+    user_service: UserService = Depends(Provide[Services.user_service]),
+):
+    return await user_service.login(request)
+
+
+@router.post(
+    "/refresh/",
+    response_model=models.TokenPair,
+    status_code=status.HTTP_200_OK,
+    description="Exchange refresh token for a new token pair",
+)
+@inject
+async def refresh(
+    request: models.RefreshTokenRequest,
+    user_service: UserService = Depends(Provide[Services.user_service]),
+):
+    return await user_service.refresh(request)
+
+
+@router.get(
+    "/me/",
+    response_model=models.TokenClaims,
+    status_code=status.HTTP_200_OK,
+    description="Get claims of access token. Does not query the database",
+)
+async def read_me(claims: models.TokenClaims = Depends(jwt_verification)):
+    return claims
+
+
+@router.post(
+    "/import/",
+    response_model=models.UserImportReport,
+    status_code=status.HTTP_200_OK,
+    description="Create users from CSV with `email,password` header or NDJSON. "
+    "`password_hash` with bcrypt hash can be sent instead of `password`",
+    dependencies=[Depends(expensive_token_based_verification)],
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "text/csv": {"schema": {"type": "string"}},
+                "application/x-ndjson": {"schema": {"type": "string"}},
+            },
+        },
+    },
+)
+@inject
+async def import_users(
+    request: Request,
+    fmt: Optional[UploadFormat] = Query(
+        None,
+        alias="format",
+        description="Format of body. Detected by Content-Type if not set.",
+    ),
+    user_service: UserService = Depends(Provide[Services.user_service]),
+):
+    fmt = fmt or UploadFormat.from_content_type(request.headers.get("content-type"))
+    if fmt is None:
+        raise UnsupportedUploadFormat
+    return await user_service.import_users(read_records(request.stream(), fmt))
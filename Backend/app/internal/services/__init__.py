@@ -2,9 +2,25 @@
 
 from dependency_injector import containers, providers
 
+from app.internal.pkg.rate_limit import PostgresRateLimiter
+from app.internal.pkg.storage import FileStorage
 from app.internal.repository import Repositories, postgresql
+from app.internal.repository.postgresql.profiling import slow_query_log
+from app.internal.services.api_key import ApiKeyService
 from app.internal.services.city import CityService
+from app.internal.services.detection import DetectionService
+from app.internal.services.detection_job import DetectionJobService
+from app.internal.services.detection_worker import DetectionWorker
+from app.internal.services.profiling import ProfilingService
 from app.internal.services.user import UserService
+from app.pkg.cache import LRUCache
+from app.pkg.connectors.postgresql.replicas import RecentWrites
+from app.pkg.detection import OnnxDetector, TiledDetector, TileFilter
+from app.pkg.models.core.rate_limit import RateLimitBackend
+from app.pkg.ratelimit import InMemoryRateLimiter
+from app.pkg.utils.jwt import JWTManager
+from app.pkg.utils.password import PasswordHasher
+from app.pkg.settings import settings
 
 
 class Services(containers.DeclarativeContainer):
@@ -14,14 +30,177 @@ class Services(containers.DeclarativeContainer):
         Repositories.postgres,
     )  # type: ignore
 
+    #: Per-process cache of cities. Shared by all ``city_service`` instances.
+    city_cache = providers.Singleton(
+        LRUCache,
+        max_size=settings.CACHE.CITY_MAX_SIZE,
+        ttl=settings.CACHE.CITY_TTL,
+    )
+
+    #: Token buckets of API keys. Selected by ``RATE_LIMIT__BACKEND``.
+    rate_limiter = providers.Selector(
+        providers.Object(RateLimitBackend(settings.RATE_LIMIT.BACKEND).value),
+        memory=providers.Singleton(InMemoryRateLimiter),
+        postgresql=providers.Singleton(PostgresRateLimiter),
+    )
+
+    #: Per-process registry of API keys.
+    api_key_service = providers.Singleton(
+        ApiKeyService,
+        api_key_repository=repositories.api_key_repository,
+        rate_limiter=rate_limiter,
+        settings_key=settings.API.X_ACCESS_TOKEN.get_secret_value(),
+        read_rate=settings.RATE_LIMIT.READ_RATE,
+        read_burst=settings.RATE_LIMIT.READ_BURST,
+        expensive_rate=settings.RATE_LIMIT.EXPENSIVE_RATE,
+        expensive_burst=settings.RATE_LIMIT.EXPENSIVE_BURST,
+        refresh_interval=settings.RATE_LIMIT.REFRESH_INTERVAL,
+        enabled=settings.RATE_LIMIT.ENABLED,
+    )
+
+    #: Per-process time of the last write of cities.
+    city_writes = providers.Singleton(
+        RecentWrites,
+        window=settings.POSTGRES.REPLICA_MAX_LAG,
+    )
 
     city_service = providers.Factory(
         CityService,
         city_repository=repositories.city_repository,
+        cache=city_cache,
+        recent_writes=city_writes,
+    )
+
+    profiling_service = providers.Factory(
+        ProfilingService,
+        slow_query_log=providers.Object(slow_query_log),
+    )
+
+    #: Per-process pool of workers which hash passwords.
+    password_hasher = providers.Singleton(
+        PasswordHasher,
+        workers=settings.PASSWORD.WORKERS,
+        max_queue=settings.PASSWORD.MAX_QUEUE,
+        rounds=settings.PASSWORD.BCRYPT_ROUNDS,
+    )
+
+    #: Per-process issuer and verifier of JWT. Keys are parsed once.
+    jwt_manager = providers.Singleton(
+        JWTManager,
+        algorithm=settings.JWT.ALGORITHM,
+        secret_key=settings.JWT.SECRET_KEY,
+        private_key=settings.JWT.PRIVATE_KEY,
+        public_key=settings.JWT.PUBLIC_KEY,
+        issuer=settings.JWT.ISSUER,
+        access_ttl=settings.JWT.ACCESS_TOKEN_TTL,
+        refresh_ttl=settings.JWT.REFRESH_TOKEN_TTL,
+        leeway=settings.JWT.LEEWAY,
+    )
+
+    #: Per-process pool of workers which hash passwords of bulk user import.
+    import_password_hasher = providers.Singleton(
+        PasswordHasher,
+        workers=settings.PASSWORD.IMPORT_WORKERS,
+        max_queue=settings.PASSWORD.IMPORT_WORKERS * 4,
+        rounds=settings.PASSWORD.BCRYPT_ROUNDS,
     )
 
     user_service = providers.Factory(
         UserService,
         user_repository=repositories.user_repository,
+        password_hasher=password_hasher,
+        jwt_manager=jwt_manager,
+        import_password_hasher=import_password_hasher,
+        import_batch_size=settings.USER_IMPORT.BATCH_SIZE,
+        import_max_rows=settings.USER_IMPORT.MAX_ROWS,
     )
 
+    #: Per-process session of detection model.
+    detector = providers.Singleton(
+        OnnxDetector,
+        model_path=settings.DETECTION.MODEL_PATH,
+        imgsz=settings.DETECTION.IMGSZ,
+        conf=settings.DETECTION.CONF,
+        iou=settings.DETECTION.IOU,
+        max_det=settings.DETECTION.MAX_DETECTIONS,
+        intra_op_threads=settings.DETECTION.INTRA_OP_THREADS,
+    )
+
+    #: Screen of tiles of large scenes before the model.
+    tile_filter = providers.Singleton(
+        TileFilter,
+        step=settings.DETECTION.TILE_FILTER_STEP,
+        min_std=settings.DETECTION.TILE_FILTER_MIN_STD,
+        edge_threshold=settings.DETECTION.TILE_FILTER_EDGE_THRESHOLD,
+        min_edge_density=settings.DETECTION.TILE_FILTER_MIN_EDGE_DENSITY,
+    )
+
+    #: Detection on scenes larger than input of model.
+    tiled_detector = providers.Singleton(
+        TiledDetector,
+        detector=detector,
+        overlap=settings.DETECTION.TILE_OVERLAP,
+        batch_size=settings.DETECTION.TILE_BATCH_SIZE,
+        workers=settings.DETECTION.TILE_WORKERS,
+        merge_threshold=settings.DETECTION.TILE_MERGE_THRESHOLD,
+        read_workers=settings.DETECTION.TILE_READ_WORKERS,
+        tile_filter=tile_filter if settings.DETECTION.TILE_FILTER_ENABLED else None,
+    )
+
+    #: Per-process cache of detection results in front of the table.
+    detection_result_cache = providers.Singleton(
+        LRUCache,
+        max_size=settings.CACHE.DETECTION_MAX_SIZE,
+        ttl=settings.CACHE.DETECTION_TTL,
+    )
+
+    detection_service = providers.Singleton(
+        DetectionService,
+        detector=detector,
+        tiled_detector=tiled_detector,
+        tile_above=settings.DETECTION.TILE_ABOVE,
+        max_pixels=settings.DETECTION.MAX_IMAGE_PIXELS,
+        raster_above=settings.DETECTION.RASTER_ABOVE,
+        spool_dir=settings.DETECTION.SPOOL_DIR,
+        tile_cache_bytes=settings.DETECTION.TILE_CACHE_BYTES,
+        workers=settings.DETECTION.WORKERS,
+        max_queue=settings.DETECTION.MAX_QUEUE,
+        warmup_runs=settings.DETECTION.WARMUP_RUNS,
+        batch_size=settings.DETECTION.BATCH_SIZE,
+        batch_window_ms=settings.DETECTION.BATCH_WINDOW_MS,
+        latency_slo_ms=settings.DETECTION.LATENCY_SLO_MS,
+        detection_result_repository=(
+            repositories.detection_result_repository
+            if settings.CACHE.DETECTION_ENABLED
+            else None
+        ),
+        result_cache=detection_result_cache,
+    )
+
+    #: Uploaded images of detection jobs shared by API and workers.
+    detection_job_storage = providers.Singleton(
+        FileStorage,
+        root=settings.DETECTION_JOBS.STORAGE_DIR,
+    )
+
+    detection_job_service = providers.Factory(
+        DetectionJobService,
+        detection_job_repository=repositories.detection_job_repository,
+        storage=detection_job_storage,
+        max_wait=settings.DETECTION_JOBS.MAX_WAIT,
+        poll_interval_ms=settings.DETECTION_JOBS.POLL_INTERVAL_MS,
+    )
+
+    #: Runner of detection jobs of ``scripts.detection_worker`` process.
+    detection_worker = providers.Singleton(
+        DetectionWorker,
+        detection_service=detection_service,
+        detection_job_repository=repositories.detection_job_repository,
+        storage=detection_job_storage,
+        concurrency=settings.DETECTION_JOBS.CONCURRENCY,
+        poll_interval_ms=settings.DETECTION_JOBS.POLL_INTERVAL_MS,
+        heartbeat_interval=settings.DETECTION_JOBS.HEARTBEAT_INTERVAL,
+        stale_after=settings.DETECTION_JOBS.STALE_AFTER,
+        max_attempts=settings.DETECTION_JOBS.MAX_ATTEMPTS,
+        retention=settings.DETECTION_JOBS.RETENTION,
+    )
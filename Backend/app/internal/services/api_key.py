@@ -0,0 +1,211 @@
+"""Service for verify API keys and limit their requests."""
+
+import asyncio
+import contextlib
+import hashlib
+import typing
+
+import asyncpg
+import psycopg2
+
+from app.internal.repository.postgresql import api_key
+from app.internal.repository.repository import BaseRepository
+from app.pkg import models
+from app.pkg.logger import get_logger
+from app.pkg.models.exceptions.repository import (
+    DriverError,
+    EmptyResult,
+    PoolTimeout,
+)
+from app.pkg.models.exceptions.token_verification import (
+    InvalidCredentials,
+    RateLimitExceeded,
+)
+from app.pkg.ratelimit import BaseRateLimiter
+
+__all__ = ["ApiKeyService", "hash_api_key"]
+
+logger = get_logger(__name__)
+
+#: int: ID of the key from :attr:`.Settings.API.X_ACCESS_TOKEN`.
+SETTINGS_KEY_ID = 0
+
+#: Tuple[Type[Exception], ...]: Errors of database or connection, which keep
+#  the old keys on reload.
+_LOAD_ERRORS = (
+    OSError,
+    asyncio.TimeoutError,
+    psycopg2.Error,
+    asyncpg.PostgresError,
+    DriverError,
+    PoolTimeout,
+)
+
+
+def hash_api_key(key: str) -> str:
+    """Hash API key for lookup.
+
+    Notes:
+        Keys are random, so one round of SHA-256 is enough and lookup does
+        not cost a slow hash on every request.
+
+    Returns:
+        Hex encoded SHA-256 of ``key``.
+    """
+
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+class ApiKeyService:
+    """Service for verify API keys and limit their requests.
+
+    Notes:
+        Active keys are loaded from ``api_keys`` table into memory by
+        :meth:`.start` and reloaded every ``refresh_interval`` seconds, so
+        verification of a request is one dict lookup. If a reload fails, the
+        previous keys are kept. The key from settings is always valid.
+
+        Every key has a token bucket per :class:`.RateLimitScope`.
+
+    Attributes:
+        defaults: Rate and burst of scopes for keys without own limits.
+        refresh_interval: Seconds between reloads of keys.
+        enabled: Whether requests above limits are rejected.
+    """
+
+    #: ApiKeyRepository: ApiKeyRepository repository implementation.
+    repository: api_key.ApiKeyRepository
+
+    #: BaseRateLimiter: Storage of token buckets.
+    rate_limiter: BaseRateLimiter
+
+    defaults: typing.Dict[models.RateLimitScope, typing.Tuple[float, int]]
+    refresh_interval: float
+    enabled: bool
+
+    def __init__(
+        self,
+        api_key_repository: BaseRepository,
+        rate_limiter: BaseRateLimiter,
+        settings_key: str,
+        read_rate: float,
+        read_burst: int,
+        expensive_rate: float,
+        expensive_burst: int,
+        refresh_interval: float = 60,
+        enabled: bool = True,
+    ):
+        self.repository = api_key_repository
+        self.rate_limiter = rate_limiter
+        self.defaults = {
+            models.RateLimitScope.READ: (read_rate, read_burst),
+            models.RateLimitScope.EXPENSIVE: (expensive_rate, expensive_burst),
+        }
+        self.refresh_interval = refresh_interval
+        self.enabled = enabled
+        self._settings_key = models.ApiKey(
+            id=SETTINGS_KEY_ID,
+            name="settings",
+            key_hash=hash_api_key(settings_key),
+        )
+        self._keys: typing.Dict[str, models.ApiKey] = {
+            self._settings_key.key_hash: self._settings_key,
+        }
+        self._refresh_task: typing.Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Load keys and start their periodic reload."""
+
+        await self.load()
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self.__refresh_forever())
+
+    async def stop(self) -> None:
+        """Stop periodic reload of keys."""
+
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._refresh_task
+            self._refresh_task = None
+
+    async def load(self) -> bool:
+        """Reload active keys from database.
+
+        Notes:
+            No active keys in database is a valid result: every loaded key
+            is revoked and only the key from settings stays valid.
+
+        Returns:
+            False if keys could not be read and the previous keys are kept.
+        """
+
+        try:
+            loaded = await self.repository.read_all_active()
+        except EmptyResult:
+            loaded = []
+        except _LOAD_ERRORS as error:
+            logger.warning("API keys are not reloaded: %s", error)
+            return False
+
+        keys = {key.key_hash: key for key in loaded}
+        keys[self._settings_key.key_hash] = self._settings_key
+        self._keys = keys
+        return True
+
+    def lookup(self, key: str) -> typing.Optional[models.ApiKey]:
+        """Find active API key.
+
+        Returns:
+            API key or None if ``key`` is unknown.
+        """
+
+        return self._keys.get(hash_api_key(key))
+
+    async def authorize(
+        self,
+        key: str,
+        scope: models.RateLimitScope,
+    ) -> models.ApiKey:
+        """Verify API key and take a token from its bucket of ``scope``.
+
+        Raises:
+            InvalidCredentials: If ``key`` is unknown.
+            RateLimitExceeded: If budget of ``scope`` is exhausted.
+
+        Returns:
+            API key of request.
+        """
+
+        found = self.lookup(key)
+        if found is None:
+            raise InvalidCredentials
+        if not self.enabled:
+            return found
+
+        rate, burst = self.limits(found, scope)
+        decision = await self.rate_limiter.acquire(
+            f"{found.id}:{scope.value}",
+            rate=rate,
+            burst=burst,
+        )
+        if not decision.allowed:
+            raise RateLimitExceeded(decision.retry_after)
+        return found
+
+    def limits(
+        self,
+        key: models.ApiKey,
+        scope: models.RateLimitScope,
+    ) -> typing.Tuple[float, int]:
+        """Get rate and burst of ``key`` in ``scope``."""
+
+        rate, burst = self.defaults[scope]
+        if scope == models.RateLimitScope.READ:
+            return key.read_rate or rate, key.read_burst or burst
+        return key.expensive_rate or rate, key.expensive_burst or burst
+
+    async def __refresh_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            await self.load()
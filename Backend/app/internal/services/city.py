@@ -4,22 +4,55 @@
 import typing
 
 from app.internal.repository.postgresql import city
+from app.internal.repository.postgresql.bulk import Commands
+from app.internal.repository.postgresql.unit_of_work import unit_of_work
 from app.internal.repository.repository import BaseRepository
 from app.pkg import models
+from app.pkg.cache import BaseCache, CacheStats
+from app.pkg.connectors.postgresql.replicas import RecentWrites
 from app.pkg.models.exceptions.city import CityNotFound, NoCityFoundForCountry
 from app.pkg.models.exceptions.repository import EmptyResult
+from app.pkg.utils.cursor import encode_cursor
 
 __all__ = ["CityService"]
 
 
+#: str: Prefix of cache keys of single cities.
+CITY_KEY = "city:"
+#: str: Prefix of cache keys of pages of cities.
+PAGE_KEY = "cities:"
+
+
 class CityService:
-    """Service for manage cities."""
+    """Service for manage cities.
+
+    Notes:
+        Cities and pages of cities are cached by ``cache``. Any write drops
+        the written cities and all cached pages, because a page contains
+        neighbours of the written city. Updated and upserted cities are
+        written through to the cache. Reads after a write go to the primary
+        for a while by ``recent_writes``, so a lagging replica does not put
+        old rows back into the cache.
+    """
 
     #: CityRepository: CityRepository repository implementation.
     repository: city.CityRepository
 
-    def __init__(self, city_repository: BaseRepository):
+    #: BaseCache: Cache of cities and pages of cities.
+    cache: BaseCache
+
+    #: RecentWrites: Route of reads after writes of cities.
+    recent_writes: RecentWrites
+
+    def __init__(
+        self,
+        city_repository: BaseRepository,
+        cache: BaseCache,
+        recent_writes: RecentWrites,
+    ):
         self.repository = city_repository
+        self.cache = cache
+        self.recent_writes = recent_writes
 
     async def create_city(self, cmd: models.CreateCityCommand) -> models.City:
         """Create city.
@@ -30,7 +63,51 @@ class CityService:
         Returns:
             City: Created city.
         """
-        return await self.repository.create(cmd=cmd)
+        created = await self.repository.create(cmd=cmd)
+        await self.__invalidate()
+        return created
+
+    async def create_cities(
+        self,
+        cmds: Commands[models.CreateCityCommand],
+    ) -> typing.List[models.City]:
+        """Create many cities. Cities with existing name or code are skipped.
+
+        Args:
+            cmds: Iterable or async iterable of CreateCityCommand commands.
+
+        Returns:
+            List[City]: Created cities.
+        """
+        try:
+            created = await self.repository.create_many(cmds=cmds)
+        except EmptyResult:
+            return []
+        await self.__invalidate()
+        return created
+
+    async def upsert_cities(
+        self,
+        cmds: Commands[models.CreateCityCommand],
+    ) -> typing.List[models.City]:
+        """Create many cities or update existing cities with the same code.
+
+        Notes:
+            The last command of a code wins. Commands with a name of a city
+            with another code are skipped.
+
+        Args:
+            cmds: Iterable or async iterable of CreateCityCommand commands.
+
+        Returns:
+            List[City]: Created or updated cities.
+        """
+        try:
+            upserted = await self.repository.upsert_many(cmds=cmds)
+        except EmptyResult:
+            return []
+        await self.__write_through(*upserted)
+        return upserted
 
     async def read_city(self, query: models.ReadCityQuery) -> models.City:
         """Read city.
@@ -41,55 +118,179 @@ class CityService:
         Returns:
             City: Read city.
         """
+        key = f"{CITY_KEY}{query.id}"
+        if (cached := await self.cache.get(key)) is not None:
+            return cached
+
         try:
-            return await self.repository.read(query=query)
+            result = await self.repository.read(
+                query=query,
+                route=self.recent_writes.route,
+            )
         except EmptyResult as e:
             raise CityNotFound from e
+        await self.cache.set(key, result)
+        return result
 
     async def read_cities_by_country(
         self,
         query: models.ReadCityByCountryQuery,
-    ) -> typing.List[models.City]:
-        """Read cities by country.
+    ) -> models.CityPage:
+        """Read page of cities by country.
 
         Args:
             query: ReadCityByCountryQuery query.
 
+        Raises:
+            NoCityFoundForCountry: When the first page is empty.
+
         Returns:
-            List[City]: Read cities by country.
+            CityPage: Page of cities by country.
         """
+        key = f"{PAGE_KEY}country:{query.country_id}:{query.after_id}:{query.limit}"
+        if (cached := await self.cache.get(key)) is not None:
+            return cached
+
         try:
-            return await self.repository.read_by_country(query=query)
+            cities = await self.repository.read_by_country(
+                query=query,
+                route=self.recent_writes.route,
+            )
         except EmptyResult as e:
-            raise NoCityFoundForCountry from e
+            if not query.after_id:
+                raise NoCityFoundForCountry from e
+            cities = []
+        page = self.__build_page(cities, query.limit)
+        await self.cache.set(key, page)
+        return page
 
-    async def read_all_cities(self) -> typing.List[models.City]:
-        """Read all cities.
+    async def read_all_cities(
+        self,
+        query: models.ReadAllCitiesQuery,
+    ) -> models.CityPage:
+        """Read page of all cities.
+
+        Args:
+            query: ReadAllCitiesQuery query.
+
+        Raises:
+            CityNotFound: When the first page is empty.
 
         Returns:
-            List[City]: Read all cities.
+            CityPage: Page of all cities.
         """
+        key = f"{PAGE_KEY}all:{query.after_id}:{query.limit}"
+        if (cached := await self.cache.get(key)) is not None:
+            return cached
+
         try:
-            return await self.repository.read_all()
+            cities = await self.repository.read_all(
+                query=query,
+                route=self.recent_writes.route,
+            )
         except EmptyResult as e:
-            raise CityNotFound from e
+            if not query.after_id:
+                raise CityNotFound from e
+            cities = []
+        page = self.__build_page(cities, query.limit)
+        await self.cache.set(key, page)
+        return page
+
+    @staticmethod
+    def __build_page(cities: typing.List[models.City], limit: int) -> models.CityPage:
+        """Build page with cursor of the next page.
+
+        Notes:
+            Cursor is returned when the page is full, so the last page of a
+            table with ``n * limit`` rows is empty.
+        """
+        next_cursor = encode_cursor(id=cities[-1].id) if len(cities) == limit else None
+        return models.CityPage(items=cities, next_cursor=next_cursor)
+
+    def cache_stats(self) -> CacheStats:
+        """Get hit, miss and eviction counters of cache of cities.
+
+        Returns:
+            CacheStats: Counters of cache.
+        """
+        return self.cache.stats()
+
+    async def __invalidate(self, *cities: models.City) -> None:
+        """Drop cached ``cities`` and all cached pages of cities."""
+        self.recent_writes.mark()
+        await self.cache.delete(*(f"{CITY_KEY}{c.id}" for c in cities))
+        await self.cache.delete_prefix(PAGE_KEY)
+
+    async def __write_through(self, *cities: models.City) -> None:
+        """Cache written ``cities`` and drop all cached pages of cities."""
+        await self.__invalidate()
+        for c in cities:
+            await self.cache.set(f"{CITY_KEY}{c.id}", c)
+
+    def stream_all_cities(
+        self,
+        batch_size: int = 500,
+    ) -> typing.AsyncIterator[models.City]:
+        """Read all cities as a stream.
+
+        Args:
+            batch_size: Count of cities fetched from database in one round-trip.
+
+        Returns:
+            AsyncIterator[City]: Stream of all cities.
+        """
+        return self.repository.stream_all(
+            batch_size=batch_size,
+            route=self.recent_writes.route,
+        )
 
     async def update_city(self, cmd: models.UpdateCityCommand) -> models.City:
         """Update city.
 
+        Notes:
+            City is read and updated in one transaction on the primary.
+
         Args:
             cmd: UpdateCityCommand command.
 
+        Raises:
+            CityNotFound: When city does not exist.
+
         Returns:
             City: Updated city.
         """
 
-        return await self.repository.update(cmd=cmd)
+        async with unit_of_work():
+            await self.__read_for_write(cmd.id)
+            updated = await self.repository.update(cmd=cmd)
+        await self.__write_through(updated)
+        return updated
 
     async def delete_city(self, cmd: models.DeleteCityCommand) -> models.City:
         """Delete city.
 
+        Notes:
+            City is read and deleted in one transaction on the primary.
+
         Args:
             cmd: DeleteCityCommand command.
+
+        Raises:
+            CityNotFound: When city does not exist.
+        """
+        async with unit_of_work():
+            await self.__read_for_write(cmd.id)
+            deleted = await self.repository.delete(cmd=cmd)
+        await self.__invalidate(deleted)
+        return deleted
+
+    async def __read_for_write(self, city_id: int) -> models.City:
+        """Read city inside unit of work of a write.
+
+        Raises:
+            CityNotFound: When city does not exist.
         """
-        return await self.repository.delete(cmd=cmd)
+        try:
+            return await self.repository.read(query=models.ReadCityQuery(id=city_id))
+        except EmptyResult as e:
+            raise CityNotFound from e
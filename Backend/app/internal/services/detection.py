@@ -0,0 +1,566 @@
+"""Service for detect ships on images."""
+
+import asyncio
+import hashlib
+import json
+import pathlib
+import time
+import typing
+from concurrent.futures import ThreadPoolExecutor
+
+import asyncpg
+import numpy as np
+import psycopg2
+
+from app.internal.repository.postgresql import detection_result
+from app.internal.repository.repository import BaseRepository
+from app.pkg import models
+from app.pkg.cache import BaseCache, CacheStats
+from app.pkg.detection import (
+    Detections,
+    ImageSource,
+    MicroBatcher,
+    OnnxDetector,
+    TiledDetector,
+    open_image,
+    xywhr_to_corners,
+)
+from app.pkg.logger import get_logger
+from app.pkg.metrics import (
+    DETECTION_BATCH_OCCUPANCY,
+    DETECTION_BATCH_SIZE,
+    DETECTION_CACHE_LOOKUPS,
+    DETECTION_PENDING,
+    DETECTION_STAGE_DURATION,
+    DETECTION_TILES,
+)
+from app.pkg.metrics.app import APP_NAME
+from app.pkg.models.base import BaseAPIException
+from app.pkg.models.exceptions.detection import (
+    DetectionOverloaded,
+    DetectorUnavailable,
+    InvalidImage,
+)
+from app.pkg.models.exceptions.repository import EmptyResult
+
+__all__ = ["DetectionService"]
+
+logger = get_logger(__name__)
+
+#: Decoded image, its min confidence and time of submission to batcher.
+_BatchItem = typing.Tuple[np.ndarray, typing.Optional[float], float]
+
+#: Tuple[Type[Exception], ...]: Errors of table of cached results, after
+#  which the image is detected as if it was not cached.
+_CACHE_ERRORS = (
+    OSError,
+    asyncio.TimeoutError,
+    psycopg2.Error,
+    asyncpg.PostgresError,
+    BaseAPIException,
+)
+
+
+class DetectionService:
+    """Service for detect ships on images.
+
+    Notes:
+        Model is loaded and warmed up once per process by :meth:`.start`, so
+        the first request does not pay for creation of session. If the model
+        can not be loaded, the server still starts and detection is answered
+        with 503.
+
+        Images with a side longer than ``tile_above`` are detected by tiles
+        of input size of model, so small ships of large scenes are not lost
+        by downscaling. Flat tiles of water or clouds are skipped by
+        :class:`.TileFilter` of ``tiled_detector``. Tiles are read by
+        :func:`.open_image`: a tiled GeoTIFF is read tile by tile from its
+        file and other images with more than ``raster_above`` pixels are
+        decoded to a memory mapped file of ``spool_dir``, so a scene does not
+        have to fit in memory.
+
+        Other images are run by :class:`.MicroBatcher`: concurrent requests
+        are collected for up to ``batch_window_ms`` or until ``batch_size``
+        images and run as one batch, which uses cores much better than runs
+        of single images. A request of an idle server waits for a batch no
+        longer than ``latency_slo_ms`` allows.
+
+        Decoding and inference run in a pool of threads, because ONNX Runtime
+        and Pillow release GIL and the event loop stays free. Count of images
+        being detected or waiting is limited by ``max_queue``, above the
+        limit :class:`.DetectionOverloaded` is raised immediately.
+
+        If ``detection_result_repository`` is set, results are cached by
+        SHA-256 of encoded image, version of model, fingerprint of settings
+        which change results (see :meth:`.settings_fingerprint`), ``imgsz``
+        and ``conf``, so an image uploaded again is not detected again. ``result_cache``
+        keeps recent results in memory of the process in front of the table.
+        Cached results are answered even when the queue is full. Errors of
+        the table are logged and the image is detected as usual.
+
+    Attributes:
+        detector: Model of this process.
+        tiled_detector: Detector of large images by tiles.
+        tile_above: Images with a side longer than this are tiled.
+        max_pixels: Max ``width * height`` of image.
+        raster_above: Images with more pixels are decoded to a file.
+        spool_dir: Directory of decoded files. System default if not set.
+        tile_cache_bytes: Max bytes of decompressed blocks of a TIFF scene
+            kept in memory.
+        workers: Count of batches run at once.
+        max_queue: Max count of images being detected or waiting.
+        warmup_runs: Count of inferences on blank input run by :meth:`.start`.
+        batch_size: Max count of images in one batch.
+        batch_window_ms: Max milliseconds the first image of a batch waits
+            for others.
+        latency_slo_ms: Target latency of a lone request in milliseconds.
+        results: Repository of cached results. Results are not cached if
+            not set.
+        result_cache: In-process cache of results in front of ``results``.
+    """
+
+    detector: OnnxDetector
+    tiled_detector: TiledDetector
+    tile_above: int
+    max_pixels: int
+    raster_above: int
+    spool_dir: typing.Optional[pathlib.Path]
+    tile_cache_bytes: int
+    workers: int
+    max_queue: int
+    warmup_runs: int
+    batch_size: int
+    batch_window_ms: int
+    latency_slo_ms: int
+    results: typing.Optional[detection_result.DetectionResultRepository]
+    result_cache: typing.Optional[BaseCache]
+
+    def __init__(
+        self,
+        detector: OnnxDetector,
+        tiled_detector: TiledDetector,
+        tile_above: int = 960,
+        max_pixels: int = 25_000 * 25_000,
+        raster_above: int = 8192 * 8192,
+        spool_dir: typing.Optional[pathlib.Path] = None,
+        tile_cache_bytes: int = 256 * 1024 * 1024,
+        workers: int = 1,
+        max_queue: int = 16,
+        warmup_runs: int = 2,
+        batch_size: int = 8,
+        batch_window_ms: int = 10,
+        latency_slo_ms: int = 1000,
+        detection_result_repository: typing.Optional[BaseRepository] = None,
+        result_cache: typing.Optional[BaseCache] = None,
+    ):
+        self.detector = detector
+        self.tiled_detector = tiled_detector
+        self.tile_above = tile_above
+        self.max_pixels = max_pixels
+        self.raster_above = raster_above
+        self.spool_dir = spool_dir
+        self.tile_cache_bytes = tile_cache_bytes
+        self.workers = workers
+        self.max_queue = max_queue
+        self.warmup_runs = warmup_runs
+        self.batch_size = batch_size
+        self.batch_window_ms = batch_window_ms
+        self.latency_slo_ms = latency_slo_ms
+        self.results = detection_result_repository
+        self.result_cache = result_cache
+        self._executor: typing.Optional[ThreadPoolExecutor] = None
+        self._batcher = MicroBatcher(
+            self.__detect_batch,
+            max_batch=batch_size,
+            window=batch_window_ms / 1000,
+            latency_slo=latency_slo_ms / 1000,
+            concurrency=workers,
+        )
+        self._pending = 0
+        self._stages = {
+            stage: DETECTION_STAGE_DURATION.labels(app_name=APP_NAME, stage=stage)
+            for stage in (
+                "decode",
+                "queue",
+                "read",
+                "filter",
+                "preprocess",
+                "inference",
+                "postprocess",
+                "merge",
+            )
+        }
+        self._tiles = {
+            result: DETECTION_TILES.labels(app_name=APP_NAME, result=result)
+            for result in ("processed", "skipped")
+        }
+        self._lookups = {
+            result: DETECTION_CACHE_LOOKUPS.labels(app_name=APP_NAME, result=result)
+            for result in ("memory", "database", "miss")
+        }
+
+    @property
+    def available(self) -> bool:
+        """Whether model is loaded."""
+
+        return self.detector.loaded
+
+    async def start(self) -> None:
+        """Load model and warm it up."""
+
+        started = time.perf_counter()
+        try:
+            await self.__run(self.__load)
+        except (OSError, RuntimeError) as error:
+            logger.error("Detection model is not loaded: %s", error)
+            return
+        logger.info(
+            "Detection model %s (%s) is loaded in %.1f s",
+            self.detector.model_path,
+            self.detector.version,
+            time.perf_counter() - started,
+        )
+
+    async def stop(self) -> None:
+        """Wait for running detections and release model."""
+
+        await self._batcher.close()
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            await asyncio.get_running_loop().run_in_executor(None, executor.shutdown)
+        self.tiled_detector.close()
+        self.detector.close()
+
+    async def detect(
+        self,
+        image: typing.Union[bytes, typing.BinaryIO],
+        conf: typing.Optional[float] = None,
+        progress: typing.Optional[typing.Callable[[int, int], None]] = None,
+        digest: typing.Optional[bytes] = None,
+    ) -> models.DetectionResponse:
+        """Find ships on image.
+
+        Args:
+            image: Encoded image, e.g. JPEG or PNG, or a binary file of it
+                positioned at the start of image, e.g. spooled upload.
+            conf: Min confidence of boxes. Default of model if not set.
+            progress: Called with counts of detected and all tiles of a
+                large image, see :meth:`.TiledDetector.detect`. Not called
+                for images detected at once.
+            digest: SHA-256 of ``image``, e.g. computed while it was
+                received. Computed here if not set and results are cached.
+
+        Raises:
+            DetectorUnavailable: If model is not loaded.
+            DetectionOverloaded: If ``max_queue`` images are already pending.
+            InvalidImage: If ``image`` can not be decoded or it is larger
+                than ``max_pixels``.
+
+        Returns:
+            Found ships in pixels of ``image``.
+        """
+
+        if not self.available:
+            raise DetectorUnavailable
+        if self.results is None:
+            return await self.__detect(image, conf, progress)
+
+        if digest is None:
+            digest = await self.__run(_sha256, image)
+        key = models.DetectionResultKey(
+            image_sha256=digest,
+            model_version=self.detector.version,
+            settings_fingerprint=self.settings_fingerprint(),
+            imgsz=self.detector.imgsz,
+            conf=self.detector.conf if conf is None else conf,
+        )
+        if (cached := await self.__read_result(key)) is not None:
+            return cached
+
+        response = await self.__detect(image, conf, progress)
+        await self.__save_result(key, response)
+        return response
+
+    def settings_fingerprint(self) -> str:
+        """Fingerprint of settings of detection which change results.
+
+        Notes:
+            Covers NMS of the model, tiling, merge of tiles and the screen of
+            tiles. Settings of batching, threads and memory give the same
+            boxes and are not included.
+
+        Returns:
+            First 12 hex chars of SHA-256 of the settings.
+        """
+
+        tiled, tile_filter = self.tiled_detector, self.tiled_detector.tile_filter
+        effective = {
+            "iou": self.detector.iou,
+            "max_det": self.detector.max_det,
+            "tile_above": self.tile_above,
+            "tile": tiled.tile,
+            "overlap": tiled.overlap,
+            "merge_threshold": tiled.merge_threshold,
+            "tile_filter": None if tile_filter is None else {
+                "step": tile_filter.step,
+                "min_std": tile_filter.min_std,
+                "edge_threshold": tile_filter.edge_threshold,
+                "min_edge_density": tile_filter.min_edge_density,
+                "max_land_share": tile_filter.max_land_share,
+            },
+        }
+        encoded = json.dumps(effective, sort_keys=True).encode()
+        return hashlib.sha256(encoded).hexdigest()[:12]
+
+    async def purge_results(
+        self,
+        cmd: models.PurgeDetectionResultsCommand,
+    ) -> models.PurgeDetectionResultsResponse:
+        """Delete cached results of a model version.
+
+        Notes:
+            Only in-process cache of this process is cleared. Other
+            processes keep results in memory until TTL of their cache.
+
+        Args:
+            cmd: Version of model.
+
+        Returns:
+            Count of deleted results of the table.
+        """
+
+        if self.result_cache is not None:
+            await self.result_cache.delete_prefix(f"{cmd.model_version}:")
+        if self.results is None:
+            return models.PurgeDetectionResultsResponse(
+                model_version=cmd.model_version,
+                deleted=0,
+            )
+        return await self.results.delete_by_model_version(cmd=cmd)
+
+    def result_cache_stats(self) -> CacheStats:
+        """Get hit, miss and eviction counters of in-process cache of results.
+
+        Returns:
+            CacheStats: Counters of cache. Zeros if there is no cache.
+        """
+
+        if self.result_cache is None:
+            return CacheStats()
+        return self.result_cache.stats()
+
+    async def __detect(
+        self,
+        image: typing.Union[bytes, typing.BinaryIO],
+        conf: typing.Optional[float],
+        progress: typing.Optional[typing.Callable[[int, int], None]],
+    ) -> models.DetectionResponse:
+        if self._pending >= self.max_queue:
+            raise DetectionOverloaded
+
+        started = time.perf_counter()
+        self._pending += 1
+        DETECTION_PENDING.inc()
+        try:
+            try:
+                source, decode_time = await self.__run(self.__decode, image)
+            except ValueError as error:
+                raise InvalidImage from error
+
+            try:
+                detections = await self.__detect_source(
+                    source,
+                    conf,
+                    progress,
+                    started,
+                )
+            finally:
+                source.close()
+        finally:
+            self._pending -= 1
+            DETECTION_PENDING.dec()
+
+        detections.timings["decode"] = decode_time
+        for stage, seconds in detections.timings.items():
+            self._stages[stage].observe(seconds)
+        return self.__to_response(source.width, source.height, detections)
+
+    async def __detect_source(
+        self,
+        source: ImageSource,
+        conf: typing.Optional[float],
+        progress: typing.Optional[typing.Callable[[int, int], None]],
+        started: float,
+    ) -> Detections:
+        try:
+            if max(source.width, source.height) > self.tile_above:
+                detections = await self.__run(
+                    self.tiled_detector.detect,
+                    source,
+                    conf,
+                    progress,
+                )
+                self._tiles["processed"].inc(
+                    detections.tiles - detections.skipped_tiles,
+                )
+                self._tiles["skipped"].inc(detections.skipped_tiles)
+                return detections
+            decoded = await self.__run(
+                source.read_window,
+                0,
+                0,
+                source.width,
+                source.height,
+            )
+        except ValueError as error:
+            # Blocks of a TIFF are decompressed only when tiles are read.
+            raise InvalidImage from error
+        return await self._batcher.submit(
+            (decoded, conf, time.perf_counter()),
+            started=started,
+        )
+
+    async def __read_result(
+        self,
+        key: models.DetectionResultKey,
+    ) -> typing.Optional[models.DetectionResponse]:
+        if self.result_cache is not None:
+            if (cached := await self.result_cache.get(key.cache_key())) is not None:
+                self._lookups["memory"].inc()
+                return cached
+
+        try:
+            stored = await self.results.read(query=key)
+        except EmptyResult:
+            self._lookups["miss"].inc()
+            return None
+        except _CACHE_ERRORS as error:
+            logger.warning("Cached detection result is not read: %s", error)
+            self._lookups["miss"].inc()
+            return None
+
+        self._lookups["database"].inc()
+        if self.result_cache is not None:
+            await self.result_cache.set(key.cache_key(), stored.result)
+        return stored.result
+
+    async def __save_result(
+        self,
+        key: models.DetectionResultKey,
+        response: models.DetectionResponse,
+    ) -> None:
+        if self.result_cache is not None:
+            await self.result_cache.set(key.cache_key(), response)
+        try:
+            await self.results.create(
+                cmd=models.CreateDetectionResultCommand(
+                    **key.model_dump(),
+                    result=response,
+                ),
+            )
+        except _CACHE_ERRORS as error:
+            logger.warning("Detection result is not cached: %s", error)
+
+    def __load(self) -> None:
+        self.detector.load()
+        started = time.perf_counter()
+        self.detector.warmup(self.warmup_runs)
+        if self.warmup_runs:
+            self._batcher.observe_lone_latency(
+                (time.perf_counter() - started) / self.warmup_runs,
+            )
+
+    def __decode(
+        self,
+        image: typing.Union[bytes, typing.BinaryIO],
+    ) -> typing.Tuple[ImageSource, float]:
+        started = time.perf_counter()
+        source = open_image(
+            image,
+            max_pixels=self.max_pixels,
+            raster_above=self.raster_above,
+            directory=self.spool_dir,
+            cache_bytes=self.tile_cache_bytes,
+        )
+        return source, time.perf_counter() - started
+
+    async def __detect_batch(
+        self,
+        items: typing.List[_BatchItem],
+    ) -> typing.List[Detections]:
+        started = time.perf_counter()
+        images, confs, submitted = zip(*items)
+        DETECTION_BATCH_SIZE.observe(len(items))
+        DETECTION_BATCH_OCCUPANCY.observe(len(items) / self.batch_size)
+
+        batch = await self.__run(self.detector.detect_batch, images, confs)
+        for detections, enqueued in zip(batch, submitted):
+            detections.timings["queue"] = started - enqueued
+        return batch
+
+    async def __run(self, fn, *args):
+        if self._executor is None:
+            # Threads for decoding besides threads running batches.
+            self._executor = ThreadPoolExecutor(
+                max_workers=2 * self.workers,
+                thread_name_prefix="detection",
+            )
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor,
+            fn,
+            *args,
+        )
+
+    def __to_response(
+        self,
+        width: int,
+        height: int,
+        detections: Detections,
+    ) -> models.DetectionResponse:
+        names = self.detector.names
+        polygons = xywhr_to_corners(detections.boxes).round(1).tolist()
+        return models.DetectionResponse(
+            width=width,
+            height=height,
+            model_version=self.detector.version,
+            detections=[
+                models.Detection(
+                    class_id=class_id,
+                    class_name=names[class_id] if class_id < len(names) else "",
+                    score=round(score, 4),
+                    box=models.OrientedBox(
+                        cx=round(cx, 1),
+                        cy=round(cy, 1),
+                        width=round(w, 1),
+                        height=round(h, 1),
+                        angle=round(angle, 4),
+                    ),
+                    polygon=polygon,
+                )
+                for (cx, cy, w, h, angle), score, class_id, polygon in zip(
+                    detections.boxes.tolist(),
+                    detections.scores.tolist(),
+                    detections.class_ids.tolist(),
+                    polygons,
+                )
+            ],
+        )
+
+
+#: int: Size of blocks of a file read to hash it.
+_HASH_BLOCK = 1024 * 1024
+
+
+def _sha256(image: typing.Union[bytes, typing.BinaryIO]) -> bytes:
+    """Hash encoded image. A file is read from its current position, which is
+    restored afterwards."""
+
+    if isinstance(image, bytes):
+        return hashlib.sha256(image).digest()
+
+    digest = hashlib.sha256()
+    start = image.tell()
+    while block := image.read(_HASH_BLOCK):
+        digest.update(block)
+    image.seek(start)
+    return digest.digest()
@@ -0,0 +1,124 @@
+"""Service for asynchronous detection jobs."""
+
+import asyncio
+import time
+import typing
+
+from app.internal.pkg.storage import FileStorage
+from app.internal.repository.postgresql import detection_job
+from app.internal.repository.repository import BaseRepository
+from app.pkg import models
+from app.pkg.models.exceptions.detection import DetectionJobNotFound
+from app.pkg.models.exceptions.repository import EmptyResult
+
+__all__ = ["DetectionJobService"]
+
+#: FrozenSet[str]: Statuses after which a job does not change.
+FINISHED = frozenset(
+    (models.DetectionJobStatus.SUCCEEDED, models.DetectionJobStatus.FAILED),
+)
+
+
+class DetectionJobService:
+    """Service for asynchronous detection jobs.
+
+    Notes:
+        The API server only queues jobs and reads them. Jobs are run by
+        :class:`.DetectionWorker` of ``scripts.detection_worker`` processes,
+        so a scene which takes minutes does not hold a connection of client
+        or a thread of the server.
+
+        ID of a job is a random UUID and it is the only way to read the job,
+        so any holder of a valid API key can read only jobs it knows.
+
+        Uploaded images are copied to ``storage``, which workers read, and a
+        job keeps only the name of its image.
+
+    Attributes:
+        repository: Repository of detection jobs.
+        storage: Uploaded images of jobs.
+        max_wait: Max seconds of long polling of a job.
+        poll_interval_ms: Milliseconds between reads of a job by long polling.
+    """
+
+    repository: detection_job.DetectionJobRepository
+    storage: FileStorage
+    max_wait: int
+    poll_interval_ms: int
+
+    def __init__(
+        self,
+        detection_job_repository: BaseRepository,
+        storage: FileStorage,
+        max_wait: int = 30,
+        poll_interval_ms: int = 500,
+    ):
+        self.repository = detection_job_repository
+        self.storage = storage
+        self.max_wait = max_wait
+        self.poll_interval_ms = poll_interval_ms
+
+    async def create_job(
+        self,
+        image: typing.BinaryIO,
+        digest: bytes,
+        conf: typing.Optional[float] = None,
+    ) -> models.CreateDetectionJobResponse:
+        """Queue detection of image.
+
+        Notes:
+            The image is deleted from storage if the job is not saved.
+
+        Args:
+            image: Binary file of encoded image positioned at its start, e.g.
+                spooled upload.
+            digest: SHA-256 of ``image``.
+            conf: Min confidence of boxes. Default of server if not set.
+
+        Returns:
+            ID of queued job.
+        """
+
+        image_path = await self.storage.save(image)
+        try:
+            return await self.repository.create(
+                cmd=models.CreateDetectionJobCommand(
+                    image_path=image_path,
+                    image_sha256=digest,
+                    conf=conf,
+                ),
+            )
+        except BaseException:
+            await asyncio.shield(self.storage.delete(image_path))
+            raise
+
+    async def read_job(
+        self,
+        query: models.ReadDetectionJobQuery,
+        wait: float = 0,
+    ) -> models.DetectionJob:
+        """Read job, optionally waiting until it is finished.
+
+        Args:
+            query: ID of job.
+            wait: Max seconds to wait for the job to finish. Capped by
+                ``max_wait``. The job is returned as is if 0.
+
+        Raises:
+            DetectionJobNotFound: If there is no job with this ID.
+
+        Returns:
+            Job. It is not finished if ``wait`` is over first.
+        """
+
+        deadline = time.monotonic() + min(wait, self.max_wait)
+        while True:
+            try:
+                job = await self.repository.read(query=query)
+            except EmptyResult as e:
+                raise DetectionJobNotFound from e
+
+            left = deadline - time.monotonic()
+            if job.status in FINISHED or left <= 0:
+                return job
+            await asyncio.sleep(min(self.poll_interval_ms / 1000, left))
@@ -0,0 +1,345 @@
+"""Worker running asynchronous detection jobs."""
+
+import asyncio
+import contextlib
+import os
+import socket
+import time
+import typing
+
+import asyncpg
+import psycopg2
+
+from app.internal.pkg.storage import FileStorage
+from app.internal.repository.postgresql import detection_job
+from app.internal.repository.repository import BaseRepository
+from app.internal.services.detection import DetectionService
+from app.pkg import models
+from app.pkg.logger import get_logger
+from app.pkg.models.base import BaseAPIException
+from app.pkg.models.exceptions.detection import DetectorUnavailable, InvalidImage
+from app.pkg.models.exceptions.repository import EmptyResult
+
+__all__ = ["DetectionWorker"]
+
+logger = get_logger(__name__)
+
+#: Tuple[Type[Exception], ...]: Errors of database after which a worker keeps
+#  running and tries again later.
+_DATABASE_ERRORS = (
+    OSError,
+    asyncio.TimeoutError,
+    psycopg2.Error,
+    asyncpg.PostgresError,
+    BaseAPIException,
+)
+
+
+class _Progress:
+    """Share of detected tiles of a running job.
+
+    Notes:
+        Called from threads of :class:`.TiledDetector`, read by heartbeat of
+        the job on the event loop. Assignment of a float is atomic.
+    """
+
+    value: float
+
+    def __init__(self):
+        self.value = 0.0
+
+    def __call__(self, done: int, total: int) -> None:
+        self.value = done / total
+
+
+class DetectionWorker:
+    """Worker running asynchronous detection jobs.
+
+    Notes:
+        ``concurrency`` consumers claim queued jobs one by one and run them by
+        :class:`.DetectionService` of this process, so small images of
+        concurrent jobs share batches like concurrent requests of the API
+        do. An idle consumer checks queue every ``poll_interval_ms``.
+
+        Progress of a running job is saved every ``heartbeat_interval``
+        seconds, which also proves the worker is alive. Every worker queues
+        again jobs without heartbeat for ``stale_after`` seconds, e.g. of a
+        killed worker, and deletes jobs finished ``retention`` seconds ago.
+
+        Images which can not be decoded or are missing in ``storage`` fail at
+        once. Other errors queue the job again until it was run
+        ``max_attempts`` times. The image of a job is read from ``storage``
+        as a file, so a large TIFF is memory mapped instead of read, and it
+        is deleted when the job is finished.
+
+    Attributes:
+        detection_service: Detection of this process.
+        repository: Repository of detection jobs.
+        storage: Uploaded images of jobs.
+        name: Name of worker saved to claimed jobs.
+        concurrency: Count of jobs run at once. Must not exceed
+            ``max_queue`` of ``detection_service``.
+        poll_interval_ms: Milliseconds between checks of an empty queue.
+        heartbeat_interval: Seconds between saves of progress.
+        stale_after: Seconds without heartbeat after which a running job is
+            queued again.
+        max_attempts: Count of runs after which a job is not retried.
+        retention: Seconds finished jobs are kept.
+
+    Examples:
+        ::
+
+            >>> stop = asyncio.Event()
+            >>> asyncio.get_running_loop().add_signal_handler(
+            ...     signal.SIGTERM, stop.set,
+            ... )
+            >>> await worker.run(stop)
+    """
+
+    detection_service: DetectionService
+    repository: detection_job.DetectionJobRepository
+    storage: FileStorage
+    name: str
+    concurrency: int
+    poll_interval_ms: int
+    heartbeat_interval: float
+    stale_after: int
+    max_attempts: int
+    retention: int
+
+    def __init__(
+        self,
+        detection_service: DetectionService,
+        detection_job_repository: BaseRepository,
+        storage: FileStorage,
+        name: typing.Optional[str] = None,
+        concurrency: int = 1,
+        poll_interval_ms: int = 500,
+        heartbeat_interval: float = 10,
+        stale_after: int = 120,
+        max_attempts: int = 3,
+        retention: int = 7 * 24 * 60 * 60,
+    ):
+        self.detection_service = detection_service
+        self.repository = detection_job_repository
+        self.storage = storage
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.concurrency = concurrency
+        self.poll_interval_ms = poll_interval_ms
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        self.max_attempts = max_attempts
+        self.retention = retention
+
+    async def run(self, stop: asyncio.Event) -> None:
+        """Run jobs until ``stop`` is set. Running jobs are finished first.
+
+        Raises:
+            DetectorUnavailable: If model can not be loaded.
+        """
+
+        await self.detection_service.start()
+        try:
+            if not self.detection_service.available:
+                raise DetectorUnavailable
+            logger.info(
+                "Detection worker %s is started with %s consumers",
+                self.name,
+                self.concurrency,
+            )
+            await asyncio.gather(
+                self.__maintain(stop),
+                *(self.__consume(stop) for _ in range(self.concurrency)),
+            )
+        finally:
+            await self.detection_service.stop()
+        logger.info("Detection worker %s is stopped", self.name)
+
+    async def __consume(self, stop: asyncio.Event) -> None:
+        cmd = models.ClaimDetectionJobCommand(worker=self.name)
+        while not stop.is_set():
+            try:
+                job = await self.repository.claim(cmd=cmd)
+            except EmptyResult:
+                await _wait(stop, self.poll_interval_ms / 1000)
+                continue
+            except _DATABASE_ERRORS as error:
+                logger.warning("Detection job is not claimed: %s", error)
+                await _wait(stop, self.poll_interval_ms / 1000)
+                continue
+            await self.__process(job)
+
+    async def __process(self, job: models.DetectionJobInput) -> None:
+        """Run claimed job and save its result.
+
+        Notes:
+            If the consumer is cancelled or interrupted while the job runs,
+            the job is queued again right away instead of waiting until it
+            becomes stale, and the exception is re-raised.
+        """
+
+        logger.info("Detection job %s is started, attempt %s", job.id, job.attempts)
+        started = time.perf_counter()
+        progress = _Progress()
+        heartbeat = asyncio.create_task(self.__heartbeat(job, progress))
+        retry = False
+        try:
+            try:
+                with self.storage.open(job.image_path) as image:
+                    response = await self.detection_service.detect(
+                        image,
+                        conf=job.conf,
+                        progress=progress,
+                        digest=job.image_sha256,
+                    )
+            finally:
+                heartbeat.cancel()
+        except InvalidImage as error:
+            finish = self.repository.fail(
+                cmd=models.FailDetectionJobCommand(
+                    id=job.id,
+                    attempts=job.attempts,
+                    error=error.message,
+                    retry=False,
+                ),
+            )
+        except FileNotFoundError:
+            logger.error("Image of detection job %s is not found", job.id)
+            finish = self.repository.fail(
+                cmd=models.FailDetectionJobCommand(
+                    id=job.id,
+                    attempts=job.attempts,
+                    error="Image of job is not found.",
+                    retry=False,
+                ),
+            )
+        except Exception as error:
+            logger.exception("Detection job %s is failed", job.id)
+            retry = job.attempts < self.max_attempts
+            finish = self.repository.fail(
+                cmd=models.FailDetectionJobCommand(
+                    id=job.id,
+                    attempts=job.attempts,
+                    error=str(error) or type(error).__name__,
+                    retry=retry,
+                ),
+            )
+        except BaseException:
+            # Shielded, so the job is requeued even if cancelled again.
+            await asyncio.shield(self.__requeue(job))
+            raise
+        else:
+            finish = self.repository.complete(
+                cmd=models.CompleteDetectionJobCommand(
+                    id=job.id,
+                    attempts=job.attempts,
+                    result=response,
+                ),
+            )
+
+        try:
+            await finish
+        except EmptyResult:
+            logger.warning("Detection job %s is taken by another worker", job.id)
+            return
+        except _DATABASE_ERRORS as error:
+            # The job is queued again when it becomes stale.
+            logger.error("Detection job %s is not saved: %s", job.id, error)
+            return
+        if not retry:
+            await self.__delete_images([job.image_path])
+        logger.info(
+            "Detection job %s is finished in %.1f s",
+            job.id,
+            time.perf_counter() - started,
+        )
+
+    async def __requeue(self, job: models.DetectionJobInput) -> None:
+        """Queue interrupted job again."""
+
+        try:
+            await self.repository.fail(
+                cmd=models.FailDetectionJobCommand(
+                    id=job.id,
+                    attempts=job.attempts,
+                    error="Detection worker is stopped",
+                    retry=True,
+                ),
+            )
+        except EmptyResult:
+            logger.warning("Detection job %s is taken by another worker", job.id)
+        except _DATABASE_ERRORS as error:
+            # The job is queued again when it becomes stale.
+            logger.error("Detection job %s is not requeued: %s", job.id, error)
+        else:
+            logger.warning("Detection job %s is interrupted and queued", job.id)
+
+    async def __heartbeat(
+        self,
+        job: models.DetectionJobInput,
+        progress: _Progress,
+    ) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                await self.repository.update_progress(
+                    cmd=models.UpdateDetectionJobProgressCommand(
+                        id=job.id,
+                        attempts=job.attempts,
+                        progress=progress.value,
+                    ),
+                )
+            except EmptyResult:
+                logger.warning("Detection job %s is taken by another worker", job.id)
+                return
+            except _DATABASE_ERRORS as error:
+                logger.warning("Progress of job %s is not saved: %s", job.id, error)
+
+    async def __maintain(self, stop: asyncio.Event) -> None:
+        requeue = models.RequeueStaleDetectionJobsCommand(
+            stale_after=self.stale_after,
+            max_attempts=self.max_attempts,
+        )
+        delete = models.DeleteFinishedDetectionJobsCommand(older_than=self.retention)
+        while not stop.is_set():
+            try:
+                stale = await self.repository.requeue_stale(cmd=requeue)
+            except EmptyResult:
+                pass
+            except _DATABASE_ERRORS as error:
+                logger.warning("Stale detection jobs are not requeued: %s", error)
+            else:
+                logger.warning("%s stale detection jobs are requeued", len(stale))
+                await self.__delete_images(
+                    [
+                        job.image_path
+                        for job in stale
+                        if job.status == models.DetectionJobStatus.FAILED
+                    ],
+                )
+
+            try:
+                deleted = await self.repository.delete_finished(cmd=delete)
+            except EmptyResult:
+                pass
+            except _DATABASE_ERRORS as error:
+                logger.warning("Finished detection jobs are not deleted: %s", error)
+            else:
+                # Images are usually deleted when jobs are finished, unless a
+                # worker was stopped or storage failed right then.
+                await self.__delete_images([job.image_path for job in deleted])
+            await _wait(stop, self.heartbeat_interval)
+
+    async def __delete_images(self, image_paths: typing.List[str]) -> None:
+        for image_path in image_paths:
+            try:
+                await self.storage.delete(image_path)
+            except (OSError, ValueError) as error:
+                logger.warning("Image %s is not deleted: %s", image_path, error)
+
+
+async def _wait(stop: asyncio.Event, timeout: float) -> None:
+    """Sleep for ``timeout`` seconds or until ``stop`` is set."""
+
+    with contextlib.suppress(asyncio.TimeoutError):
+        await asyncio.wait_for(stop.wait(), timeout)
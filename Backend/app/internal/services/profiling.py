@@ -0,0 +1,30 @@
+"""Service for read profiling data of repositories."""
+
+import typing
+
+from app.internal.repository.postgresql.profiling import SlowQueryLog
+from app.pkg import models
+
+__all__ = ["ProfilingService"]
+
+
+class ProfilingService:
+    """Service for read profiling data of repositories."""
+
+    #: SlowQueryLog: Slow query log of the current process.
+    slow_query_log: SlowQueryLog
+
+    def __init__(self, slow_query_log: SlowQueryLog):
+        self.slow_query_log = slow_query_log
+
+    async def read_slow_queries(self) -> typing.List[models.SlowQuery]:
+        """Read the slowest statements of the current process.
+
+        Returns:
+            List[SlowQuery]: Statements sorted by duration, the slowest first.
+        """
+        return self.slow_query_log.top()
+
+    async def reset_slow_queries(self) -> None:
+        """Drop all statements of slow query log."""
+        self.slow_query_log.reset()
@@ -1,34 +1,266 @@
-import psycopg2
+import typing
 
+import pydantic
+from pydantic import SecretBytes
+
+from app.internal.pkg.uploads import Record
 from app.internal.repository.postgresql import user
 from app.internal.repository.repository import BaseRepository
 from app.pkg import models
 from app.pkg.logger import get_logger
-from app.pkg.models.exceptions import UserAlreadyExists
-from app.pkg.utils.password import hash_password
-from pydantic import SecretBytes
+from app.pkg.models.exceptions import InvalidEmailOrPassword, UserAlreadyExists
+from app.pkg.models.exceptions.jwt import InvalidToken
+from app.pkg.models.exceptions.repository import EmptyResult, UniqueViolation
+from app.pkg.models.types import EncryptedSecretBytes
+from app.pkg.utils.jwt import JWTManager
+from app.pkg.utils.password import PasswordHasher
 
 
 logger = get_logger(__name__)
 
+#: SecretBytes: Hash of a random password. Checked when user is not found, so
+#  response time does not reveal which emails are registered.
+_DUMMY_HASH = SecretBytes(
+    b"$2b$12$J5VIrGK4sjv1wvN6z4EK3.ZGuMxy.IxOGaDijNpq09KbBnYeauQii",
+)
+
 class UserService:
     """Service for manage users."""
 
     user_repository: user.UserRepository
 
-    def __init__(self, user_repository: BaseRepository):
+    #: PasswordHasher: Hasher of passwords in a process pool.
+    password_hasher: PasswordHasher
+
+    #: JWTManager: Issuer of access and refresh tokens.
+    jwt_manager: JWTManager
+
+    #: PasswordHasher: Hasher of passwords of bulk user import.
+    import_password_hasher: PasswordHasher
+
+    #: int: Count of users hashed and written at once by import.
+    import_batch_size: int
+
+    #: int: Max count of lines in one import.
+    import_max_rows: int
+
+    def __init__(
+        self,
+        user_repository: BaseRepository,
+        password_hasher: PasswordHasher,
+        jwt_manager: JWTManager,
+        import_password_hasher: PasswordHasher,
+        import_batch_size: int = 1000,
+        import_max_rows: int = 100_000,
+    ):
         self.user_repository = user_repository
+        self.password_hasher = password_hasher
+        self.jwt_manager = jwt_manager
+        self.import_password_hasher = import_password_hasher
+        self.import_batch_size = import_batch_size
+        self.import_max_rows = import_max_rows
 
     async def create_user(self, request: models.CreateUserRequest):
-        encrypted_password: SecretBytes = hash_password(request.password)
+        cmd = models.CreateUserCommand(
+            email=request.email,
+            password=request.password,
+        )
+        await cmd.password.hash_with(self.password_hasher.hash_bytes)
+
+        try:
+            return await self.user_repository.create(cmd=cmd)
+        except UniqueViolation as e:
+            raise UserAlreadyExists from e
+
+    async def login(self, request: models.LoginRequest) -> models.TokenPair:
+        """Check email and password and issue token pair.
+
+        Raises:
+            InvalidEmailOrPassword: If user is not found or password does not
+                match.
+
+        Returns:
+            Access and refresh tokens.
+        """
+
+        try:
+            found = await self.user_repository.read_by_email(
+                query=models.ReadUserByEmailQuery(email=request.email),
+            )
+        except EmptyResult:
+            await self.password_hasher.verify(request.password, _DUMMY_HASH)
+            raise InvalidEmailOrPassword
+
+        if not await self.password_hasher.verify(request.password, found.password):
+            raise InvalidEmailOrPassword
+        return self.jwt_manager.create_tokens(found)
+
+    async def refresh(self, request: models.RefreshTokenRequest) -> models.TokenPair:
+        """Exchange refresh token for a new token pair.
+
+        Notes:
+            User is read again, so the new tokens carry the current role.
+
+        Raises:
+            InvalidToken: If refresh token is invalid or user is deleted.
+            TokenExpired: If refresh token has expired.
+
+        Returns:
+            Access and refresh tokens.
+        """
 
+        claims = self.jwt_manager.decode(
+            request.refresh_token,
+            token_type=models.TokenType.REFRESH,
+        )
         try:
-            return await self.user_repository.create(
-                cmd=models.CreateUserCommand(
-                    email=request.email,
-                    password=encrypted_password,
+            found = await self.user_repository.read(
+                query=models.ReadUserQuery(id=claims.user_id),
+            )
+        except EmptyResult as e:
+            raise InvalidToken from e
+        return self.jwt_manager.create_tokens(found)
+
+    async def import_users(
+        self,
+        records: typing.AsyncIterable[Record],
+    ) -> models.UserImportReport:
+        """Create users from uploaded records.
+
+        Notes:
+            Records are validated like on signup and processed in batches of
+            ``import_batch_size``: plain passwords of a batch are hashed on
+            all workers of ``import_password_hasher``, then the batch is
+            written by ``COPY`` in its own transaction. Rows with
+            ``password_hash`` skip hashing. A failed line is reported and
+            does not stop the import, so created users of earlier batches
+            stay created.
+
+        Args:
+            records: Parsed lines of upload with ``email`` and ``password`` or
+                ``password_hash`` fields.
+
+        Raises:
+            PasswordHashingOverloaded: If other imports use all workers.
+
+        Returns:
+            Count of created users and lines which were skipped.
+        """
+
+        report = models.UserImportReport(created=0, failed=[])
+        seen: typing.Set[str] = set()
+        batch: typing.List[typing.Tuple[int, models.ImportUserRequest]] = []
+        count = 0
+
+        async for record in records:
+            count += 1
+            if count > self.import_max_rows:
+                report.failed.append(
+                    models.UserImportFailure(
+                        line=record.line,
+                        reason=models.UserImportFailureReason.INVALID,
+                        detail=f"Import is limited to {self.import_max_rows} "
+                        f"lines, the rest of upload is skipped",
+                    ),
+                )
+                break
+
+            request = self.__validate_import(record, report)
+            if request is None:
+                continue
+            if request.email in seen:
+                report.failed.append(
+                    models.UserImportFailure(
+                        line=record.line,
+                        email=request.email,
+                        reason=models.UserImportFailureReason.DUPLICATE,
+                    ),
+                )
+                continue
+
+            seen.add(request.email)
+            batch.append((record.line, request))
+            if len(batch) >= self.import_batch_size:
+                await self.__import_batch(batch, report)
+                batch = []
+
+        if batch:
+            await self.__import_batch(batch, report)
+        report.failed.sort(key=lambda failure: failure.line)
+        return report
+
+    @staticmethod
+    def __validate_import(
+        record: Record,
+        report: models.UserImportReport,
+    ) -> typing.Optional[models.ImportUserRequest]:
+        """Validate record or add it to failed lines of ``report``."""
+
+        if record.error is not None:
+            detail = record.error
+        else:
+            try:
+                return models.ImportUserRequest.model_validate(
+                    {k: v for k, v in record.data.items() if v not in ("", None)},
+                )
+            except pydantic.ValidationError as error:
+                detail = "; ".join(
+                    ".".join(map(str, e["loc"])) + f": {e['msg']}" if e["loc"]
+                    else e["msg"]
+                    for e in error.errors()
                 )
+
+        email = (record.data or {}).get("email")
+        report.failed.append(
+            models.UserImportFailure(
+                line=record.line,
+                email=email if isinstance(email, str) else None,
+                reason=models.UserImportFailureReason.INVALID,
+                detail=detail,
+            ),
+        )
+        return None
+
+    async def __import_batch(
+        self,
+        batch: typing.List[typing.Tuple[int, models.ImportUserRequest]],
+        report: models.UserImportReport,
+    ) -> None:
+        """Hash passwords of ``batch`` and write it. Emails which already
+        exist are added to failed lines of ``report``."""
+
+        plain = [
+            i for i, (_, request) in enumerate(batch) if request.password is not None
+        ]
+        hashed = await self.import_password_hasher.hash_many(
+            [batch[i][1].password.get_secret_value().encode("utf-8") for i in plain],
+        )
+        hashes = dict(zip(plain, hashed))
+
+        # Emails are validated by ImportUserRequest already.
+        cmds = [
+            models.CreateUserCommand.model_construct(
+                email=request.email,
+                password=EncryptedSecretBytes.from_hash(
+                    hashes[i] if i in hashes
+                    else request.password_hash.get_secret_value(),
+                ),
             )
-        except psycopg2.errors.UniqueViolation as e:
-            raise UserAlreadyExists
+            for i, (_, request) in enumerate(batch)
+        ]
+        try:
+            created = await self.user_repository.create_many(cmds=cmds)
+        except EmptyResult:
+            created = []
 
+        report.created += len(created)
+        created_emails = {u.email for u in created}
+        report.failed.extend(
+            models.UserImportFailure(
+                line=line,
+                email=request.email,
+                reason=models.UserImportFailureReason.ALREADY_EXISTS,
+            )
+            for line, request in batch
+            if request.email not in created_emails
+        )
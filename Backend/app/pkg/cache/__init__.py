@@ -0,0 +1,10 @@
+"""Caches for read-mostly data.
+
+All caches must be inherited from :class:`.BaseCache`, so a service does not
+depend on where cached values are stored.
+"""
+
+# ruff: noqa
+
+from app.pkg.cache.base import BaseCache, CacheStats
+from app.pkg.cache.memory import LRUCache
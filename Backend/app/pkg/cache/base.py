@@ -0,0 +1,87 @@
+"""Abstract cache interface."""
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Optional
+
+__all__ = ["BaseCache", "CacheStats"]
+
+
+@dataclass
+class CacheStats:
+    """Counters of cache.
+
+    Attributes:
+        hits: Count of found keys.
+        misses: Count of missing or expired keys.
+        evictions: Count of keys removed to free space for new keys.
+        invalidations: Count of keys removed by write operations.
+        size: Current count of keys.
+    """
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+    size: int = 0
+
+
+class BaseCache(ABC):
+    """Base cache interface.
+
+    Notes:
+        Methods are asynchronous, so a shared backend (for example, redis for
+        all uvicorn workers) can implement this interface without changes in
+        services.
+
+    Examples:
+        Read-through usage in service::
+
+            >>> async def read_city(self, query):
+            ...     key = f"city:{query.id}"
+            ...     if (city := await self.cache.get(key)) is not None:
+            ...         return city
+            ...     city = await self.repository.read(query=query)
+            ...     await self.cache.set(key, city)
+            ...     return city
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        """Get value by key.
+
+        Returns:
+            Cached value or None if key is missing or expired.
+        """
+
+        raise NotImplementedError
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Set value by key.
+
+        Args:
+            key: Key of value.
+            value: Value. Must not be None.
+            ttl: Time to live in seconds. Default ttl of cache if None.
+        """
+
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete(self, *keys: str) -> None:
+        """Delete keys."""
+
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete_prefix(self, prefix: str) -> None:
+        """Delete all keys started with ``prefix``."""
+
+        raise NotImplementedError
+
+    @abstractmethod
+    def stats(self) -> CacheStats:
+        """Get counters of cache."""
+
+        raise NotImplementedError
@@ -0,0 +1,76 @@
+"""In-process cache with LRU eviction and TTL."""
+
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+from app.pkg.cache.base import BaseCache, CacheStats
+
+__all__ = ["LRUCache"]
+
+
+class LRUCache(BaseCache):
+    """In-process cache with LRU eviction and TTL.
+
+    Notes:
+        Cache lives in memory of one process. Values are returned as is,
+        so callers must not mutate them.
+
+    Attributes:
+        max_size: Max count of keys. The least recently used key is evicted
+            when cache is full.
+        ttl: Default time to live of keys in seconds.
+    """
+
+    max_size: int
+    ttl: float
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._stats = CacheStats()
+
+    async def get(self, key: str) -> Optional[Any]:
+        item = self._data.get(key)
+        if item is None:
+            self._stats.misses += 1
+            return None
+
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            self._stats.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self._stats.hits += 1
+        return value
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self._stats.evictions += 1
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            if self._data.pop(key, None) is not None:
+                self._stats.invalidations += 1
+
+    async def delete_prefix(self, prefix: str) -> None:
+        """Delete all keys started with ``prefix``.
+
+        Notes:
+            Complexity is O(n) of cache size. It is fine for reference data,
+            which is rarely written.
+        """
+
+        keys = [key for key in self._data if key.startswith(prefix)]
+        await self.delete(*keys)
+
+    def stats(self) -> CacheStats:
+        self._stats.size = len(self._data)
+        return self._stats
@@ -2,19 +2,46 @@
 
 from dependency_injector import containers, providers
 
-from app.pkg.connectors.postgresql.resource import Postgresql
+from app.pkg.connectors.postgresql.resource import Asyncpg, Postgresql, Replicas
+from app.pkg.models.core.postgresql import PostgresDriver
 from app.pkg.settings import settings
 
 __all__ = ["PostgresSQL"]
 
 
 class PostgresSQL(containers.DeclarativeContainer):
-    """Declarative container with PostgresSQL connector."""
+    """Declarative container with PostgresSQL connector.
 
+    Notes:
+        Driver of ``connector`` is selected by
+        :attr:`.Settings.POSTGRES.DRIVER`. ``replicas`` is empty when
+        :attr:`.Settings.POSTGRES.REPLICA_HOSTS` is not set.
+    """
 
-    connector = providers.Resource(
-        Postgresql,
-        dsn=settings.POSTGRES.DSN,
+    connector = providers.Selector(
+        providers.Object(PostgresDriver(settings.POSTGRES.DRIVER).value),
+        aiopg=providers.Resource(
+            Postgresql,
+            dsn=settings.POSTGRES.DSN,
+            minsize=settings.POSTGRES.MIN_CONNECTION,
+            maxsize=settings.POSTGRES.MAX_CONNECTION,
+        ),
+        asyncpg=providers.Resource(
+            Asyncpg,
+            dsn=settings.POSTGRES.DSN,
+            minsize=settings.POSTGRES.MIN_CONNECTION,
+            maxsize=settings.POSTGRES.MAX_CONNECTION,
+            statement_cache_size=settings.POSTGRES.STATEMENT_CACHE_SIZE,
+        ),
+    )
+
+    replicas = providers.Resource(
+        Replicas,
+        dsns=settings.POSTGRES.REPLICA_DSNS,
+        driver=PostgresDriver(settings.POSTGRES.DRIVER),
+        balancing=settings.POSTGRES.REPLICA_BALANCING,
+        retry_after=settings.POSTGRES.REPLICA_RETRY_AFTER,
+        statement_cache_size=settings.POSTGRES.STATEMENT_CACHE_SIZE,
         minsize=settings.POSTGRES.MIN_CONNECTION,
         maxsize=settings.POSTGRES.MAX_CONNECTION,
     )
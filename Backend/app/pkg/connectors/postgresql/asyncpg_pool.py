@@ -0,0 +1,379 @@
+"""``aiopg`` compatible facade over ``asyncpg`` pool.
+
+Repositories are written against aiopg cursors: ``%(name)s`` placeholders,
+``await cur.execute(q, params)`` and ``fetchone``/``fetchall`` returning
+dict-like rows. This module keeps that contract, so
+:func:`.get_connection` and :func:`.acquire_connection` work with both
+drivers without changes in repositories.
+
+Notes:
+    Queries are run by ``fetch``, ``execute`` and ``executemany`` of the
+    connection, which keep prepared statements in the statement cache of
+    ``asyncpg`` (``statement_cache_size`` of the pool). Repositories use
+    static SQL strings, so after warm-up each query is parsed and planned by
+    PostgreSQL once per connection, also after the connection was returned
+    to the pool, and results are transferred in binary format.
+
+    Every connection also keeps its own LRU cache of descriptions of
+    queries: columns of the result and positions of ``bytea`` parameters.
+"""
+
+import re
+from collections import OrderedDict, namedtuple
+from functools import lru_cache
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+import asyncpg
+
+__all__ = [
+    "AsyncpgPool",
+    "AsyncpgConnection",
+    "AsyncpgCursor",
+    "PreparedStatementConnection",
+    "StatementDescription",
+    "compile_query",
+]
+
+#: DB-API like column description.
+Column = namedtuple("Column", ["name", "type_code"])
+
+#: Columns of result of a query and positions of its ``bytea`` parameters.
+StatementDescription = namedtuple("StatementDescription", ["columns", "bytea"])
+
+_PLACEHOLDER = re.compile(r"%\((\w+)\)s|%s|%%")
+
+#: Postgres type names which must be passed as ``bytes``.
+_BYTEA_TYPES = frozenset({"bytea"})
+
+
+@lru_cache(maxsize=1024)
+def compile_query(query: str) -> Tuple[str, Tuple[Union[str, int], ...]]:
+    """Convert pyformat query to native postgres placeholders.
+
+    Args:
+        query: Query with ``%(name)s`` or ``%s`` placeholders.
+
+    Examples:
+        ::
+
+            >>> compile_query("select * from t where a = %(a)s and b = %(a)s")
+            ('select * from t where a = $1 and b = $1', ('a',))
+
+    Returns:
+        Tuple of query with ``$n`` placeholders and keys of arguments in order
+        of placeholders.
+    """
+
+    keys: List[Union[str, int]] = []
+    positional = 0
+
+    def replace(match: "re.Match[str]") -> str:
+        nonlocal positional
+        token = match.group(0)
+        if token == "%%":
+            return "%"
+
+        key: Union[str, int]
+        if token == "%s":
+            key, positional = positional, positional + 1
+        else:
+            key = match.group(1)
+
+        if key not in keys:
+            keys.append(key)
+        return f"${keys.index(key) + 1}"
+
+    return _PLACEHOLDER.sub(replace, query), tuple(keys)
+
+
+class PreparedStatementConnection(asyncpg.Connection):
+    """``asyncpg`` connection with LRU cache of descriptions of queries."""
+
+    #: int: Max count of cached descriptions. Overrides from pool ``init``.
+    prepared_cache_size: int = 256
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._described: "OrderedDict[str, StatementDescription]" = OrderedDict()
+
+    async def describe(self, query: str) -> StatementDescription:
+        """Get description of query from cache or prepare the query once.
+
+        Notes:
+            Description does not depend on acquisition of the connection from
+            pool, unlike ``PreparedStatement`` objects, which ``asyncpg``
+            invalidates when the connection is released.
+
+        Args:
+            query: Query with native postgres placeholders.
+
+        Returns:
+            Columns of result and positions of ``bytea`` parameters.
+        """
+
+        if (cached := self._described.get(query)) is not None:
+            self._described.move_to_end(query)
+            return cached
+
+        statement = await self.prepare(query)
+        description = StatementDescription(
+            columns=tuple(
+                Column(attribute.name, attribute.type.oid)
+                for attribute in statement.get_attributes()
+            ),
+            bytea=tuple(
+                position
+                for position, param in enumerate(statement.get_parameters())
+                if param.name in _BYTEA_TYPES
+            ),
+        )
+        self._described[query] = description
+        if len(self._described) > self.prepared_cache_size:
+            self._described.popitem(last=False)
+        return description
+
+    def forget_statement(self, query: str) -> None:
+        """Drop description from cache. Used when schema of table was changed.
+
+        Args:
+            query: Query with native postgres placeholders.
+        """
+
+        self._described.pop(query, None)
+
+
+class AsyncpgCursor:
+    """Cursor with ``aiopg`` interface on top of ``asyncpg`` connection.
+
+    Attributes:
+        connection: Raw ``asyncpg`` connection.
+        rowcount: Count of rows returned or affected by the last query.
+        query: Last executed query and its arguments.
+    """
+
+    connection: PreparedStatementConnection
+    rowcount: int
+    query: Optional[Tuple[str, Tuple[Any, ...]]]
+
+    def __init__(self, connection: PreparedStatementConnection):
+        self.connection = connection
+        self.rowcount = -1
+        self.query = None
+        self._rows: List[asyncpg.Record] = []
+        self._position = 0
+        self._columns: Tuple[Column, ...] = ()
+
+    @property
+    def description(self) -> Optional[Tuple[Column, ...]]:
+        """Columns of the last query result."""
+
+        return self._columns or None
+
+    async def execute(
+        self,
+        operation: str,
+        parameters: Optional[Union[Mapping[str, Any], Sequence[Any]]] = None,
+    ) -> None:
+        """Execute query through cached prepared statement.
+
+        Args:
+            operation: Query with pyformat placeholders.
+            parameters: Mapping or sequence of query parameters.
+        """
+
+        query, keys = compile_query(operation)
+        args = tuple(parameters[key] for key in keys) if keys else ()
+
+        try:
+            rows, status = await self.__fetch(query, args)
+        except (
+            asyncpg.exceptions.InvalidCachedStatementError,
+            asyncpg.exceptions.OutdatedSchemaCacheError,
+        ):
+            self.connection.forget_statement(query)
+            rows, status = await self.__fetch(query, args)
+
+        self.query = (query, args)
+        self._rows, self._position = rows, 0
+        self.rowcount = self.__parse_rowcount(status, rows)
+
+    async def executemany(
+        self,
+        operation: str,
+        seq_of_parameters: Sequence[Optional[Union[Mapping[str, Any], Sequence[Any]]]],
+    ) -> None:
+        """Execute query for every parameters in one pipelined round-trip.
+        Results are discarded.
+
+        Args:
+            operation: Query with pyformat placeholders.
+            seq_of_parameters: Parameters of every execution.
+        """
+
+        query, keys = compile_query(operation)
+        description = await self.connection.describe(query)
+        args = [
+            self.__encode(
+                tuple(parameters[key] for key in keys) if keys else (),
+                description.bytea,
+            )
+            for parameters in seq_of_parameters
+        ]
+        await self.connection.executemany(query, args)
+
+        self.query = (query, args[-1] if args else ())
+        self._rows, self._position = [], 0
+        self.rowcount = -1
+        self._columns = ()
+
+    async def __fetch(
+        self,
+        query: str,
+        args: Tuple[Any, ...],
+    ) -> Tuple[List[asyncpg.Record], Optional[str]]:
+        description = await self.connection.describe(query)
+        args = self.__encode(args, description.bytea)
+        self._columns = description.columns
+        if description.columns:
+            return await self.connection.fetch(query, *args), None
+        # Status of a command without result, e.g. ``UPDATE 3``.
+        return [], await self.connection.execute(query, *args)
+
+    @staticmethod
+    def __encode(args: Tuple[Any, ...], bytea: Tuple[int, ...]) -> Tuple[Any, ...]:
+        """Encode ``str`` arguments of ``bytea`` parameters to ``bytes``."""
+
+        if not bytea:
+            return args
+        return tuple(
+            value.encode() if position in bytea and isinstance(value, str)
+            else value
+            for position, value in enumerate(args)
+        )
+
+    @staticmethod
+    def __parse_rowcount(status: Optional[str], rows: List[asyncpg.Record]) -> int:
+        if rows or not status:
+            return len(rows)
+        count = status.rsplit(" ", 1)[-1]
+        return int(count) if count.isdigit() else -1
+
+    async def fetchone(self) -> Optional[Dict[str, Any]]:
+        """Fetch next row of the last query."""
+
+        if self._position >= len(self._rows):
+            return None
+        row = self._rows[self._position]
+        self._position += 1
+        return dict(row)
+
+    async def fetchmany(self, size: int = 1) -> List[Dict[str, Any]]:
+        """Fetch next ``size`` rows of the last query."""
+
+        rows = self._rows[self._position : self._position + size]
+        self._position += len(rows)
+        return [dict(row) for row in rows]
+
+    async def fetchall(self) -> List[Dict[str, Any]]:
+        """Fetch all remaining rows of the last query."""
+
+        rows = self._rows[self._position :]
+        self._position = len(self._rows)
+        return [dict(row) for row in rows]
+
+    def close(self) -> None:
+        """Release fetched rows."""
+
+        self._rows, self._position = [], 0
+
+
+class AsyncpgConnection:
+    """Connection facade returned by :meth:`.AsyncpgPool.acquire`."""
+
+    raw: PreparedStatementConnection
+
+    def __init__(self, raw: PreparedStatementConnection):
+        self.raw = raw
+
+    async def cursor(self, cursor_factory: object = None) -> AsyncpgCursor:
+        """Create cursor. ``cursor_factory`` is accepted for compatibility
+        only, rows are always returned as dicts."""
+
+        del cursor_factory  # unused
+        return AsyncpgCursor(self.raw)
+
+
+class _AcquireContext:
+    """Awaitable and async context manager, like ``aiopg`` acquire."""
+
+    def __init__(self, pool: "AsyncpgPool"):
+        self._pool = pool
+        self._connection: Optional[AsyncpgConnection] = None
+
+    async def _acquire(self) -> AsyncpgConnection:
+        raw = await self._pool.raw.acquire()
+        return AsyncpgConnection(raw)
+
+    def __await__(self):
+        return self._acquire().__await__()
+
+    async def __aenter__(self) -> AsyncpgConnection:
+        self._connection = await self._acquire()
+        return self._connection
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self._pool.release(self._connection)
+        self._connection = None
+
+
+class AsyncpgPool:
+    """Pool facade with the part of ``aiopg.Pool`` interface used by
+    repositories."""
+
+    raw: asyncpg.Pool
+
+    def __init__(self, raw: asyncpg.Pool):
+        self.raw = raw
+        self._closing = False
+
+    @property
+    def closed(self) -> bool:
+        return self._closing or self.raw.is_closing()
+
+    @property
+    def minsize(self) -> int:
+        return self.raw.get_min_size()
+
+    @property
+    def maxsize(self) -> int:
+        return self.raw.get_max_size()
+
+    @property
+    def size(self) -> int:
+        return self.raw.get_size()
+
+    @property
+    def freesize(self) -> int:
+        return self.raw.get_idle_size()
+
+    def acquire(self) -> _AcquireContext:
+        """Acquire connection from pool."""
+
+        return _AcquireContext(self)
+
+    async def release(self, connection: AsyncpgConnection) -> None:
+        """Return connection to pool."""
+
+        await self.raw.release(connection.raw)
+
+    def close(self) -> None:
+        """Mark pool as closing. Connections are closed in
+        :meth:`.wait_closed`."""
+
+        self._closing = True
+
+    async def wait_closed(self) -> None:
+        """Gracefully close all connections of pool."""
+
+        if not self.raw.is_closing():
+            await self.raw.close()
@@ -0,0 +1,112 @@
+"""Set of read replica pools with balancing and health tracking."""
+
+import itertools
+import time
+from typing import Dict, List, Optional, Union
+
+from aiopg import Pool
+
+from app.pkg.connectors.postgresql.asyncpg_pool import AsyncpgPool
+from app.pkg.models.core.postgresql import PostgresRoute, ReplicaBalancing
+
+__all__ = ["ReplicaSet", "RecentWrites"]
+
+_AnyPool = Union[Pool, AsyncpgPool]
+
+
+class ReplicaSet:
+    """Pools of read replicas.
+
+    Notes:
+        A replica is healthy until :meth:`.mark_failed` is called for its
+        pool. Failed replica is skipped for ``retry_after`` seconds, after that
+        it is selected again. When there is no healthy replica,
+        :meth:`.select` returns None and reads go to the primary.
+
+    Attributes:
+        pools: Pools of replicas.
+        balancing: Selection of replica.
+        retry_after: Seconds while a failed replica is skipped.
+    """
+
+    pools: List[_AnyPool]
+    balancing: ReplicaBalancing
+    retry_after: float
+
+    def __init__(
+        self,
+        pools: List[_AnyPool],
+        balancing: ReplicaBalancing = ReplicaBalancing.ROUND_ROBIN,
+        retry_after: float = 5.0,
+    ):
+        self.pools = pools
+        self.balancing = ReplicaBalancing(balancing)
+        self.retry_after = retry_after
+        self._failed_until: Dict[int, float] = {}
+        self._counter = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self.pools)
+
+    def healthy(self) -> List[_AnyPool]:
+        """Get pools of healthy replicas."""
+
+        now = time.monotonic()
+        return [
+            pool
+            for pool in self.pools
+            if not pool.closed and self._failed_until.get(id(pool), 0) <= now
+        ]
+
+    def select(self) -> Optional[_AnyPool]:
+        """Select pool of healthy replica.
+
+        Returns:
+            Pool of replica or None if there is no healthy replica.
+        """
+
+        if not self.pools:
+            return None
+        if not (pools := self.healthy()):
+            return None
+
+        if self.balancing is ReplicaBalancing.LEAST_BUSY:
+            return max(pools, key=lambda p: p.maxsize - p.size + p.freesize)
+        return pools[next(self._counter) % len(pools)]
+
+    def mark_failed(self, pool: _AnyPool) -> None:
+        """Skip replica of ``pool`` for ``retry_after`` seconds."""
+
+        self._failed_until[id(pool)] = time.monotonic() + self.retry_after
+
+
+class RecentWrites:
+    """Route of reads of data which is written by the process.
+
+    Notes:
+        Replicas may lag behind the primary, so after :meth:`.mark` reads go
+        to the primary for ``window`` seconds. Otherwise, a read right after
+        a write may see the old row and put it into a cache.
+
+    Attributes:
+        window: Seconds after a write while reads go to the primary.
+    """
+
+    window: float
+
+    def __init__(self, window: float):
+        self.window = window
+        self._primary_until = 0.0
+
+    def mark(self) -> None:
+        """Send reads to the primary for ``window`` seconds."""
+
+        self._primary_until = time.monotonic() + self.window
+
+    @property
+    def route(self) -> PostgresRoute:
+        """Route of a read at the moment."""
+
+        if time.monotonic() < self._primary_until:
+            return PostgresRoute.PRIMARY
+        return PostgresRoute.REPLICA
@@ -1,26 +1,49 @@
 """Async resource for PostgresSQL connector."""
 
+import logging
+from typing import List
+
 import aiopg
+import asyncpg
+import psycopg2
 
+from app.pkg.connectors.postgresql.asyncpg_pool import (
+    AsyncpgPool,
+    PreparedStatementConnection,
+)
+from app.pkg.connectors.postgresql.replicas import ReplicaSet
 from app.pkg.connectors.resources import BaseAsyncResource
+from app.pkg.metrics import register_pool, unregister_pool
+from app.pkg.models.core.postgresql import PostgresDriver, ReplicaBalancing
+
+__all__ = ["Postgresql", "Asyncpg", "Replicas"]
 
-__all__ = ["Postgresql"]
+logger = logging.getLogger(__name__)
 
 
 class Postgresql(BaseAsyncResource):
     """PostgresSQL connector using aiopg."""
 
-    async def init(self, dsn: str, *args, **kwargs) -> aiopg.Pool:
+    async def init(
+        self,
+        dsn: str,
+        *args,
+        name: str = "primary",
+        **kwargs,
+    ) -> aiopg.Pool:
         """Getting connection pool in asynchronous.
 
         Args:
             dsn: D.S.N - Data Source Name.
+            name: Name of pool in metrics.
 
         Returns:
             Created connection pool.
         """
 
-        return await aiopg.create_pool(dsn=str(dsn), *args, **kwargs)
+        pool = await aiopg.create_pool(dsn=str(dsn), *args, **kwargs)
+        register_pool(pool, name=name)
+        return pool
 
     async def shutdown(self, resource: aiopg.Pool):
         """Close connection.
@@ -35,5 +58,128 @@ class Postgresql(BaseAsyncResource):
             ``Closing`` provider is used.
         """
 
+        unregister_pool(resource)
         resource.close()
         await resource.wait_closed()
+
+
+class Asyncpg(BaseAsyncResource):
+    """PostgresSQL connector using asyncpg binary protocol.
+
+    Notes:
+        Returned pool has ``aiopg`` compatible interface, so it can be used in
+        :func:`.get_connection` and :func:`.acquire_connection` like a pool
+        created by :class:`.Postgresql`.
+    """
+
+    async def init(
+        self,
+        dsn: str,
+        minsize: int = 1,
+        maxsize: int = 10,
+        statement_cache_size: int = 256,
+        name: str = "primary",
+        **kwargs,
+    ) -> AsyncpgPool:
+        """Getting connection pool in asynchronous.
+
+        Args:
+            dsn: D.S.N - Data Source Name.
+            minsize: Min count of connections in pool.
+            maxsize: Max count of connections in pool.
+            statement_cache_size: Max count of prepared statements cached on
+                each connection.
+            name: Name of pool in metrics.
+
+        Returns:
+            Created connection pool.
+        """
+
+        async def set_cache_size(connection: PreparedStatementConnection) -> None:
+            connection.prepared_cache_size = statement_cache_size
+
+        pool = await asyncpg.create_pool(
+            dsn=str(dsn),
+            min_size=minsize,
+            max_size=maxsize,
+            connection_class=PreparedStatementConnection,
+            statement_cache_size=statement_cache_size,
+            init=set_cache_size,
+            **kwargs,
+        )
+        resource = AsyncpgPool(pool)
+        register_pool(resource, name=name)
+        return resource
+
+    async def shutdown(self, resource: AsyncpgPool):
+        """Close connection.
+
+        Args:
+            resource: Resource returned by :meth:`.Asyncpg.init()` method.
+        """
+
+        unregister_pool(resource)
+        resource.close()
+        await resource.wait_closed()
+
+
+class Replicas(BaseAsyncResource):
+    """Pools of PostgresSQL read replicas.
+
+    Notes:
+        Replica which is not available on startup is skipped, so the
+        application starts even if all replicas are down. Reads go to the
+        primary in this case.
+    """
+
+    async def init(
+        self,
+        dsns: List[str],
+        driver: PostgresDriver,
+        balancing: ReplicaBalancing = ReplicaBalancing.ROUND_ROBIN,
+        retry_after: float = 5.0,
+        statement_cache_size: int = 256,
+        **kwargs,
+    ) -> ReplicaSet:
+        """Create pool for every replica.
+
+        Args:
+            dsns: D.S.N of every replica.
+            driver: Driver of pools. The same as driver of primary.
+            balancing: Selection of replica for read queries.
+            retry_after: Seconds while a failed replica is not used.
+            statement_cache_size: Max count of prepared statements cached on
+                each connection. Used only by ``asyncpg`` driver.
+            **kwargs: Arguments of pool, e.g. ``minsize`` and ``maxsize``.
+
+        Returns:
+            Set of created pools.
+        """
+
+        resource = Postgresql()
+        if driver == PostgresDriver.ASYNCPG:
+            resource = Asyncpg()
+            kwargs["statement_cache_size"] = statement_cache_size
+
+        pools = []
+        for number, dsn in enumerate(dsns):
+            try:
+                pools.append(
+                    await resource.init(dsn, name=f"replica-{number}", **kwargs),
+                )
+            except (OSError, psycopg2.OperationalError, asyncpg.PostgresError) as e:
+                logger.warning("Replica %s is not available: %s", number, e)
+
+        return ReplicaSet(pools, balancing=balancing, retry_after=retry_after)
+
+    async def shutdown(self, resource: ReplicaSet):
+        """Close pools of all replicas.
+
+        Args:
+            resource: Resource returned by :meth:`.Replicas.init()` method.
+        """
+
+        for pool in resource.pools:
+            unregister_pool(pool)
+            pool.close()
+            await pool.wait_closed()
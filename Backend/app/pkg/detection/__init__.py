@@ -0,0 +1,30 @@
+"""Detection of ships on satellite images by YOLOv8-OBB.
+
+Modules of this package do not depend on FastAPI and are used by services,
+benchmarks and scripts alike. Boxes are ``numpy`` arrays of ``cx, cy, w, h,
+angle``, converted to models only by :class:`.DetectionService`.
+"""
+
+# ruff: noqa
+
+from app.pkg.detection.batching import MicroBatcher
+from app.pkg.detection.classes import SHIP_CLASSES
+from app.pkg.detection.detector import Detections, OnnxDetector
+from app.pkg.detection.geometry import (
+    box_overlap,
+    corners_to_xywhr,
+    pairwise_overlap,
+    rotated_nms,
+    xywhr_to_corners,
+)
+from app.pkg.detection.prefilter import TileFilter
+from app.pkg.detection.preprocess import allow_image_pixels, decode_image, letterbox
+from app.pkg.detection.sources import (
+    ArraySource,
+    BlockCache,
+    ImageSource,
+    RasterSource,
+    TiffSource,
+    open_image,
+)
+from app.pkg.detection.tiling import TiledDetector, tile_windows
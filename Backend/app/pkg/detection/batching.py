@@ -0,0 +1,192 @@
+"""Micro-batching of concurrent requests to one model."""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Generic, List, Optional, Set, TypeVar
+
+__all__ = ["MicroBatcher"]
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+#: float: Weight of a shorter run in the estimate of latency of a lone item.
+#  A longer run replaces the estimate at once, so the estimate errs on the
+#  safe side.
+SMOOTHING = 0.2
+
+
+@dataclass
+class _Pending(Generic[T, R]):
+    item: T
+    future: "asyncio.Future[R]"
+    started: float
+    submitted: float = field(default_factory=time.perf_counter)
+
+
+class MicroBatcher(Generic[T, R]):
+    """Collect concurrent items to batches and run every batch at once.
+
+    Notes:
+        The first item of a batch waits at most ``window`` seconds for
+        other items, a batch is run as soon as it has ``max_batch`` items.
+        Items submitted while all ``concurrency`` slots are busy wait in
+        queue and form the next batch immediately when a slot is free, so
+        batches grow with load without any extra waiting.
+
+        A lone item never waits longer than ``latency_slo`` minus its
+        latency without waiting, estimated from previous lone items, so
+        batching alone does not push a request of an idle server over the
+        SLO. Latency counts from ``started`` of :meth:`.submit`, so work done
+        before submission, e.g. decoding, is within the SLO too.
+
+    Attributes:
+        fn: Coroutine function running a batch. Returns one result per item
+            in order of items.
+        max_batch: Max count of items in one batch.
+        window: Max seconds the first item of a batch waits for others.
+        latency_slo: Target seconds of latency of a lone item.
+        concurrency: Count of batches running at once.
+
+    Examples:
+        ::
+
+            >>> async def run(images):
+            ...     return await loop.run_in_executor(
+            ...         None, detector.detect_batch, images,
+            ...     )
+            >>> batcher = MicroBatcher(run, max_batch=8, window=0.01)
+            >>> detections = await batcher.submit(image)
+    """
+
+    fn: Callable[[List[T]], Awaitable[List[R]]]
+    max_batch: int
+    window: float
+    latency_slo: float
+    concurrency: int
+
+    def __init__(
+        self,
+        fn: Callable[[List[T]], Awaitable[List[R]]],
+        max_batch: int = 8,
+        window: float = 0.01,
+        latency_slo: float = 1.0,
+        concurrency: int = 1,
+    ):
+        self.fn = fn
+        self.max_batch = max_batch
+        self.window = window
+        self.latency_slo = latency_slo
+        self.concurrency = concurrency
+        self._lone_latency = 0.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._running: Set[asyncio.Task] = set()
+
+    def observe_lone_latency(self, seconds: float) -> None:
+        """Update estimate of latency of a lone item without waiting, e.g. by
+        time of warmup."""
+
+        if seconds > self._lone_latency:
+            self._lone_latency = seconds
+        else:
+            self._lone_latency += SMOOTHING * (seconds - self._lone_latency)
+
+    async def submit(self, item: T, started: Optional[float] = None) -> R:
+        """Run ``item`` in the next batch and wait for its result.
+
+        Args:
+            item: Item of batch.
+            started: :func:`time.perf_counter` of start of the request of the
+                item. Now if not set.
+
+        Raises:
+            Exception: Any exception raised by :attr:`.fn` for the batch.
+        """
+
+        if self._dispatcher is None:
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.concurrency)
+            self._dispatcher = asyncio.create_task(self.__dispatch())
+
+        future = asyncio.get_running_loop().create_future()
+        pending = _Pending(item, future, started or time.perf_counter())
+        self._queue.put_nowait(pending)
+        return await pending.future
+
+    async def close(self) -> None:
+        """Wait for running batches and stop collecting new ones.
+
+        Items still waiting in queue fail with :class:`asyncio.CancelledError`.
+        """
+
+        if self._dispatcher is None:
+            return
+        dispatcher, self._dispatcher = self._dispatcher, None
+        dispatcher.cancel()
+        await asyncio.gather(dispatcher, *self._running, return_exceptions=True)
+        while not self._queue.empty():
+            self._queue.get_nowait().future.cancel()
+
+    async def __dispatch(self) -> None:
+        while True:
+            await self._slots.acquire()
+            batch: List[_Pending[T, R]] = []
+            try:
+                await self.__collect(batch)
+            except BaseException:
+                self._slots.release()
+                for pending in batch:
+                    pending.future.cancel()
+                raise
+            task = asyncio.create_task(self.__execute(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def __collect(self, batch: List[_Pending[T, R]]) -> None:
+        deadline = None
+        while len(batch) < self.max_batch:
+            if deadline is None:
+                pending = await self._queue.get()
+            elif not self._queue.empty():
+                pending = self._queue.get_nowait()
+            else:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    pending = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+
+            # Callers which gave up, e.g. closed connection, are not run.
+            if pending.future.done():
+                continue
+            if deadline is None:
+                deadline = min(
+                    pending.submitted + self.window,
+                    pending.started + self.latency_slo - self._lone_latency,
+                )
+            batch.append(pending)
+
+    async def __execute(self, batch: List[_Pending[T, R]]) -> None:
+        started = time.perf_counter()
+        try:
+            results = await self.fn([pending.item for pending in batch])
+        except Exception as error:
+            for pending in batch:
+                if not pending.future.done():
+                    pending.future.set_exception(error)
+        else:
+            for pending, result in zip(batch, results):
+                if not pending.future.done():
+                    pending.future.set_result(result)
+            if len(batch) == 1:
+                pending = batch[0]
+                waited = started - pending.submitted
+                self.observe_lone_latency(
+                    time.perf_counter() - pending.started - waited,
+                )
+        finally:
+            self._slots.release()
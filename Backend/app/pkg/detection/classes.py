@@ -0,0 +1,50 @@
+"""Classes of ships detected by the model."""
+
+import ast
+from typing import Optional, Tuple
+
+__all__ = ["SHIP_CLASSES", "names_from_metadata"]
+
+#: Tuple[str, ...]: Names of classes in order of class ids of the dataset
+#  ``ship-detection-yr46o`` the model was trained on.
+SHIP_CLASSES: Tuple[str, ...] = (
+    "Barge",
+    "Cargo",
+    "Container Ship",
+    "Fishing Vessel",
+    "Hovercraft",
+    "Military Vessel",
+    "Motorboat",
+    "Oil Tanker",
+    "Other Merchant",
+    "Other Ship",
+    "Patrol",
+    "RoRo",
+    "Sailboat",
+    "Tugboat",
+    "Yacht",
+)
+
+
+def names_from_metadata(value: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """Parse names of classes written by ``ultralytics`` export.
+
+    Args:
+        value: ``names`` of ONNX metadata, e.g. ``"{0: 'Barge', 1: 'Cargo'}"``.
+
+    Returns:
+        Names in order of class ids or None if ``value`` is not set or can
+        not be parsed.
+    """
+
+    if not value:
+        return None
+    try:
+        names = ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return None
+    if isinstance(names, dict):
+        return tuple(str(names[i]) for i in sorted(names))
+    if isinstance(names, (list, tuple)):
+        return tuple(str(name) for name in names)
+    return None
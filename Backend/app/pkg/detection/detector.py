@@ -0,0 +1,271 @@
+"""YOLOv8-OBB detector on ONNX Runtime."""
+
+import hashlib
+import pathlib
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import onnxruntime
+
+from app.pkg.detection.classes import SHIP_CLASSES, names_from_metadata
+from app.pkg.detection.postprocess import decode_obb
+from app.pkg.detection.preprocess import letterbox
+
+__all__ = ["Detections", "OnnxDetector"]
+
+
+@dataclass(frozen=True)
+class Detections:
+    """Boxes found on one image.
+
+    Attributes:
+        boxes: ``(n, 5)`` boxes ``cx, cy, w, h, angle`` in pixels of source
+            image. ``w`` is the longer side, angle is in radians in
+            ``[0, pi)``.
+        scores: ``(n,)`` confidence of boxes.
+        class_ids: ``(n,)`` class ids of boxes.
+        timings: Seconds spent in every stage, e.g. ``inference``.
+        tiles: Count of tiles the image was cut to.
+        skipped_tiles: Count of tiles not run through the model by
+            :class:`.TileFilter`.
+    """
+
+    boxes: np.ndarray
+    scores: np.ndarray
+    class_ids: np.ndarray
+    timings: Dict[str, float] = field(default_factory=dict)
+    tiles: int = 1
+    skipped_tiles: int = 0
+
+    @classmethod
+    def empty(cls, timings: Optional[Dict[str, float]] = None) -> "Detections":
+        """No boxes, e.g. of a skipped tile."""
+
+        return cls(
+            np.zeros((0, 5), dtype=np.float64),
+            np.zeros(0, dtype=np.float32),
+            np.zeros(0, dtype=np.int64),
+            timings=timings or {},
+        )
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+
+class OnnxDetector:
+    """YOLOv8-OBB detector on ONNX Runtime CPU provider.
+
+    Notes:
+        Session is created by :meth:`.load` and kept for the whole life of
+        the process: creation of a session of ``yolov8x-obb`` takes seconds.
+        :meth:`.detect` may be called from several threads, but one call
+        already uses ``intra_op_threads`` cores.
+
+        Model is an export of ``ultralytics`` weights::
+
+            $ yolo export model=last.pt format=onnx imgsz=640 dynamic=True
+
+    Attributes:
+        model_path: Path to ``.onnx`` file.
+        imgsz: Size of square input of model. Overridden by input shape of
+            model if it is not dynamic.
+        conf: Default min score of boxes.
+        iou: Max IoU of kept boxes of one class.
+        max_det: Max count of boxes on one image.
+        intra_op_threads: Count of threads of one inference. 0 means count
+            of physical cores.
+        names: Names of classes. Read from model metadata on load.
+        version: First 12 hex chars of SHA-256 of model file. Set on load.
+
+    Examples:
+        ::
+
+            >>> detector = OnnxDetector(pathlib.Path("models/yolov8x_obb.onnx"))
+            >>> detector.load()
+            >>> detections = detector.detect(decode_image(data))
+            >>> detector.names[detections.class_ids[0]]
+            'Cargo'
+    """
+
+    model_path: pathlib.Path
+    imgsz: int
+    conf: float
+    iou: float
+    max_det: int
+    intra_op_threads: int
+    names: Tuple[str, ...]
+    version: Optional[str]
+
+    def __init__(
+        self,
+        model_path: pathlib.Path,
+        imgsz: int = 640,
+        conf: float = 0.25,
+        iou: float = 0.7,
+        max_det: int = 300,
+        intra_op_threads: int = 0,
+    ):
+        self.model_path = pathlib.Path(model_path)
+        self.imgsz = imgsz
+        self.conf = conf
+        self.iou = iou
+        self.max_det = max_det
+        self.intra_op_threads = intra_op_threads
+        self.names = SHIP_CLASSES
+        self.version = None
+        self._session: Optional[onnxruntime.InferenceSession] = None
+        self._input_name = "images"
+        self._dynamic_batch = False
+
+    @property
+    def loaded(self) -> bool:
+        """Whether session is created."""
+
+        return self._session is not None
+
+    @property
+    def input_size(self) -> Tuple[int, int]:
+        """``(height, width)`` of model input."""
+
+        return self.imgsz, self.imgsz
+
+    def load(self) -> None:
+        """Create session of model.
+
+        Raises:
+            FileNotFoundError: If model file does not exist.
+        """
+
+        if not self.model_path.is_file():
+            raise FileNotFoundError(f"Model file {self.model_path} does not exist")
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = (
+            onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        )
+        options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+        options.intra_op_num_threads = self.intra_op_threads
+        session = onnxruntime.InferenceSession(
+            str(self.model_path),
+            sess_options=options,
+            providers=["CPUExecutionProvider"],
+        )
+
+        model_input = session.get_inputs()[0]
+        batch, _, height, width = model_input.shape
+        if isinstance(height, int) and isinstance(width, int):
+            self.imgsz = max(height, width)
+        self._input_name = model_input.name
+        self._dynamic_batch = not isinstance(batch, int)
+
+        metadata = session.get_modelmeta().custom_metadata_map
+        self.names = names_from_metadata(metadata.get("names")) or SHIP_CLASSES
+        self.version = _file_version(self.model_path)
+        self._session = session
+
+    def warmup(self, runs: int = 1) -> None:
+        """Run model on blank input, so memory of session is allocated before
+        the first request."""
+
+        blank = np.zeros((1, 3, *self.input_size), dtype=np.float32)
+        for _ in range(runs):
+            self.__run(blank)
+
+    def detect(self, image: np.ndarray, conf: Optional[float] = None) -> Detections:
+        """Find ships on one image.
+
+        Args:
+            image: ``(height, width, 3)`` ``uint8`` RGB array.
+            conf: Min score of boxes. :attr:`.conf` if not set.
+
+        Returns:
+            Boxes in pixels of ``image``.
+        """
+
+        return self.detect_batch([image], conf=conf)[0]
+
+    def detect_batch(
+        self,
+        images: Sequence[np.ndarray],
+        conf: Union[None, float, Sequence[Optional[float]]] = None,
+        scaleup: bool = True,
+    ) -> List[Detections]:
+        """Find ships on several images in one run of model.
+
+        Notes:
+            Images are run one by one if model was exported without dynamic
+            batch size.
+
+        Args:
+            images: ``(height, width, 3)`` ``uint8`` RGB arrays.
+            conf: Min score of boxes, one for all images or one per image.
+                :attr:`.conf` if not set.
+            scaleup: Enlarge images smaller than model input. Tiles are
+                only padded, so ships keep their size in pixels.
+
+        Returns:
+            Boxes of every image in order of ``images``.
+        """
+
+        if conf is None or isinstance(conf, (int, float)):
+            conf = [conf] * len(images)
+        confs = [self.conf if value is None else value for value in conf]
+
+        if not self._dynamic_batch and len(images) > 1:
+            return [
+                self.detect_batch([image], conf=value, scaleup=scaleup)[0]
+                for image, value in zip(images, confs)
+            ]
+
+        started = time.perf_counter()
+        prepared = [
+            letterbox(image, self.input_size, scaleup=scaleup) for image in images
+        ]
+        batch = np.stack([tensor for tensor, _ in prepared])
+        preprocessed = time.perf_counter()
+
+        output = self.__run(batch)
+        inferred = time.perf_counter()
+
+        results = []
+        for (_, transform), prediction, value in zip(prepared, output, confs):
+            boxes, scores, class_ids = decode_obb(
+                prediction,
+                conf=value,
+                iou=self.iou,
+                max_det=self.max_det,
+            )
+            results.append((transform.to_source(boxes), scores, class_ids))
+        postprocessed = time.perf_counter()
+
+        timings = {
+            "preprocess": (preprocessed - started) / len(images),
+            "inference": (inferred - preprocessed) / len(images),
+            "postprocess": (postprocessed - inferred) / len(images),
+        }
+        return [
+            Detections(boxes, scores, class_ids, timings=dict(timings))
+            for boxes, scores, class_ids in results
+        ]
+
+    def close(self) -> None:
+        """Release session."""
+
+        self._session = None
+
+    def __run(self, batch: np.ndarray) -> np.ndarray:
+        if self._session is None:
+            raise RuntimeError("Model is not loaded")
+        return self._session.run(None, {self._input_name: batch})[0]
+
+
+def _file_version(path: pathlib.Path) -> str:
+    """First 12 hex chars of SHA-256 of file."""
+
+    digest = hashlib.sha256()
+    with path.open("rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
@@ -0,0 +1,459 @@
+"""Vectorized geometry of oriented boxes.
+
+Boxes are ``(..., 5)`` arrays of ``cx, cy, w, h, angle`` with angle in
+radians, corners are ``(..., 4, 2)`` arrays. Every function works on whole
+arrays, so post-processing of thousands of boxes stays in NumPy and never
+loops over pairs of boxes in Python.
+"""
+
+from dataclasses import dataclass
+from typing import Literal, Tuple
+
+import numpy as np
+
+__all__ = [
+    "OverlapMetric",
+    "box_overlap",
+    "corners_to_xywhr",
+    "pairwise_overlap",
+    "rotated_nms",
+    "xywhr_to_corners",
+]
+
+#: Measure of overlap of two boxes: intersection over union or intersection
+#  over the smaller box. The latter matches a box cut by border of a tile
+#  with the whole box.
+OverlapMetric = Literal["iou", "ios"]
+
+#: int: Max count of vertices of intersection of two quadrilaterals.
+MAX_VERTICES = 8
+
+#: int: Count of pairs of boxes considered at once by :func:`.rotated_nms`.
+#  Larger blocks spend less on calls of NumPy, smaller ones skip more pairs
+#  of already suppressed boxes.
+CHUNK_PAIRS = 1 << 15
+
+
+def xywhr_to_corners(boxes: np.ndarray) -> np.ndarray:
+    """Convert ``(..., 5)`` boxes ``cx, cy, w, h, angle`` to ``(..., 4, 2)``
+    corners in clockwise order in image coordinates."""
+
+    cos, sin = np.cos(boxes[..., 4]), np.sin(boxes[..., 4])
+    half_w, half_h = boxes[..., 2] / 2, boxes[..., 3] / 2
+    dx = np.stack((half_w * cos, half_w * sin), axis=-1)
+    dy = np.stack((-half_h * sin, half_h * cos), axis=-1)
+    center = boxes[..., None, :2]
+    return center + np.stack((-dx - dy, dx - dy, dx + dy, -dx + dy), axis=-2)
+
+
+def corners_to_xywhr(corners: np.ndarray) -> np.ndarray:
+    """Convert ``(..., 4, 2)`` convex quadrilaterals to ``(..., 5)`` boxes.
+
+    Notes:
+        Every quadrilateral is replaced by its minimum-area enclosing
+        rectangle, which has a side collinear with one of the sides of the
+        quadrilateral, so labels which are not exact rectangles get the same
+        box as ``cv2.minAreaRect`` gives. Rectangles are converted exactly:
+        ``corners_to_xywhr(xywhr_to_corners(boxes))`` equals ``boxes`` up to
+        the representation of angle.
+
+    Returns:
+        Boxes with ``w`` along the chosen side and angle in ``(-pi, pi]``.
+    """
+
+    edges = np.roll(corners, -1, axis=-2) - corners
+    angles = np.arctan2(edges[..., 1], edges[..., 0])
+    cos, sin = np.cos(angles)[..., None], np.sin(angles)[..., None]
+
+    # (..., side, corner) coordinates of corners in frame of every side.
+    u = corners[..., None, :, 0] * cos + corners[..., None, :, 1] * sin
+    v = -corners[..., None, :, 0] * sin + corners[..., None, :, 1] * cos
+    u_low, u_high = u.min(axis=-1), u.max(axis=-1)
+    v_low, v_high = v.min(axis=-1), v.max(axis=-1)
+
+    best = ((u_high - u_low) * (v_high - v_low)).argmin(axis=-1)[..., None]
+
+    def pick(values: np.ndarray) -> np.ndarray:
+        return np.take_along_axis(values, best, axis=-1)[..., 0]
+
+    angle = pick(angles)
+    u_mid = pick(u_low + u_high) / 2
+    v_mid = pick(v_low + v_high) / 2
+    cos, sin = np.cos(angle), np.sin(angle)
+    return np.stack(
+        (
+            u_mid * cos - v_mid * sin,
+            u_mid * sin + v_mid * cos,
+            pick(u_high - u_low),
+            pick(v_high - v_low),
+            angle,
+        ),
+        axis=-1,
+    )
+
+
+def box_overlap(
+    first: np.ndarray,
+    second: np.ndarray,
+    metric: OverlapMetric = "iou",
+) -> np.ndarray:
+    """Overlap of boxes of two arrays pair by pair.
+
+    Args:
+        first: ``(n, 5)`` boxes.
+        second: ``(n, 5)`` boxes.
+        metric: Measure of overlap.
+
+    Returns:
+        ``(n,)`` overlap of ``first[i]`` and ``second[i]``.
+    """
+
+    return _overlap(
+        xywhr_to_corners(first),
+        xywhr_to_corners(second),
+        first[:, 2] * first[:, 3],
+        second[:, 2] * second[:, 3],
+        metric,
+    )
+
+
+def pairwise_overlap(
+    first: np.ndarray,
+    second: np.ndarray,
+    metric: OverlapMetric = "iou",
+) -> np.ndarray:
+    """Overlap of every box of ``first`` with every box of ``second``.
+
+    Notes:
+        Memory is ``O(n * m)``. For suppression of many boxes use
+        :func:`.rotated_nms`, which clips only boxes with overlapping
+        bounding rectangles.
+
+    Args:
+        first: ``(n, 5)`` boxes.
+        second: ``(m, 5)`` boxes.
+        metric: Measure of overlap.
+
+    Returns:
+        ``(n, m)`` overlap matrix.
+    """
+
+    i, j = np.meshgrid(np.arange(len(first)), np.arange(len(second)), indexing="ij")
+    return box_overlap(first[i.ravel()], second[j.ravel()], metric).reshape(
+        len(first),
+        len(second),
+    )
+
+
+def rotated_nms(
+    boxes: np.ndarray,
+    scores: np.ndarray,
+    threshold: float,
+    metric: OverlapMetric = "iou",
+) -> np.ndarray:
+    """Greedy non-maximum suppression of rotated boxes.
+
+    Notes:
+        Only pairs of boxes whose axis-aligned bounding rectangles intersect
+        can overlap. Such pairs are found by a uniform grid of cells of
+        about the size of a typical box: a box is put to every cell its
+        rectangle covers and only boxes sharing a cell are compared. The
+        boxes are paired in blocks of about :data:`.CHUNK_PAIRS` pairs by
+        rank of the better box, and boxes dropped by previous blocks are not
+        paired at all. Pairs whose overlap may exceed ``threshold`` judging
+        by the bounding rectangles are clipped as by :func:`.box_overlap`,
+        then the greedy pass over the block drops neighbours of every kept
+        box. Result is the same as of the classic quadratic loop.
+
+    Args:
+        boxes: ``(n, 5)`` boxes ``cx, cy, w, h, angle``.
+        scores: ``(n,)`` scores of boxes.
+        threshold: Boxes which overlap a better box by more than this value
+            are removed.
+        metric: Measure of overlap.
+
+    Returns:
+        Indexes of kept boxes sorted by score.
+    """
+
+    order = np.argsort(-scores, kind="stable")
+    if len(order) < 2:
+        return order.astype(np.int64)
+
+    # Boxes are renumbered by rank, so the better box of a pair is the
+    # smaller index.
+    boxes = np.asarray(boxes, dtype=np.float64)[order]
+    corners = xywhr_to_corners(boxes)
+    low, high = corners.min(axis=1), corners.max(axis=1)
+    areas = boxes[:, 2] * boxes[:, 3]
+    grid = _Grid.build(low, high)
+
+    # Blocks of ranks with about CHUNK_PAIRS pairs of cells, so boxes
+    # suppressed by previous blocks are never paired.
+    budget = np.concatenate(([0], np.cumsum(grid.pairs_per_box)))
+    suppressed = np.zeros(len(boxes), dtype=bool)
+    block_start = 0
+    while block_start < len(boxes):
+        block_end = np.searchsorted(budget, budget[block_start] + CHUNK_PAIRS, "right")
+        block_end = min(max(block_end - 1, block_start + 1), len(boxes))
+        live = np.flatnonzero(~suppressed[block_start:block_end]) + block_start
+        i, j = grid.pairs(live, low, high, suppressed)
+
+        bound = _overlap_bound(low, high, areas, i, j, metric)
+        i, j = i[bound > threshold], j[bound > threshold]
+        overlapping = _overlap(corners[i], corners[j], areas[i], areas[j], metric)
+        i, j = i[overlapping > threshold], j[overlapping > threshold]
+
+        neighbours = np.searchsorted(i, np.arange(block_start, block_end + 1))
+        for k in np.flatnonzero(neighbours[1:] > neighbours[:-1]):
+            if not suppressed[block_start + k]:
+                suppressed[j[neighbours[k] : neighbours[k + 1]]] = True
+        block_start = block_end
+
+    return order[~suppressed].astype(np.int64)
+
+
+@dataclass(frozen=True)
+class _Grid:
+    """Uniform grid of cells over bounding rectangles of boxes.
+
+    Attributes:
+        origin: Top left corner of the grid.
+        cell: Side of a cell, about the size of a typical box.
+        box: Box of every entry. A box has an entry for every cell its
+            rectangle covers. Entries are sorted by cell, then by box.
+        cell_x: Column of cell of every entry.
+        cell_y: Row of cell of every entry.
+        cell_end: Index after the last entry of the cell of every entry.
+        by_box: Indexes of entries sorted by box.
+        box_start: Index of the first entry of every box in ``by_box`` and
+            count of entries at the end.
+        pairs_per_box: Count of later entries sharing a cell with entries of
+            every box.
+    """
+
+    origin: np.ndarray
+    cell: float
+    box: np.ndarray
+    cell_x: np.ndarray
+    cell_y: np.ndarray
+    cell_end: np.ndarray
+    by_box: np.ndarray
+    box_start: np.ndarray
+    pairs_per_box: np.ndarray
+
+    @classmethod
+    def build(cls, low: np.ndarray, high: np.ndarray) -> "_Grid":
+        """Put ``(n, 2)`` rectangles ``low, high`` to cells."""
+
+        cell = max(float(np.median((high - low).max(axis=1))), 1.0)
+        origin = low.min(axis=0)
+        cell_low = np.floor((low - origin) / cell).astype(np.int64)
+        spans = np.floor((high - origin) / cell).astype(np.int64) - cell_low + 1
+
+        per_box = spans[:, 0] * spans[:, 1]
+        box = np.repeat(np.arange(len(low)), per_box)
+        offset = _offsets(per_box)
+        cell_x = cell_low[box, 0] + offset % spans[box, 0]
+        cell_y = cell_low[box, 1] + offset // spans[box, 0]
+        key = cell_x * (cell_y.max() + 1) + cell_y
+
+        entries = np.lexsort((box, key))
+        key, box = key[entries], box[entries]
+        cell_end = np.searchsorted(key, key, side="right")
+        by_box = np.argsort(box, kind="stable")
+        return cls(
+            origin=origin,
+            cell=cell,
+            box=box,
+            cell_x=cell_x[entries],
+            cell_y=cell_y[entries],
+            cell_end=cell_end,
+            by_box=by_box,
+            box_start=np.searchsorted(box[by_box], np.arange(len(low) + 1)),
+            pairs_per_box=np.bincount(
+                box,
+                weights=cell_end - np.arange(len(box)) - 1,
+                minlength=len(low),
+            ),
+        )
+
+    def pairs(
+        self,
+        boxes: np.ndarray,
+        low: np.ndarray,
+        high: np.ndarray,
+        suppressed: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Pairs of ``boxes`` with worse boxes with intersecting rectangles.
+
+        Notes:
+            Boxes sharing several cells are paired in the cell of the top
+            left corner of intersection of their rectangles only, so every
+            pair is found once.
+
+        Args:
+            boxes: Sorted indexes of better boxes.
+            low: ``(n, 2)`` top left corners of rectangles.
+            high: ``(n, 2)`` bottom right corners of rectangles.
+            suppressed: Boxes excluded from pairs.
+
+        Returns:
+            ``first`` and ``second`` indexes of pairs sorted by ``first``.
+        """
+
+        starts, ends = self.box_start[boxes], self.box_start[boxes + 1]
+        entry = self.by_box[np.repeat(starts, ends - starts) + _offsets(ends - starts)]
+        later = self.cell_end[entry] - entry - 1
+        other = np.repeat(entry, later) + _offsets(later) + 1
+        entry = np.repeat(entry, later)
+        first, second = self.box[entry], self.box[other]
+
+        candidate = ~suppressed[second]
+        entry, first, second = entry[candidate], first[candidate], second[candidate]
+        corner = np.floor(
+            (np.maximum(low[first], low[second]) - self.origin) / self.cell,
+        ).astype(np.int64)
+        candidate = (
+            np.all((low[first] <= high[second]) & (low[second] <= high[first]), axis=1)
+            & (corner[:, 0] == self.cell_x[entry])
+            & (corner[:, 1] == self.cell_y[entry])
+        )
+        first, second = first[candidate], second[candidate]
+        order = np.argsort(first, kind="stable")
+        return first[order], second[order]
+
+
+def _offsets(counts: np.ndarray) -> np.ndarray:
+    """Position of every element of ``np.repeat(..., counts)`` within its
+    repetition."""
+
+    return np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+
+def _overlap_bound(
+    low: np.ndarray,
+    high: np.ndarray,
+    areas: np.ndarray,
+    first: np.ndarray,
+    second: np.ndarray,
+    metric: OverlapMetric,
+) -> np.ndarray:
+    """Upper bound of overlap of pairs of boxes by their bounding rectangles.
+
+    Notes:
+        Intersection of boxes is not larger than intersection of their
+        bounding rectangles or than the smaller box, so pairs whose bound is
+        not above threshold are not clipped at all.
+    """
+
+    sides = np.minimum(high[first], high[second]) - np.maximum(low[first], low[second])
+    intersection = np.minimum(
+        np.prod(np.clip(sides, 0, None), axis=1),
+        np.minimum(areas[first], areas[second]),
+    )
+    if metric == "ios":
+        union = np.minimum(areas[first], areas[second])
+    else:
+        union = areas[first] + areas[second] - intersection
+    bound = np.divide(
+        intersection,
+        union,
+        out=np.zeros_like(intersection),
+        where=union > 0,
+    )
+    # Rounding of corners must not drop a pair the clipping would keep.
+    return bound * (1 + 1e-9) + 1e-12
+
+
+def _overlap(
+    first: np.ndarray,
+    second: np.ndarray,
+    first_area: np.ndarray,
+    second_area: np.ndarray,
+    metric: OverlapMetric,
+) -> np.ndarray:
+    intersection = _polygon_area(*_clip(first, second))
+    if metric == "ios":
+        union = np.minimum(first_area, second_area)
+    else:
+        union = first_area + second_area - intersection
+    return np.divide(
+        intersection,
+        union,
+        out=np.zeros_like(intersection),
+        where=union > 0,
+    )
+
+
+def _clip(subject: np.ndarray, clip: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Sutherland-Hodgman clipping of ``(n, 4, 2)`` convex ``subject`` by
+    ``(n, 4, 2)`` convex ``clip`` polygons.
+
+    Notes:
+        Every polygon is a fixed buffer of :data:`.MAX_VERTICES` points with
+        count of used points, so all pairs are clipped by the same array
+        operations. Unused points of the buffer repeat the last vertex, so
+        the previous vertex of every vertex is the previous point of the
+        buffer cyclically and the shoelace formula may run over the whole
+        buffer. Clipping by every edge keeps points inside the edge and adds
+        intersections of the edge with sides of the polygon.
+
+    Returns:
+        ``(n, MAX_VERTICES)`` x and y of vertices of intersections.
+    """
+
+    n, capacity = len(subject), MAX_VERTICES
+    index = np.arange(capacity)
+    rows = np.arange(n)
+    x = subject[:, np.minimum(index, 3), 0]
+    y = subject[:, np.minimum(index, 3), 1]
+    count = np.full(n, 4)
+    orientation = _cross(clip[:, 0], clip[:, 1], clip[:, 2])[:, None]
+    degenerate = orientation[:, 0] == 0
+    x[degenerate], y[degenerate], count[degenerate] = 0, 0, 0
+
+    for k in range(4):
+        start_x, start_y = clip[:, k, 0, None], clip[:, k, 1, None]
+        edge_x = (clip[:, (k + 1) % 4, 0, None] - start_x) * orientation
+        edge_y = (clip[:, (k + 1) % 4, 1, None] - start_y) * orientation
+        side = edge_x * (y - start_y) - edge_y * (x - start_x)
+        previous_x, previous_y = np.roll(x, 1, axis=1), np.roll(y, 1, axis=1)
+        previous_side = np.roll(side, 1, axis=1)
+
+        valid = index < count[:, None]
+        inside = side >= 0
+        crossing = valid & (inside != (previous_side >= 0))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = np.where(crossing, previous_side / (previous_side - side), 0.0)
+
+        # Intersection with the side ending at a point goes before the point.
+        candidates_x = np.stack((previous_x + t * (x - previous_x), x), axis=2)
+        candidates_y = np.stack((previous_y + t * (y - previous_y), y), axis=2)
+        kept = np.stack((crossing, valid & inside), axis=2).reshape(n, 2 * capacity)
+        position = np.cumsum(kept, axis=1) - 1
+        position = np.where(kept & (position < capacity), position, capacity)
+        x, y = np.zeros((n, capacity + 1)), np.zeros((n, capacity + 1))
+        np.put_along_axis(x, position, candidates_x.reshape(n, 2 * capacity), axis=1)
+        np.put_along_axis(y, position, candidates_y.reshape(n, 2 * capacity), axis=1)
+
+        count = np.minimum(kept.sum(axis=1), capacity)
+        last = np.maximum(count - 1, 0)
+        unused = index >= count[:, None]
+        x = np.where(unused, x[rows, last, None], x[:, :capacity])
+        y = np.where(unused, y[rows, last, None], y[:, :capacity])
+
+    return x, y
+
+
+def _polygon_area(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Area of polygons of :func:`._clip` by shoelace formula."""
+
+    following_x, following_y = np.roll(x, -1, axis=1), np.roll(y, -1, axis=1)
+    return np.abs((x * following_y - following_x * y).sum(axis=1)) / 2
+
+
+def _cross(a: np.ndarray, b: np.ndarray, c: np.ndarray) -> np.ndarray:
+    return (b[..., 0] - a[..., 0]) * (c[..., 1] - a[..., 1]) - (
+        b[..., 1] - a[..., 1]
+    ) * (c[..., 0] - a[..., 0])
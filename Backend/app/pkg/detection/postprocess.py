@@ -0,0 +1,68 @@
+"""Decode output of YOLOv8-OBB and suppress overlapping boxes."""
+
+import math
+from typing import Tuple
+
+import numpy as np
+
+from app.pkg.detection.geometry import rotated_nms
+
+__all__ = ["decode_obb", "regularize_boxes"]
+
+#: int: Max count of candidates passed to NMS, the same as in ``ultralytics``.
+MAX_NMS = 30_000
+
+#: int: Offset of boxes of one class from boxes of other classes, so NMS of
+#  all classes at once never suppresses a box of another class.
+CLASS_OFFSET = 7680
+
+
+def decode_obb(
+    output: np.ndarray,
+    conf: float,
+    iou: float,
+    max_det: int,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Filter predictions of one image.
+
+    Args:
+        output: ``(4 + classes + 1, anchors)`` output of model for one image.
+            Rows are ``cx, cy, w, h`` in pixels of model input, score of every
+            class and angle in radians.
+        conf: Min score of box.
+        iou: Max IoU of kept boxes of one class.
+        max_det: Max count of boxes.
+
+    Returns:
+        ``(n, 5)`` boxes ``cx, cy, w, h, angle`` in pixels of model input,
+        ``(n,)`` scores and ``(n,)`` class ids, sorted by score.
+    """
+
+    scores_by_class = output[4:-1]
+    class_ids = scores_by_class.argmax(axis=0)
+    scores = scores_by_class[class_ids, np.arange(output.shape[1])]
+
+    keep = np.flatnonzero(scores > conf)
+    keep = keep[np.argsort(-scores[keep], kind="stable")][:MAX_NMS]
+    boxes = np.concatenate((output[:4, keep], output[-1:, keep])).T
+    scores, class_ids = scores[keep], class_ids[keep]
+
+    shifted = boxes.copy()
+    shifted[:, :2] += class_ids[:, None] * CLASS_OFFSET
+    keep = rotated_nms(shifted, scores, iou)[:max_det]
+    return (
+        regularize_boxes(boxes[keep]),
+        scores[keep],
+        class_ids[keep].astype(np.int64),
+    )
+
+
+def regularize_boxes(boxes: np.ndarray) -> np.ndarray:
+    """Make width the longer side and angle in ``[0, pi)``, so one box has
+    one representation."""
+
+    boxes = boxes.astype(np.float64)
+    swap = boxes[:, 2] < boxes[:, 3]
+    boxes[swap, 2], boxes[swap, 3] = boxes[swap, 3], boxes[swap, 2]
+    boxes[:, 4] = np.where(swap, boxes[:, 4] + math.pi / 2, boxes[:, 4]) % math.pi
+    return boxes
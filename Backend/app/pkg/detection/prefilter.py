@@ -0,0 +1,149 @@
+"""Cheap screen of tiles of a scene, which can not have ships."""
+
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+__all__ = ["TileFilter"]
+
+#: np.ndarray: Weights of RGB in brightness, ITU-R BT.601 as in Pillow.
+LUMA = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+class TileFilter:
+    """Screen of tiles before the model.
+
+    Notes:
+        Open water, thick cloud and no-data borders of a scene are flat: the
+        brightness hardly varies and there are almost no sharp edges, while
+        a ship is a sharp bright or dark spot. A tile is skipped when both
+        standard deviation of brightness is below ``min_std`` and share of
+        pixels with a brightness step above ``edge_threshold`` to a neighbour
+        pixel is below ``min_edge_density``. Both are computed on every
+        ``step``-th pixel of a batch of tiles at once, which costs a tiny
+        part of inference.
+
+        Optional land mask of a scene skips tiles with ``max_land_share`` of
+        land or more before they are even read.
+
+        Thresholds are fit on tiles of the labelled dataset by
+        ``python -m benchmarks.tile_prefilter``, which also checks recall of
+        ships on the ``test`` split.
+
+    Attributes:
+        step: Stride of pixels used for scores.
+        min_std: Min standard deviation of brightness of a kept tile.
+        edge_threshold: Min brightness step of an edge pixel.
+        min_edge_density: Min share of edge pixels of a kept tile.
+        max_land_share: Min share of land of a skipped tile.
+
+    Examples:
+        ::
+
+            >>> tile_filter = TileFilter(min_std=2.0, min_edge_density=5e-4)
+            >>> keep = tile_filter.keep([scene[0:640, 0:640], ...])
+    """
+
+    step: int
+    min_std: float
+    edge_threshold: float
+    min_edge_density: float
+    max_land_share: float
+
+    def __init__(
+        self,
+        step: int = 2,
+        min_std: float = 2.0,
+        edge_threshold: float = 24.0,
+        min_edge_density: float = 5e-4,
+        max_land_share: float = 1.0,
+    ):
+        self.step = step
+        self.min_std = min_std
+        self.edge_threshold = edge_threshold
+        self.min_edge_density = min_edge_density
+        self.max_land_share = max_land_share
+
+    def scores(self, tiles: Sequence[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """Compute scores of tiles.
+
+        Args:
+            tiles: ``(height, width, 3)`` ``uint8`` RGB arrays.
+
+        Returns:
+            ``(n,)`` standard deviations of brightness and ``(n,)`` shares of
+            edge pixels. A tile too small for edges has share 1.
+        """
+
+        std = np.empty(len(tiles), dtype=np.float64)
+        edges = np.ones(len(tiles), dtype=np.float64)
+
+        # Tiles of a batch usually have one shape and are screened at once.
+        groups: Dict[Tuple[int, ...], List[int]] = {}
+        for i, tile in enumerate(tiles):
+            groups.setdefault(tile[:: self.step, :: self.step].shape, []).append(i)
+
+        for (height, width, _), indexes in groups.items():
+            gray = np.stack(
+                [tiles[i][:: self.step, :: self.step] for i in indexes],
+            ) @ LUMA
+            std[indexes] = gray.reshape(len(indexes), -1).std(axis=1)
+            if height < 2 or width < 2:
+                continue
+            step_x = np.abs(np.diff(gray, axis=2))[:, :-1, :]
+            step_y = np.abs(np.diff(gray, axis=1))[:, :, :-1]
+            strong = np.maximum(step_x, step_y) > self.edge_threshold
+            edges[indexes] = strong.reshape(len(indexes), -1).mean(axis=1)
+        return std, edges
+
+    def keep(self, tiles: Sequence[np.ndarray]) -> np.ndarray:
+        """Check which tiles may have ships.
+
+        Args:
+            tiles: ``(height, width, 3)`` ``uint8`` RGB arrays.
+
+        Returns:
+            ``(n,)`` bool mask of tiles to run through the model.
+        """
+
+        if not len(tiles):
+            return np.zeros(0, dtype=bool)
+        std, edges = self.scores(tiles)
+        return (std >= self.min_std) | (edges >= self.min_edge_density)
+
+    def on_land(
+        self,
+        land_mask: np.ndarray,
+        windows: np.ndarray,
+        width: int,
+        height: int,
+    ) -> np.ndarray:
+        """Check which windows are covered by land.
+
+        Notes:
+            Mask may be coarser than the scene, e.g. a rasterized coastline.
+            A window covers every mask pixel it touches, so a window partly
+            over water is not skipped with ``max_land_share`` 1.
+
+        Args:
+            land_mask: ``(mask_height, mask_width)`` mask of the whole scene,
+                non-zero on land.
+            windows: ``(n, 4)`` windows ``x0, y0, x1, y1`` in pixels of scene.
+            width: Width of scene.
+            height: Height of scene.
+
+        Returns:
+            ``(n,)`` bool mask of windows with at least ``max_land_share`` of
+            land.
+        """
+
+        mask_height, mask_width = land_mask.shape[:2]
+        integral = np.zeros((mask_height + 1, mask_width + 1), dtype=np.int64)
+        integral[1:, 1:] = (land_mask != 0).cumsum(axis=0).cumsum(axis=1)
+
+        x0 = np.floor(windows[:, 0] * mask_width / width).astype(np.int64)
+        y0 = np.floor(windows[:, 1] * mask_height / height).astype(np.int64)
+        x1 = np.ceil(windows[:, 2] * mask_width / width).astype(np.int64)
+        y1 = np.ceil(windows[:, 3] * mask_height / height).astype(np.int64)
+        land = integral[y1, x1] - integral[y0, x1] - integral[y1, x0] + integral[y0, x0]
+        return land >= self.max_land_share * (x1 - x0) * (y1 - y0)
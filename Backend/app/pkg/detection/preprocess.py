@@ -0,0 +1,140 @@
+"""Decode images and prepare them for the model."""
+
+import io
+from dataclasses import dataclass
+from typing import BinaryIO, Optional, Tuple, Union
+
+import numpy as np
+from PIL import Image, UnidentifiedImageError
+
+__all__ = ["Letterbox", "allow_image_pixels", "decode_image", "letterbox"]
+
+#: int: Value of padding pixels, the same as in training by ``ultralytics``.
+PAD_VALUE = 114
+
+
+@dataclass(frozen=True)
+class Letterbox:
+    """Transformation of source image to input of model.
+
+    Attributes:
+        scale: Ratio of model input size to source image size.
+        pad_x: Left padding in pixels of model input.
+        pad_y: Top padding in pixels of model input.
+    """
+
+    scale: float
+    pad_x: int
+    pad_y: int
+
+    def to_source(self, boxes: np.ndarray) -> np.ndarray:
+        """Map ``(n, 5)`` boxes ``cx, cy, w, h, angle`` from model input to
+        source image pixels in place."""
+
+        boxes[:, 0] -= self.pad_x
+        boxes[:, 1] -= self.pad_y
+        boxes[:, :4] /= self.scale
+        return boxes
+
+
+def allow_image_pixels(max_pixels: int) -> None:
+    """Let Pillow open images of up to ``max_pixels``.
+
+    Notes:
+        Pillow warns about images above ``Image.MAX_IMAGE_PIXELS`` and refuses
+        images above twice of it. The bound is only raised, so it stays
+        finite for every user of Pillow in the process.
+    """
+
+    if Image.MAX_IMAGE_PIXELS is not None and Image.MAX_IMAGE_PIXELS < max_pixels:
+        Image.MAX_IMAGE_PIXELS = max_pixels
+
+
+def decode_image(
+    data: Union[bytes, BinaryIO],
+    max_pixels: Optional[int] = None,
+) -> np.ndarray:
+    """Decode JPEG, PNG, TIFF or other image supported by Pillow.
+
+    Notes:
+        Size is checked by header before decoding, so a small file with
+        huge declared size is rejected without allocating memory for it.
+        Without ``max_pixels`` the decompression bomb limit of Pillow
+        applies.
+
+        A file is read from its current position by chunks as Pillow
+        decodes it, so encoded image is never held in memory as a whole.
+
+    Args:
+        data: Encoded image or a binary file of it.
+        max_pixels: Max ``width * height``. Not limited if not set.
+
+    Raises:
+        ValueError: If ``data`` is not an image or it is larger than
+            ``max_pixels``.
+
+    Returns:
+        ``(height, width, 3)`` ``uint8`` RGB array.
+    """
+
+    if max_pixels is not None:
+        allow_image_pixels(max_pixels)
+    try:
+        source = io.BytesIO(data) if isinstance(data, bytes) else data
+        with Image.open(source) as image:
+            width, height = image.size
+            if max_pixels is not None and width * height > max_pixels:
+                raise ValueError(
+                    f"Image of {width}x{height} pixels is larger than "
+                    f"{max_pixels} pixels",
+                )
+            if image.mode != "RGB":
+                image = image.convert("RGB")
+            return np.asarray(image)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as error:
+        raise ValueError(f"Image can not be decoded: {error}") from error
+
+
+def letterbox(
+    image: np.ndarray,
+    size: Tuple[int, int],
+    scaleup: bool = True,
+) -> Tuple[np.ndarray, Letterbox]:
+    """Resize image keeping aspect ratio and pad it to ``size``.
+
+    Notes:
+        Same transformation as ``ultralytics.data.augment.LetterBox`` with
+        ``auto=False``, so boxes match ones of ``model.predict``.
+
+    Args:
+        image: ``(height, width, 3)`` ``uint8`` RGB array.
+        size: ``(height, width)`` of model input.
+        scaleup: Enlarge images smaller than ``size``. If False, they are
+            only padded, e.g. tiles at the border of a scene.
+
+    Returns:
+        ``(3, height, width)`` ``float32`` array with values in ``[0, 1]``
+        and the transformation to map boxes back.
+    """
+
+    height, width = image.shape[:2]
+    scale = min(size[0] / height, size[1] / width)
+    if not scaleup:
+        scale = min(scale, 1.0)
+    new_width, new_height = round(width * scale), round(height * scale)
+    pad_x = round((size[1] - new_width) / 2 - 0.1)
+    pad_y = round((size[0] - new_height) / 2 - 0.1)
+
+    if (new_width, new_height) != (width, height):
+        image = np.asarray(
+            Image.fromarray(image).resize(
+                (new_width, new_height),
+                Image.Resampling.BILINEAR,
+            ),
+        )
+
+    tensor = np.full((3, size[0], size[1]), PAD_VALUE / 255, dtype=np.float32)
+    tensor[:, pad_y : pad_y + new_height, pad_x : pad_x + new_width] = (
+        image.transpose(2, 0, 1) * np.float32(1 / 255)
+    )
+    return tensor, Letterbox(scale=scale, pad_x=pad_x, pad_y=pad_y)
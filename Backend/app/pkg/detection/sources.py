@@ -0,0 +1,473 @@
+"""Windowed reads of scenes, which may be larger than memory."""
+
+import abc
+import io
+import mmap
+import pathlib
+import tempfile
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, BinaryIO, Hashable, Mapping, Optional, Tuple, Union
+
+import numpy as np
+from PIL import Image, UnidentifiedImageError
+
+from app.pkg.cache.base import CacheStats
+from app.pkg.detection.preprocess import allow_image_pixels
+
+__all__ = [
+    "ImageSource",
+    "ArraySource",
+    "TiffSource",
+    "RasterSource",
+    "BlockCache",
+    "open_image",
+]
+
+#: FrozenSet[int]: Codes of deflate compression of TIFF.
+_DEFLATE = frozenset((8, 32946))
+
+#: int: Count of locks of blocks of a TIFF. Threads decompressing the same
+#  block wait for each other, the rest run at once.
+_BLOCK_LOCKS = 64
+
+
+class ImageSource(abc.ABC):
+    """Decoded RGB image read by windows.
+
+    Notes:
+        Windows of one source may be read from several threads at once.
+
+    Attributes:
+        width: Width of image in pixels.
+        height: Height of image in pixels.
+    """
+
+    width: int
+    height: int
+
+    @abc.abstractmethod
+    def read_window(self, x: int, y: int, width: int, height: int) -> np.ndarray:
+        """Read window of image.
+
+        Args:
+            x: Left column of window.
+            y: Top row of window.
+            width: Width of window.
+            height: Height of window.
+
+        Raises:
+            ValueError: If window is outside of image or image is corrupted.
+
+        Returns:
+            ``(height, width, 3)`` ``uint8`` RGB array. It may be a view of
+            image or of a cached block, so it must not be mutated.
+        """
+
+    def close(self) -> None:
+        """Release memory and files of source."""
+
+    def __enter__(self) -> "ImageSource":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _check_window(self, x: int, y: int, width: int, height: int) -> None:
+        if (
+            x < 0
+            or y < 0
+            or width <= 0
+            or height <= 0
+            or x + width > self.width
+            or y + height > self.height
+        ):
+            raise ValueError(
+                f"Window {width}x{height} at {x},{y} is outside of image of "
+                f"{self.width}x{self.height} pixels",
+            )
+
+
+class ArraySource(ImageSource):
+    """Image decoded to memory. Windows are views of it.
+
+    Attributes:
+        image: ``(height, width, 3)`` ``uint8`` RGB array.
+    """
+
+    image: np.ndarray
+
+    def __init__(self, image: np.ndarray):
+        self.image = image
+        self.height, self.width = image.shape[:2]
+
+    def read_window(self, x: int, y: int, width: int, height: int) -> np.ndarray:
+        self._check_window(x, y, width, height)
+        return self.image[y : y + height, x : x + width]
+
+
+class BlockCache:
+    """LRU cache of decoded blocks limited by their size in bytes.
+
+    Notes:
+        Methods may be called from several threads. A block larger than
+        ``max_bytes`` is not cached.
+
+    Attributes:
+        max_bytes: Max total ``nbytes`` of cached blocks.
+    """
+
+    max_bytes: int
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[Hashable, np.ndarray]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = CacheStats()
+
+    def get(self, key: Hashable) -> Optional[np.ndarray]:
+        with self._lock:
+            block = self._data.get(key)
+            if block is None:
+                self._stats.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self._stats.hits += 1
+            return block
+
+    def set(self, key: Hashable, block: np.ndarray) -> None:
+        if block.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._data.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.nbytes
+            self._data[key] = block
+            self._bytes += block.nbytes
+            while self._bytes > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                self._stats.evictions += 1
+
+    @property
+    def nbytes(self) -> int:
+        """Total size of cached blocks in bytes."""
+
+        return self._bytes
+
+    def stats(self) -> CacheStats:
+        self._stats.size = len(self._data)
+        return self._stats
+
+
+class TiffSource(ImageSource):
+    """Tiled or stripped TIFF, e.g. GeoTIFF, read block by block.
+
+    Notes:
+        Blocks, i.e. tiles or strips, are sliced from ``buffer``, which is
+        usually a memory mapped file, so only blocks under read windows are
+        paged in and a scene larger than memory is read as fast as the disk
+        allows. Uncompressed blocks are views of the mapping and are never
+        copied. Deflate blocks are decompressed on read and kept in
+        ``cache``, so windows sharing a block in their overlap do not
+        decompress it again, even when they are read at once.
+
+        Only 8-bit gray, RGB or RGBA with interleaved samples, without
+        compression or with deflate, are supported, see
+        :meth:`.supports`. GDAL writes such scenes by ``gdal_translate -co
+        TILED=YES -co COMPRESS=DEFLATE``.
+
+    Attributes:
+        block_width: Width of a block in pixels.
+        block_height: Height of a block in pixels. Rows of a strip.
+        samples: Count of samples of a pixel.
+        compression: Code of compression.
+        predictor: Code of predictor of deflate.
+        cache: Decompressed blocks.
+    """
+
+    block_width: int
+    block_height: int
+    samples: int
+    compression: int
+    predictor: int
+    cache: BlockCache
+
+    def __init__(
+        self,
+        buffer: Union[bytes, mmap.mmap],
+        tags: Mapping[int, Any],
+        cache: BlockCache,
+        start: int = 0,
+    ):
+        """Init TiffSource.
+
+        Args:
+            buffer: File of TIFF.
+            tags: Tags of the first image of TIFF, e.g. ``tag_v2`` of Pillow.
+            cache: Decompressed blocks.
+            start: Offset of TIFF in ``buffer``.
+        """
+
+        self.width, self.height = tags[256], tags[257]
+        self.samples = tags.get(277, 1)
+        self.compression = tags.get(259, 1)
+        self.predictor = tags.get(317, 1)
+        if 322 in tags:
+            self.block_width, self.block_height = tags[322], tags[323]
+            offsets, counts = tags[324], tags[325]
+        else:
+            self.block_width = self.width
+            self.block_height = min(tags.get(278, self.height), self.height)
+            offsets, counts = tags[273], tags[279]
+        self.cache = cache
+        self._tiled = 322 in tags
+        self._across = -(-self.width // self.block_width)
+        self._offsets = np.asarray(offsets, dtype=np.int64) + start
+        self._counts = np.asarray(counts, dtype=np.int64)
+        self._buffer = buffer
+        self._data = np.frombuffer(buffer, dtype=np.uint8)
+        self._locks = [threading.Lock() for _ in range(_BLOCK_LOCKS)]
+
+    @staticmethod
+    def supports(tags: Mapping[int, Any]) -> bool:
+        """Whether blocks of TIFF with ``tags`` can be read by this class."""
+
+        samples = tags.get(277, 1)
+        compression = tags.get(259, 1)
+        predictor = tags.get(317, 1)
+        return (
+            all(bits == 8 for bits in _values(tags.get(258, 1)))
+            and all(kind == 1 for kind in _values(tags.get(339, 1)))
+            and (samples, tags.get(262)) in ((1, 1), (3, 2), (4, 2))
+            and tags.get(284, 1) == 1
+            and (
+                (compression == 1 and predictor == 1)
+                or (compression in _DEFLATE and predictor in (1, 2))
+            )
+            and (322 in tags or 273 in tags)
+        )
+
+    def read_window(self, x: int, y: int, width: int, height: int) -> np.ndarray:
+        self._check_window(x, y, width, height)
+        columns = range(x // self.block_width, (x + width - 1) // self.block_width + 1)
+        rows = range(y // self.block_height, (y + height - 1) // self.block_height + 1)
+
+        if len(columns) == 1 and len(rows) == 1 and self.samples == 3:
+            block = self.__block(rows[0], columns[0])
+            block_x, block_y = x % self.block_width, y % self.block_height
+            return block[block_y : block_y + height, block_x : block_x + width]
+
+        window = np.empty((height, width, 3), dtype=np.uint8)
+        for row in rows:
+            for column in columns:
+                block = self.__block(row, column)
+                left, top = column * self.block_width, row * self.block_height
+                x0, x1 = max(x, left), min(x + width, left + self.block_width)
+                y0, y1 = max(y, top), min(y + height, top + self.block_height)
+                # Gray is broadcast to RGB, alpha is dropped.
+                window[y0 - y : y1 - y, x0 - x : x1 - x] = block[
+                    y0 - top : y1 - top,
+                    x0 - left : x1 - left,
+                    :3,
+                ]
+        return window
+
+    def close(self) -> None:
+        # Windows may still be views of the mapping, so it is closed when
+        # the last of them is collected.
+        self._data = None
+        self._buffer = None
+
+    def __block(self, row: int, column: int) -> np.ndarray:
+        index = row * self._across + column
+        rows = self.block_height
+        if not self._tiled:
+            rows = min(rows, self.height - row * self.block_height)
+        shape = (rows, self.block_width, self.samples)
+        size = rows * self.block_width * self.samples
+
+        offset, count = int(self._offsets[index]), int(self._counts[index])
+        if count == 0:
+            # Sparse block of GDAL.
+            return np.zeros(shape, dtype=np.uint8)
+        if self.compression == 1:
+            if count < size:
+                raise ValueError(f"Image can not be decoded: block {index} is short")
+            return self._data[offset : offset + size].reshape(shape)
+
+        with self._locks[index % _BLOCK_LOCKS]:
+            if (block := self.cache.get(index)) is None:
+                block = self.__decompress(index, offset, count, shape)
+                self.cache.set(index, block)
+            return block
+
+    def __decompress(
+        self,
+        index: int,
+        offset: int,
+        count: int,
+        shape: Tuple[int, int, int],
+    ) -> np.ndarray:
+        size = shape[0] * shape[1] * shape[2]
+        try:
+            data = zlib.decompress(self._data[offset : offset + count])
+        except zlib.error as error:
+            raise ValueError(f"Image can not be decoded: {error}") from error
+        if len(data) < size:
+            raise ValueError(f"Image can not be decoded: block {index} is short")
+        block = np.frombuffer(data, dtype=np.uint8, count=size).reshape(shape)
+        if self.predictor == 2:
+            # Horizontal differencing: every sample is a delta to the left one.
+            block = np.cumsum(block, axis=1, dtype=np.uint8)
+        return block
+
+
+class RasterSource(ImageSource):
+    """Image decoded once to a memory mapped temporary file.
+
+    Notes:
+        Pillow decodes the image to its own memory, which is then copied to
+        the mapping as RGB strip by strip, so a gray or RGBA image is never
+        converted as a whole. Decoding needs memory of the decoded image
+        once, the source keeps none of it afterwards: the OS writes pages
+        back to the file when memory is needed, and windows page in only
+        rows they cover. The temporary file is deleted by :meth:`.close`.
+    """
+
+    #: int: Max bytes of a strip of image converted to RGB at once.
+    STRIP_BYTES: int = 16 * 1024 * 1024
+
+    def __init__(
+        self,
+        image: Image.Image,
+        directory: Optional[pathlib.Path] = None,
+    ):
+        """Decode image to a temporary file.
+
+        Args:
+            image: Opened image.
+            directory: Directory of temporary file. System default if not
+                set.
+
+        Raises:
+            ValueError: If image can not be decoded.
+        """
+
+        self.width, self.height = image.size
+        self._file = tempfile.TemporaryFile(dir=directory)
+        try:
+            image.load()
+            self._raster = np.memmap(
+                self._file,
+                dtype=np.uint8,
+                mode="w+",
+                shape=(self.height, self.width, 3),
+            )
+            rows = max(1, self.STRIP_BYTES // (self.width * 4))
+            for top in range(0, self.height, rows):
+                bottom = min(top + rows, self.height)
+                strip = image.crop((0, top, self.width, bottom))
+                if strip.mode != "RGB":
+                    strip = strip.convert("RGB")
+                self._raster[top:bottom] = np.asarray(strip)
+        except (OSError, SyntaxError) as error:
+            self.close()
+            raise ValueError(f"Image can not be decoded: {error}") from error
+        except ValueError:
+            self.close()
+            raise
+
+    def read_window(self, x: int, y: int, width: int, height: int) -> np.ndarray:
+        self._check_window(x, y, width, height)
+        return self._raster[y : y + height, x : x + width]
+
+    def close(self) -> None:
+        self._raster = None
+        self._file.close()
+
+
+def open_image(
+    data: Union[bytes, BinaryIO],
+    max_pixels: Optional[int] = None,
+    raster_above: Optional[int] = None,
+    directory: Optional[pathlib.Path] = None,
+    cache_bytes: int = 256 * 1024 * 1024,
+) -> ImageSource:
+    """Open image for windowed reads.
+
+    Notes:
+        Size is checked by header before decoding, as by
+        :func:`.decode_image`. Then the image is opened as:
+
+        * :class:`.TiffSource` if it is a TIFF supported by it. A file with
+          descriptor, e.g. a spooled upload, is memory mapped, so nothing is
+          decoded before windows are read.
+        * :class:`.RasterSource` in ``directory`` if it has more than
+          ``raster_above`` pixels.
+        * :class:`.ArraySource` otherwise.
+
+    Args:
+        data: Encoded image or a binary file of it positioned at the start
+            of image. The file must stay open until the source is closed.
+        max_pixels: Max ``width * height``. Not limited if not set.
+        raster_above: Images with more pixels are decoded to a file. Never
+            if not set.
+        directory: Directory of decoded files. System default if not set.
+        cache_bytes: Max bytes of decompressed blocks of TIFF kept in
+            memory.
+
+    Raises:
+        ValueError: If ``data`` is not an image or it is larger than
+            ``max_pixels``.
+
+    Returns:
+        Opened image. Must be closed by caller.
+    """
+
+    if max_pixels is not None:
+        allow_image_pixels(max_pixels)
+    start = 0 if isinstance(data, bytes) else data.tell()
+    try:
+        with Image.open(io.BytesIO(data) if isinstance(data, bytes) else data) as image:
+            width, height = image.size
+            if max_pixels is not None and width * height > max_pixels:
+                raise ValueError(
+                    f"Image of {width}x{height} pixels is larger than "
+                    f"{max_pixels} pixels",
+                )
+            if image.format == "TIFF" and TiffSource.supports(image.tag_v2):
+                return TiffSource(
+                    _map(data),
+                    dict(image.tag_v2),
+                    BlockCache(cache_bytes),
+                    start=start,
+                )
+            if raster_above is not None and width * height > raster_above:
+                return RasterSource(image, directory=directory)
+            if image.mode != "RGB":
+                image = image.convert("RGB")
+            return ArraySource(np.asarray(image))
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as error:
+        raise ValueError(f"Image can not be decoded: {error}") from error
+
+
+def _values(value: Union[int, Tuple[int, ...]]) -> Tuple[int, ...]:
+    """Values of a tag, which Pillow returns as a tuple or a single value."""
+
+    return value if isinstance(value, tuple) else (value,)
+
+
+def _map(data: Union[bytes, BinaryIO]) -> Union[bytes, mmap.mmap]:
+    """Map file to memory or read it if it has no descriptor."""
+
+    if isinstance(data, bytes):
+        return data
+    try:
+        # Spooled file in memory is moved to disk by ``fileno``.
+        return mmap.mmap(data.fileno(), 0, access=mmap.ACCESS_READ)
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        data.seek(0)
+        return data.read()
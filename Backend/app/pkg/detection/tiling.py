@@ -0,0 +1,348 @@
+"""Detection on scenes larger than input of model by overlapping tiles."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from app.pkg.detection.detector import Detections, OnnxDetector
+from app.pkg.detection.geometry import rotated_nms, xywhr_to_corners
+from app.pkg.detection.prefilter import TileFilter
+from app.pkg.detection.sources import ArraySource, ImageSource
+
+__all__ = ["TiledDetector", "tile_windows"]
+
+#: float: Boxes closer than this count of pixels to inner border of a tile
+#  are cut by the border.
+EDGE_MARGIN = 2.0
+
+
+def tile_windows(width: int, height: int, tile: int, overlap: int) -> np.ndarray:
+    """Split scene to overlapping windows.
+
+    Notes:
+        Windows are ``tile`` pixels wide with ``tile - overlap`` pixels step.
+        The last window of every row and column is aligned to border of
+        scene, so it overlaps the previous one more and no window is smaller
+        than ``tile``, unless the scene itself is.
+
+    Args:
+        width: Width of scene.
+        height: Height of scene.
+        tile: Size of square window.
+        overlap: Min count of pixels shared by neighbour windows.
+
+    Returns:
+        ``(n, 4)`` windows ``x0, y0, x1, y1`` row by row.
+    """
+
+    xs = _axis_starts(width, tile, tile - overlap)
+    ys = _axis_starts(height, tile, tile - overlap)
+    x0, y0 = np.meshgrid(xs, ys)
+    x0, y0 = x0.ravel(), y0.ravel()
+    return np.stack(
+        (x0, y0, np.minimum(x0 + tile, width), np.minimum(y0 + tile, height)),
+        axis=1,
+    )
+
+
+def _axis_starts(length: int, tile: int, stride: int) -> np.ndarray:
+    if length <= tile:
+        return np.zeros(1, dtype=np.int64)
+    count = -(-(length - tile) // stride) + 1
+    starts = np.arange(count, dtype=np.int64) * stride
+    starts[-1] = length - tile
+    return starts
+
+
+def _cores(starts: np.ndarray, ends: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Parts of windows of one axis not covered by neighbour windows.
+
+    Returns:
+        Start and end of core of every window. Sorted unique ``starts`` are
+        expected.
+    """
+
+    core_starts = np.concatenate(([starts[0]], ends[:-1]))
+    core_ends = np.concatenate((starts[1:], [ends[-1]]))
+    return core_starts, core_ends
+
+
+class TiledDetector:
+    """Detection on scenes larger than input of model.
+
+    Notes:
+        Scene is cut to overlapping windows of ``tile`` pixels. Windows of a
+        scene array are views of it, so the scene is never copied. Windows of
+        other :class:`.ImageSource`, e.g. a memory mapped GeoTIFF, are read
+        by ``read_workers`` threads at once just before their batch, so a
+        scene larger than memory is detected with only a few batches of
+        windows in memory. Windows are run through the model by batches of
+        ``batch_size`` on ``workers`` threads at once. If ``tile_filter`` is
+        set, tiles of open water, clouds or land are skipped before the
+        model. Boxes are mapped to scene pixels and duplicates of overlap
+        zones are merged:
+
+        * Boxes inside the part of a window not covered by other windows can
+          not be duplicated and are kept as is.
+        * The rest is suppressed by rotated NMS with intersection over the
+          smaller box regardless of class, so a ship cut by border of one
+          tile is matched with the whole ship of the neighbour tile. Boxes
+          cut by inner border of their tile lose to whole boxes regardless
+          of score.
+
+        With ``overlap`` larger than the longest ship, every ship is whole in
+        at least one tile.
+
+        One inference uses ``intra_op_threads`` of the detector. Throughput
+        grows with cores until ``workers * intra_op_threads`` is count of
+        cores; a few workers with a few threads each usually beat one worker
+        with all threads, because small batches do not parallelize well.
+
+    Attributes:
+        detector: Loaded model.
+        tile: Size of square window. Equal to input of model, so tiles are
+            not resized.
+        overlap: Min count of pixels shared by neighbour windows.
+        batch_size: Count of windows in one run of model.
+        workers: Count of batches run at once.
+        merge_threshold: Min intersection over the smaller box of duplicates.
+        read_workers: Count of windows of one batch read at once.
+        tile_filter: Screen of tiles before the model. Every tile is run
+            through the model if not set.
+
+    Examples:
+        ::
+
+            >>> tiled = TiledDetector(detector, overlap=128, workers=2)
+            >>> detections = tiled.detect(decode_image(scene_bytes))
+            >>> with open_image(open("scene.tif", "rb")) as scene:
+            ...     detections = tiled.detect(scene)
+    """
+
+    detector: OnnxDetector
+    tile: int
+    overlap: int
+    batch_size: int
+    workers: int
+    merge_threshold: float
+    read_workers: int
+    tile_filter: Optional[TileFilter]
+
+    def __init__(
+        self,
+        detector: OnnxDetector,
+        tile: Optional[int] = None,
+        overlap: int = 128,
+        batch_size: int = 8,
+        workers: int = 1,
+        merge_threshold: float = 0.5,
+        read_workers: int = 4,
+        tile_filter: Optional[TileFilter] = None,
+    ):
+        self.detector = detector
+        self.tile = tile or detector.imgsz
+        if not 0 <= overlap < self.tile:
+            raise ValueError("Overlap must be smaller than tile")
+        self.overlap = overlap
+        self.batch_size = batch_size
+        self.workers = workers
+        self.merge_threshold = merge_threshold
+        self.read_workers = read_workers
+        self.tile_filter = tile_filter
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._readers: Optional[ThreadPoolExecutor] = None
+
+    def detect(
+        self,
+        scene: Union[np.ndarray, ImageSource],
+        conf: Optional[float] = None,
+        progress: Optional[Callable[[int, int], None]] = None,
+        land_mask: Optional[np.ndarray] = None,
+    ) -> Detections:
+        """Find ships on scene.
+
+        Args:
+            scene: ``(height, width, 3)`` ``uint8`` RGB array or a source
+                read by windows. The source is not closed.
+            conf: Min score of boxes. Default of detector if not set.
+            progress: Called with counts of detected and all tiles after
+                every batch, from the thread which ran the batch.
+            land_mask: Mask of land of the whole scene, see
+                :meth:`.TileFilter.on_land`. Used only with ``tile_filter``.
+
+        Raises:
+            ValueError: If a window of ``scene`` can not be read.
+
+        Returns:
+            Boxes in pixels of ``scene``. ``timings`` are totals of all
+            tiles plus ``read``, ``filter`` and ``merge`` stages.
+        """
+
+        source = ArraySource(scene) if isinstance(scene, np.ndarray) else scene
+        width, height = source.width, source.height
+        windows = tile_windows(width, height, self.tile, self.overlap)
+        on_land = np.zeros(len(windows), dtype=bool)
+        if self.tile_filter is not None and land_mask is not None:
+            on_land = self.tile_filter.on_land(land_mask, windows, width, height)
+        batches = [
+            (windows[i : i + self.batch_size], on_land[i : i + self.batch_size])
+            for i in range(0, len(windows), self.batch_size)
+        ]
+
+        # Windows of an array are views, threads would only add overhead.
+        readers = None
+        if not isinstance(source, ArraySource) and self.read_workers > 1:
+            readers = self.__reader_pool()
+
+        done = skipped_tiles = 0
+        lock = threading.Lock()
+
+        def run(batch: Tuple[np.ndarray, np.ndarray]) -> List[Detections]:
+            nonlocal done, skipped_tiles
+            batch_windows, skip = batch
+            started = time.perf_counter()
+            crops = self.__read(source, batch_windows[~skip], readers)
+            read_time = (time.perf_counter() - started) / len(batch_windows)
+
+            started = time.perf_counter()
+            if self.tile_filter is not None:
+                keep = self.tile_filter.keep(crops)
+                crops = [crop for crop, kept in zip(crops, keep) if kept]
+                skip = skip.copy()
+                skip[~skip] = ~keep
+            filter_time = (time.perf_counter() - started) / len(batch_windows)
+
+            detected = iter(
+                self.detector.detect_batch(crops, conf=conf, scaleup=False)
+                if crops
+                else (),
+            )
+            detections = [
+                Detections.empty() if skipped else next(detected) for skipped in skip
+            ]
+            for d in detections:
+                d.timings["read"] = read_time
+                d.timings["filter"] = filter_time
+            with lock:
+                done += len(batch_windows)
+                skipped_tiles += int(skip.sum())
+                if progress is not None:
+                    progress(done, len(windows))
+            return detections
+
+        if self.workers > 1 and len(batches) > 1:
+            results = [d for ds in self.__pool().map(run, batches) for d in ds]
+        else:
+            results = [d for batch in batches for d in run(batch)]
+
+        started = time.perf_counter()
+        boxes, scores, class_ids = self.__merge(windows, results, width, height)
+        # Skipped tiles have no stages of the model.
+        stages = dict.fromkeys(stage for d in results for stage in d.timings)
+        timings = {
+            stage: sum(d.timings.get(stage, 0.0) for d in results) for stage in stages
+        }
+        timings["merge"] = time.perf_counter() - started
+        return Detections(
+            boxes,
+            scores,
+            class_ids,
+            timings=timings,
+            tiles=len(windows),
+            skipped_tiles=skipped_tiles,
+        )
+
+    def close(self) -> None:
+        """Stop worker threads."""
+
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self._readers is not None:
+            self._readers.shutdown()
+            self._readers = None
+
+    @staticmethod
+    def __read(
+        source: ImageSource,
+        batch: np.ndarray,
+        readers: Optional[ThreadPoolExecutor],
+    ) -> List[np.ndarray]:
+        def read(window: np.ndarray) -> np.ndarray:
+            x0, y0, x1, y1 = (int(value) for value in window)
+            return source.read_window(x0, y0, x1 - x0, y1 - y0)
+
+        if readers is None:
+            return [read(window) for window in batch]
+        return list(readers.map(read, batch))
+
+    def __pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers,
+                thread_name_prefix="tiling",
+            )
+        return self._executor
+
+    def __reader_pool(self) -> ThreadPoolExecutor:
+        if self._readers is None:
+            self._readers = ThreadPoolExecutor(
+                max_workers=self.read_workers,
+                thread_name_prefix="tiling-read",
+            )
+        return self._readers
+
+    def __merge(
+        self,
+        windows: np.ndarray,
+        results: List[Detections],
+        width: int,
+        height: int,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        counts = [len(d) for d in results]
+        owner = np.repeat(np.arange(len(windows)), counts)
+        boxes = np.concatenate([d.boxes for d in results]).reshape(-1, 5)
+        scores = np.concatenate([d.scores for d in results])
+        class_ids = np.concatenate([d.class_ids for d in results])
+        if not len(scores):
+            return boxes, scores, class_ids.astype(np.int64)
+
+        window = windows[owner]
+        boxes[:, :2] += window[:, :2]
+
+        corners = xywhr_to_corners(boxes)
+        low, high = corners.min(axis=1), corners.max(axis=1)
+
+        xs, x_ends = np.unique(windows[:, [0, 2]], axis=0).T
+        ys, y_ends = np.unique(windows[:, [1, 3]], axis=0).T
+        core_x0, core_x1 = _cores(xs, x_ends)
+        core_y0, core_y1 = _cores(ys, y_ends)
+        column = np.searchsorted(xs, window[:, 0])
+        row = np.searchsorted(ys, window[:, 1])
+        in_core = (
+            (low[:, 0] >= core_x0[column])
+            & (high[:, 0] <= core_x1[column])
+            & (low[:, 1] >= core_y0[row])
+            & (high[:, 1] <= core_y1[row])
+        )
+
+        cut = (
+            ((low[:, 0] <= window[:, 0] + EDGE_MARGIN) & (window[:, 0] > 0))
+            | ((low[:, 1] <= window[:, 1] + EDGE_MARGIN) & (window[:, 1] > 0))
+            | ((high[:, 0] >= window[:, 2] - EDGE_MARGIN) & (window[:, 2] < width))
+            | ((high[:, 1] >= window[:, 3] - EDGE_MARGIN) & (window[:, 3] < height))
+        )
+
+        seam = np.flatnonzero(~in_core)
+        kept = rotated_nms(
+            boxes[seam],
+            scores[seam] - cut[seam],
+            self.merge_threshold,
+            metric="ios",
+        )
+        keep = np.concatenate((np.flatnonzero(in_core), seam[kept]))
+        keep = keep[np.argsort(-scores[keep], kind="stable")]
+        return boxes[keep], scores[keep], class_ids[keep]
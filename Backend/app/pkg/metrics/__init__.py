@@ -0,0 +1,28 @@
+"""Prometheus metrics of application.
+
+All metrics are registered in the default ``prometheus_client`` registry and
+exposed by ``GET /metrics`` route. Every metric has ``app_name`` label equal
+to :attr:`.Settings.API.INSTANCE_APP_NAME`, so the grafana dashboard can
+filter metrics of one application.
+"""
+
+# ruff: noqa
+
+from app.pkg.metrics.app import APP_INFO, APP_NAME
+from app.pkg.metrics.detection import (
+    DETECTION_BATCH_OCCUPANCY,
+    DETECTION_BATCH_SIZE,
+    DETECTION_CACHE_LOOKUPS,
+    DETECTION_PENDING,
+    DETECTION_STAGE_DURATION,
+    DETECTION_TILES,
+)
+from app.pkg.metrics.postgresql import (
+    ACQUIRE_TIMEOUTS,
+    ACQUIRE_WAIT,
+    ACQUIRE_WAITING,
+    QUERY_DURATION,
+    PoolCollector,
+    register_pool,
+    unregister_pool,
+)
@@ -0,0 +1,14 @@
+"""Common metrics of application."""
+
+from prometheus_client import Gauge
+
+from app.pkg.settings import settings
+
+__all__ = ["APP_NAME", "APP_INFO"]
+
+#: str: Value of ``app_name`` label of all metrics.
+APP_NAME = settings.API.INSTANCE_APP_NAME
+
+#: Gauge: Always 1. Used by grafana for list values of ``app_name`` variable.
+APP_INFO = Gauge("fastapi_app_info", "FastAPI application information.", ["app_name"])
+APP_INFO.labels(app_name=APP_NAME).set(1)
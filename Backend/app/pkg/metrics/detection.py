@@ -0,0 +1,70 @@
+"""Metrics of ship detection."""
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from app.pkg.metrics.app import APP_NAME
+
+__all__ = [
+    "DETECTION_STAGE_DURATION",
+    "DETECTION_PENDING",
+    "DETECTION_BATCH_SIZE",
+    "DETECTION_BATCH_OCCUPANCY",
+    "DETECTION_CACHE_LOOKUPS",
+    "DETECTION_TILES",
+]
+
+#: Tuple[float, ...]: Buckets of detection stages in seconds.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+#: Histogram: Time of one stage of detection of one image. Stages are
+#  ``decode``, ``queue``, ``read`` of tiles, ``preprocess``, ``inference``,
+#  ``postprocess`` and ``merge`` of tiles. ``queue`` is the wait for a batch
+#  to be run. ``decode`` of a TIFF read by tiles only parses its header.
+#  ``filter`` is the screen of tiles before the model.
+DETECTION_STAGE_DURATION = Histogram(
+    "detection_stage_duration_seconds",
+    "Time of stage of ship detection of one image.",
+    ["app_name", "stage"],
+    buckets=BUCKETS,
+)
+
+#: Gauge: Count of images being detected or waiting for a worker.
+DETECTION_PENDING = Gauge(
+    "detection_pending",
+    "Count of images being detected or waiting for a worker.",
+    ["app_name"],
+).labels(app_name=APP_NAME)
+
+#: Histogram: Count of images in one run of model by batching scheduler.
+DETECTION_BATCH_SIZE = Histogram(
+    "detection_batch_size",
+    "Count of images in one run of detection model.",
+    ["app_name"],
+    buckets=(1, 2, 3, 4, 6, 8, 12, 16, 24, 32),
+).labels(app_name=APP_NAME)
+
+#: Histogram: Share of max batch size filled by one run of model. Low values
+#  under load mean the batching window is too short.
+DETECTION_BATCH_OCCUPANCY = Histogram(
+    "detection_batch_occupancy",
+    "Share of max batch size filled by one run of detection model.",
+    ["app_name"],
+    buckets=(0.125, 0.25, 0.375, 0.5, 0.625, 0.75, 0.875, 1.0),
+).labels(app_name=APP_NAME)
+
+#: Counter: Lookups of cached results of detection by ``result``: ``memory``
+#  and ``database`` are hits of in-process cache and of the table, ``miss``
+#  is run by model.
+DETECTION_CACHE_LOOKUPS = Counter(
+    "detection_cache_lookups",
+    "Count of lookups of cached results of detection.",
+    ["app_name", "result"],
+)
+
+#: Counter: Tiles of large scenes by ``result``: ``processed`` are run by
+#  model, ``skipped`` are screened out as water, cloud or land before it.
+DETECTION_TILES = Counter(
+    "detection_tiles",
+    "Count of tiles of large scenes run by detection model or skipped.",
+    ["app_name", "result"],
+)
@@ -0,0 +1,131 @@
+"""Metrics of postgresql connection pool.
+
+Notes:
+    Wait time and query time are recorded by
+    :func:`.acquire_connection`. Count of connections is read from the pool
+    on every scrape by :class:`.PoolCollector`, so gauges are never stale.
+"""
+
+from typing import TYPE_CHECKING, Dict, Iterator, Union
+
+from aiopg import Pool
+from prometheus_client import REGISTRY, Counter, Gauge, Histogram
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+from app.pkg.metrics.app import APP_NAME
+
+if TYPE_CHECKING:
+    from app.pkg.connectors.postgresql.asyncpg_pool import AsyncpgPool
+
+__all__ = [
+    "ACQUIRE_WAIT",
+    "ACQUIRE_WAITING",
+    "ACQUIRE_TIMEOUTS",
+    "QUERY_DURATION",
+    "PoolCollector",
+    "register_pool",
+    "unregister_pool",
+]
+
+#: Tuple[float, ...]: Buckets of wait and query time in seconds.
+BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+#: Histogram: Time of waiting for a free connection of pool.
+ACQUIRE_WAIT = Histogram(
+    "postgres_pool_acquire_duration_seconds",
+    "Time of waiting for a free connection of postgresql pool.",
+    ["app_name"],
+    buckets=BUCKETS,
+).labels(app_name=APP_NAME)
+
+#: Gauge: Count of coroutines waiting for a free connection of pool.
+ACQUIRE_WAITING = Gauge(
+    "postgres_pool_acquire_waiting",
+    "Count of coroutines waiting for a free connection of postgresql pool.",
+    ["app_name"],
+).labels(app_name=APP_NAME)
+
+#: Counter: Count of acquires which were not completed in time.
+ACQUIRE_TIMEOUTS = Counter(
+    "postgres_pool_acquire_timeouts",
+    "Count of acquires of postgresql pool which were not completed in time.",
+    ["app_name"],
+).labels(app_name=APP_NAME)
+
+#: Histogram: Time of query execution, without waiting for a connection.
+QUERY_DURATION = Histogram(
+    "postgres_query_duration_seconds",
+    "Time of postgresql query execution.",
+    ["app_name"],
+    buckets=BUCKETS,
+).labels(app_name=APP_NAME)
+
+
+class PoolCollector(Collector):
+    """Collect count of connections of pools on scrape.
+
+    Attributes:
+        pools: ``aiopg`` pools or ``asyncpg`` pool facades by name. Name is
+            set as ``pool`` label, e.g. ``primary`` or ``replica-0``.
+    """
+
+    pools: Dict[str, Union[Pool, "AsyncpgPool"]]
+
+    def __init__(self):
+        self.pools = {}
+
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        connections = GaugeMetricFamily(
+            "postgres_pool_connections",
+            "Count of connections of postgresql pool by state.",
+            labels=["app_name", "pool", "state"],
+        )
+        limits = {
+            name: GaugeMetricFamily(
+                f"postgres_pool_{name}_connections",
+                f"{name.capitalize()} count of connections of postgresql pool.",
+                labels=["app_name", "pool"],
+            )
+            for name in ("min", "max")
+        }
+        for name, pool in self.pools.items():
+            free = pool.freesize
+            connections.add_metric([APP_NAME, name, "in_use"], pool.size - free)
+            connections.add_metric([APP_NAME, name, "free"], free)
+            limits["min"].add_metric([APP_NAME, name], pool.minsize)
+            limits["max"].add_metric([APP_NAME, name], pool.maxsize)
+
+        yield connections
+        yield from limits.values()
+
+
+_collector = PoolCollector()
+REGISTRY.register(_collector)
+
+
+def register_pool(pool: Union[Pool, "AsyncpgPool"], name: str = "primary") -> None:
+    """Collect connections of ``pool``. Replaces a previous pool with the
+    same name.
+
+    Args:
+        pool: Created connection pool.
+        name: Value of ``pool`` label.
+    """
+
+    _collector.pools[name] = pool
+
+
+def unregister_pool(pool: Union[Pool, "AsyncpgPool"]) -> None:
+    """Stop collecting connections of ``pool``.
+
+    Args:
+        pool: Closed connection pool.
+    """
+
+    for name, registered in list(_collector.pools.items()):
+        if registered is pool:
+            del _collector.pools[name]
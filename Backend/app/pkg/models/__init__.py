@@ -11,16 +11,35 @@ from app.pkg.models.app.user import (
     User,
     CreateUserRequest,
     CreateUserCommand,
-    CreateUserResponse
+    CreateUserResponse,
+    ReadUserQuery,
+    ReadUserByEmailQuery,
+    ImportUserRequest,
+    ImportedUser,
+    UserImportFailureReason,
+    UserImportFailure,
+    UserImportReport,
+)
+
+from app.pkg.models.app.auth import (
+    LoginRequest,
+    RefreshTokenRequest,
+    TokenClaims,
+    TokenPair,
+    TokenType,
 )
 
 
 
 
+from app.pkg.models.app.api_key import ApiKey, RateLimitScope
 from app.pkg.models.app.city import (
     City,
+    CityCursor,
+    CityPage,
     CreateCityCommand,
     DeleteCityCommand,
+    ReadAllCitiesQuery,
     ReadCityByCountryQuery,
     ReadCityQuery,
     UpdateCityCommand,
@@ -43,6 +62,33 @@ from app.pkg.models.app.country import (
     ReadCountryQuery,
     UpdateCountryCommand,
 )
+from app.pkg.models.app.detection import (
+    Detection,
+    DetectionResponse,
+    OrientedBox,
+)
+from app.pkg.models.app.detection_result import (
+    CachedDetectionResult,
+    CreateDetectionResultCommand,
+    DetectionResultKey,
+    PurgeDetectionResultsCommand,
+    PurgeDetectionResultsResponse,
+)
+from app.pkg.models.app.detection_job import (
+    ClaimDetectionJobCommand,
+    CompleteDetectionJobCommand,
+    CreateDetectionJobCommand,
+    CreateDetectionJobResponse,
+    DeleteFinishedDetectionJobsCommand,
+    DetectionJob,
+    DetectionJobImage,
+    DetectionJobInput,
+    DetectionJobStatus,
+    FailDetectionJobCommand,
+    ReadDetectionJobQuery,
+    RequeueStaleDetectionJobsCommand,
+    UpdateDetectionJobProgressCommand,
+)
 from app.pkg.models.app.direction import (
     CreateDirectionCommand,
     DeleteDirectionCommand,
@@ -51,6 +97,7 @@ from app.pkg.models.app.direction import (
     ReadDirectionQuery,
     UpdateDirectionCommand,
 )
+from app.pkg.models.app.profiling import SlowQuery
 from app.pkg.models.app.partner import (
     CreatePartnerCommand,
     DeletePartnerCommand,
@@ -0,0 +1,61 @@
+"""Models of API keys."""
+
+from typing import Optional
+
+from pydantic import Field, NonNegativeInt, PositiveFloat, PositiveInt
+
+from app.pkg.models.base import BaseEnum, BaseModel
+
+__all__ = ["ApiKey", "RateLimitScope"]
+
+
+class RateLimitScope(BaseEnum):
+    """Budget of API key used by a route."""
+
+    #: Cheap reads, e.g. cities.
+    READ = "read"
+    #: Expensive routes, e.g. upload and detection.
+    EXPENSIVE = "expensive"
+
+
+class ApiKeyFields:
+    id = Field(description="API key ID", examples=[1])
+    name = Field(description="Name of client", examples=["harbour-monitor"])
+    key_hash = Field(
+        description="Hex encoded SHA-256 of API key",
+        examples=["2bb80d537b1da3e38bd30361aa855686bde0eacd7162fef6a25fe97bf527a25b"],
+    )
+    read_rate = Field(
+        default=None,
+        description="Tokens per second of read budget. Default if null",
+        examples=[20.0],
+    )
+    read_burst = Field(
+        default=None,
+        description="Capacity of read budget. Default if null",
+        examples=[40],
+    )
+    expensive_rate = Field(
+        default=None,
+        description="Tokens per second of expensive budget. Default if null",
+        examples=[0.5],
+    )
+    expensive_burst = Field(
+        default=None,
+        description="Capacity of expensive budget. Default if null",
+        examples=[4],
+    )
+
+
+class BaseApiKey(BaseModel):
+    """Base model for API key."""
+
+
+class ApiKey(BaseApiKey):
+    id: NonNegativeInt = ApiKeyFields.id
+    name: str = ApiKeyFields.name
+    key_hash: str = ApiKeyFields.key_hash
+    read_rate: Optional[PositiveFloat] = ApiKeyFields.read_rate
+    read_burst: Optional[PositiveInt] = ApiKeyFields.read_burst
+    expensive_rate: Optional[PositiveFloat] = ApiKeyFields.expensive_rate
+    expensive_burst: Optional[PositiveInt] = ApiKeyFields.expensive_burst
@@ -0,0 +1,118 @@
+"""Models of JWT authentication."""
+
+from pydantic import EmailStr, Field, PositiveInt, SecretStr
+
+from app.pkg.models.app.user_roles import UserRoleID
+from app.pkg.models.base import BaseEnum, BaseModel
+
+__all__ = [
+    "TokenType",
+    "TokenClaims",
+    "TokenPair",
+    "LoginRequest",
+    "RefreshTokenRequest",
+]
+
+
+class TokenType(BaseEnum):
+    """Purpose of token. Stored in ``type`` claim."""
+
+    #: Short-lived token sent in ``Authorization: Bearer`` header.
+    ACCESS = "access"
+    #: Long-lived token exchanged for a new token pair.
+    REFRESH = "refresh"
+
+
+class AuthFields:
+    email = Field(
+        description="User email",
+        examples=["example@mail.com"],
+    )
+    password = Field(
+        description="User password",
+        examples=["SecurePass123"],
+    )
+    access_token = Field(
+        description="Access token. Send it in `Authorization: Bearer` header.",
+        examples=["eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9..."],
+    )
+    refresh_token = Field(
+        description="Refresh token. Exchange it for a new token pair.",
+        examples=["eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9..."],
+    )
+    token_type = Field(
+        default="bearer",
+        description="Type of access token",
+        examples=["bearer"],
+    )
+    expires_in = Field(
+        description="Lifetime of access token in seconds",
+        examples=[900],
+    )
+    sub = Field(
+        description="User ID",
+        examples=["1"],
+    )
+    role_id = Field(
+        description="User role ID. 1 - ADMIN. 2 - DEFAULT",
+        examples=[1],
+    )
+    type = Field(
+        description="Purpose of token",
+        examples=["access"],
+    )
+    iss = Field(
+        description="Issuer of token",
+        examples=["ships"],
+    )
+    iat = Field(
+        description="Unix time when token was issued",
+        examples=[1760772000],
+    )
+    exp = Field(
+        description="Unix time when token expires",
+        examples=[1760772900],
+    )
+    jti = Field(
+        description="Unique ID of token",
+        examples=["9f1c2e5a4b6d4c0f8e7a1b2c3d4e5f60"],
+    )
+
+
+class BaseAuth(BaseModel):
+    """Base model for authentication."""
+
+
+# Requests
+class LoginRequest(BaseAuth):
+    email: EmailStr = AuthFields.email
+    password: SecretStr = AuthFields.password
+
+
+class RefreshTokenRequest(BaseAuth):
+    refresh_token: str = AuthFields.refresh_token
+
+
+# Claims
+class TokenClaims(BaseAuth):
+    sub: str = AuthFields.sub
+    role_id: UserRoleID = AuthFields.role_id
+    type: TokenType = AuthFields.type
+    iss: str = AuthFields.iss
+    iat: int = AuthFields.iat
+    exp: int = AuthFields.exp
+    jti: str = AuthFields.jti
+
+    @property
+    def user_id(self) -> int:
+        """ID of authenticated user."""
+
+        return int(self.sub)
+
+
+# Responses
+class TokenPair(BaseAuth):
+    access_token: str = AuthFields.access_token
+    refresh_token: str = AuthFields.refresh_token
+    token_type: str = AuthFields.token_type
+    expires_in: PositiveInt = AuthFields.expires_in
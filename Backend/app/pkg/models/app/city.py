@@ -1,7 +1,9 @@
 """Models of city object."""
 
+from typing import List, Optional
+
 from pydantic.fields import Field
-from pydantic.types import PositiveInt
+from pydantic.types import NonNegativeInt, PositiveInt
 
 from app.pkg.models.base import BaseModel
 
@@ -10,6 +12,9 @@ __all__ = [
     "CreateCityCommand",
     "ReadCityQuery",
     "ReadCityByCountryQuery",
+    "ReadAllCitiesQuery",
+    "CityPage",
+    "CityCursor",
     "UpdateCityCommand",
     "DeleteCityCommand",
 ]
@@ -24,6 +29,22 @@ class CityFields:
     name: PositiveInt = Field(description="City name.", examples=["Moscow"])
     code: str = Field(description="City code.", examples=["MSK"], pattern=r"^[A-Z]{3}$")
     country_id: PositiveInt = Field(description="Country id.", examples=[1])
+    after_id: NonNegativeInt = Field(
+        default=0,
+        description="Return cities with id greater than this value.",
+        examples=[0],
+    )
+    limit: PositiveInt = Field(
+        default=100,
+        le=1000,
+        description="Max count of cities in page.",
+        examples=[100],
+    )
+    next_cursor: Optional[str] = Field(
+        default=None,
+        description="Opaque cursor of the next page. Null for the last page.",
+        examples=["eyJpZCI6NDJ9"],
+    )
 
 
 class _City(BaseCity):
@@ -56,3 +77,23 @@ class ReadCityQuery(BaseCity):
 
 class ReadCityByCountryQuery(BaseCity):
     country_id: PositiveInt = CityFields.country_id
+    after_id: NonNegativeInt = CityFields.after_id
+    limit: PositiveInt = CityFields.limit
+
+
+class ReadAllCitiesQuery(BaseCity):
+    after_id: NonNegativeInt = CityFields.after_id
+    limit: PositiveInt = CityFields.limit
+
+
+# Cursors.
+class CityCursor(BaseCity):
+    """Keys of the last city of a page, see :func:`.decode_cursor`."""
+
+    id: NonNegativeInt = CityFields.after_id
+
+
+# Responses.
+class CityPage(BaseCity):
+    items: List[City]
+    next_cursor: Optional[str] = CityFields.next_cursor
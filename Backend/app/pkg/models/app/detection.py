@@ -0,0 +1,63 @@
+"""Models of ship detection."""
+
+from typing import List, Tuple
+
+from pydantic import Field, NonNegativeFloat, NonNegativeInt, PositiveInt, confloat
+
+from app.pkg.models.base import BaseModel
+
+__all__ = ["OrientedBox", "Detection", "DetectionResponse"]
+
+
+class DetectionFields:
+    cx = Field(description="X of box center in pixels", examples=[412.5])
+    cy = Field(description="Y of box center in pixels", examples=[230.0])
+    box_width = Field(description="Longer side of box in pixels", examples=[96.3])
+    box_height = Field(description="Shorter side of box in pixels", examples=[21.8])
+    angle = Field(
+        description="Rotation of longer side from X axis in radians, [0, pi)",
+        examples=[0.52],
+    )
+    class_id = Field(description="Class ID", examples=[1])
+    class_name = Field(description="Class name", examples=["Cargo"])
+    score = Field(description="Confidence of detection", examples=[0.87])
+    box = Field(description="Oriented box")
+    polygon = Field(
+        description="Corners of box in pixels, clockwise",
+        examples=[[[360.1, 182.6], [443.6, 230.6], [432.7, 249.5], [349.3, 201.5]]],
+    )
+    image_width = Field(description="Width of image in pixels", examples=[640])
+    image_height = Field(description="Height of image in pixels", examples=[640])
+    model_version = Field(
+        description="First 12 hex chars of SHA-256 of model file",
+        examples=["3f9a1c0b7d2e"],
+    )
+    detections = Field(description="Found ships sorted by score")
+
+
+class BaseDetection(BaseModel):
+    """Base model for detection."""
+
+
+class OrientedBox(BaseDetection):
+    cx: float = DetectionFields.cx
+    cy: float = DetectionFields.cy
+    width: NonNegativeFloat = DetectionFields.box_width
+    height: NonNegativeFloat = DetectionFields.box_height
+    angle: float = DetectionFields.angle
+
+
+class Detection(BaseDetection):
+    class_id: NonNegativeInt = DetectionFields.class_id
+    class_name: str = DetectionFields.class_name
+    score: confloat(ge=0, le=1) = DetectionFields.score
+    box: OrientedBox = DetectionFields.box
+    polygon: List[Tuple[float, float]] = DetectionFields.polygon
+
+
+# Responses
+class DetectionResponse(BaseDetection):
+    width: PositiveInt = DetectionFields.image_width
+    height: PositiveInt = DetectionFields.image_height
+    model_version: str = DetectionFields.model_version
+    detections: List[Detection] = DetectionFields.detections
@@ -0,0 +1,173 @@
+"""Models of asynchronous detection jobs."""
+
+from datetime import datetime
+from typing import Optional
+
+from pydantic import UUID4, Field, Json, NonNegativeInt, PositiveInt, confloat
+
+from app.pkg.models.app.detection import DetectionResponse
+from app.pkg.models.base import BaseEnum, BaseModel
+
+__all__ = [
+    "DetectionJobStatus",
+    "DetectionJob",
+    "CreateDetectionJobResponse",
+    "DetectionJobInput",
+    "DetectionJobImage",
+    "CreateDetectionJobCommand",
+    "ReadDetectionJobQuery",
+    "ClaimDetectionJobCommand",
+    "UpdateDetectionJobProgressCommand",
+    "CompleteDetectionJobCommand",
+    "FailDetectionJobCommand",
+    "RequeueStaleDetectionJobsCommand",
+    "DeleteFinishedDetectionJobsCommand",
+]
+
+
+class DetectionJobStatus(BaseEnum):
+    """Status of detection job."""
+
+    #: Waiting for a worker.
+    QUEUED = "queued"
+    #: Claimed by a worker.
+    RUNNING = "running"
+    #: Finished, ``result`` is set.
+    SUCCEEDED = "succeeded"
+    #: Finished, ``error`` is set.
+    FAILED = "failed"
+
+
+class DetectionJobFields:
+    id = Field(
+        description="Detection job ID",
+        examples=["1b4e28ba-2fa1-41d2-883f-0016d3cca427"],
+    )
+    status = Field(description="Status of job", examples=[DetectionJobStatus.QUEUED])
+    conf = Field(
+        default=None,
+        description="Min confidence of boxes. Default of server if null",
+        examples=[0.25],
+    )
+    progress = Field(
+        description="Share of tiles of image already detected, [0, 1]",
+        examples=[0.4],
+    )
+    attempts = Field(description="Count of runs of job by workers", examples=[1])
+    error = Field(
+        default=None,
+        description="Reason of failure",
+        examples=["Image can not be decoded."],
+    )
+    result = Field(default=None, description="Found ships, set when job succeeded")
+    created_at = Field(description="Time of creation of job")
+    started_at = Field(default=None, description="Time of the last claim by worker")
+    finished_at = Field(default=None, description="Time of success or failure")
+    image_path = Field(
+        description="Name of uploaded image in storage of jobs",
+        examples=["5f0c8e1d9a7b4c2e8f3a6b1d0c9e7f2a"],
+    )
+    image_sha256 = Field(description="SHA-256 of uploaded image")
+    worker = Field(
+        description="Name of worker process",
+        examples=["detection-worker-1:4242"],
+    )
+    stale_after = Field(
+        description="Seconds without heartbeat after which a job is stale",
+        examples=[120],
+    )
+    max_attempts = Field(
+        description="Count of runs after which a job is not retried",
+        examples=[3],
+    )
+    retry = Field(description="Queue job again instead of failing it")
+    older_than = Field(
+        description="Seconds since finish after which a job is deleted",
+        examples=[604800],
+    )
+
+
+class BaseDetectionJob(BaseModel):
+    """Base model for detection job."""
+
+
+class DetectionJob(BaseDetectionJob):
+    id: UUID4 = DetectionJobFields.id
+    status: DetectionJobStatus = DetectionJobFields.status
+    conf: Optional[confloat(gt=0, lt=1)] = DetectionJobFields.conf
+    progress: confloat(ge=0, le=1) = DetectionJobFields.progress
+    attempts: NonNegativeInt = DetectionJobFields.attempts
+    error: Optional[str] = DetectionJobFields.error
+    result: Optional[Json[DetectionResponse]] = DetectionJobFields.result
+    created_at: datetime = DetectionJobFields.created_at
+    started_at: Optional[datetime] = DetectionJobFields.started_at
+    finished_at: Optional[datetime] = DetectionJobFields.finished_at
+
+
+class DetectionJobInput(BaseDetectionJob):
+    """Claimed job with its image."""
+
+    id: UUID4 = DetectionJobFields.id
+    conf: Optional[confloat(gt=0, lt=1)] = DetectionJobFields.conf
+    attempts: PositiveInt = DetectionJobFields.attempts
+    image_path: str = DetectionJobFields.image_path
+    image_sha256: bytes = DetectionJobFields.image_sha256
+
+
+class DetectionJobImage(BaseDetectionJob):
+    """Job requeued or deleted by maintenance with its image."""
+
+    id: UUID4 = DetectionJobFields.id
+    status: DetectionJobStatus = DetectionJobFields.status
+    image_path: str = DetectionJobFields.image_path
+
+
+# Responses
+class CreateDetectionJobResponse(BaseDetectionJob):
+    id: UUID4 = DetectionJobFields.id
+    status: DetectionJobStatus = DetectionJobFields.status
+    created_at: datetime = DetectionJobFields.created_at
+
+
+# Commands
+class CreateDetectionJobCommand(BaseDetectionJob):
+    image_path: str = DetectionJobFields.image_path
+    image_sha256: bytes = DetectionJobFields.image_sha256
+    conf: Optional[confloat(gt=0, lt=1)] = DetectionJobFields.conf
+
+
+class ClaimDetectionJobCommand(BaseDetectionJob):
+    worker: str = DetectionJobFields.worker
+
+
+class UpdateDetectionJobProgressCommand(BaseDetectionJob):
+    id: UUID4 = DetectionJobFields.id
+    attempts: PositiveInt = DetectionJobFields.attempts
+    progress: confloat(ge=0, le=1) = DetectionJobFields.progress
+
+
+class CompleteDetectionJobCommand(BaseDetectionJob):
+    id: UUID4 = DetectionJobFields.id
+    attempts: PositiveInt = DetectionJobFields.attempts
+    result: DetectionResponse = DetectionJobFields.result
+
+
+class FailDetectionJobCommand(BaseDetectionJob):
+    id: UUID4 = DetectionJobFields.id
+    attempts: PositiveInt = DetectionJobFields.attempts
+    error: str = DetectionJobFields.error
+    retry: bool = DetectionJobFields.retry
+
+
+class RequeueStaleDetectionJobsCommand(BaseDetectionJob):
+    stale_after: PositiveInt = DetectionJobFields.stale_after
+    max_attempts: PositiveInt = DetectionJobFields.max_attempts
+
+
+class DeleteFinishedDetectionJobsCommand(BaseDetectionJob):
+    older_than: PositiveInt = DetectionJobFields.older_than
+
+
+# Query
+class ReadDetectionJobQuery(BaseDetectionJob):
+    id: UUID4 = DetectionJobFields.id
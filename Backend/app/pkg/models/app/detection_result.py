@@ -0,0 +1,71 @@
+"""Models of cached results of ship detection."""
+
+from pydantic import Field, Json, NonNegativeInt, PositiveInt, confloat
+
+from app.pkg.models.app.detection import DetectionResponse
+from app.pkg.models.base import BaseModel
+
+__all__ = [
+    "DetectionResultKey",
+    "CachedDetectionResult",
+    "CreateDetectionResultCommand",
+    "PurgeDetectionResultsCommand",
+    "PurgeDetectionResultsResponse",
+]
+
+
+class DetectionResultFields:
+    image_sha256 = Field(description="SHA-256 of encoded image")
+    model_version = Field(
+        description="First 12 hex chars of SHA-256 of model file",
+        examples=["3f9a1c0b7d2e"],
+    )
+    settings_fingerprint = Field(
+        description="First 12 hex chars of SHA-256 of settings of detection "
+        "which change results",
+        examples=["b41d0e6c9a27"],
+    )
+    imgsz = Field(description="Size of model input", examples=[640])
+    conf = Field(description="Min confidence of boxes", examples=[0.25])
+    result = Field(description="Found ships")
+    deleted = Field(description="Count of deleted results", examples=[42])
+
+
+class BaseDetectionResult(BaseModel):
+    """Base model for cached detection result."""
+
+
+class DetectionResultKey(BaseDetectionResult):
+    image_sha256: bytes = DetectionResultFields.image_sha256
+    model_version: str = DetectionResultFields.model_version
+    settings_fingerprint: str = DetectionResultFields.settings_fingerprint
+    imgsz: PositiveInt = DetectionResultFields.imgsz
+    conf: confloat(gt=0, lt=1) = DetectionResultFields.conf
+
+    def cache_key(self) -> str:
+        """Key of result in in-process cache. Starts with model version, so
+        results of one model are deleted by prefix."""
+
+        return (
+            f"{self.model_version}:{self.settings_fingerprint}:{self.imgsz}:"
+            f"{self.conf}:{self.image_sha256.hex()}"
+        )
+
+
+class CachedDetectionResult(BaseDetectionResult):
+    result: Json[DetectionResponse] = DetectionResultFields.result
+
+
+# Responses
+class PurgeDetectionResultsResponse(BaseDetectionResult):
+    model_version: str = DetectionResultFields.model_version
+    deleted: NonNegativeInt = DetectionResultFields.deleted
+
+
+# Commands
+class CreateDetectionResultCommand(DetectionResultKey):
+    result: DetectionResponse = DetectionResultFields.result
+
+
+class PurgeDetectionResultsCommand(BaseDetectionResult):
+    model_version: str = DetectionResultFields.model_version
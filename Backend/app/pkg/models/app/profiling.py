@@ -0,0 +1,54 @@
+"""Models of repository profiling."""
+
+from datetime import datetime
+from typing import Optional
+
+from pydantic.fields import Field
+from pydantic.types import NonNegativeFloat, PositiveInt
+
+from app.pkg.models.base import BaseModel
+
+__all__ = ["SlowQuery"]
+
+
+class BaseProfiling(BaseModel):
+    """Base model for profiling."""
+
+
+class ProfilingFields:
+    repository: str = Field(
+        description="Class of repository.",
+        examples=["CityRepository"],
+    )
+    method: str = Field(description="Method of repository.", examples=["read_all"])
+    query: str = Field(
+        description="Statement executed by the method. Without parameters.",
+        examples=["select id, name, code, country_id from cities where id > $1"],
+    )
+    duration_ms: NonNegativeFloat = Field(
+        description="The longest execution of the statement in milliseconds.",
+        examples=[512.4],
+    )
+    calls: PositiveInt = Field(
+        description="Count of executions of the statement longer than threshold.",
+        examples=[3],
+    )
+    plan: Optional[str] = Field(
+        default=None,
+        description="Output of EXPLAIN (ANALYZE, BUFFERS). Null until captured.",
+        examples=["Seq Scan on cities  (cost=0.00..1.01 rows=1 width=48) ..."],
+    )
+    last_seen_at: datetime = Field(
+        description="Time of the last slow call.",
+        examples=["2026-10-18T12:00:00"],
+    )
+
+
+class SlowQuery(BaseProfiling):
+    repository: str = ProfilingFields.repository
+    method: str = ProfilingFields.method
+    query: str = ProfilingFields.query
+    duration_ms: NonNegativeFloat = ProfilingFields.duration_ms
+    calls: PositiveInt = ProfilingFields.calls
+    plan: Optional[str] = ProfilingFields.plan
+    last_seen_at: datetime = ProfilingFields.last_seen_at
@@ -1,15 +1,20 @@
+import re
+from typing import List, Optional
 from unittest.mock import DEFAULT
 
 from app.pkg.models import UserRoleName
 from app.pkg.models.app.user_roles import UserRoleEnum
-from app.pkg.models.base import BaseModel
+from app.pkg.models.base import BaseEnum, BaseModel
+from app.pkg.models.types import EncryptedSecretBytes
 from pydantic import (
     Field,
-    SecretStr,
+    NonNegativeInt,
     SecretBytes,
+    SecretStr,
     EmailStr,
     PositiveInt,
     field_validator,
+    model_validator,
 )
 
 __all__ = [
@@ -17,8 +22,30 @@ __all__ = [
     "CreateUserRequest",
     "CreateUserCommand",
     "CreateUserResponse",
+    "ReadUserQuery",
+    "ReadUserByEmailQuery",
+    "ImportUserRequest",
+    "ImportedUser",
+    "UserImportFailureReason",
+    "UserImportFailure",
+    "UserImportReport",
 ]
 
+#: re.Pattern: bcrypt hash in modular crypt format.
+BCRYPT_HASH = re.compile(r"^\$2[aby]\$\d{2}\$[./A-Za-z0-9]{53}$")
+
+
+def _check_password_complexity(v: SecretStr) -> SecretStr:
+    password = v.get_secret_value()
+
+    if not any(c.isupper() for c in password):
+        raise ValueError("Password must contain minimum 1 uppercase letter")
+
+    if not any(c.isdigit() for c in password):
+        raise ValueError("Password must contain minimum 1 digit")
+
+    return v
+
 class UserFields:
     id = Field(
         description="User ID",
@@ -54,6 +81,29 @@ class UserFields:
         examples=["True", "False"],
     )
 
+    import_password = Field(
+        default=None,
+        description="Plain password. Same rules as on signup",
+        min_length=6,
+        max_length=64,
+        examples=["SecurePass123"],
+    )
+    password_hash = Field(
+        default=None,
+        description="bcrypt hash of password migrated from another system",
+        examples=["$2b$12$J5VIrGK4sjv1wvN6z4EK3.ZGuMxy.IxOGaDijNpq09KbBnYeauQii"],
+    )
+
+    line = Field(description="Line of upload", examples=[2])
+    reason = Field(description="Why user was not created", examples=["already_exists"])
+    detail = Field(
+        default=None,
+        description="Validation errors of line",
+        examples=["value is not a valid email address"],
+    )
+    created = Field(description="Count of created users", examples=[9998])
+    failed = Field(description="Lines which were not imported")
+
 
 class BaseUser(BaseModel):
     """User base model"""
@@ -67,21 +117,40 @@ class CreateUserRequest(BaseUser):
     @field_validator('password', mode="after")
     @classmethod
     def validate_password_complexity(cls, v: SecretStr) -> SecretStr:
-        password = v.get_secret_value()
+        return _check_password_complexity(v)
 
-        if not any(c.isupper() for c in password):
-            raise ValueError("Password must contain minimum 1 uppercase letter")
 
-        if not any(c.isdigit() for c in password):
-            raise ValueError("Password must contain minimum 1 digit")
+class ImportUserRequest(BaseUser):
+    email: EmailStr = UserFields.email
+    password: Optional[SecretStr] = UserFields.import_password
+    password_hash: Optional[SecretStr] = UserFields.password_hash
 
+    @field_validator('password', mode="after")
+    @classmethod
+    def validate_password_complexity(
+        cls,
+        v: Optional[SecretStr],
+    ) -> Optional[SecretStr]:
+        return v if v is None else _check_password_complexity(v)
+
+    @field_validator('password_hash', mode="after")
+    @classmethod
+    def validate_password_hash(cls, v: Optional[SecretStr]) -> Optional[SecretStr]:
+        if v is not None and not BCRYPT_HASH.match(v.get_secret_value()):
+            raise ValueError("Password hash must be a bcrypt hash")
         return v
 
+    @model_validator(mode="after")
+    def validate_one_password(self) -> "ImportUserRequest":
+        if (self.password is None) == (self.password_hash is None):
+            raise ValueError("Exactly one of password and password_hash is required")
+        return self
+
 
 # Commands (DataBase)
 class CreateUserCommand(BaseUser):
     email: EmailStr = UserFields.email
-    password: SecretBytes = UserFields.encrypted_password
+    password: EncryptedSecretBytes = UserFields.encrypted_password
 
 #
 class User(BaseUser):
@@ -89,10 +158,47 @@ class User(BaseUser):
     email: EmailStr = UserFields.email
     role_id: PositiveInt = UserFields.role_id
     is_activated: bool = UserFields.is_activated
-    password: SecretStr = UserFields.encrypted_password
+    password: SecretBytes = UserFields.encrypted_password
+
+
+class ImportedUser(BaseUser):
+    id: PositiveInt = UserFields.id
+    email: EmailStr = UserFields.email
+
+
+# Queries
+class ReadUserQuery(BaseUser):
+    id: PositiveInt = UserFields.id
+
+
+class ReadUserByEmailQuery(BaseUser):
+    email: EmailStr = UserFields.email
 
 
 # Responses
 class CreateUserResponse(BaseUser):
     email: EmailStr = UserFields.email
     role_name: UserRoleName = UserRoleEnum.DEFAULT.name
+
+
+class UserImportFailureReason(BaseEnum):
+    """Why line of user import was skipped."""
+
+    #: Line could not be parsed or validated.
+    INVALID = "invalid"
+    #: User with this email already exists.
+    ALREADY_EXISTS = "already_exists"
+    #: Email is repeated in upload. The first line is imported.
+    DUPLICATE = "duplicate"
+
+
+class UserImportFailure(BaseUser):
+    line: PositiveInt = UserFields.line
+    email: Optional[str] = Field(default=None, description="User email")
+    reason: UserImportFailureReason = UserFields.reason
+    detail: Optional[str] = UserFields.detail
+
+
+class UserImportReport(BaseUser):
+    created: NonNegativeInt = UserFields.created
+    failed: List[UserImportFailure] = UserFields.failed
@@ -1,6 +1,6 @@
 """Base exception for API."""
 
-from typing import Optional, Union
+from typing import Dict, Optional, Union
 
 from fastapi import HTTPException
 from starlette import status
@@ -18,6 +18,8 @@ class BaseAPIException(HTTPException):
             Message of exception.
         status_code:
             Status code of exception.
+        headers:
+            Headers of response, e.g. ``Retry-After``.
 
     Examples:
         Before using this class, you must create your own exception class.
@@ -40,6 +42,7 @@ class BaseAPIException(HTTPException):
 
     message: Optional[Union[NotEmptyStr, str]] = "Base API Exception"
     status_code: int = status.HTTP_500_INTERNAL_SERVER_ERROR
+    headers: Optional[Dict[str, str]] = None
 
     def __init__(self, message: Optional[Union[NotEmptyStr, str, Exception]] = None):
         """Init BaseAPIException.
@@ -54,4 +57,8 @@ class BaseAPIException(HTTPException):
         if isinstance(message, Exception):
             self.message = str(message)
 
-        super().__init__(status_code=self.status_code, detail=self.message)
+        super().__init__(
+            status_code=self.status_code,
+            detail=self.message,
+            headers=self.headers,
+        )
@@ -0,0 +1,15 @@
+"""Models of JWT authentication."""
+
+from app.pkg.models.base import BaseEnum
+
+__all__ = ["JWTAlgorithm"]
+
+
+class JWTAlgorithm(BaseEnum):
+    """Algorithm used by :class:`.JWTManager` to sign tokens."""
+
+    #: HMAC with SHA-256. Tokens are signed and verified by one shared secret.
+    HS256 = "HS256"
+    #: Ed25519 signature. Services which only verify tokens need the public
+    #  key only.
+    EDDSA = "EdDSA"
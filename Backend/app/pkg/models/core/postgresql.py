@@ -0,0 +1,33 @@
+"""Models of postgresql connectors."""
+
+from app.pkg.models.base import BaseEnum
+
+__all__ = ["PostgresDriver", "ReplicaBalancing", "PostgresRoute"]
+
+
+class PostgresDriver(BaseEnum):
+    """Driver used by :class:`.PostgresSQL` container for build connection
+    pool."""
+
+    #: psycopg2 text protocol through ``aiopg`` pool.
+    AIOPG = "aiopg"
+    #: Binary protocol with per-connection prepared statements through ``asyncpg``.
+    ASYNCPG = "asyncpg"
+
+
+class ReplicaBalancing(BaseEnum):
+    """Selection of read replica by :class:`.ReplicaSet`."""
+
+    #: Replicas are selected one by one.
+    ROUND_ROBIN = "round_robin"
+    #: Replica with the most free connections is selected.
+    LEAST_BUSY = "least_busy"
+
+
+class PostgresRoute(BaseEnum):
+    """Pool used by :func:`.get_connection`."""
+
+    #: Primary server. Used for writes and reads that must see own writes.
+    PRIMARY = "primary"
+    #: Healthy read replica or primary if there is no healthy replica.
+    REPLICA = "replica"
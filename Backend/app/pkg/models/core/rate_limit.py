@@ -0,0 +1,14 @@
+"""Models of rate limiting."""
+
+from app.pkg.models.base import BaseEnum
+
+__all__ = ["RateLimitBackend"]
+
+
+class RateLimitBackend(BaseEnum):
+    """Storage of token buckets used by :class:`.ApiKeyService`."""
+
+    #: Buckets in memory of the process. Every uvicorn worker has own limits.
+    MEMORY = "memory"
+    #: Buckets in an unlogged postgresql table shared by all workers.
+    POSTGRESQL = "postgresql"
@@ -10,5 +10,6 @@ Examples:
 """
 
 from app.pkg.models.exceptions.user import (
-    UserAlreadyExists
+    UserAlreadyExists,
+    InvalidEmailOrPassword,
 )
\ No newline at end of file
@@ -12,6 +12,7 @@ from app.pkg.models.exceptions import (
     repository,
     skill,
     skill_levels,
+    user,
 )
 
 __all__ = ["__aiopg__", "__constrains__"]
@@ -32,4 +33,5 @@ __constrains__ = {
     **skill_levels.__constrains__,
     **contacts.__constrains__,
     **partners.__constrains__,
+    **user.__constrains__,
 }
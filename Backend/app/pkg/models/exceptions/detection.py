@@ -0,0 +1,33 @@
+"""Exceptions for ship detection."""
+
+from starlette import status
+
+from app.pkg.models.base import BaseAPIException
+
+__all__ = [
+    "DetectorUnavailable",
+    "DetectionOverloaded",
+    "InvalidImage",
+    "DetectionJobNotFound",
+]
+
+
+class DetectorUnavailable(BaseAPIException):
+    message = "Detection model is not loaded."
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+
+
+class DetectionOverloaded(BaseAPIException):
+    message = "Too many requests for detection. Try again later."
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    headers = {"Retry-After": "1"}
+
+
+class InvalidImage(BaseAPIException):
+    message = "Image can not be decoded."
+    status_code = status.HTTP_400_BAD_REQUEST
+
+
+class DetectionJobNotFound(BaseAPIException):
+    message = "Detection job not found."
+    status_code = status.HTTP_404_NOT_FOUND
@@ -0,0 +1,24 @@
+"""Exceptions for JWT authentication."""
+
+from starlette import status
+
+from app.pkg.models.base import BaseAPIException
+
+__all__ = ["InvalidToken", "TokenExpired", "InsufficientRole"]
+
+
+class InvalidToken(BaseAPIException):
+    message = "Could not validate token."
+    status_code = status.HTTP_401_UNAUTHORIZED
+    headers = {"WWW-Authenticate": "Bearer"}
+
+
+class TokenExpired(BaseAPIException):
+    message = "Token has expired."
+    status_code = status.HTTP_401_UNAUTHORIZED
+    headers = {"WWW-Authenticate": 'Bearer error="invalid_token"'}
+
+
+class InsufficientRole(BaseAPIException):
+    message = "Role of user does not allow this action."
+    status_code = status.HTTP_403_FORBIDDEN
@@ -0,0 +1,12 @@
+"""Exceptions for paginated queries."""
+
+from starlette import status
+
+from app.pkg.models.base import BaseAPIException
+
+__all__ = ["InvalidCursor"]
+
+
+class InvalidCursor(BaseAPIException):
+    message = "Invalid pagination cursor."
+    status_code = status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,13 @@
+"""Exceptions for password hashing."""
+
+from starlette import status
+
+from app.pkg.models.base import BaseAPIException
+
+__all__ = ["PasswordHashingOverloaded"]
+
+
+class PasswordHashingOverloaded(BaseAPIException):
+    message = "Too many requests for password hashing. Try again later."
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    headers = {"Retry-After": "1"}
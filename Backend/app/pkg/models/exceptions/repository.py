@@ -9,6 +9,7 @@ __all__ = [
     "UniqueViolation",
     "EmptyResult",
     "DriverError",
+    "PoolTimeout",
 ]
 
 
@@ -40,3 +41,11 @@ class DriverError(BaseAPIException):
             self.details = details
 
         super().__init__()
+
+
+class PoolTimeout(BaseAPIException):
+    """Exception for waiting for a free connection longer than
+    :attr:`.Settings.POSTGRES.ACQUIRE_TIMEOUT`."""
+
+    message = "Database is busy. Try again later."
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
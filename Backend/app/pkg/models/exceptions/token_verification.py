@@ -1,12 +1,31 @@
 """Exceptions for token-based auth verification."""
 
+import math
+
 from starlette import status
 
 from app.pkg.models.base import BaseAPIException
 
-__all__ = ["InvalidCredentials"]
+__all__ = ["InvalidCredentials", "RateLimitExceeded"]
 
 
 class InvalidCredentials(BaseAPIException):
     message = "Could not validate credentials."
     status_code = status.HTTP_403_FORBIDDEN
+
+
+class RateLimitExceeded(BaseAPIException):
+    message = "Rate limit exceeded."
+    status_code = status.HTTP_429_TOO_MANY_REQUESTS
+
+    def __init__(self, retry_after: float):
+        """Init RateLimitExceeded.
+
+        Args:
+            retry_after:
+                Seconds until the request would be allowed. Sent in
+                ``Retry-After`` header rounded up to whole seconds.
+        """
+
+        self.headers = {"Retry-After": str(max(1, math.ceil(retry_after)))}
+        super().__init__()
@@ -0,0 +1,17 @@
+"""Exceptions for uploads."""
+
+from starlette import status
+
+from app.pkg.models.base import BaseAPIException
+
+__all__ = ["UnsupportedUploadFormat", "UploadTooLarge"]
+
+
+class UnsupportedUploadFormat(BaseAPIException):
+    message = "Unsupported format of upload. Use text/csv or application/x-ndjson."
+    status_code = status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+
+
+class UploadTooLarge(BaseAPIException):
+    message = "Upload is too large."
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
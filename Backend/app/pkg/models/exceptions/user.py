@@ -6,8 +6,19 @@ from app.pkg.models.base import BaseAPIException
 
 __all__ = [
     "UserAlreadyExists",
+    "InvalidEmailOrPassword",
 ]
 
 class UserAlreadyExists(BaseAPIException):
     message = "User already exists"
-    status_code = status.HTTP_409_CONFLICT
\ No newline at end of file
+    status_code = status.HTTP_409_CONFLICT
+
+
+class InvalidEmailOrPassword(BaseAPIException):
+    message = "Invalid email or password"
+    status_code = status.HTTP_401_UNAUTHORIZED
+
+
+__constrains__ = {
+    "users_email_key": UserAlreadyExists,
+}
@@ -1,33 +1,153 @@
 """Secret bytes types for pydantic models."""
 
-from typing import Any
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional, Union
+
 import bcrypt
+import pydantic
+from pydantic import GetCoreSchemaHandler, GetJsonSchemaHandler
+from pydantic.json_schema import JsonSchemaValue
+from pydantic_core import core_schema
 
 __all__ = ["EncryptedSecretBytes"]
 
-class EncryptedSecretBytes:
-    """Model for verify bytes range [6;100] and crypt than by bcrypt
-    algorithm."""
+
+class EncryptedSecretBytes(pydantic.SecretBytes):
+    """Password which is hashed by bcrypt exactly once.
+
+    Notes:
+        Validation only checks length of a plain password and wraps it, bcrypt
+        is not called. Instance of :class:`.EncryptedSecretBytes` passes
+        validation as is and deep copy returns the same instance, so
+        ``validate_assignment``, ``model_copy`` and conversion between
+        commands never hash it again. Hash is computed on the first
+        :meth:`.hash_with` (off the event loop) or :meth:`.get_secret_value`
+        (in the calling thread) and is kept by the instance.
+
+        Hash loaded from database must be wrapped by :meth:`.from_hash`,
+        raw bytes are always treated as a plain password.
+
+    Examples:
+        ::
+
+            >>> cmd = models.CreateUserCommand(email=email, password=b"Secure1")
+            >>> await cmd.password.hash_with(password_hasher.hash_bytes)
+            >>> cmd.to_dict(show_secrets=True)["password"]
+            '$2b$12$...'
+    """
 
     min_length = 6
     max_length = 100
 
-    def __init__(self, value: Any):
-        self.value = self.validate(value)
+    #: Optional[int]: Cost factor of hashing in the calling thread.
+    #  :attr:`.Settings.PASSWORD.BCRYPT_ROUNDS` if None.
+    rounds: Optional[int] = None
+
+    def __init__(self, secret_value: Union[bytes, str], hashed: bool = False):
+        if isinstance(secret_value, str):
+            secret_value = secret_value.encode("utf-8")
+        super().__init__(secret_value)
+        self._hashed = hashed
+        self._hashing: Optional[asyncio.Future] = None
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "EncryptedSecretBytes":
+        # Copies share the instance, so a hash of one is a hash of all.
+        return self
+
+    @classmethod
+    def from_hash(cls, hashed: Union[bytes, str]) -> "EncryptedSecretBytes":
+        """Wrap existing bcrypt hash."""
+
+        return cls(hashed, hashed=True)
+
+    @property
+    def is_hashed(self) -> bool:
+        return self._hashed
+
+    def get_secret_value(self) -> bytes:
+        """Get bcrypt hash. Hashes in the calling thread if the value is not
+        hashed yet."""
 
-    def __repr__(self) -> str:
-        return f"EncryptedSecretBytes(b'{self.value!r}')"
+        if not self._hashed:
+            salt = bcrypt.gensalt(rounds=self.__rounds())
+            self.__set_hash(bcrypt.hashpw(self._secret_value, salt))
+        return self._secret_value
+
+    @classmethod
+    def __rounds(cls) -> int:
+        if cls.rounds is not None:
+            return cls.rounds
+        # Settings import models, so they are read on the first hash.
+        from app.pkg.settings import settings
+
+        return settings.PASSWORD.BCRYPT_ROUNDS
+
+    async def hash_with(
+        self,
+        hash_fn: Callable[[bytes], Awaitable[bytes]],
+    ) -> "EncryptedSecretBytes":
+        """Hash plain password by ``hash_fn`` if it is not hashed yet.
+
+        Args:
+            hash_fn: Async function which returns bcrypt hash of password,
+                e.g. :meth:`.PasswordHasher.hash_bytes`.
+
+        Returns:
+            self.
+        """
+
+        if self._hashed:
+            return self
+
+        if self._hashing is None:
+            self._hashing = asyncio.ensure_future(hash_fn(self._secret_value))
+        try:
+            self.__set_hash(await self._hashing)
+        finally:
+            self._hashing = None
+        return self
+
+    def __set_hash(self, hashed: bytes) -> None:
+        if not self._hashed:
+            self._secret_value, self._hashed = hashed, True
 
     @classmethod
     def validate(cls, value: Any) -> "EncryptedSecretBytes":
         if isinstance(value, cls):
             return value
+        if isinstance(value, (pydantic.SecretStr, pydantic.SecretBytes)):
+            value = value.get_secret_value()
+        if isinstance(value, str):
+            value = value.encode("utf-8")
         if not isinstance(value, bytes):
             raise ValueError("Expected a bytes value")
 
         if len(value) < cls.min_length or len(value) > cls.max_length:
-            raise ValueError(f"Length of value must be between {cls.min_length} and {cls.max_length} bytes.")
+            raise ValueError(
+                f"Length of value must be between {cls.min_length} and "
+                f"{cls.max_length} bytes.",
+            )
 
-        encrypted_value = bcrypt.hashpw(value, bcrypt.gensalt())
-        return cls(encrypted_value)
+        return cls(value)
 
+    @classmethod
+    def __get_pydantic_core_schema__(
+        cls,
+        source: Any,
+        handler: GetCoreSchemaHandler,
+    ) -> core_schema.CoreSchema:
+        return core_schema.no_info_plain_validator_function(
+            cls.validate,
+            serialization=core_schema.plain_serializer_function_ser_schema(
+                lambda value: value._display().decode(),
+                when_used="json",
+            ),
+        )
+
+    @classmethod
+    def __get_pydantic_json_schema__(
+        cls,
+        schema: core_schema.CoreSchema,
+        handler: GetJsonSchemaHandler,
+    ) -> JsonSchemaValue:
+        return {"type": "string", "format": "password", "writeOnly": True}
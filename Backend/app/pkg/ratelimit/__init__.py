@@ -0,0 +1,10 @@
+"""Token bucket rate limiters.
+
+All limiters must be inherited from :class:`.BaseRateLimiter`, so a service
+does not depend on where state of buckets is stored.
+"""
+
+# ruff: noqa
+
+from app.pkg.ratelimit.base import BaseRateLimiter, RateLimitDecision
+from app.pkg.ratelimit.memory import InMemoryRateLimiter
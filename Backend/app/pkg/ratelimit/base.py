@@ -0,0 +1,77 @@
+"""Abstract rate limiter interface."""
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+
+__all__ = ["BaseRateLimiter", "RateLimitDecision"]
+
+
+@dataclass(frozen=True)
+class RateLimitDecision:
+    """Result of :meth:`.BaseRateLimiter.acquire`.
+
+    Attributes:
+        allowed: Whether tokens were taken from bucket.
+        remaining: Count of tokens left in bucket.
+        retry_after: Seconds until ``cost`` tokens are available. 0 if
+            allowed.
+    """
+
+    allowed: bool
+    remaining: float
+    retry_after: float = 0.0
+
+
+class BaseRateLimiter(ABC):
+    """Base token bucket rate limiter.
+
+    Notes:
+        Bucket of ``key`` holds up to ``burst`` tokens and is refilled by
+        ``rate`` tokens per second. Request takes ``cost`` tokens or is
+        rejected. A new bucket is full.
+
+        Methods are asynchronous, so a shared backend (for example,
+        postgresql for all uvicorn workers) can implement this interface
+        without changes in services.
+
+    Examples:
+        ::
+
+            >>> decision = await limiter.acquire("1:read", rate=20, burst=40)
+            >>> if not decision.allowed:
+            ...     raise RateLimitExceeded(decision.retry_after)
+    """
+
+    @abstractmethod
+    async def acquire(
+        self,
+        key: str,
+        rate: float,
+        burst: int,
+        cost: float = 1.0,
+    ) -> RateLimitDecision:
+        """Take ``cost`` tokens from bucket of ``key``.
+
+        Args:
+            key: Key of bucket.
+            rate: Tokens added to bucket per second.
+            burst: Capacity of bucket.
+            cost: Tokens taken by request.
+
+        Returns:
+            Whether request is allowed.
+        """
+
+        raise NotImplementedError
+
+    @staticmethod
+    def decide(tokens: float, rate: float, cost: float) -> RateLimitDecision:
+        """Build decision for bucket with ``tokens`` after refill."""
+
+        if tokens >= cost:
+            return RateLimitDecision(allowed=True, remaining=tokens - cost)
+        return RateLimitDecision(
+            allowed=False,
+            remaining=tokens,
+            retry_after=(cost - tokens) / rate,
+        )
@@ -0,0 +1,40 @@
+"""In-process token bucket rate limiter."""
+
+import time
+from typing import Dict, List
+
+from app.pkg.ratelimit.base import BaseRateLimiter, RateLimitDecision
+
+__all__ = ["InMemoryRateLimiter"]
+
+
+class InMemoryRateLimiter(BaseRateLimiter):
+    """Token buckets in memory of one process.
+
+    Notes:
+        Every uvicorn worker has own buckets, so the effective limit is
+        multiplied by count of workers. Buckets are only created for known
+        API keys, so their count is bounded by the key registry.
+    """
+
+    def __init__(self):
+        #: Dict[str, List[float]]: Tokens and monotonic time of last refill
+        #  of every bucket.
+        self._buckets: Dict[str, List[float]] = {}
+
+    async def acquire(
+        self,
+        key: str,
+        rate: float,
+        burst: int,
+        cost: float = 1.0,
+    ) -> RateLimitDecision:
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [float(burst), now]
+
+        tokens = min(float(burst), bucket[0] + (now - bucket[1]) * rate)
+        decision = self.decide(tokens, rate, cost)
+        bucket[0], bucket[1] = decision.remaining, now
+        return decision
@@ -6,10 +6,19 @@ import urllib.parse
 from functools import lru_cache
 
 from dotenv import find_dotenv
-from pydantic import PostgresDsn, model_validator, field_validator
-from pydantic.types import PositiveInt, SecretStr
+from pydantic import PostgresDsn, confloat, conint, model_validator, field_validator
+from pydantic.types import (
+    NonNegativeFloat,
+    NonNegativeInt,
+    PositiveFloat,
+    PositiveInt,
+    SecretStr,
+)
 from pydantic_settings import BaseSettings, SettingsConfigDict
+from app.pkg.models.core.jwt import JWTAlgorithm
 from app.pkg.models.core.logger import LoggerLevel
+from app.pkg.models.core.postgresql import PostgresDriver, ReplicaBalancing
+from app.pkg.models.core.rate_limit import RateLimitBackend
 
 __all__ = ["Settings", "get_settings"]
 
@@ -67,10 +76,46 @@ class Postgresql(_Settings):
     MIN_CONNECTION: PositiveInt = 1
     #: PositiveInt: Max count of connections in one pool  to postgresql.
     MAX_CONNECTION: PositiveInt = 16
+    #: PositiveFloat: Max time in seconds of waiting for a free connection.
+    ACQUIRE_TIMEOUT: PositiveFloat = 10.0
+
+    #: PostgresDriver: Driver of connection pool. ``aiopg`` or ``asyncpg``.
+    DRIVER: PostgresDriver = PostgresDriver.AIOPG
+    #: PositiveInt: Max count of prepared statements cached on one connection.
+    #  Used only by ``asyncpg`` driver.
+    STATEMENT_CACHE_SIZE: PositiveInt = 256
+
+    #: NonNegativeInt: Statements of repository calls longer than this count
+    #  of milliseconds are written to slow query log. 0 disables the log.
+    SLOW_QUERY_THRESHOLD_MS: NonNegativeInt = 200
+    #: PositiveInt: Count of the slowest statements kept in slow query log.
+    SLOW_QUERY_TOP_N: PositiveInt = 50
+    #: bool: Capture ``EXPLAIN (ANALYZE, BUFFERS)`` of slow ``select`` statements.
+    SLOW_QUERY_EXPLAIN: bool = True
+    #: bool: Capture EXPLAIN of slow writes too. Writes are executed by
+    #  ``ANALYZE`` and rolled back, but still take locks and use sequences.
+    SLOW_QUERY_EXPLAIN_WRITES: bool = False
+    #: PositiveInt: Min count of seconds between two EXPLAIN of one statement.
+    SLOW_QUERY_EXPLAIN_INTERVAL: PositiveInt = 300
+
+    #: List[str]: Hosts of read replicas as ``host`` or ``host:port``. Port of
+    #  primary is used when it is not set. For example:
+    #  ``POSTGRES__REPLICA_HOSTS='["replica-1", "replica-2:5433"]'``.
+    REPLICA_HOSTS: typing.List[str] = []
+    #: ReplicaBalancing: Selection of replica for read queries.
+    REPLICA_BALANCING: ReplicaBalancing = ReplicaBalancing.ROUND_ROBIN
+    #: PositiveFloat: Seconds while a failed replica is not used for reads.
+    REPLICA_RETRY_AFTER: PositiveFloat = 5.0
+    #: NonNegativeFloat: Seconds after a write of a service while its reads go
+    #  to the primary. Should be above replication lag of replicas.
+    REPLICA_MAX_LAG: NonNegativeFloat = 5.0
 
     #: str: Concatenation all settings for postgresql in one string. (DSN)
     #  Builds in `root_validator` method.
     DSN: typing.Optional[str] = None
+    #: List[str]: DSN of every replica from ``REPLICA_HOSTS``.
+    #  Builds in `root_validator` method.
+    REPLICA_DSNS: typing.List[str] = []
 
     @model_validator(mode="after")
     def build_dsn(cls, values: "Postgresql"):  # pylint: disable=no-self-argument
@@ -94,14 +139,21 @@ class Postgresql(_Settings):
             dict with all settings and DSN.
         """
 
-        values.DSN = PostgresDsn.build(
-            scheme="postgresql",
-            username=f"{values.USER}",
-            password=f"{urllib.parse.quote_plus(values.PASSWORD.get_secret_value())}",
-            host=f"{values.HOST}",
-            port=int(f"{values.PORT}"),
-            path=f"{values.DATABASE_NAME}",
-        )
+        def build(host: str, port: int) -> PostgresDsn:
+            return PostgresDsn.build(
+                scheme="postgresql",
+                username=f"{values.USER}",
+                password=f"{urllib.parse.quote_plus(values.PASSWORD.get_secret_value())}",
+                host=f"{host}",
+                port=int(f"{port}"),
+                path=f"{values.DATABASE_NAME}",
+            )
+
+        values.DSN = build(values.HOST, values.PORT)
+        values.REPLICA_DSNS = []
+        for replica in values.REPLICA_HOSTS:
+            host, _, port = replica.partition(":")
+            values.REPLICA_DSNS.append(build(host, port or values.PORT))
         return values
 
 
@@ -125,6 +177,244 @@ class Logging(_Settings):
         return v
 
 
+class Cache(_Settings):
+    """In-process cache settings."""
+
+    #: PositiveInt: Max count of keys in cache of cities.
+    CITY_MAX_SIZE: PositiveInt = 10_000
+    #: PositiveInt: Time to live of cached cities in seconds.
+    CITY_TTL: PositiveInt = 300
+    #: bool: Cache results of detection by SHA-256 of image in
+    #  ``detection_results`` table.
+    DETECTION_ENABLED: bool = True
+    #: PositiveInt: Max count of results of detection in memory of process in
+    #  front of the table.
+    DETECTION_MAX_SIZE: PositiveInt = 256
+    #: PositiveInt: Time to live of results of detection in memory in
+    #  seconds. Results purged by another process are answered until then.
+    DETECTION_TTL: PositiveInt = 600
+
+
+class PasswordHashing(_Settings):
+    """Password hashing settings."""
+
+    #: PositiveInt: Count of processes which hash passwords.
+    WORKERS: PositiveInt = 2
+    #: PositiveInt: Max count of hash operations running or waiting for a
+    #  process. Signup is answered with 503 above this limit.
+    MAX_QUEUE: PositiveInt = 64
+    #: int: Cost factor of bcrypt. Every increment doubles time of hashing.
+    BCRYPT_ROUNDS: conint(ge=4, le=31) = 12
+    #: PositiveInt: Count of processes which hash passwords of bulk user
+    #  import. Separate from ``WORKERS``, so an import does not delay signups.
+    IMPORT_WORKERS: PositiveInt = 4
+
+
+class UserImport(_Settings):
+    """Bulk user import settings."""
+
+    #: PositiveInt: Count of users hashed and written to database at once.
+    BATCH_SIZE: PositiveInt = 1000
+    #: PositiveInt: Max count of lines in one upload. Lines above the limit
+    #  are reported as invalid.
+    MAX_ROWS: PositiveInt = 100_000
+
+
+class JWTAuthentication(_Settings):
+    """JWT authentication settings."""
+
+    #: JWTAlgorithm: Algorithm of signature. ``HS256`` or ``EdDSA``.
+    ALGORITHM: JWTAlgorithm = JWTAlgorithm.HS256
+    #: SecretStr: Shared secret of ``HS256``. At least 32 bytes. Required by
+    #  ``HS256``, there is no default, so a deployment can not run with a
+    #  publicly known secret.
+    SECRET_KEY: typing.Optional[SecretStr] = None
+    #: SecretStr: PEM encoded Ed25519 private key of ``EdDSA``. Not required
+    #  by services which only verify tokens.
+    PRIVATE_KEY: typing.Optional[SecretStr] = None
+    #: str: PEM encoded Ed25519 public key of ``EdDSA``. Derived from
+    #  ``PRIVATE_KEY`` when it is not set.
+    PUBLIC_KEY: typing.Optional[str] = None
+    #: str: Value of ``iss`` claim. Tokens of other issuers are rejected.
+    ISSUER: str = "ships"
+    #: PositiveInt: Lifetime of access token in seconds.
+    ACCESS_TOKEN_TTL: PositiveInt = 900
+    #: PositiveInt: Lifetime of refresh token in seconds.
+    REFRESH_TOKEN_TTL: PositiveInt = 14 * 24 * 60 * 60
+    #: NonNegativeInt: Allowed clock skew in seconds when ``exp`` is checked.
+    LEEWAY: NonNegativeInt = 10
+
+    @model_validator(mode="after")
+    def check_keys(  # pylint: disable=no-self-argument
+        cls,
+        values: "JWTAuthentication",
+    ):
+        """Check that keys of ``ALGORITHM`` are set.
+
+        Raises:
+            ValueError: If ``SECRET_KEY`` of ``HS256`` is not set or shorter
+                than 32 bytes, or neither key of ``EdDSA`` is set.
+
+        Returns:
+            Checked settings.
+        """
+
+        if values.ALGORITHM == JWTAlgorithm.HS256:
+            if values.SECRET_KEY is None:
+                raise ValueError("JWT__SECRET_KEY is required for HS256")
+            if len(values.SECRET_KEY.get_secret_value().encode()) < 32:
+                raise ValueError("JWT__SECRET_KEY must be at least 32 bytes")
+        elif values.PRIVATE_KEY is None and values.PUBLIC_KEY is None:
+            raise ValueError("JWT__PRIVATE_KEY or JWT__PUBLIC_KEY is required")
+        return values
+
+
+class RateLimit(_Settings):
+    """Rate limiting of API keys settings.
+
+    Notes:
+        Limits of a key are token buckets: ``*_RATE`` tokens per second are
+        added up to ``*_BURST`` tokens, every request takes one. Limits set
+        for a key in ``api_keys`` table override these defaults.
+    """
+
+    #: bool: Reject requests above limits with 429.
+    ENABLED: bool = True
+    #: RateLimitBackend: Storage of buckets. ``postgresql`` shares limits
+    #  between uvicorn workers.
+    BACKEND: RateLimitBackend = RateLimitBackend.MEMORY
+    #: PositiveFloat: Requests per second of cheap read routes.
+    READ_RATE: PositiveFloat = 20.0
+    #: PositiveInt: Max burst of cheap read routes.
+    READ_BURST: PositiveInt = 40
+    #: PositiveFloat: Requests per second of upload and detection routes.
+    EXPENSIVE_RATE: PositiveFloat = 0.5
+    #: PositiveInt: Max burst of upload and detection routes.
+    EXPENSIVE_BURST: PositiveInt = 4
+    #: PositiveInt: Seconds between reloads of API keys from database.
+    REFRESH_INTERVAL: PositiveInt = 60
+
+
+class Detection(_Settings):
+    """Ship detection settings."""
+
+    #: pathlib.Path: ONNX export of YOLOv8-OBB weights. Detection routes answer
+    #  503 if the file does not exist.
+    MODEL_PATH: pathlib.Path = pathlib.Path("./models/yolov8x_obb.onnx")
+    #: PositiveInt: Size of model input. Must match ``imgsz`` of training.
+    IMGSZ: PositiveInt = 640
+    #: float: Default min confidence of boxes.
+    CONF: confloat(gt=0, lt=1) = 0.25
+    #: float: Max IoU of kept boxes of one class.
+    IOU: confloat(gt=0, le=1) = 0.7
+    #: PositiveInt: Max count of boxes on one image.
+    MAX_DETECTIONS: PositiveInt = 300
+    #: NonNegativeInt: Threads of one inference. 0 is count of physical cores.
+    INTRA_OP_THREADS: NonNegativeInt = 0
+    #: PositiveInt: Count of inferences running at once in one process. Every
+    #  one uses ``INTRA_OP_THREADS`` threads.
+    WORKERS: PositiveInt = 1
+    #: PositiveInt: Max count of images being detected or waiting for a
+    #  worker. Requests above the limit are answered with 503. Keep it at
+    #  least ``2 * BATCH_SIZE``, so the next batch fills while one runs.
+    MAX_QUEUE: PositiveInt = 16
+    #: PositiveInt: Max count of images of concurrent requests run by model at
+    #  once. 1 disables batching. Requires export with dynamic batch size.
+    BATCH_SIZE: PositiveInt = 8
+    #: NonNegativeInt: Max milliseconds the first image of a batch waits for
+    #  other requests. 0 batches only requests which are already waiting.
+    BATCH_WINDOW_MS: NonNegativeInt = 10
+    #: PositiveInt: Target latency of a lone request in milliseconds. The
+    #  batch window is shortened, so waiting plus inference of one image fits.
+    LATENCY_SLO_MS: PositiveInt = 1000
+    #: NonNegativeInt: Inferences on blank input run on startup.
+    WARMUP_RUNS: NonNegativeInt = 2
+    #: PositiveInt: Max size of uploaded image in bytes.
+    MAX_IMAGE_BYTES: PositiveInt = 256 * 1024 * 1024
+    #: PositiveInt: Max ``width * height`` of uploaded image. Checked before
+    #  decoding. Scenes above ``RASTER_ABOVE`` are not decoded to memory.
+    MAX_IMAGE_PIXELS: PositiveInt = 25_000 * 25_000
+    #: PositiveInt: Images with more pixels are decoded to a memory mapped
+    #  file of ``SPOOL_DIR`` and read by tiles. Tiled or stripped 8-bit TIFF
+    #  without compression or with deflate is never decoded as a whole.
+    RASTER_ABOVE: PositiveInt = 8192 * 8192
+    #: NonNegativeInt: Uploaded images up to this size in bytes are received
+    #  to memory, larger ones to a temporary file of ``SPOOL_DIR``.
+    SPOOL_MAX_MEMORY: NonNegativeInt = 1024 * 1024
+    #: Optional[pathlib.Path]: Directory of temporary files of uploaded
+    #  images and of scenes decoded to files. Default temporary directory of
+    #  system if not set.
+    SPOOL_DIR: typing.Optional[pathlib.Path] = None
+
+    #: PositiveInt: Images with a side longer than this are cut to tiles of
+    #  ``IMGSZ`` pixels without resizing. Smaller images are resized to
+    #  ``IMGSZ`` as in training.
+    TILE_ABOVE: PositiveInt = 960
+    #: NonNegativeInt: Min count of pixels shared by neighbour tiles. Ships
+    #  shorter than this are whole in at least one tile.
+    TILE_OVERLAP: NonNegativeInt = 128
+    #: PositiveInt: Count of tiles in one run of model.
+    TILE_BATCH_SIZE: PositiveInt = 8
+    #: PositiveInt: Count of batches of tiles run at once.
+    TILE_WORKERS: PositiveInt = 1
+    #: float: Min intersection over the smaller box of duplicates of overlap
+    #  zones.
+    TILE_MERGE_THRESHOLD: confloat(gt=0, le=1) = 0.5
+    #: PositiveInt: Count of tiles of a scene read by tiles at once.
+    TILE_READ_WORKERS: PositiveInt = 4
+    #: NonNegativeInt: Max bytes of decompressed blocks of a TIFF scene kept
+    #  in memory, so tiles sharing a block do not decompress it again.
+    TILE_CACHE_BYTES: NonNegativeInt = 256 * 1024 * 1024
+    #: bool: Skip flat tiles of open water, clouds and no-data borders before
+    #  the model. Disabled until thresholds below are fit and checked for
+    #  recall of ships on imagery of the deployment by
+    #  ``python -m benchmarks.tile_prefilter``.
+    TILE_FILTER_ENABLED: bool = False
+    #: PositiveInt: Stride of pixels of a tile used by the screen.
+    TILE_FILTER_STEP: PositiveInt = 2
+    #: float: Tiles with lower standard deviation of brightness and lower
+    #  share of edge pixels are skipped.
+    TILE_FILTER_MIN_STD: confloat(ge=0) = 2.0
+    #: float: Min brightness step to a neighbour pixel of an edge pixel.
+    TILE_FILTER_EDGE_THRESHOLD: confloat(ge=0) = 24.0
+    #: float: Tiles with lower share of edge pixels and lower standard
+    #  deviation of brightness are skipped.
+    TILE_FILTER_MIN_EDGE_DENSITY: confloat(ge=0, le=1) = 5e-4
+
+
+class DetectionJobs(_Settings):
+    """Asynchronous detection jobs settings.
+
+    Notes:
+        Jobs are run by ``python -m scripts.detection_worker`` processes, not
+        by the API server. Settings of :class:`.Detection` apply to workers
+        as well.
+    """
+
+    #: PositiveInt: Max seconds of long polling of a job status.
+    MAX_WAIT: PositiveInt = 30
+    #: PositiveInt: Milliseconds between checks of status by long polling and
+    #  between checks of queue by an idle worker.
+    POLL_INTERVAL_MS: PositiveInt = 500
+    #: PositiveInt: Count of jobs run at once by one worker. Small images of
+    #  concurrent jobs are detected in one batch.
+    CONCURRENCY: PositiveInt = 1
+    #: PositiveInt: Seconds between saves of progress of a running job.
+    HEARTBEAT_INTERVAL: PositiveInt = 10
+    #: PositiveInt: Running jobs without heartbeat for this count of seconds
+    #  are queued again. Must be a few ``HEARTBEAT_INTERVAL`` long.
+    STALE_AFTER: PositiveInt = 120
+    #: PositiveInt: Count of runs after which a job fails instead of being
+    #  queued again.
+    MAX_ATTEMPTS: PositiveInt = 3
+    #: PositiveInt: Seconds finished jobs and their results are kept.
+    RETENTION: PositiveInt = 7 * 24 * 60 * 60
+    #: pathlib.Path: Directory of uploaded images of jobs. Must be shared by
+    #  API servers and workers, e.g. a volume of NFS or a mounted bucket.
+    #  An image is deleted when its job is finished.
+    STORAGE_DIR: pathlib.Path = pathlib.Path("./data/detection_jobs")
+
+
 class APIServer(_Settings):
     """API settings."""
 
@@ -156,6 +446,28 @@ class Settings(_Settings):
     #: Postgresql: Postgresql settings.
     POSTGRES: Postgresql
 
+    #: Cache: Cache settings.
+    CACHE: Cache = Cache()
+
+    #: PasswordHashing: Password hashing settings.
+    PASSWORD: PasswordHashing = PasswordHashing()
+
+    #: UserImport: Bulk user import settings.
+    USER_IMPORT: UserImport = UserImport()
+
+    #: JWTAuthentication: JWT authentication settings. Required, keys of
+    #  tokens have no defaults.
+    JWT: JWTAuthentication
+
+    #: RateLimit: Rate limiting of API keys settings.
+    RATE_LIMIT: RateLimit = RateLimit()
+
+    #: Detection: Ship detection settings.
+    DETECTION: Detection = Detection()
+
+    #: DetectionJobs: Asynchronous detection jobs settings.
+    DETECTION_JOBS: DetectionJobs = DetectionJobs()
+
 
 # TODO: Возможно даже lru_cache не стоит использовать. Стоит использовать meta sigleton.
 #   Для класса настроек. А инициализацию перенести в `def __init__`
@@ -0,0 +1,71 @@
+"""Opaque cursors for keyset pagination.
+
+Cursor is an url-safe base64 of a JSON object with keys of the last row of
+the page. Clients must not parse it, so the set of keys can be changed
+without changes in API.
+"""
+
+import base64
+import binascii
+import json
+from typing import Any, Optional, Type, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+from app.pkg.models.exceptions.pagination import InvalidCursor
+
+__all__ = ["encode_cursor", "decode_cursor"]
+
+Keys = TypeVar("Keys", bound=BaseModel)
+
+
+def encode_cursor(**keys: Any) -> str:
+    """Encode keys of the last row of the page.
+
+    Examples:
+        ::
+
+            >>> encode_cursor(id=42)
+            'eyJpZCI6NDJ9'
+    """
+
+    raw = json.dumps(keys, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: Optional[str], schema: Type[Keys]) -> Keys:
+    """Decode cursor produced by :func:`.encode_cursor`.
+
+    Args:
+        cursor: Cursor from client or None for the first page.
+        schema: Model of keys. Keys of the first page are its defaults.
+
+    Raises:
+        InvalidCursor: When cursor is malformed or its keys do not match
+            ``schema``.
+
+    Examples:
+        ::
+
+            >>> decode_cursor("eyJpZCI6NDJ9", models.CityCursor).id
+            42
+
+    Returns:
+        Keys of the last row of the previous page.
+    """
+
+    if not cursor:
+        return schema()
+
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        keys = json.loads(raw)
+    except (binascii.Error, ValueError) as e:
+        raise InvalidCursor from e
+
+    if not isinstance(keys, dict):
+        raise InvalidCursor
+    try:
+        return schema.model_validate(keys)
+    except ValidationError as e:
+        raise InvalidCursor from e
@@ -0,0 +1,6 @@
+"""Stateless authentication by JWT."""
+
+from app.pkg.utils.jwt.keys import load_keys
+from app.pkg.utils.jwt.manager import JWTManager
+
+__all__ = ["JWTManager", "load_keys"]
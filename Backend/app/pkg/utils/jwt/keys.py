@@ -0,0 +1,59 @@
+"""Parsing of JWT key material.
+
+Notes:
+    Keys are parsed once per process and cached, so :mod:`jwt` receives
+    ready key objects and does not parse PEM on every request. Invalid keys
+    are reported when :class:`.JWTManager` is created, not by the first
+    request.
+"""
+
+from functools import lru_cache
+from typing import Any, Optional, Tuple
+
+import jwt
+
+from app.pkg.models.core.jwt import JWTAlgorithm
+
+__all__ = ["load_keys"]
+
+
+def load_keys(
+    algorithm: JWTAlgorithm,
+    secret_key: Optional[str] = None,
+    private_key: Optional[str] = None,
+    public_key: Optional[str] = None,
+) -> Tuple[Optional[Any], Any]:
+    """Parse keys of ``algorithm``.
+
+    Args:
+        algorithm: Algorithm of signature.
+        secret_key: Shared secret of ``HS256``.
+        private_key: PEM encoded private key of ``EdDSA``.
+        public_key: PEM encoded public key of ``EdDSA``. Derived from
+            ``private_key`` when it is not set.
+
+    Raises:
+        ValueError: If keys required by ``algorithm`` are not set.
+
+    Returns:
+        Signing key, or None if tokens can only be verified, and verifying
+        key.
+    """
+
+    if algorithm == JWTAlgorithm.HS256:
+        if not secret_key:
+            raise ValueError("JWT secret key is required for HS256.")
+        key = _prepare_key(algorithm, secret_key)
+        return key, key
+
+    signing_key = _prepare_key(algorithm, private_key) if private_key else None
+    if public_key:
+        return signing_key, _prepare_key(algorithm, public_key)
+    if signing_key is None:
+        raise ValueError("JWT private or public key is required for EdDSA.")
+    return signing_key, signing_key.public_key()
+
+
+@lru_cache(maxsize=16)
+def _prepare_key(algorithm: JWTAlgorithm, key: str) -> Any:
+    return jwt.get_algorithm_by_name(algorithm.value).prepare_key(key)
@@ -0,0 +1,168 @@
+"""Issue and verify JWT."""
+
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+import jwt
+import pydantic
+
+from app.pkg import models
+from app.pkg.models.core.jwt import JWTAlgorithm
+from app.pkg.models.exceptions.jwt import InvalidToken, TokenExpired
+from app.pkg.utils.jwt.keys import load_keys
+
+__all__ = ["JWTManager"]
+
+#: Tuple[str, ...]: Claims which every token must contain.
+_REQUIRED_CLAIMS = ("sub", "role_id", "type", "iss", "iat", "exp", "jti")
+
+
+class JWTManager:
+    """Issue and verify access and refresh tokens.
+
+    Notes:
+        Verification is stateless: signature, ``exp``, ``iss`` and ``type``
+        are checked, and claims carry everything needed for authorization.
+        The database is not queried. So a changed role takes effect on the
+        next refresh, and a token cannot be revoked before it expires.
+
+        Keys are parsed once by the constructor. Create one instance per
+        process, e.g. by ``providers.Singleton``.
+
+    Attributes:
+        algorithm: Algorithm of signature.
+        issuer: Value of ``iss`` claim.
+        access_ttl: Lifetime of access token in seconds.
+        refresh_ttl: Lifetime of refresh token in seconds.
+        leeway: Allowed clock skew in seconds.
+
+    Examples:
+        ::
+
+            >>> manager = JWTManager(
+            ...     algorithm=JWTAlgorithm.HS256,
+            ...     secret_key=SecretStr("..."),
+            ... )
+            >>> pair = manager.create_tokens(user)
+            >>> manager.decode(pair.access_token).user_id == user.id
+            True
+    """
+
+    algorithm: JWTAlgorithm
+    issuer: str
+    access_ttl: int
+    refresh_ttl: int
+    leeway: int
+
+    def __init__(
+        self,
+        algorithm: JWTAlgorithm,
+        secret_key: Optional[pydantic.SecretStr] = None,
+        private_key: Optional[pydantic.SecretStr] = None,
+        public_key: Optional[str] = None,
+        issuer: str = "ships",
+        access_ttl: int = 900,
+        refresh_ttl: int = 14 * 24 * 60 * 60,
+        leeway: int = 0,
+    ):
+        self.algorithm = JWTAlgorithm(algorithm)
+        self.issuer = issuer
+        self.access_ttl = access_ttl
+        self.refresh_ttl = refresh_ttl
+        self.leeway = leeway
+        self._signing_key, self._verifying_key = load_keys(
+            algorithm=self.algorithm,
+            secret_key=secret_key.get_secret_value() if secret_key else None,
+            private_key=private_key.get_secret_value() if private_key else None,
+            public_key=public_key,
+        )
+        self._algorithms = [self.algorithm.value]
+        self._jwt = jwt.PyJWT(options={"require": list(_REQUIRED_CLAIMS)})
+
+    def create_tokens(self, user: models.User) -> models.TokenPair:
+        """Issue access and refresh tokens of ``user``.
+
+        Raises:
+            ValueError: If the manager has no signing key.
+
+        Returns:
+            Token pair.
+        """
+
+        now = int(time.time())
+        return models.TokenPair(
+            access_token=self.__encode(
+                user,
+                models.TokenType.ACCESS,
+                now,
+                self.access_ttl,
+            ),
+            refresh_token=self.__encode(
+                user,
+                models.TokenType.REFRESH,
+                now,
+                self.refresh_ttl,
+            ),
+            expires_in=self.access_ttl,
+        )
+
+    def decode(
+        self,
+        token: str,
+        token_type: models.TokenType = models.TokenType.ACCESS,
+    ) -> models.TokenClaims:
+        """Verify ``token`` and get its claims.
+
+        Args:
+            token: Encoded token.
+            token_type: Expected purpose of token.
+
+        Raises:
+            TokenExpired: If ``exp`` of token has passed.
+            InvalidToken: If signature, issuer, type or claims are invalid.
+
+        Returns:
+            Claims of token.
+        """
+
+        try:
+            payload = self._jwt.decode(
+                token,
+                self._verifying_key,
+                algorithms=self._algorithms,
+                issuer=self.issuer,
+                leeway=self.leeway,
+            )
+        except jwt.ExpiredSignatureError as error:
+            raise TokenExpired from error
+        except jwt.InvalidTokenError as error:
+            raise InvalidToken from error
+
+        if payload["type"] != token_type.value:
+            raise InvalidToken
+        try:
+            return models.TokenClaims.model_validate(payload)
+        except pydantic.ValidationError as error:
+            raise InvalidToken from error
+
+    def __encode(
+        self,
+        user: models.User,
+        token_type: models.TokenType,
+        now: int,
+        ttl: int,
+    ) -> str:
+        if self._signing_key is None:
+            raise ValueError("JWT manager has no private key to sign tokens.")
+
+        payload: Dict[str, Any] = {
+            "sub": str(user.id),
+            "role_id": int(user.role_id),
+            "type": token_type.value,
+            "iss": self.issuer,
+            "iat": now,
+            "exp": now + ttl,
+            "jti": uuid.uuid4().hex,
+        }
+        return jwt.encode(payload, self._signing_key, algorithm=self.algorithm.value)
@@ -1,16 +1,197 @@
-from pydantic import SecretStr, SecretBytes
+"""Hash and verify passwords with bcrypt.
+
+Notes:
+    bcrypt takes hundreds of milliseconds of CPU. In async code use
+    :class:`.PasswordHasher`, which runs bcrypt in a process pool, so the
+    event loop is not blocked.
+"""
+
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence
+
 import bcrypt
+from pydantic import SecretBytes, SecretStr
+
+from app.pkg.models.exceptions.password import PasswordHashingOverloaded
+
+__all__ = ["hash_password", "verify_password", "PasswordHasher"]
+
+#: int: Default cost factor of bcrypt.
+DEFAULT_ROUNDS = 12
+
+
+def hash_password(password: SecretStr, rounds: int = DEFAULT_ROUNDS) -> SecretBytes:
+    """Hash password. Blocks the calling thread."""
 
-def hash_password(password: SecretStr) -> SecretBytes:
     password_bytes = password.get_secret_value().encode('utf-8')
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password_bytes, salt)
-    return SecretBytes(hashed)
+    return SecretBytes(_hashpw(password_bytes, rounds))
+
 
 def verify_password(
     plain_password: SecretStr,
     hashed_password: SecretBytes
 ) -> bool:
+    """Check password against hash. Blocks the calling thread."""
+
     password_bytes = plain_password.get_secret_value().encode('utf-8')
     hashed_bytes = hashed_password.get_secret_value()
-    return bcrypt.checkpw(password_bytes, hashed_bytes)
\ No newline at end of file
+    return _checkpw(password_bytes, hashed_bytes)
+
+
+def _hashpw(password: bytes, rounds: int) -> bytes:
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds=rounds))
+
+
+def _hashpw_many(passwords: Sequence[bytes], rounds: int) -> List[bytes]:
+    return [_hashpw(password, rounds) for password in passwords]
+
+
+def _checkpw(password: bytes, hashed: bytes) -> bool:
+    return bcrypt.checkpw(password, hashed)
+
+
+class PasswordHasher:
+    """Hash and verify passwords in a process pool.
+
+    Notes:
+        Count of operations running or waiting for a worker is limited by
+        ``max_queue``. Above the limit :class:`.PasswordHashingOverloaded`
+        is raised immediately, so a signup burst is answered with 503 instead
+        of growing latency of every request. Workers are started on the
+        first call.
+
+    Attributes:
+        workers: Count of worker processes.
+        max_queue: Max count of operations running or waiting for a worker.
+        rounds: Cost factor of new hashes.
+
+    Examples:
+        ::
+
+            >>> hasher = PasswordHasher(workers=2, max_queue=64, rounds=12)
+            >>> hashed = await hasher.hash(SecretStr("SecurePass123"))
+            >>> await hasher.verify(SecretStr("SecurePass123"), hashed)
+            True
+    """
+
+    workers: int
+    max_queue: int
+    rounds: int
+
+    def __init__(self, workers: int, max_queue: int, rounds: int = DEFAULT_ROUNDS):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.rounds = rounds
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        """Count of operations running or waiting for a worker."""
+
+        return self._pending
+
+    async def hash(self, password: SecretStr) -> SecretBytes:
+        """Hash password.
+
+        Raises:
+            PasswordHashingOverloaded: when ``max_queue`` operations are
+                already pending.
+
+        Returns:
+            bcrypt hash of ``password``.
+        """
+
+        hashed = await self.hash_bytes(password.get_secret_value().encode("utf-8"))
+        return SecretBytes(hashed)
+
+    async def hash_bytes(self, password: bytes) -> bytes:
+        """Hash password. Used by :meth:`.EncryptedSecretBytes.hash_with`.
+
+        Raises:
+            PasswordHashingOverloaded: when ``max_queue`` operations are
+                already pending.
+
+        Returns:
+            bcrypt hash of ``password``.
+        """
+
+        return await self.__submit(_hashpw, password, self.rounds)
+
+    async def hash_many(self, passwords: Sequence[bytes]) -> List[bytes]:
+        """Hash passwords on all workers in parallel.
+
+        Notes:
+            Passwords are sent to workers in ``workers * 2`` chunks, so
+            serialization between processes is paid per chunk, not per
+            password, and every chunk counts as one pending operation.
+
+        Raises:
+            PasswordHashingOverloaded: when ``max_queue`` operations are
+                already pending.
+
+        Returns:
+            bcrypt hashes in order of ``passwords``.
+        """
+
+        if not passwords:
+            return []
+
+        chunks = min(len(passwords), self.workers * 2)
+        if self._pending + chunks > self.max_queue:
+            raise PasswordHashingOverloaded
+
+        size = -(-len(passwords) // chunks)
+        hashed = await asyncio.gather(
+            *(
+                self.__submit(_hashpw_many, passwords[i : i + size], self.rounds)
+                for i in range(0, len(passwords), size)
+            ),
+        )
+        return [item for chunk in hashed for item in chunk]
+
+    async def verify(
+        self,
+        plain_password: SecretStr,
+        hashed_password: SecretBytes,
+    ) -> bool:
+        """Check password against hash.
+
+        Raises:
+            PasswordHashingOverloaded: when ``max_queue`` operations are
+                already pending.
+
+        Returns:
+            True if ``plain_password`` matches ``hashed_password``.
+        """
+
+        return await self.__submit(
+            _checkpw,
+            plain_password.get_secret_value().encode("utf-8"),
+            hashed_password.get_secret_value(),
+        )
+
+    async def __submit(self, fn, *args):
+        if self._pending >= self.max_queue:
+            raise PasswordHashingOverloaded
+
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+
+        self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor,
+                fn,
+                *args,
+            )
+        finally:
+            self._pending -= 1
+
+    def shutdown(self) -> None:
+        """Stop worker processes. Pending operations are completed."""
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
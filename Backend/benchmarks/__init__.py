@@ -0,0 +1,61 @@
+"""Benchmarks of the hot paths of the API server.
+
+Each module is runnable with ``python -m benchmarks.<name>`` from the
+``Backend`` directory and reads connection settings from ``.env``.
+"""
+
+import multiprocessing
+import resource
+import sys
+from argparse import ArgumentParser
+from typing import Any, Callable, TypeVar
+
+__all__ = ["peak_rss", "run_isolated", "add_scene_arguments"]
+
+T = TypeVar("T")
+
+
+def peak_rss() -> int:
+    """Peak resident memory of the process in bytes."""
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def run_isolated(func: Callable[..., T], *args: Any) -> T:
+    """Call ``func`` in a fresh process.
+
+    Peak resident memory of one run does not hide the next one. ``func``
+    must be a module level function, as arguments are pickled.
+    """
+
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(func, args)
+
+
+def add_scene_arguments(parser: ArgumentParser, size: int) -> None:
+    """Add ``--size``, ``--overlap`` and ``--batch-size`` of tiled scenes.
+
+    Args:
+        parser: Parser of a benchmark.
+        size: Default side of synthetic scene in pixels.
+    """
+
+    parser.add_argument(
+        "--size",
+        type=int,
+        default=size,
+        help="Side of synthetic scene in pixels",
+    )
+    parser.add_argument(
+        "--overlap",
+        type=int,
+        default=128,
+        help="Min count of pixels shared by neighbour tiles",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=8,
+        help="Count of tiles read and run by model at once",
+    )
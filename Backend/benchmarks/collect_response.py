@@ -0,0 +1,97 @@
+"""Per-row cost of :func:`.collect_response` conversion.
+
+Compares the legacy conversion, which resolved annotations, copied the
+response and built a validator on every call, with the compiled converter
+in validating and trusted modes. No database is required: the decorated
+functions return prepared rows.
+
+Examples:
+    ::
+
+        $ python -m benchmarks.collect_response --rows 1000 --repeat 200
+        variant                 us/row
+        legacy                  ...
+        compiled                ...
+        compiled (trusted)      ...
+"""
+
+import asyncio
+import time
+from argparse import ArgumentParser
+from typing import Any, Callable, Dict, List
+
+import pydantic
+
+from app.internal.repository.postgresql.handlers.collect_response import (
+    collect_response,
+)
+from app.pkg import models
+
+
+def _rows(count: int) -> List[Dict[str, Any]]:
+    return [
+        {"id": i, "name": f"city_{i}", "code": "ABC", "country_id": 1 + i % 10}
+        for i in range(1, count + 1)
+    ]
+
+
+def legacy_collect_response(fn):
+    """Conversion as it was implemented before compiling."""
+
+    async def inner(*args, **kwargs):
+        response = await fn(*args, **kwargs)
+        ann = fn.__annotations__["return"]
+        r = response.copy()
+        if str(ann).replace("typing.", "").startswith("List"):
+            r = [_legacy_memory_viewer(dict(item)) for item in r]
+        else:
+            r = _legacy_memory_viewer(dict(r))
+        return pydantic.TypeAdapter(ann).validate_python(r)
+
+    return inner
+
+
+def _legacy_memory_viewer(r: Dict[str, Any]) -> Dict[str, Any]:
+    for key, value in r.items():
+        if isinstance(value, memoryview):
+            r[key] = value.tobytes()
+    return r
+
+
+async def _measure(fn: Callable, rows: int, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        await fn()
+    return (time.perf_counter() - started) / (rows * repeat) * 1e6
+
+
+async def main(rows: int, repeat: int) -> None:
+    data = _rows(rows)
+
+    async def fetch() -> List[models.City]:
+        return [dict(row) for row in data]
+
+    variants = {
+        "legacy": legacy_collect_response(fetch),
+        "compiled": collect_response(fetch),
+        "compiled (trusted)": collect_response(trusted=True)(fetch),
+    }
+
+    print(f"{'variant':<22}{'us/row':>10}")
+    for name, fn in variants.items():
+        await fn()  # warm up
+        print(f"{name:<22}{await _measure(fn, rows, repeat):>10.2f}")
+
+
+def parse_cli_args():
+    """Parse cli arguments."""
+
+    parser = ArgumentParser(description="Benchmark collect_response")
+    parser.add_argument("--rows", type=int, default=1000, help="Rows per response")
+    parser.add_argument("--repeat", type=int, default=200, help="Count of calls")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_cli_args()
+    asyncio.run(main(args.rows, args.repeat))
@@ -0,0 +1,223 @@
+"""Throughput and latency of detection with and without micro-batching.
+
+Runs :class:`.DetectionService` in process, the way ``POST /detect/`` does,
+with ``--clients`` concurrent clients sending images of the test split in a
+loop, once for every ``--batch-sizes`` value. Batch size 1 is detection of
+single images. For every run prints images/s, latency percentiles and mean
+occupancy of batches.
+
+Then sends ``--lone`` requests one at a time to the batched service and
+checks that latency of a lone request stays within ``--slo-ms``.
+
+Examples:
+    ::
+
+        $ python -m benchmarks.detection_batching \\
+            --model models/yolov8x_obb.onnx \\
+            --images ../ML/Ship-detection-4/test/images \\
+            --clients 16 --batch-sizes 1 4 8 --threads 4
+        batch  images  images/s  p50 ms   p95 ms   p99 ms   occupancy
+        1      ...
+        4      ...
+        8      ...
+
+        lone requests  p50 ms   max ms   slo ms   result
+        ...
+"""
+
+import asyncio
+import pathlib
+import time
+from argparse import ArgumentParser
+from typing import List
+
+import numpy as np
+from prometheus_client import REGISTRY
+
+from app.internal.services.detection import DetectionService
+from app.pkg.detection import OnnxDetector, TiledDetector
+from app.pkg.metrics import APP_NAME
+
+#: Tuple[str, ...]: Extensions of images of the test split.
+IMAGE_SUFFIXES = (".jpg", ".jpeg", ".png", ".tif", ".tiff")
+
+
+def _sample(name: str) -> float:
+    return REGISTRY.get_sample_value(name, {"app_name": APP_NAME}) or 0.0
+
+
+def _create_service(
+    model: pathlib.Path,
+    threads: int,
+    batch_size: int,
+    window_ms: int,
+    slo_ms: int,
+) -> DetectionService:
+    detector = OnnxDetector(model, intra_op_threads=threads)
+    return DetectionService(
+        detector,
+        TiledDetector(detector),
+        max_queue=1 << 20,
+        batch_size=batch_size,
+        batch_window_ms=window_ms,
+        latency_slo_ms=slo_ms,
+    )
+
+
+async def _clients(
+    service: DetectionService,
+    images: List[bytes],
+    clients: int,
+    requests: int,
+) -> List[float]:
+    latencies: List[float] = []
+
+    async def client(offset: int) -> None:
+        for i in range(offset, requests, clients):
+            started = time.perf_counter()
+            await service.detect(images[i % len(images)])
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(client(offset) for offset in range(clients)))
+    return latencies
+
+
+async def main(
+    model: pathlib.Path,
+    images_path: pathlib.Path,
+    clients: int,
+    requests: int,
+    batch_sizes: List[int],
+    window_ms: int,
+    slo_ms: int,
+    lone: int,
+    threads: int,
+) -> None:
+    paths = sorted(
+        p for p in images_path.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES
+    )
+    if not paths:
+        raise SystemExit(f"No images in {images_path}")
+    images = [path.read_bytes() for path in paths]
+
+    print(
+        f"{'batch':<7}{'images':<8}{'images/s':<10}{'p50 ms':<9}{'p95 ms':<9}"
+        f"{'p99 ms':<9}{'occupancy':<9}",
+    )
+    for batch_size in batch_sizes:
+        service = _create_service(model, threads, batch_size, window_ms, slo_ms)
+        await service.start()
+        if not service.available:
+            raise SystemExit(f"Model {model} is not loaded")
+
+        runs_before = _sample("detection_batch_size_count")
+        occupancy_before = _sample("detection_batch_occupancy_sum")
+
+        started = time.perf_counter()
+        latencies = await _clients(service, images, clients, requests)
+        elapsed = time.perf_counter() - started
+        await service.stop()
+
+        runs = _sample("detection_batch_size_count") - runs_before
+        occupancy = (_sample("detection_batch_occupancy_sum") - occupancy_before) / runs
+
+        ms = np.asarray(latencies) * 1000
+        p50, p95, p99 = np.percentile(ms, (50, 95, 99))
+        print(
+            f"{batch_size:<7}{requests:<8}{requests / elapsed:<10.2f}{p50:<9.1f}"
+            f"{p95:<9.1f}{p99:<9.1f}{occupancy:<9.2f}",
+        )
+
+    service = _create_service(model, threads, max(batch_sizes), window_ms, slo_ms)
+    await service.start()
+    latencies = []
+    for i in range(lone):
+        started = time.perf_counter()
+        await service.detect(images[i % len(images)])
+        latencies.append(time.perf_counter() - started)
+    await service.stop()
+
+    ms = np.asarray(latencies) * 1000
+    passed = ms.max() <= slo_ms
+    print()
+    print(f"{'lone requests':<15}{'p50 ms':<9}{'max ms':<9}{'slo ms':<9}{'result':<6}")
+    print(
+        f"{lone:<15}{np.percentile(ms, 50):<9.1f}{ms.max():<9.1f}{slo_ms:<9}"
+        f"{'ok' if passed else 'FAIL':<6}",
+    )
+    if not passed:
+        raise SystemExit("Latency of a lone request is above SLO")
+
+
+def parse_cli_args():
+    """Parse cli arguments."""
+
+    parser = ArgumentParser(description="Benchmark micro-batching of detection")
+    parser.add_argument(
+        "--model",
+        type=pathlib.Path,
+        default=pathlib.Path("models/yolov8x_obb.onnx"),
+        help="ONNX export of YOLOv8-OBB weights with dynamic batch size",
+    )
+    parser.add_argument(
+        "--images",
+        type=pathlib.Path,
+        required=True,
+        help="Directory with images of the test split",
+    )
+    parser.add_argument("--clients", type=int, default=16, help="Concurrent clients")
+    parser.add_argument(
+        "--requests",
+        type=int,
+        default=128,
+        help="Count of requests of every run",
+    )
+    parser.add_argument(
+        "--batch-sizes",
+        type=int,
+        nargs="+",
+        default=[1, 4, 8],
+        help="Max batch sizes to compare. 1 disables batching",
+    )
+    parser.add_argument(
+        "--window-ms",
+        type=int,
+        default=10,
+        help="Max milliseconds the first image of a batch waits for others",
+    )
+    parser.add_argument(
+        "--slo-ms",
+        type=int,
+        default=1000,
+        help="Target latency of a lone request in milliseconds",
+    )
+    parser.add_argument(
+        "--lone",
+        type=int,
+        default=20,
+        help="Count of sequential requests checked against SLO",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=0,
+        help="Threads of one inference. Count of physical cores if 0",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_cli_args()
+    asyncio.run(
+        main(
+            args.model,
+            args.images,
+            args.clients,
+            args.requests,
+            args.batch_sizes,
+            args.window_ms,
+            args.slo_ms,
+            args.lone,
+            args.threads,
+        ),
+    )
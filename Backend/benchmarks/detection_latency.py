@@ -0,0 +1,127 @@
+"""Latency of ship detection on images of the test split.
+
+Runs :class:`.OnnxDetector` the same way :class:`.DetectionService` does for
+one request: decode, letterbox, inference and postprocess of one image, and
+prints latency of every stage. No server or database is required.
+
+Images are ``test/images`` of the Roboflow export of the dataset
+(``Ship-detection-4/test/images`` in ``ML/EDA.ipynb``). The model is an ONNX
+export of the trained weights, see :class:`.OnnxDetector`.
+
+Examples:
+    ::
+
+        $ python -m benchmarks.detection_latency \\
+            --model models/yolov8x_obb.onnx \\
+            --images ../ML/Ship-detection-4/test/images --threads 4
+        images  boxes   images/s
+        ...
+        stage         mean ms  p50 ms   p95 ms   p99 ms
+        decode        ...
+        preprocess    ...
+        inference     ...
+        postprocess   ...
+        total         ...
+"""
+
+import pathlib
+import time
+from argparse import ArgumentParser
+from typing import Dict, List
+
+import numpy as np
+
+from app.pkg.detection import OnnxDetector, decode_image
+
+#: Tuple[str, ...]: Extensions of images of the test split.
+IMAGE_SUFFIXES = (".jpg", ".jpeg", ".png", ".tif", ".tiff")
+
+STAGES = ("decode", "preprocess", "inference", "postprocess")
+
+
+def main(
+    model: pathlib.Path,
+    images: pathlib.Path,
+    limit: int,
+    warmup: int,
+    threads: int,
+    conf: float,
+) -> None:
+    paths = sorted(p for p in images.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+    paths = paths[:limit] if limit else paths
+    if not paths:
+        raise SystemExit(f"No images in {images}")
+
+    detector = OnnxDetector(model, conf=conf, intra_op_threads=threads)
+    detector.load()
+    detector.warmup(warmup)
+
+    timings: Dict[str, List[float]] = {stage: [] for stage in (*STAGES, "total")}
+    boxes = 0
+    started = time.perf_counter()
+    for path in paths:
+        data = path.read_bytes()
+        decode_started = time.perf_counter()
+        image = decode_image(data)
+        decoded = time.perf_counter()
+        detections = detector.detect(image)
+        finished = time.perf_counter()
+
+        boxes += len(detections)
+        timings["decode"].append(decoded - decode_started)
+        for stage in STAGES[1:]:
+            timings[stage].append(detections.timings[stage])
+        timings["total"].append(finished - decode_started)
+    elapsed = time.perf_counter() - started
+
+    print(f"{'images':<8}{'boxes':<8}{'images/s':>8}")
+    print(f"{len(paths):<8}{boxes:<8}{len(paths) / elapsed:>8.2f}")
+    print()
+    print(f"{'stage':<14}{'mean ms':<9}{'p50 ms':<9}{'p95 ms':<9}{'p99 ms':<9}")
+    for stage, values in timings.items():
+        ms = np.asarray(values) * 1000
+        p50, p95, p99 = np.percentile(ms, (50, 95, 99))
+        print(f"{stage:<14}{ms.mean():<9.1f}{p50:<9.1f}{p95:<9.1f}{p99:<9.1f}")
+
+
+def parse_cli_args():
+    """Parse cli arguments."""
+
+    parser = ArgumentParser(description="Benchmark latency of ship detection")
+    parser.add_argument(
+        "--model",
+        type=pathlib.Path,
+        default=pathlib.Path("models/yolov8x_obb.onnx"),
+        help="ONNX export of YOLOv8-OBB weights",
+    )
+    parser.add_argument(
+        "--images",
+        type=pathlib.Path,
+        required=True,
+        help="Directory with images of the test split",
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=0,
+        help="Max count of images. All images if 0",
+    )
+    parser.add_argument(
+        "--warmup",
+        type=int,
+        default=2,
+        help="Inferences on blank input before measurement",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=0,
+        help="Threads of one inference. Count of physical cores if 0",
+    )
+    parser.add_argument("--conf", type=float, default=0.25, help="Min confidence")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_cli_args()
+    main(args.model, args.images, args.limit, args.warmup, args.threads, args.conf)
@@ -0,0 +1,123 @@
+"""Throughput of access token verification per CPU core.
+
+Measures :meth:`.JWTManager.decode`, which is all the work done by
+:func:`.jwt_verification` for one request, for every algorithm. For
+``EdDSA`` it also measures verification which parses the PEM public key on
+every call, as it happens when a key string is passed to :func:`jwt.decode`.
+No database is required.
+
+Verification is CPU bound, so every process verifies tokens independently
+and throughput of the server grows with count of workers. ``--processes``
+runs the measurement in several processes at once to check it on this
+machine.
+
+Examples:
+    ::
+
+        $ python -m benchmarks.jwt_verification --seconds 2 --processes 1
+        variant                         tokens/s/core
+        HS256                           ...
+        EdDSA                           ...
+        EdDSA (PEM parsed every call)   ...
+"""
+
+import time
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+from pydantic import SecretBytes, SecretStr
+
+from app.pkg import models
+from app.pkg.models.core.jwt import JWTAlgorithm
+from app.pkg.utils.jwt import JWTManager
+
+
+def _variants() -> Dict[str, Callable[[], object]]:
+    user = models.User(
+        id=1,
+        email="bench@example.com",
+        role_id=2,
+        is_activated=True,
+        password=SecretBytes(b"hash"),
+    )
+
+    hs256 = JWTManager(JWTAlgorithm.HS256, secret_key=SecretStr("k" * 32))
+    hs256_token = hs256.create_tokens(user).access_token
+
+    private_key = Ed25519PrivateKey.generate()
+    private_pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo,
+    ).decode()
+    eddsa = JWTManager(JWTAlgorithm.EDDSA, private_key=SecretStr(private_pem))
+    eddsa_token = eddsa.create_tokens(user).access_token
+
+    return {
+        "HS256": lambda: hs256.decode(hs256_token),
+        "EdDSA": lambda: eddsa.decode(eddsa_token),
+        "EdDSA (PEM parsed every call)": lambda: jwt.decode(
+            eddsa_token,
+            public_pem,
+            algorithms=["EdDSA"],
+            issuer=eddsa.issuer,
+        ),
+    }
+
+
+def _measure(name: str, seconds: float) -> float:
+    """Verify tokens for ``seconds`` and return count of tokens per second."""
+
+    fn = _variants()[name]
+    fn()  # warm up
+    count = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while (now := time.perf_counter()) < deadline:
+        for _ in range(100):
+            fn()
+        count += 100
+    return count / (now - started)
+
+
+def main(seconds: float, processes: int) -> None:
+    print(f"{'variant':<32}{'tokens/s/core':>14}{'tokens/s total':>16}")
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        for name in _variants():
+            rates = list(
+                executor.map(_measure, [name] * processes, [seconds] * processes),
+            )
+            total = sum(rates)
+            print(f"{name:<32}{total / processes:>14.0f}{total:>16.0f}")
+
+
+def parse_cli_args():
+    """Parse cli arguments."""
+
+    parser = ArgumentParser(description="Benchmark JWT verification")
+    parser.add_argument(
+        "--seconds",
+        type=float,
+        default=2.0,
+        help="Duration of measurement of one variant",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=1,
+        help="Count of processes verifying tokens at once",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_cli_args()
+    main(args.seconds, args.processes)
@@ -0,0 +1,286 @@
+"""Accuracy, latency and size of variants of the detection model.
+
+Runs every model of ``--models``, e.g. FP32, FP16 and INT8 variants made by
+``python -m scripts.export_detector --variants fp32 fp16 int8``, on images of
+the ``test`` split and prints mAP50, mean milliseconds per image and size of
+model file. Labels are ``labels`` next to ``--images``, YOLO OBB format:
+``class x1 y1 x2 y2 x3 y3 x4 y4`` normalized by size of image.
+
+mAP50 is computed as ``ultralytics`` does: detections of a class are
+matched by descending score with unmatched labels of their image with
+rotated IoU of at least 0.5, AP is the area under the interpolated
+precision-recall curve at 101 points, mAP is the mean over classes with
+labels. Use the low default ``--conf`` for mAP, as validation does.
+
+Time per image includes letterboxing and decoding of output, not decoding of
+files. The benchmark fails if mAP50 of a model is lower than mAP50 of the
+first model by more than ``--max-map-drop``.
+
+Examples:
+    ::
+
+        $ python -m benchmarks.model_variants \\
+            --models models/yolov8x_obb.onnx models/yolov8x_obb_fp16.onnx \\
+                models/yolov8x_obb_int8.onnx \\
+            --images ../ML/Ship-detection-4/test/images --threads 4
+        model                  size MiB   ms/image   mAP50
+        yolov8x_obb.onnx       ...
+        yolov8x_obb_fp16.onnx  ...
+        yolov8x_obb_int8.onnx  ...
+"""
+
+import pathlib
+import time
+from argparse import ArgumentParser
+from typing import List, Tuple
+
+import numpy as np
+
+from app.pkg.detection import (
+    Detections,
+    OnnxDetector,
+    corners_to_xywhr,
+    decode_image,
+    pairwise_overlap,
+)
+
+#: Tuple[str, ...]: Extensions of images of the test split.
+IMAGE_SUFFIXES = (".jpg", ".jpeg", ".png", ".tif", ".tiff")
+
+#: float: Min IoU of a detection matched with a label.
+IOU_THRESHOLD = 0.5
+
+
+def load_labels(
+    path: pathlib.Path,
+    width: int,
+    height: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Read boxes of a label file.
+
+    Returns:
+        ``(n, 5)`` boxes ``cx, cy, w, h, angle`` in pixels and ``(n,)``
+        class ids.
+    """
+
+    if not path.exists():
+        return np.zeros((0, 5)), np.zeros(0, dtype=np.int64)
+    rows = [line.split() for line in path.read_text().splitlines() if line.strip()]
+    if not rows:
+        return np.zeros((0, 5)), np.zeros(0, dtype=np.int64)
+    values = np.array([row[:9] for row in rows], dtype=np.float64)
+    corners = values[:, 1:].reshape(-1, 4, 2) * (width, height)
+    return corners_to_xywhr(corners), values[:, 0].astype(np.int64)
+
+
+def match(
+    detections: Detections,
+    boxes: np.ndarray,
+    class_ids: np.ndarray,
+) -> np.ndarray:
+    """Mark true positives of detections of one image.
+
+    Returns:
+        ``(n,)`` bool mask of detections matched with a label of their class.
+    """
+
+    matched = np.zeros(len(detections), dtype=bool)
+    if not len(detections) or not len(boxes):
+        return matched
+    iou = pairwise_overlap(detections.boxes, boxes)
+    iou[detections.class_ids[:, None] != class_ids[None, :]] = 0
+    taken = np.zeros(len(boxes), dtype=bool)
+    for i in np.argsort(-detections.scores, kind="stable"):
+        candidates = np.where(taken, 0.0, iou[i])
+        best = int(candidates.argmax())
+        if candidates[best] >= IOU_THRESHOLD:
+            matched[i] = taken[best] = True
+    return matched
+
+
+def average_precision(recall: np.ndarray, precision: np.ndarray) -> float:
+    """Area under precision-recall curve interpolated at 101 points."""
+
+    recall = np.concatenate(([0.0], recall, [1.0]))
+    precision = np.concatenate(([1.0], precision, [0.0]))
+    precision = np.flip(np.maximum.accumulate(np.flip(precision)))
+    points = np.linspace(0, 1, 101)
+    return float(np.trapezoid(np.interp(points, recall, precision), points))
+
+
+def mean_average_precision(
+    scores: np.ndarray,
+    class_ids: np.ndarray,
+    matched: np.ndarray,
+    label_class_ids: np.ndarray,
+) -> float:
+    """mAP over classes with labels.
+
+    Notes:
+        AP of a class with labels but without detections is 0.
+
+    Args:
+        scores: ``(n,)`` scores of detections of all images.
+        class_ids: ``(n,)`` classes of detections.
+        matched: ``(n,)`` true positives of detections.
+        label_class_ids: ``(m,)`` classes of labels of all images.
+    """
+
+    aps = []
+    for class_id in np.unique(label_class_ids):
+        mask = class_ids == class_id
+        if not mask.any():
+            # No detections of a class with labels, as ``ultralytics`` counts it.
+            aps.append(0.0)
+            continue
+        order = np.argsort(-scores[mask], kind="stable")
+        true_positives = np.cumsum(matched[mask][order])
+        recall = true_positives / (label_class_ids == class_id).sum()
+        precision = true_positives / np.arange(1, len(order) + 1)
+        aps.append(average_precision(recall, precision))
+    return float(np.mean(aps)) if aps else 0.0
+
+
+def evaluate(
+    model: pathlib.Path,
+    paths: List[pathlib.Path],
+    threads: int,
+    conf: float,
+    warmup: int,
+) -> Tuple[float, float]:
+    """Run model on images.
+
+    Returns:
+        mAP50 and mean seconds per image.
+    """
+
+    detector = OnnxDetector(model, conf=conf, intra_op_threads=threads)
+    detector.load()
+    detector.warmup(warmup)
+
+    scores, class_ids, matched, label_class_ids = [], [], [], []
+    elapsed = 0.0
+    for path in paths:
+        image = decode_image(path.read_bytes())
+        started = time.perf_counter()
+        detections = detector.detect(image)
+        elapsed += time.perf_counter() - started
+
+        height, width = image.shape[:2]
+        label_path = path.parent.parent / "labels" / f"{path.stem}.txt"
+        boxes, labels = load_labels(label_path, width, height)
+        scores.append(detections.scores)
+        class_ids.append(detections.class_ids)
+        matched.append(match(detections, boxes, labels))
+        label_class_ids.append(labels)
+    detector.close()
+
+    map50 = mean_average_precision(
+        np.concatenate(scores),
+        np.concatenate(class_ids),
+        np.concatenate(matched),
+        np.concatenate(label_class_ids),
+    )
+    return map50, elapsed / len(paths)
+
+
+def main(
+    models: List[pathlib.Path],
+    images: pathlib.Path,
+    limit: int,
+    warmup: int,
+    threads: int,
+    conf: float,
+    max_map_drop: float,
+) -> None:
+    paths = sorted(p for p in images.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+    paths = paths[:limit] if limit else paths
+    if not paths:
+        raise SystemExit(f"No images in {images}")
+
+    width = max(len(model.name) for model in models) + 2
+    print(f"{'model':<{width}}{'size MiB':<11}{'ms/image':<11}{'mAP50':<8}")
+    maps = []
+    for model in models:
+        map50, seconds = evaluate(model, paths, threads, conf, warmup)
+        maps.append(map50)
+        size = model.stat().st_size / 2**20
+        print(
+            f"{model.name:<{width}}{size:<11.1f}{seconds * 1000:<11.1f}"
+            f"{map50:<8.4f}",
+        )
+
+    dropped = [
+        model.name
+        for model, value in zip(models, maps)
+        if maps[0] - value > max_map_drop
+    ]
+    if dropped:
+        raise SystemExit(f"mAP50 of {', '.join(dropped)} dropped by more than allowed")
+
+
+def parse_cli_args():
+    """Parse cli arguments."""
+
+    parser = ArgumentParser(description="Compare variants of detection model")
+    parser.add_argument(
+        "--models",
+        type=pathlib.Path,
+        nargs="+",
+        default=[
+            pathlib.Path("models/yolov8x_obb.onnx"),
+            pathlib.Path("models/yolov8x_obb_fp16.onnx"),
+            pathlib.Path("models/yolov8x_obb_int8.onnx"),
+        ],
+        help="ONNX models, mAP50 of others is compared with the first one",
+    )
+    parser.add_argument(
+        "--images",
+        type=pathlib.Path,
+        default=pathlib.Path("../ML/Ship-detection-4/test/images"),
+        help="Directory of images of the test split, labels are next to it",
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=0,
+        help="Max count of images. All images if 0",
+    )
+    parser.add_argument(
+        "--warmup",
+        type=int,
+        default=2,
+        help="Runs of model on blank input before measuring",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=0,
+        help="Threads of one inference. Count of physical cores if 0",
+    )
+    parser.add_argument(
+        "--conf",
+        type=float,
+        default=0.001,
+        help="Min score of boxes",
+    )
+    parser.add_argument(
+        "--max-map-drop",
+        type=float,
+        default=0.02,
+        help="Max drop of mAP50 of a model from the first model",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_cli_args()
+    main(
+        args.models,
+        args.images,
+        args.limit,
+        args.warmup,
+        args.threads,
+        args.conf,
+        args.max_map_drop,
+    )
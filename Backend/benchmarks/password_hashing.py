@@ -0,0 +1,90 @@
+"""Count bcrypt invocations per signup request.
+
+A request is replayed the way it goes through the API server: validation
+of :class:`.CreateUserRequest`, conversion to :class:`.CreateUserCommand`,
+assignment with ``validate_assignment``, ``model_copy``, conversion through
+``model_dump``, hashing off the event loop and two ``to_dict`` calls.
+``bcrypt.hashpw`` is wrapped by a counter, hashing runs in a thread so the
+counter sees every call. Exit code is 1 if any request hashed more than once.
+
+Examples:
+    ::
+
+        $ python -m benchmarks.password_hashing --requests 20 --rounds 4
+        requests   hashpw calls   calls/request   ms/request
+              20             20            1.00          ...
+"""
+
+import asyncio
+import sys
+import time
+from argparse import ArgumentParser
+
+import bcrypt
+
+from app.pkg import models
+from app.pkg.utils import password
+
+
+class _Counter:
+    """Wrapper of ``bcrypt.hashpw`` which counts calls."""
+
+    def __init__(self, fn):
+        self.fn = fn
+        self.calls = 0
+
+    def __call__(self, *args, **kwargs):
+        self.calls += 1
+        return self.fn(*args, **kwargs)
+
+
+async def _request(rounds: int) -> None:
+    """Replay one signup request."""
+
+    request = models.CreateUserRequest(
+        email="bench@example.com",
+        password="SecurePass123",
+    )
+    cmd = models.CreateUserCommand(email=request.email, password=request.password)
+    cmd.password = cmd.password
+    cmd = cmd.model_copy()
+    cmd = models.CreateUserCommand.model_validate(cmd.model_dump())
+
+    async def hash_bytes(value: bytes) -> bytes:
+        return await asyncio.to_thread(password._hashpw, value, rounds)
+
+    await cmd.password.hash_with(hash_bytes)
+    cmd.to_dict(show_secrets=True)
+    cmd.to_dict(show_secrets=True)
+
+
+async def main(requests: int, rounds: int) -> int:
+    counter = _Counter(bcrypt.hashpw)
+    bcrypt.hashpw = counter
+    password.bcrypt.hashpw = counter
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        await _request(rounds)
+    elapsed = time.perf_counter() - started
+
+    print(f"{'requests':>8} {'hashpw calls':>14} {'calls/request':>15} {'ms/request':>12}")
+    print(
+        f"{requests:>8} {counter.calls:>14} {counter.calls / requests:>15.2f} "
+        f"{elapsed / requests * 1000:>12.2f}",
+    )
+    return int(counter.calls != requests)
+
+
+def parse_cli_args():
+    """Parse cli arguments."""
+
+    parser = ArgumentParser(description="Count bcrypt invocations per request")
+    parser.add_argument("--requests", type=int, default=20, help="Count of requests")
+    parser.add_argument("--rounds", type=int, default=4, help="Cost of bcrypt")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_cli_args()
+    sys.exit(asyncio.run(main(requests=args.requests, rounds=args.rounds)))
@@ -0,0 +1,101 @@
+"""Compare read throughput of ``aiopg`` and ``asyncpg`` connection pools.
+
+Both pools are used through :func:`.acquire_connection`, exactly like
+repositories use them, so the result includes the cost of the cursor facade.
+
+Examples:
+    ::
+
+        $ python -m benchmarks.postgresql_drivers --rows 500 --requests 2000
+        driver     requests   rows/sec    req/sec
+        aiopg          2000   ...         ...
+        asyncpg        2000   ...         ...
+"""
+
+import asyncio
+import time
+from argparse import ArgumentParser
+from typing import Tuple
+
+from app.internal.repository.postgresql.connection import acquire_connection
+from app.pkg.connectors.postgresql.resource import Asyncpg, Postgresql
+from app.pkg.connectors.resources import BaseAsyncResource
+from app.pkg.settings import settings
+
+#: Same shape as ``CityRepository.read_all`` without dependency on data.
+QUERY = """
+    select
+        i as id, 'city_' || i as name, 'ABC' as code, i %% 10 + 1 as country_id
+    from generate_series(1, %(rows)s) as i
+"""
+
+
+async def _run(
+    resource: BaseAsyncResource,
+    rows: int,
+    requests: int,
+    concurrency: int,
+) -> Tuple[float, int]:
+    """Run ``requests`` queries over ``concurrency`` workers.
+
+    Returns:
+        Elapsed time in seconds and count of fetched rows.
+    """
+
+    pool = await resource.init(
+        dsn=settings.POSTGRES.DSN,
+        minsize=concurrency,
+        maxsize=concurrency,
+    )
+    fetched = 0
+    queue: asyncio.Queue = asyncio.Queue()
+    for _ in range(requests):
+        queue.put_nowait(None)
+
+    async def worker() -> None:
+        nonlocal fetched
+        while not queue.empty():
+            queue.get_nowait()
+            async with acquire_connection(pool) as cur:
+                await cur.execute(QUERY, {"rows": rows})
+                fetched += len(await cur.fetchall())
+
+    try:
+        # Warm up connections and statement caches.
+        await asyncio.gather(*(_warmup(pool) for _ in range(concurrency)))
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return time.perf_counter() - started, fetched
+    finally:
+        await resource.shutdown(pool)
+
+
+async def _warmup(pool) -> None:
+    async with acquire_connection(pool) as cur:
+        await cur.execute(QUERY, {"rows": 1})
+        await cur.fetchall()
+
+
+async def main(rows: int, requests: int, concurrency: int) -> None:
+    print(f"{'driver':<10}{'requests':>10}{'rows/sec':>14}{'req/sec':>12}")
+    for name, resource in (("aiopg", Postgresql()), ("asyncpg", Asyncpg())):
+        elapsed, fetched = await _run(resource, rows, requests, concurrency)
+        print(
+            f"{name:<10}{requests:>10}{fetched / elapsed:>14.0f}"
+            f"{requests / elapsed:>12.0f}",
+        )
+
+
+def parse_cli_args():
+    """Parse cli arguments."""
+
+    parser = ArgumentParser(description="Benchmark postgresql drivers")
+    parser.add_argument("--rows", type=int, default=100, help="Rows per query")
+    parser.add_argument("--requests", type=int, default=2000, help="Count of queries")
+    parser.add_argument("--concurrency", type=int, default=8, help="Pool size")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_cli_args()
+    asyncio.run(main(args.rows, args.requests, args.concurrency))
@@ -0,0 +1,215 @@
+"""Cost of rotated NMS of oriented boxes.
+
+Times the legacy implementation, which clipped polygons pair by pair in a
+Python loop, and the vectorized one of :mod:`app.pkg.detection.geometry`.
+Both give the same result, which is checked by
+``tests/detection/test_geometry.py`` against the legacy loop of this module.
+
+Boxes are synthetic: ``--boxes`` candidates around ``--boxes / --per-ship``
+ships in a square scene. The legacy loop is measured on the first
+``--reference-boxes`` boxes only, it takes minutes on 10k boxes. No model or
+database is required.
+
+Examples:
+    ::
+
+        $ python -m benchmarks.rotated_nms --boxes 10000
+        implementation  boxes   kept    ms
+        legacy          ...
+        vectorized      ...
+"""
+
+import math
+import time
+from argparse import ArgumentParser
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from app.pkg.detection import rotated_nms, xywhr_to_corners
+
+
+def legacy_rotated_nms(
+    boxes: np.ndarray,
+    scores: np.ndarray,
+    threshold: float,
+    metric: str = "iou",
+) -> np.ndarray:
+    """NMS as it was implemented before vectorization."""
+
+    order = np.argsort(-scores, kind="stable")
+    corners = xywhr_to_corners(boxes)
+    areas = boxes[:, 2] * boxes[:, 3]
+    keep: List[int] = []
+    for i in order:
+        if all(
+            legacy_polygon_iou(corners[i], corners[j], areas[i], areas[j], metric)
+            <= threshold
+            for j in keep
+        ):
+            keep.append(int(i))
+    return np.asarray(keep, dtype=np.int64)
+
+
+def legacy_polygon_iou(
+    first: np.ndarray,
+    second: np.ndarray,
+    first_area: float,
+    second_area: float,
+    metric: str = "iou",
+) -> float:
+    """Overlap of two convex polygons given by corners in one order."""
+
+    intersection = _area(_clip(first.tolist(), second.tolist()))
+    if metric == "ios":
+        smaller = min(first_area, second_area)
+        return intersection / smaller if smaller > 0 else 0.0
+    union = first_area + second_area - intersection
+    return intersection / union if union > 0 else 0.0
+
+
+def _clip(
+    subject: Sequence[Sequence[float]],
+    clip: Sequence[Sequence[float]],
+) -> List[Sequence[float]]:
+    orientation = _cross(clip[0], clip[1], clip[2])
+    if orientation == 0:
+        return []
+    result = list(subject)
+    for k, start in enumerate(clip):
+        end = clip[(k + 1) % len(clip)]
+        points, result = result, []
+        for m, current in enumerate(points):
+            previous = points[m - 1]
+            current_inside = _cross(start, end, current) * orientation >= 0
+            previous_inside = _cross(start, end, previous) * orientation >= 0
+            if current_inside != previous_inside:
+                result.append(_intersect(start, end, previous, current))
+            if current_inside:
+                result.append(current)
+        if not result:
+            break
+    return result
+
+
+def _cross(a: Sequence[float], b: Sequence[float], c: Sequence[float]) -> float:
+    return (b[0] - a[0]) * (c[1] - a[1]) - (b[1] - a[1]) * (c[0] - a[0])
+
+
+def _intersect(
+    a: Sequence[float],
+    b: Sequence[float],
+    p: Sequence[float],
+    q: Sequence[float],
+) -> Tuple[float, float]:
+    dp, dq = _cross(a, b, p), _cross(a, b, q)
+    t = dp / (dp - dq)
+    return p[0] + t * (q[0] - p[0]), p[1] + t * (q[1] - p[1])
+
+
+def _area(points: Sequence[Sequence[float]]) -> float:
+    return abs(
+        sum(
+            points[k - 1][0] * point[1] - point[0] * points[k - 1][1]
+            for k, point in enumerate(points)
+        ),
+    ) / 2
+
+
+def clustered_boxes(
+    rng: np.random.Generator,
+    count: int,
+    per_ship: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Candidates of NMS: jittered copies of boxes of ships with scores."""
+
+    ships = max(count // per_ship, 1)
+    scene = 250.0 * math.sqrt(ships)
+    centers = _random_boxes(rng, ships, scene)
+    boxes = np.repeat(centers, per_ship, axis=0)[:count]
+    boxes[:, :2] += rng.normal(0, 3, (len(boxes), 2))
+    boxes[:, 2:4] *= rng.uniform(0.8, 1.2, (len(boxes), 2))
+    boxes[:, 4] += rng.normal(0, 0.1, len(boxes))
+    return boxes, rng.uniform(0.25, 1.0, len(boxes))
+
+
+def _random_boxes(rng: np.random.Generator, count: int, scene: float) -> np.ndarray:
+    length = rng.uniform(15, 150, count)
+    return np.stack(
+        (
+            rng.uniform(0, scene, count),
+            rng.uniform(0, scene, count),
+            length,
+            length / rng.uniform(2, 8, count),
+            rng.uniform(0, math.pi, count),
+        ),
+        axis=1,
+    )
+
+
+def main(
+    boxes: int,
+    per_ship: int,
+    reference_boxes: int,
+    iou: float,
+    repeat: int,
+) -> None:
+    rng = np.random.default_rng(0)
+    candidates, scores = clustered_boxes(rng, boxes, per_ship)
+    subset, subset_scores = candidates[:reference_boxes], scores[:reference_boxes]
+    started = time.perf_counter()
+    legacy_keep = legacy_rotated_nms(subset, subset_scores, iou)
+    legacy_time = time.perf_counter() - started
+
+    vectorized_time = math.inf
+    for _ in range(repeat):
+        started = time.perf_counter()
+        keep = rotated_nms(candidates, scores, iou)
+        vectorized_time = min(vectorized_time, time.perf_counter() - started)
+
+    print(f"{'implementation':<16}{'boxes':<8}{'kept':<8}{'ms':<10}")
+    print(
+        f"{'legacy':<16}{len(subset):<8}{len(legacy_keep):<8}"
+        f"{legacy_time * 1000:<10.1f}",
+    )
+    print(
+        f"{'vectorized':<16}{len(candidates):<8}{len(keep):<8}"
+        f"{vectorized_time * 1000:<10.1f}",
+    )
+
+
+def parse_cli_args():
+    """Parse cli arguments."""
+
+    parser = ArgumentParser(description="Benchmark rotated NMS")
+    parser.add_argument(
+        "--boxes",
+        type=int,
+        default=10_000,
+        help="Count of candidates of NMS",
+    )
+    parser.add_argument(
+        "--per-ship",
+        type=int,
+        default=10,
+        help="Count of candidates around one ship",
+    )
+    parser.add_argument(
+        "--reference-boxes",
+        type=int,
+        default=1_000,
+        help="Count of candidates of the legacy implementation",
+    )
+    parser.add_argument("--iou", type=float, default=0.7, help="Max IoU of kept boxes")
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="Runs of vectorized NMS, the best one is printed",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_cli_args()
+    main(args.boxes, args.per_ship, args.reference_boxes, args.iou, args.repeat)
@@ -0,0 +1,319 @@
+"""Throughput and memory of reading tiles of a large scene.
+
+Writes a synthetic RGB scene of ``--size`` pixels per side as a tiled TIFF,
+like ``gdal_translate -co TILED=YES`` does, and as a JPEG, then reads every
+tile of :func:`.tile_windows` from them:
+
+* ``legacy`` decodes the whole scene by :func:`.decode_image` and slices
+  tiles from it, as detection did before windowed reads.
+* ``windowed`` opens the scene by :func:`.open_image`: the TIFF is read
+  block by block from a memory mapped file, the JPEG is decoded to a memory
+  mapped file first. Tiles are read by ``--read-workers`` threads.
+
+Every run is done in a fresh process and prints growth of its peak resident
+memory. It includes pages of memory mapped files, which the OS drops when
+memory is needed, so a scene larger than memory is still read. Tiles of both
+variants are hashed in the same order, the benchmark fails if hashes differ.
+The scene is a random block repeated over the whole area, so deflate is
+close to the worst case of decompression.
+
+Examples:
+    ::
+
+        $ python -m benchmarks.scene_reading --size 16384 --compression deflate
+        file    variant    tiles   tiles/s   cache hits   RSS growth MiB
+        tiff    legacy     ...
+        tiff    windowed   ...
+        jpeg    legacy     ...
+        jpeg    windowed   ...
+"""
+
+import hashlib
+import pathlib
+import struct
+import tempfile
+import time
+import zlib
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from app.pkg.detection import (
+    ArraySource,
+    ImageSource,
+    TiffSource,
+    open_image,
+    tile_windows,
+)
+from app.pkg.detection.preprocess import decode_image
+from benchmarks import add_scene_arguments, peak_rss, run_isolated
+
+#: int: Side of the random block repeated over synthetic scene.
+BLOCK = 509
+
+#: Dict[str, int]: Codes of compressions of TIFF by name.
+COMPRESSIONS = {"none": 1, "deflate": 8}
+
+
+def _pattern(size: int) -> np.ndarray:
+    return np.random.default_rng(0).integers(0, 256, (size, size, 3), dtype=np.uint8)
+
+
+def _region(block: np.ndarray, x: int, y: int, width: int, height: int) -> np.ndarray:
+    rows = np.arange(y, y + height) % BLOCK
+    columns = np.arange(x, x + width) % BLOCK
+    return block[rows[:, None], columns[None, :]]
+
+
+def write_tiff(
+    path: pathlib.Path,
+    size: int,
+    block_size: int,
+    compression: str,
+) -> None:
+    """Write synthetic scene as a tiled RGB TIFF tile by tile.
+
+    Notes:
+        Deflate tiles use horizontal predictor, as GDAL does with
+        ``-co PREDICTOR=2``. The scene is never held in memory as a whole,
+        so it may be larger than memory. Classic TIFF is limited to 4 GiB.
+    """
+
+    block = _pattern(BLOCK)
+    across = -(-size // block_size)
+    offsets, counts = [], []
+    with open(path, "wb") as file:
+        file.write(b"II*\0\0\0\0\0")
+        for row in range(across):
+            for column in range(across):
+                tile = _region(
+                    block,
+                    column * block_size,
+                    row * block_size,
+                    block_size,
+                    block_size,
+                )
+                if compression == "deflate":
+                    tile = np.diff(tile, axis=1, prepend=0).astype(np.uint8)
+                    data = zlib.compress(tile.tobytes(), 6)
+                else:
+                    data = tile.tobytes()
+                offsets.append(file.tell())
+                counts.append(len(data))
+                file.write(data)
+
+        extra = file.tell()
+        file.write(struct.pack("<3H", 8, 8, 8))
+        offsets_at = file.tell()
+        file.write(struct.pack(f"<{len(offsets)}I", *offsets))
+        counts_at = file.tell()
+        file.write(struct.pack(f"<{len(counts)}I", *counts))
+
+        short, long = 3, 4
+        entries = [
+            (256, long, 1, size),
+            (257, long, 1, size),
+            (258, short, 3, extra),
+            (259, short, 1, COMPRESSIONS[compression]),
+            (262, short, 1, 2),
+            (277, short, 1, 3),
+            (284, short, 1, 1),
+            (317, short, 1, 2 if compression == "deflate" else 1),
+            (322, long, 1, block_size),
+            (323, long, 1, block_size),
+            (324, long, len(offsets), offsets_at),
+            (325, long, len(counts), counts_at),
+        ]
+        if file.tell() + 6 + 12 * len(entries) > 2**32:
+            raise SystemExit("Scene does not fit to classic TIFF, use smaller size")
+        ifd = file.tell()
+        file.write(struct.pack("<H", len(entries)))
+        for tag, kind, count, value in entries:
+            file.write(struct.pack("<HHII", tag, kind, count, value))
+        file.write(struct.pack("<I", 0))
+        file.seek(4)
+        file.write(struct.pack("<I", ifd))
+
+
+def write_jpeg(path: pathlib.Path, size: int) -> None:
+    """Write synthetic scene as a baseline JPEG.
+
+    Notes:
+        Pillow encodes from memory, so the scene is held in memory while it
+        is written.
+    """
+
+    scene = _region(_pattern(BLOCK), 0, 0, size, size)
+    Image.fromarray(scene).save(path, "JPEG", quality=90)
+
+
+def _windows(width: int, height: int, tile: int, overlap: int) -> Iterator[Tuple]:
+    for x0, y0, x1, y1 in tile_windows(width, height, tile, overlap):
+        yield int(x0), int(y0), int(x1 - x0), int(y1 - y0)
+
+
+def _run(
+    variant: str,
+    path: pathlib.Path,
+    tile: int,
+    overlap: int,
+    batch_size: int,
+    read_workers: int,
+    cache_bytes: int,
+    directory: Optional[pathlib.Path],
+    max_pixels: int,
+) -> Tuple[int, float, int, int, str]:
+    """Read every tile of scene in this process.
+
+    Returns:
+        Count of tiles, seconds, hits of block cache, growth of peak
+        resident memory in bytes and SHA-256 of tiles.
+    """
+
+    before = peak_rss()
+    started = time.perf_counter()
+    digest = hashlib.sha256()
+    hits = 0
+    with open(path, "rb") as file:
+        if variant == "legacy":
+            source: ImageSource = ArraySource(decode_image(file, max_pixels))
+        else:
+            source = open_image(
+                file,
+                max_pixels=max_pixels,
+                raster_above=0,
+                directory=directory,
+                cache_bytes=cache_bytes,
+            )
+        windows = list(_windows(source.width, source.height, tile, overlap))
+        with source, ThreadPoolExecutor(read_workers) as readers:
+            # Batch by batch, as :class:`.TiledDetector` reads them.
+            for i in range(0, len(windows), batch_size):
+                batch = windows[i : i + batch_size]
+                for window in readers.map(lambda w: source.read_window(*w), batch):
+                    digest.update(np.ascontiguousarray(window).data)
+            if isinstance(source, TiffSource):
+                hits = source.cache.stats().hits
+    elapsed = time.perf_counter() - started
+    return len(windows), elapsed, hits, peak_rss() - before, digest.hexdigest()
+
+
+def main(
+    size: int,
+    block_size: int,
+    compression: str,
+    tile: int,
+    overlap: int,
+    batch_size: int,
+    read_workers: int,
+    cache_mib: int,
+    directory: Optional[pathlib.Path],
+    files: List[str],
+) -> None:
+    failed = False
+
+    print(
+        f"{'file':<8}{'variant':<11}{'tiles':<8}{'tiles/s':<10}"
+        f"{'cache hits':<13}{'RSS growth MiB':<14}",
+    )
+    with tempfile.TemporaryDirectory(dir=directory) as workdir:
+        for kind in files:
+            path = pathlib.Path(workdir) / f"scene.{kind}"
+            if kind == "tiff":
+                write_tiff(path, size, block_size, compression)
+            else:
+                write_jpeg(path, size)
+
+            digests = set()
+            for variant in ("legacy", "windowed"):
+                count, elapsed, hits, peak, digest = run_isolated(
+                    _run,
+                    variant,
+                    path,
+                    tile,
+                    overlap,
+                    batch_size,
+                    read_workers,
+                    cache_mib * 2**20,
+                    directory,
+                    size * size,
+                )
+                digests.add(digest)
+                print(
+                    f"{kind:<8}{variant:<11}{count:<8}{count / elapsed:<10.1f}"
+                    f"{hits:<13}{peak / 2**20:<14.0f}",
+                )
+            failed |= len(digests) != 1
+
+    if failed:
+        raise SystemExit("Windowed tiles differ from the legacy ones")
+
+
+def parse_cli_args():
+    """Parse cli arguments."""
+
+    parser = ArgumentParser(description="Benchmark windowed reads of scenes")
+    add_scene_arguments(parser, size=12_000)
+    parser.add_argument(
+        "--block-size",
+        type=int,
+        default=512,
+        help="Side of a tile of TIFF in pixels",
+    )
+    parser.add_argument(
+        "--compression",
+        choices=tuple(COMPRESSIONS),
+        default="deflate",
+        help="Compression of TIFF",
+    )
+    parser.add_argument(
+        "--tile",
+        type=int,
+        default=640,
+        help="Side of a tile of detection in pixels",
+    )
+    parser.add_argument(
+        "--read-workers",
+        type=int,
+        default=4,
+        help="Count of tiles read at once",
+    )
+    parser.add_argument(
+        "--cache-mib",
+        type=int,
+        default=256,
+        help="Max MiB of decompressed blocks of TIFF kept in memory",
+    )
+    parser.add_argument(
+        "--directory",
+        type=pathlib.Path,
+        default=None,
+        help="Directory of scene files. System default if not set",
+    )
+    parser.add_argument(
+        "--files",
+        nargs="+",
+        choices=("tiff", "jpeg"),
+        default=["tiff", "jpeg"],
+        help="Formats of scene to benchmark",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_cli_args()
+    main(
+        args.size,
+        args.block_size,
+        args.compression,
+        args.tile,
+        args.overlap,
+        args.batch_size,
+        args.read_workers,
+        args.cache_mib,
+        args.directory,
+        args.files,
+    )
@@ -0,0 +1,139 @@
+"""Throughput and memory of detection on a full-size satellite scene.
+
+Runs :class:`.TiledDetector` on a synthetic RGB scene of ``--size`` pixels
+per side and prints count of tiles, tiles/s, time of every stage and peak
+resident memory of the process. Peak memory is expected to be close to size
+of the scene itself: tiles are views of the scene array and only one batch of
+model inputs per worker is allocated at a time.
+
+The scene is a random block repeated over the whole area, so the model finds
+few or no ships on it and the merge stage is measured on what the model
+reports. Use ``--scene`` to run on a real image instead.
+
+Examples:
+    ::
+
+        $ python -m benchmarks.scene_tiling \\
+            --model models/yolov8x_obb.onnx --size 20000 \\
+            --workers 2 --threads 2
+        scene          tiles   overlap  batch  workers
+        20000x20000    1521    128      8      2
+        ...
+        tiles/s   boxes   scene MiB   peak RSS MiB
+        ...
+"""
+
+import pathlib
+import time
+from argparse import ArgumentParser
+from typing import Optional
+
+import numpy as np
+
+from app.pkg.detection import OnnxDetector, TiledDetector, decode_image, tile_windows
+from app.pkg.settings import settings
+from benchmarks import add_scene_arguments, peak_rss
+
+#: int: Side of the random block repeated over synthetic scene.
+BLOCK = 509
+
+
+def main(
+    model: pathlib.Path,
+    scene_path: Optional[pathlib.Path],
+    size: int,
+    overlap: int,
+    batch_size: int,
+    workers: int,
+    threads: int,
+) -> None:
+    detector = OnnxDetector(model, intra_op_threads=threads)
+    detector.load()
+    detector.warmup(2)
+    tiled = TiledDetector(
+        detector,
+        overlap=overlap,
+        batch_size=batch_size,
+        workers=workers,
+    )
+
+    if scene_path is not None:
+        scene = decode_image(
+            scene_path.read_bytes(),
+            max_pixels=settings.DETECTION.MAX_IMAGE_PIXELS,
+        )
+    else:
+        block = np.random.default_rng(0).integers(
+            0,
+            256,
+            (BLOCK, BLOCK, 3),
+            dtype=np.uint8,
+        )
+        reps = -(-size // BLOCK)
+        scene = np.tile(block, (reps, reps, 1))[:size, :size]
+    height, width = scene.shape[:2]
+    tiles = len(tile_windows(width, height, tiled.tile, overlap))
+
+    started = time.perf_counter()
+    detections = tiled.detect(scene)
+    elapsed = time.perf_counter() - started
+    tiled.close()
+
+    print(f"{'scene':<15}{'tiles':<8}{'overlap':<9}{'batch':<7}{'workers':<8}")
+    print(f"{f'{width}x{height}':<15}{tiles:<8}{overlap:<9}{batch_size:<7}{workers:<8}")
+    print()
+    print(f"{'stage':<14}{'total s':<9}{'per tile ms':<12}")
+    for stage, seconds in detections.timings.items():
+        print(f"{stage:<14}{seconds:<9.2f}{seconds / tiles * 1000:<12.1f}")
+    print(f"{'wall':<14}{elapsed:<9.2f}{elapsed / tiles * 1000:<12.1f}")
+    print()
+    print(f"{'tiles/s':<10}{'boxes':<8}{'scene MiB':<12}{'peak RSS MiB':<12}")
+    print(
+        f"{tiles / elapsed:<10.2f}{len(detections):<8}"
+        f"{scene.nbytes / 2**20:<12.0f}{peak_rss() / 2**20:<12.0f}",
+    )
+
+
+def parse_cli_args():
+    """Parse cli arguments."""
+
+    parser = ArgumentParser(description="Benchmark detection on a large scene")
+    parser.add_argument(
+        "--model",
+        type=pathlib.Path,
+        default=pathlib.Path("models/yolov8x_obb.onnx"),
+        help="ONNX export of YOLOv8-OBB weights",
+    )
+    parser.add_argument(
+        "--scene",
+        type=pathlib.Path,
+        default=None,
+        help="Image of a real scene. Synthetic scene of --size if not set",
+    )
+    add_scene_arguments(parser, size=20_000)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Count of batches run at once",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=0,
+        help="Threads of one inference. Count of physical cores if 0",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_cli_args()
+    main(
+        args.model,
+        args.scene,
+        args.size,
+        args.overlap,
+        args.batch_size,
+        args.workers,
+        args.threads,
+    )
@@ -0,0 +1,60 @@
+"""Load test: latency of unrelated endpoints during a signup burst.
+
+``SignupUser`` creates users as fast as possible, so bcrypt runs all the
+time. ``ProbeUser`` calls ``GET /metrics``, which touches neither bcrypt nor
+the database, so its latency shows only how long requests wait for the event
+loop. Compare p99 of ``/metrics`` in the locust report with and without the
+burst (``--tags probe``), or with a different ``PASSWORD__WORKERS``.
+
+Unlike other benchmarks, this module is a locustfile and runs against a
+started server.
+
+Examples:
+    ::
+
+        $ uvicorn app:create_app --factory --port 5000
+        $ locust -f benchmarks/signup_burst.py --host http://127.0.0.1:5000 \\
+            --headless --users 200 --spawn-rate 50 --run-time 1m
+
+    Signups rejected with 503 by the hashing queue limit are reported as
+    failures with ``overloaded`` message, so the report shows how many
+    signups were shed.
+"""
+
+import uuid
+
+from locust import FastHttpUser, between, constant, tag, task
+
+
+class SignupUser(FastHttpUser):
+    """Creates users without pause."""
+
+    weight = 3
+    wait_time = constant(0)
+
+    @tag("signup")
+    @task
+    def signup(self) -> None:
+        with self.client.post(
+            "/user",
+            json={
+                "email": f"load-{uuid.uuid4().hex}@example.com",
+                "password": "SecurePass123",
+            },
+            name="POST /user",
+            catch_response=True,
+        ) as response:
+            if response.status_code == 503:
+                response.failure("overloaded")
+
+
+class ProbeUser(FastHttpUser):
+    """Calls an endpoint which does not hash passwords."""
+
+    weight = 1
+    wait_time = between(0.05, 0.1)
+
+    @tag("probe")
+    @task
+    def probe(self) -> None:
+        self.client.get("/metrics", name="GET /metrics")
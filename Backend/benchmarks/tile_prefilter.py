@@ -0,0 +1,253 @@
+"""Recall of ships and share of skipped tiles of :class:`.TileFilter`.
+
+Images and labels are ``images`` and ``labels`` of a split of the Roboflow
+export of the dataset (``Ship-detection-4/test`` in ``ML/EDA.ipynb``).
+Labels are YOLO OBB: ``class x1 y1 x2 y2 x3 y3 x4 y4`` normalized by size of
+image. Images of the dataset are of input size of the model, so they are cut
+to ``--tile`` pixels tiles by :func:`.tile_windows` without overlap to have
+tiles both with and without ships. A ship belongs to the tile of its centre.
+
+With ``--fit-images`` thresholds are learned on ship tiles of that split
+(``train``) first: ``min_edge_density`` is ``--quantile`` of their edge
+densities and ``min_std`` is ``--quantile`` of standard deviations of ship
+tiles the edge density does not keep, both lowered by ``--margin``. If edges
+keep every ship tile, ``min_std`` is infinite and unused. Without
+``--fit-images`` thresholds of the command line are checked.
+
+The benchmark prints suggested settings, recall of ships (ships on kept
+tiles of ``--images`` by all ships), share of skipped tiles without ships and
+time of the screen per tile. It fails if recall is below ``--min-recall``.
+
+Examples:
+    ::
+
+        $ python -m benchmarks.tile_prefilter \\
+            --images ../ML/Ship-detection-4/test/images \\
+            --fit-images ../ML/Ship-detection-4/train/images
+        DETECTION__TILE_FILTER_MIN_STD=...
+        DETECTION__TILE_FILTER_MIN_EDGE_DENSITY=...
+        tiles   ship tiles   ships   recall   empty skipped   ms/tile
+        ...
+"""
+
+import pathlib
+import time
+from argparse import ArgumentParser
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.pkg.detection import TileFilter, decode_image, tile_windows
+
+#: Tuple[str, ...]: Extensions of images of the dataset.
+IMAGE_SUFFIXES = (".jpg", ".jpeg", ".png", ".tif", ".tiff")
+
+
+def load_split(
+    images: pathlib.Path,
+    tile: int,
+    limit: int,
+) -> Tuple[List[np.ndarray], np.ndarray]:
+    """Cut images of a split to tiles.
+
+    Returns:
+        Tiles and ``(n,)`` counts of ships of every tile.
+    """
+
+    paths = sorted(p for p in images.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+    paths = paths[:limit] if limit else paths
+    if not paths:
+        raise SystemExit(f"No images in {images}")
+
+    tiles: List[np.ndarray] = []
+    ships: List[int] = []
+    for path in paths:
+        image = decode_image(path.read_bytes())
+        height, width = image.shape[:2]
+        centres = _centres(images.parent / "labels" / f"{path.stem}.txt")
+        centres = centres * (width, height)
+        for x0, y0, x1, y1 in tile_windows(width, height, tile, 0):
+            tiles.append(image[y0:y1, x0:x1])
+            inside = (
+                (centres[:, 0] >= x0)
+                & (centres[:, 0] < x1)
+                & (centres[:, 1] >= y0)
+                & (centres[:, 1] < y1)
+            )
+            ships.append(int(inside.sum()))
+    return tiles, np.array(ships)
+
+
+def _centres(path: pathlib.Path) -> np.ndarray:
+    """Normalized centres of ships of a label file, ``(n, 2)``."""
+
+    if not path.exists():
+        return np.zeros((0, 2))
+    rows = [line.split() for line in path.read_text().splitlines() if line.strip()]
+    corners = np.array([row[1:9] for row in rows], dtype=np.float64)
+    return corners.reshape(-1, 4, 2).mean(axis=1)
+
+
+def fit(
+    tile_filter: TileFilter,
+    tiles: List[np.ndarray],
+    ships: np.ndarray,
+    quantile: float,
+    margin: float,
+) -> TileFilter:
+    """Learn thresholds keeping ship tiles of a split.
+
+    Returns:
+        Filter with thresholds of ship tiles and ``step`` and
+        ``edge_threshold`` of ``tile_filter``.
+    """
+
+    ship_tiles = [t for t, count in zip(tiles, ships) if count]
+    if not ship_tiles:
+        raise SystemExit("No ships to fit thresholds on")
+    std, edges = tile_filter.scores(ship_tiles)
+    min_edge_density = float(np.quantile(edges, quantile)) * margin
+    missed = std[edges < min_edge_density]
+    # Standard deviation is not needed if edges keep every ship tile.
+    min_std = float(np.quantile(missed, quantile)) * margin if len(missed) else np.inf
+    return TileFilter(
+        step=tile_filter.step,
+        min_std=min_std,
+        edge_threshold=tile_filter.edge_threshold,
+        min_edge_density=min_edge_density,
+    )
+
+
+def main(
+    images: pathlib.Path,
+    fit_images: Optional[pathlib.Path],
+    tile: int,
+    limit: int,
+    tile_filter: TileFilter,
+    quantile: float,
+    margin: float,
+    min_recall: float,
+) -> None:
+    if fit_images is not None:
+        fit_tiles, fit_ships = load_split(fit_images, tile, limit)
+        tile_filter = fit(tile_filter, fit_tiles, fit_ships, quantile, margin)
+    for name, value in (
+        ("STEP", tile_filter.step),
+        ("MIN_STD", tile_filter.min_std),
+        ("EDGE_THRESHOLD", tile_filter.edge_threshold),
+        ("MIN_EDGE_DENSITY", tile_filter.min_edge_density),
+    ):
+        print(f"DETECTION__TILE_FILTER_{name}={value:.4g}")
+    print()
+
+    tiles, ships = load_split(images, tile, limit)
+    started = time.perf_counter()
+    keep = tile_filter.keep(tiles)
+    elapsed = time.perf_counter() - started
+
+    recall = ships[keep].sum() / max(ships.sum(), 1)
+    empty = ships == 0
+    skipped = (~keep & empty).sum() / max(empty.sum(), 1)
+    print(
+        f"{'tiles':<8}{'ship tiles':<13}{'ships':<8}{'recall':<9}"
+        f"{'empty skipped':<16}{'ms/tile':<8}",
+    )
+    print(
+        f"{len(tiles):<8}{int((~empty).sum()):<13}{int(ships.sum()):<8}"
+        f"{recall:<9.4f}{skipped:<16.2%}{elapsed / len(tiles) * 1000:<8.3f}",
+    )
+
+    if recall < min_recall:
+        raise SystemExit(f"Recall of ships {recall:.4f} is below {min_recall}")
+
+
+def parse_cli_args():
+    """Parse cli arguments."""
+
+    parser = ArgumentParser(description="Check recall of screen of tiles")
+    parser.add_argument(
+        "--images",
+        type=pathlib.Path,
+        default=pathlib.Path("../ML/Ship-detection-4/test/images"),
+        help="Directory of images of the checked split, labels are next to it",
+    )
+    parser.add_argument(
+        "--fit-images",
+        type=pathlib.Path,
+        default=None,
+        help="Directory of images of the split to learn thresholds on",
+    )
+    parser.add_argument(
+        "--tile",
+        type=int,
+        default=160,
+        help="Side of a tile in pixels",
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=0,
+        help="Max count of images of a split. All images if 0",
+    )
+    parser.add_argument(
+        "--step",
+        type=int,
+        default=2,
+        help="Stride of pixels of a tile used by the screen",
+    )
+    parser.add_argument(
+        "--min-std",
+        type=float,
+        default=2.0,
+        help="Min standard deviation of brightness of a kept tile",
+    )
+    parser.add_argument(
+        "--edge-threshold",
+        type=float,
+        default=24.0,
+        help="Min brightness step of an edge pixel",
+    )
+    parser.add_argument(
+        "--min-edge-density",
+        type=float,
+        default=5e-4,
+        help="Min share of edge pixels of a kept tile",
+    )
+    parser.add_argument(
+        "--quantile",
+        type=float,
+        default=0.0,
+        help="Quantile of scores of ship tiles used as a threshold",
+    )
+    parser.add_argument(
+        "--margin",
+        type=float,
+        default=0.5,
+        help="Factor of learned thresholds",
+    )
+    parser.add_argument(
+        "--min-recall",
+        type=float,
+        default=1.0,
+        help="Min recall of ships on kept tiles",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_cli_args()
+    main(
+        args.images,
+        args.fit_images,
+        args.tile,
+        args.limit,
+        TileFilter(
+            step=args.step,
+            min_std=args.min_std,
+            edge_threshold=args.edge_threshold,
+            min_edge_density=args.min_edge_density,
+        ),
+        args.quantile,
+        args.margin,
+        args.min_recall,
+    )
@@ -0,0 +1,169 @@
+"""Peak memory of receiving uploaded images of growing size.
+
+Feeds a synthetic body by chunks of ``--chunk-kib`` to the legacy
+:func:`.read_body`, which kept the whole body in memory, and to
+:func:`.spool_body`, which writes it to a temporary file, then reads the
+received body back by blocks like a decoder does. Every run is done in a
+fresh process, so peak resident memory of one run does not hide the next.
+
+Growth of peak memory of spooled bodies is expected to be flat: close to
+``--max-memory-kib`` whatever the size of upload. The benchmark fails if it
+grows by more than ``--tolerance-mib`` between the smallest and the largest
+upload.
+
+Examples:
+    ::
+
+        $ python -m benchmarks.upload_spooling --sizes-mib 16 64 256
+        variant   size MiB   MiB/s     RSS growth MiB
+        legacy    16         ...
+        spooled   16         ...
+        ...
+"""
+
+import asyncio
+import hashlib
+import io
+import time
+from argparse import ArgumentParser
+from typing import AsyncIterator, Awaitable, BinaryIO, Callable, Dict, List, Tuple
+
+from app.internal.pkg.uploads import read_body, spool_body
+from benchmarks import peak_rss, run_isolated
+
+#: int: Size of blocks a received body is read back by.
+READ_BLOCK = 1024 * 1024
+
+
+async def _chunks(size: int, chunk: int) -> AsyncIterator[bytes]:
+    # A new object per chunk, like a server receiving it from a socket.
+    block = bytes(range(256)) * (chunk // 256)
+    sent = 0
+    while sent < size:
+        part = block[: min(chunk, size - sent)]
+        sent += len(part)
+        yield bytes(part)
+
+
+async def _legacy(size: int, chunk: int, max_memory: int) -> bytes:
+    digest = hashlib.sha256()
+    body = await read_body(_chunks(size, chunk), size, digest=digest)
+    _read_back(io.BytesIO(body))
+    return digest.digest()
+
+
+async def _spooled(size: int, chunk: int, max_memory: int) -> bytes:
+    async with spool_body(
+        _chunks(size, chunk),
+        size,
+        content_length=size,
+        max_memory=max_memory,
+    ) as body:
+        _read_back(body.file)
+        return body.sha256
+
+
+async def _expected(size: int, chunk: int) -> bytes:
+    digest = hashlib.sha256()
+    async for part in _chunks(size, chunk):
+        digest.update(part)
+    return digest.digest()
+
+
+def _read_back(file: BinaryIO) -> None:
+    while file.read(READ_BLOCK):
+        pass
+
+
+#: Dict[str, Callable[[int, int, int], Awaitable[bytes]]]: Receivers of body
+#  returning its SHA-256.
+VARIANTS: Dict[str, Callable[[int, int, int], Awaitable[bytes]]] = {
+    "legacy": _legacy,
+    "spooled": _spooled,
+}
+
+
+def _run(variant: str, size: int, chunk: int, max_memory: int) -> Tuple[float, int]:
+    """Receive one body in this process.
+
+    Returns:
+        Seconds of receiving and growth of peak resident memory in bytes.
+    """
+
+    before = peak_rss()
+    started = time.perf_counter()
+    digest = asyncio.run(VARIANTS[variant](size, chunk, max_memory))
+    elapsed = time.perf_counter() - started
+    grown = peak_rss() - before
+    if digest != asyncio.run(_expected(size, chunk)):
+        raise SystemExit(f"SHA-256 of {variant} body differs")
+    return elapsed, grown
+
+
+def main(
+    sizes_mib: List[int],
+    chunk_kib: int,
+    max_memory_kib: int,
+    tolerance_mib: float,
+) -> None:
+    chunk, max_memory = chunk_kib * 1024, max_memory_kib * 1024
+    growth: Dict[str, List[int]] = {name: [] for name in VARIANTS}
+
+    print(f"{'variant':<10}{'size MiB':<11}{'MiB/s':<10}{'RSS growth MiB':<14}")
+    for size_mib in sizes_mib:
+        for variant in VARIANTS:
+            elapsed, grown = run_isolated(
+                _run,
+                variant,
+                size_mib * 2**20,
+                chunk,
+                max_memory,
+            )
+            growth[variant].append(grown)
+            print(
+                f"{variant:<10}{size_mib:<11}{size_mib / elapsed:<10.0f}"
+                f"{grown / 2**20:<14.1f}",
+            )
+
+    spread = (max(growth["spooled"]) - min(growth["spooled"])) / 2**20
+    print()
+    print(f"spread of spooled RSS growth: {spread:.1f} MiB")
+    if spread > tolerance_mib:
+        raise SystemExit("Memory of spooled uploads grows with size of upload")
+
+
+def parse_cli_args():
+    """Parse cli arguments."""
+
+    parser = ArgumentParser(description="Benchmark memory of uploaded images")
+    parser.add_argument(
+        "--sizes-mib",
+        type=int,
+        nargs="+",
+        default=[16, 64, 256],
+        help="Sizes of uploaded bodies in MiB",
+    )
+    parser.add_argument(
+        "--chunk-kib",
+        type=int,
+        default=64,
+        help="Size of received chunks in KiB",
+    )
+    parser.add_argument(
+        "--max-memory-kib",
+        type=int,
+        default=1024,
+        help="Max size of spooled body kept in memory in KiB",
+    )
+    parser.add_argument(
+        "--tolerance-mib",
+        type=float,
+        default=8,
+        help="Max spread of RSS growth of spooled bodies between sizes",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_cli_args()
+    main(args.sizes_mib, args.chunk_kib, args.max_memory_kib, args.tolerance_mib)
@@ -0,0 +1,91 @@
+"""Throughput of bulk user import.
+
+Sends one CSV of ``--rows`` new users to ``POST /user/import/`` of a
+started server and prints rows per second. ``--hashed`` is the share of rows
+sent with ``password_hash``: they skip bcrypt, so import of pre-hashed users
+is bound by ``COPY`` and validation, and import of plain passwords by
+``PASSWORD__IMPORT_WORKERS``.
+
+Examples:
+    ::
+
+        $ uvicorn app:create_app --factory --port 5000
+        $ python -m benchmarks.user_import --rows 10000 --hashed 1 \\
+            --token "$API__X_ACCESS_TOKEN"
+        rows     hashed   created  failed   seconds  rows/s
+        10000    1.00     10000    0        ...      ...
+"""
+
+import json
+import time
+import urllib.request
+import uuid
+from argparse import ArgumentParser
+
+import bcrypt
+
+
+def _body(rows: int, hashed: float) -> bytes:
+    """Build CSV of ``rows`` unique users."""
+
+    password_hash = bcrypt.hashpw(b"SecurePass123", bcrypt.gensalt()).decode()
+    prefix = uuid.uuid4().hex[:8]
+    hashed_rows = int(rows * hashed)
+    lines = ["email,password,password_hash"]
+    for i in range(rows):
+        email = f"import-{prefix}-{i}@example.com"
+        if i < hashed_rows:
+            lines.append(f"{email},,{password_hash}")
+        else:
+            lines.append(f"{email},SecurePass123,")
+    return "\n".join(lines).encode()
+
+
+def main(url: str, token: str, rows: int, hashed: float) -> None:
+    request = urllib.request.Request(
+        f"{url.rstrip('/')}/user/import/",
+        data=_body(rows, hashed),
+        headers={"Content-Type": "text/csv", "X-ACCESS-TOKEN": token},
+        method="POST",
+    )
+    started = time.perf_counter()
+    with urllib.request.urlopen(request) as response:
+        report = json.load(response)
+    seconds = time.perf_counter() - started
+
+    print(f"{'rows':<9}{'hashed':<9}{'created':<9}{'failed':<9}{'seconds':<9}rows/s")
+    print(
+        f"{rows:<9}{hashed:<9.2f}{report['created']:<9}{len(report['failed']):<9}"
+        f"{seconds:<9.2f}{rows / seconds:.0f}",
+    )
+
+
+def parse_cli_args():
+    """Parse cli arguments."""
+
+    parser = ArgumentParser(description="Benchmark bulk user import")
+    parser.add_argument(
+        "--url",
+        type=str,
+        default="http://127.0.0.1:5000",
+        help="Address of started server",
+    )
+    parser.add_argument(
+        "--token",
+        type=str,
+        required=True,
+        help="API key with budget for expensive requests",
+    )
+    parser.add_argument("--rows", type=int, default=10_000, help="Count of users")
+    parser.add_argument(
+        "--hashed",
+        type=float,
+        default=1.0,
+        help="Share of users sent with password_hash, from 0 to 1",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_cli_args()
+    main(args.url, args.token, args.rows, args.hashed)
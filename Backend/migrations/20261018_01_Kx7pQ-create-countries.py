@@ -0,0 +1,20 @@
+"""
+create-countries
+"""
+
+from yoyo import step
+
+steps = [
+    step(
+        """
+            CREATE TABLE if NOT EXISTS countries (
+                id serial PRIMARY KEY,
+                name text NOT NULL UNIQUE,
+                code text NOT NULL UNIQUE
+            );
+        """,
+        """
+            DROP TABLE if EXISTS countries cascade;
+        """,
+    ),
+]
@@ -0,0 +1,25 @@
+"""
+create-cities
+"""
+
+from yoyo import step
+
+__depends__ = {'20261018_01_Kx7pQ-create-countries'}
+
+steps = [
+    step(
+        """
+            CREATE TABLE if NOT EXISTS cities (
+                id serial PRIMARY KEY,
+                country_id int NOT NULL REFERENCES countries,
+                name text NOT NULL UNIQUE,
+                code text NOT NULL UNIQUE,
+
+                CONSTRAINT unique_country_and_city_code UNIQUE (country_id, code)
+            );
+        """,
+        """
+            DROP TABLE if EXISTS cities cascade;
+        """,
+    ),
+]
@@ -0,0 +1,22 @@
+"""
+cities-keyset-indexes
+"""
+
+from yoyo import step
+
+__depends__ = {'20261018_02_Rm4tZ-create-cities'}
+
+steps = [
+    # Keyset pagination of ``read_by_country``:
+    #   where country_id = $1 and id > $2 order by id limit $3
+    # ``read_all`` is served by the primary key.
+    step(
+        """
+            CREATE INDEX if NOT EXISTS cities_country_id_id_idx
+                ON cities (country_id, id);
+        """,
+        """
+            DROP INDEX if EXISTS cities_country_id_id_idx;
+        """,
+    ),
+]
@@ -0,0 +1,47 @@
+"""
+create-api-keys
+"""
+
+from yoyo import step
+
+__depends__ = {'20261018_03_Vn2sL-cities-keyset-indexes'}
+
+steps = [
+    # Only SHA-256 of a key is stored. Issue a key by:
+    #   insert into api_keys (name, key_hash)
+    #       values ('client', encode(sha256('<key>'::bytea), 'hex'));
+    # Null limits mean defaults of ``RATE_LIMIT`` settings.
+    step(
+        """
+            CREATE TABLE if NOT EXISTS api_keys (
+                id serial PRIMARY KEY,
+                name text NOT NULL,
+                key_hash text UNIQUE NOT NULL,
+                read_rate double precision CHECK (read_rate > 0),
+                read_burst integer CHECK (read_burst > 0),
+                expensive_rate double precision CHECK (expensive_rate > 0),
+                expensive_burst integer CHECK (expensive_burst > 0),
+                is_active boolean NOT NULL DEFAULT TRUE,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        );
+        """,
+        """
+            DROP TABLE if EXISTS api_keys;
+        """,
+    ),
+    # Token buckets of ``RATE_LIMIT__BACKEND=postgresql``. Unlogged: buckets
+    # lost on crash are just full again.
+    step(
+        """
+            CREATE UNLOGGED TABLE if NOT EXISTS rate_limit_buckets (
+                bucket_key text PRIMARY KEY,
+                tokens double precision NOT NULL,
+                allowed boolean NOT NULL,
+                updated_at TIMESTAMPTZ NOT NULL
+        );
+        """,
+        """
+            DROP TABLE if EXISTS rate_limit_buckets;
+        """,
+    ),
+]
@@ -0,0 +1,57 @@
+"""
+create-detection-jobs
+"""
+
+from yoyo import step
+
+__depends__ = {'20261018_04_Hq8dW-create-api-keys'}
+
+steps = [
+    # Queue of ``POST /detect/jobs``. Workers of ``scripts.detection_worker``
+    # claim queued jobs with ``FOR UPDATE SKIP LOCKED``, so the table is the
+    # broker. ``attempts`` of a running job is its lease: a job requeued by
+    # another worker after a missed heartbeat can not be finished by the old
+    # one. Uploaded images are files of ``DETECTION_JOBS__STORAGE_DIR``
+    # shared by API servers and workers, a job keeps only the name of its
+    # image, so polling of status and claims never read image data.
+    step(
+        """
+            CREATE TABLE if NOT EXISTS detection_jobs (
+                id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+                status text NOT NULL DEFAULT 'queued'
+                    CHECK (status IN ('queued', 'running', 'succeeded', 'failed')),
+                conf double precision CHECK (conf > 0 AND conf < 1),
+                image_path text NOT NULL,
+                image_sha256 bytea NOT NULL CHECK (length(image_sha256) = 32),
+                progress double precision NOT NULL DEFAULT 0
+                    CHECK (progress >= 0 AND progress <= 1),
+                attempts integer NOT NULL DEFAULT 0,
+                worker text,
+                error text,
+                result jsonb,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                started_at TIMESTAMPTZ,
+                heartbeat_at TIMESTAMPTZ,
+                finished_at TIMESTAMPTZ
+        );
+        """,
+        """
+            DROP TABLE if EXISTS detection_jobs;
+        """,
+    ),
+    step(
+        """
+            CREATE INDEX if NOT EXISTS detection_jobs_queued_idx
+                ON detection_jobs (created_at) WHERE status = 'queued';
+            CREATE INDEX if NOT EXISTS detection_jobs_running_idx
+                ON detection_jobs (heartbeat_at) WHERE status = 'running';
+            CREATE INDEX if NOT EXISTS detection_jobs_finished_idx
+                ON detection_jobs (finished_at) WHERE finished_at IS NOT NULL;
+        """,
+        """
+            DROP INDEX if EXISTS detection_jobs_finished_idx;
+            DROP INDEX if EXISTS detection_jobs_running_idx;
+            DROP INDEX if EXISTS detection_jobs_queued_idx;
+        """,
+    ),
+]
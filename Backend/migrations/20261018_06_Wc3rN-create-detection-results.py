@@ -0,0 +1,43 @@
+"""
+create-detection-results
+"""
+
+from yoyo import step
+
+__depends__ = {'20261018_05_Jb6tW-create-detection-jobs'}
+
+steps = [
+    # Results of detection by SHA-256 of uploaded image and parameters of
+    # inference. Results depend on settings of detection besides model, e.g.
+    # tiling and the screen of tiles, so a fingerprint of them is a part of
+    # the key. Rows of a replaced model are deleted by
+    # ``DELETE /admin/detection-cache/?model_version=...``.
+    step(
+        """
+            CREATE TABLE if NOT EXISTS detection_results (
+                image_sha256 bytea NOT NULL CHECK (length(image_sha256) = 32),
+                model_version text NOT NULL,
+                settings_fingerprint text NOT NULL,
+                imgsz integer NOT NULL,
+                conf double precision NOT NULL,
+                result jsonb NOT NULL,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                PRIMARY KEY (
+                    image_sha256, model_version, settings_fingerprint, imgsz, conf
+                )
+        );
+        """,
+        """
+            DROP TABLE if EXISTS detection_results;
+        """,
+    ),
+    step(
+        """
+            CREATE INDEX if NOT EXISTS detection_results_model_version_idx
+                ON detection_results (model_version);
+        """,
+        """
+            DROP INDEX if EXISTS detection_results_model_version_idx;
+        """,
+    ),
+]
@@ -0,0 +1,63 @@
+"""Run asynchronous detection jobs of ``POST /detect/jobs``.
+
+Notes:
+    Every process loads its own model and takes jobs from ``detection_jobs``
+    table, so workers are scaled by starting more processes on any hosts
+    with access to database. ``SIGTERM`` or ``SIGINT`` stops taking new jobs
+    and exits when running jobs are finished::
+
+        $ python -m scripts.detection_worker
+"""
+
+import asyncio
+import signal
+from argparse import ArgumentParser
+
+from dependency_injector.wiring import Provide, inject
+
+from app.configuration import __containers__
+from app.internal.services import Services
+from app.internal.services.detection_worker import DetectionWorker
+from app.pkg.connectors import PostgresSQL
+
+
+@inject
+async def work(
+    worker: DetectionWorker = Provide[Services.detection_worker],
+) -> None:
+    """Run jobs until the process is asked to stop."""
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stop.set)
+    await worker.run(stop)
+
+
+def parse_cli_args():
+    """Parse cli arguments."""
+
+    parser = ArgumentParser(description="Run asynchronous detection jobs")
+    parser.add_argument(
+        "--testing",
+        action="store_true",
+        help="Use test database",
+    )
+    return parser.parse_args()
+
+
+def cli():
+    """Dispatch function, based on cli arguments."""
+
+    args = parse_cli_args()
+
+    __containers__.set_environment(
+        connectors=[PostgresSQL],
+        testing=args.testing,
+        pkg_name=__name__,
+    )
+    asyncio.run(work())
+
+
+if __name__ == "__main__":
+    cli()
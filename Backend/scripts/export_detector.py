@@ -0,0 +1,407 @@
+"""Export trained YOLOv8-OBB weights to ONNX for detection service.
+
+Notes:
+    Requires ``ultralytics`` and ``onnx`` from ``ml`` dependency group, which
+    is not installed on API servers::
+
+        $ poetry install --with ml
+        $ poetry run python -m scripts.export_detector \\
+            --weights Orion_YOLO_Training/yolov8x_obb/weights/last.pt
+
+    Names of classes are written to metadata of the model by ``ultralytics``
+    and read by :class:`.OnnxDetector`.
+
+    Besides FP32 model, ``--variants`` exports smaller ones for CPU nodes,
+    next to ``--output`` with a suffix of the variant:
+
+    * ``fp16`` keeps weights in half precision. CPU kernels of
+      ``onnxruntime`` are FP32, so weights are cast back to FP32 once, when
+      a session is created: the file is twice smaller, inference is as fast
+      as FP32 and differs only by rounding of weights.
+    * ``int8`` is static INT8 quantization in QDQ format. Ranges of
+      activations are calibrated on ``--calibration-size`` random images of
+      ``--calibration-images``, the ``train`` split. Nodes of the head
+      after its convolutions mix pixels with scores in one tensor and are
+      kept in FP32.
+
+    Accuracy and latency of variants are compared by
+    ``python -m benchmarks.model_variants``::
+
+        $ poetry run python -m scripts.export_detector \\
+            --weights last.pt --variants fp32 fp16 int8 \\
+            --calibration-images ../ML/Ship-detection-4/train/images
+
+    ``--weights`` may also be an FP32 ``.onnx`` file, then only smaller
+    variants are made of it and ``ultralytics`` is not needed.
+"""
+
+import pathlib
+import random
+import re
+import shutil
+import tempfile
+from argparse import ArgumentParser
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import onnx
+from onnx import numpy_helper
+from onnxruntime.quantization import (
+    CalibrationDataReader,
+    CalibrationMethod,
+    QuantFormat,
+    QuantType,
+    quantize_static,
+)
+from onnxruntime.quantization.shape_inference import quant_pre_process
+
+from app.pkg.detection import decode_image, letterbox
+from app.pkg.settings import settings
+
+#: Tuple[str, ...]: Variants of model in order of export.
+VARIANTS = ("fp32", "fp16", "int8")
+
+#: Tuple[str, ...]: Extensions of images of the dataset.
+IMAGE_SUFFIXES = (".jpg", ".jpeg", ".png", ".tif", ".tiff")
+
+#: Dict[str, CalibrationMethod]: Methods of calibration of ranges by name.
+CALIBRATION_METHODS = {
+    "minmax": CalibrationMethod.MinMax,
+    "entropy": CalibrationMethod.Entropy,
+    "percentile": CalibrationMethod.Percentile,
+}
+
+
+def export(
+    weights: pathlib.Path,
+    output: pathlib.Path,
+    imgsz: int,
+    opset: int,
+    dynamic: bool,
+) -> pathlib.Path:
+    """Export ``weights`` to ONNX file ``output``.
+
+    Args:
+        weights: ``.pt`` checkpoint of ``model.train``.
+        output: Path of ONNX file.
+        imgsz: Size of model input, the same as ``imgsz`` of training.
+        opset: ONNX opset version.
+        dynamic: Export with dynamic batch size and input size, which is
+            required for inference of several images at once.
+
+    Returns:
+        Path of ONNX file.
+    """
+
+    from ultralytics import YOLO  # pylint: disable=import-outside-toplevel
+
+    exported = YOLO(str(weights)).export(
+        format="onnx",
+        imgsz=imgsz,
+        opset=opset,
+        dynamic=dynamic,
+        simplify=True,
+        device="cpu",
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    shutil.move(exported, output)
+    return output
+
+
+def convert_fp16(model_path: pathlib.Path, output: pathlib.Path) -> pathlib.Path:
+    """Store FP32 weights of a model in half precision.
+
+    Notes:
+        Every converted weight is followed by a ``Cast`` to FP32, which is
+        folded by graph optimizations of ``onnxruntime`` when a session is
+        created. Inputs, outputs and computations stay FP32.
+
+    Args:
+        model_path: FP32 ONNX file.
+        output: Path of FP16 ONNX file.
+
+    Returns:
+        Path of FP16 ONNX file.
+    """
+
+    model = onnx.load(str(model_path))
+    graph = model.graph
+    casts = []
+    for initializer in graph.initializer:
+        if initializer.data_type != onnx.TensorProto.FLOAT:
+            continue
+        values = numpy_helper.to_array(initializer)
+        name = initializer.name
+        initializer.CopyFrom(
+            numpy_helper.from_array(values.astype(np.float16), f"{name}_fp16"),
+        )
+        casts.append(
+            onnx.helper.make_node(
+                "Cast",
+                [f"{name}_fp16"],
+                [name],
+                name=f"{name}_cast",
+                to=onnx.TensorProto.FLOAT,
+            ),
+        )
+    # Casts go first, so nodes stay in topological order.
+    nodes = casts + list(graph.node)
+    del graph.node[:]
+    graph.node.extend(nodes)
+
+    onnx.checker.check_model(model)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    onnx.save(model, str(output))
+    return output
+
+
+class ImageCalibrationReader(CalibrationDataReader):
+    """Inputs of model of images for calibration of INT8 ranges.
+
+    Notes:
+        Images are letterboxed like :class:`.OnnxDetector` does, so ranges
+        are calibrated on the same inputs the model gets in service.
+
+    Attributes:
+        paths: Images, one input per image.
+        input_name: Name of input of model.
+        imgsz: Size of square input of model.
+    """
+
+    paths: List[pathlib.Path]
+    input_name: str
+    imgsz: int
+
+    def __init__(self, paths: Sequence[pathlib.Path], input_name: str, imgsz: int):
+        self.paths = list(paths)
+        self.input_name = input_name
+        self.imgsz = imgsz
+        self._next = 0
+
+    def get_next(self) -> Optional[Dict[str, np.ndarray]]:
+        if self._next >= len(self.paths):
+            return None
+        image = decode_image(self.paths[self._next].read_bytes())
+        self._next += 1
+        tensor, _ = letterbox(image, (self.imgsz, self.imgsz))
+        return {self.input_name: tensor[None]}
+
+    def rewind(self) -> None:
+        self._next = 0
+
+
+def quantize_int8(
+    model_path: pathlib.Path,
+    output: pathlib.Path,
+    images: pathlib.Path,
+    size: int,
+    imgsz: int,
+    method: str,
+    per_channel: bool,
+    reduce_range: bool,
+    seed: int = 0,
+) -> pathlib.Path:
+    """Quantize FP32 model to static INT8 in QDQ format.
+
+    Notes:
+        Activations are ``uint8`` and weights are ``int8``, as recommended
+        for x86 CPUs. ``reduce_range`` quantizes weights to 7 bits, which
+        avoids saturation on CPUs without VNNI.
+
+    Args:
+        model_path: FP32 ONNX file.
+        output: Path of INT8 ONNX file.
+        images: Directory of calibration images, the ``train`` split.
+        size: Count of random calibration images.
+        imgsz: Size of square input of model.
+        method: Name of method of :data:`.CALIBRATION_METHODS`.
+        per_channel: Quantize weights per output channel.
+        reduce_range: Quantize weights to 7 bits.
+        seed: Seed of sample of images.
+
+    Raises:
+        SystemExit: If there are no calibration images.
+
+    Returns:
+        Path of INT8 ONNX file.
+    """
+
+    paths = sorted(p for p in images.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+    if not paths:
+        raise SystemExit(f"No calibration images in {images}")
+    paths = random.Random(seed).sample(paths, min(size, len(paths)))
+
+    with tempfile.TemporaryDirectory() as workdir:
+        prepared = pathlib.Path(workdir) / "prepared.onnx"
+        # Shapes of convolutional models are inferred by ONNX itself.
+        quant_pre_process(str(model_path), str(prepared), skip_symbolic_shape=True)
+        model = onnx.load(str(prepared))
+        output.parent.mkdir(parents=True, exist_ok=True)
+        quantize_static(
+            str(prepared),
+            str(output),
+            ImageCalibrationReader(paths, model.graph.input[0].name, imgsz),
+            quant_format=QuantFormat.QDQ,
+            per_channel=per_channel,
+            reduce_range=reduce_range,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            nodes_to_exclude=head_nodes(model),
+            calibrate_method=CALIBRATION_METHODS[method],
+        )
+
+    # Names of classes are kept for :class:`.OnnxDetector`.
+    source, quantized = onnx.load(str(model_path)), onnx.load(str(output))
+    metadata = {prop.key: prop.value for prop in source.metadata_props}
+    metadata.update({prop.key: prop.value for prop in quantized.metadata_props})
+    onnx.helper.set_model_props(quantized, metadata)
+    onnx.save(quantized, str(output))
+    return output
+
+
+def head_nodes(model: onnx.ModelProto) -> List[str]:
+    """Names of nodes kept in FP32 by INT8 quantization.
+
+    Notes:
+        Nodes of ``ultralytics`` models are named by their module, e.g.
+        ``/model.22/dfl/Softmax``. The head is the last module: its nodes
+        after convolutions decode distributions of box sides, angles and
+        scores and concatenate pixels with probabilities in one output,
+        which one ``uint8`` range can not hold. Nodes producing outputs of
+        graph are kept in FP32 for models of any naming.
+    """
+
+    modules = [
+        int(match.group(1))
+        for node in model.graph.node
+        if (match := re.match(r"/model\.(\d+)/", node.name))
+    ]
+    head = f"/model.{max(modules)}/" if modules else None
+    outputs = {output.name for output in model.graph.output}
+    # Quantizer matches nodes by name, so nodes without a name are not listed.
+    return [
+        node.name
+        for node in model.graph.node
+        if node.name
+        and (
+            (head is not None and node.name.startswith(head) and node.op_type != "Conv")
+            or outputs.intersection(node.output)
+        )
+    ]
+
+
+def parse_cli_args():
+    """Parse cli arguments."""
+
+    parser = ArgumentParser(description="Export YOLOv8-OBB weights to ONNX")
+    parser.add_argument(
+        "--weights",
+        type=pathlib.Path,
+        required=True,
+        help="Checkpoint of training, e.g. yolov8x_obb/weights/last.pt, "
+        "or its FP32 ONNX export",
+    )
+    parser.add_argument(
+        "--output",
+        type=pathlib.Path,
+        default=settings.DETECTION.MODEL_PATH,
+        help="Path of FP32 ONNX file. DETECTION__MODEL_PATH by default",
+    )
+    parser.add_argument(
+        "--imgsz",
+        type=int,
+        default=settings.DETECTION.IMGSZ,
+        help="Size of model input",
+    )
+    parser.add_argument("--opset", type=int, default=17, help="ONNX opset version")
+    parser.add_argument(
+        "--static",
+        action="store_true",
+        help="Export with fixed batch size 1",
+    )
+    parser.add_argument(
+        "--variants",
+        nargs="+",
+        choices=VARIANTS,
+        default=["fp32"],
+        help="Variants of model, saved as <output>_<variant>.onnx except fp32",
+    )
+    parser.add_argument(
+        "--calibration-images",
+        type=pathlib.Path,
+        default=pathlib.Path("../ML/Ship-detection-4/train/images"),
+        help="Directory of images for calibration of INT8 model",
+    )
+    parser.add_argument(
+        "--calibration-size",
+        type=int,
+        default=200,
+        help="Count of random calibration images",
+    )
+    parser.add_argument(
+        "--calibration-method",
+        choices=tuple(CALIBRATION_METHODS),
+        default="minmax",
+        help="Method of calibration of ranges of activations",
+    )
+    parser.add_argument(
+        "--per-tensor",
+        action="store_true",
+        help="Quantize weights per tensor instead of per channel",
+    )
+    parser.add_argument(
+        "--reduce-range",
+        action="store_true",
+        help="Quantize weights to 7 bits, for CPUs without VNNI",
+    )
+    return parser.parse_args()
+
+
+def variant_path(output: pathlib.Path, variant: str) -> pathlib.Path:
+    """Path of ``variant`` of model with FP32 file ``output``."""
+
+    if variant == "fp32":
+        return output
+    return output.with_name(f"{output.stem}_{variant}{output.suffix}")
+
+
+def cli():
+    """Export model by cli arguments."""
+
+    args = parse_cli_args()
+    if args.weights.suffix == ".onnx":
+        fp32 = args.weights
+    else:
+        fp32 = export(
+            args.weights,
+            args.output,
+            imgsz=args.imgsz,
+            opset=args.opset,
+            dynamic=not args.static,
+        )
+
+    for variant in VARIANTS:
+        if variant not in args.variants:
+            continue
+        output = variant_path(args.output, variant)
+        if variant == "fp32" and fp32 != output:
+            output.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(fp32, output)
+        elif variant == "fp16":
+            convert_fp16(fp32, output)
+        elif variant == "int8":
+            quantize_int8(
+                fp32,
+                output,
+                args.calibration_images,
+                size=args.calibration_size,
+                imgsz=args.imgsz,
+                method=args.calibration_method,
+                per_channel=not args.per_tensor,
+                reduce_range=args.reduce_range,
+            )
+        print(f"Model {variant} is exported to {output}")
+
+
+if __name__ == "__main__":
+    cli()
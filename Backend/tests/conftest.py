@@ -0,0 +1,6 @@
+"""Settings required by the app, which have no defaults."""
+
+import os
+
+# Settings are read at import, before fixtures run.
+os.environ.setdefault("JWT__SECRET_KEY", "test-secret-key-of-at-least-32-bytes")
@@ -0,0 +1,129 @@
+"""Batches of :class:`.MicroBatcher` by size and deadline, and their results."""
+
+import asyncio
+import time
+from typing import List
+
+import pytest
+
+from app.pkg.detection import MicroBatcher
+
+#: float: Seconds of a window long enough to never end during a test.
+FOREVER = 30.0
+
+
+class Model:
+    """Ten times every item, with a record of every batch."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.batches: List[List[int]] = []
+
+    async def __call__(self, items: List[int]) -> List[int]:
+        self.batches.append(list(items))
+        await asyncio.sleep(self.delay)
+        return [item * 10 for item in items]
+
+
+async def test_batch_is_run_at_max_batch_without_waiting_window():
+    model = Model()
+    batcher = MicroBatcher(model, max_batch=3, window=FOREVER, latency_slo=FOREVER)
+
+    results = await asyncio.wait_for(
+        asyncio.gather(*(batcher.submit(item) for item in range(3))),
+        timeout=1.0,
+    )
+    await batcher.close()
+
+    assert results == [0, 10, 20]
+    assert model.batches == [[0, 1, 2]]
+
+
+async def test_batch_is_split_by_max_batch():
+    model = Model()
+    batcher = MicroBatcher(model, max_batch=3, window=0.05, latency_slo=FOREVER)
+
+    await asyncio.gather(*(batcher.submit(item) for item in range(7)))
+    await batcher.close()
+
+    assert model.batches == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+async def test_batch_is_run_at_end_of_window():
+    model = Model()
+    batcher = MicroBatcher(model, max_batch=8, window=0.1, latency_slo=FOREVER)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(batcher.submit(1), batcher.submit(2))
+    elapsed = time.perf_counter() - started
+    await batcher.close()
+
+    assert results == [10, 20]
+    assert model.batches == [[1, 2]]
+    assert 0.1 <= elapsed < 1.0
+
+
+@pytest.mark.parametrize("lone_latency, expected", [(0.0, 0.2), (0.15, 0.05)])
+async def test_lone_item_waits_at_most_its_slo(lone_latency: float, expected: float):
+    model = Model()
+    batcher = MicroBatcher(model, max_batch=8, window=FOREVER, latency_slo=0.2)
+    batcher.observe_lone_latency(lone_latency)
+
+    started = time.perf_counter()
+    assert await batcher.submit(1, started=started) == 10
+    elapsed = time.perf_counter() - started
+    await batcher.close()
+
+    assert expected <= elapsed < expected + 0.1
+
+
+async def test_results_go_back_to_their_callers():
+    model = Model(delay=0.01)
+    batcher = MicroBatcher(model, max_batch=4, window=0.01, concurrency=2)
+
+    async def caller(item: int) -> int:
+        await asyncio.sleep(item % 3 * 0.005)
+        return await batcher.submit(item)
+
+    results = await asyncio.gather(*(caller(item) for item in range(20)))
+    await batcher.close()
+
+    assert results == [item * 10 for item in range(20)]
+    assert len(model.batches) > 1
+    assert sorted(sum(model.batches, [])) == list(range(20))
+
+
+async def test_error_of_batch_reaches_every_caller():
+    error = RuntimeError("session failed")
+
+    async def fail(items: List[int]) -> List[int]:
+        raise error
+
+    batcher = MicroBatcher(fail, max_batch=3, window=0.01)
+
+    results = await asyncio.gather(
+        *(batcher.submit(item) for item in range(3)),
+        return_exceptions=True,
+    )
+
+    assert results == [error, error, error]
+    # The failed batch frees its slot for the next one.
+    batcher.fn = Model()
+    assert await batcher.submit(4) == 40
+    await batcher.close()
+
+
+async def test_caller_which_gave_up_is_not_run():
+    model = Model(delay=0.05)
+    batcher = MicroBatcher(model, max_batch=1, window=FOREVER, latency_slo=FOREVER)
+
+    # The only slot is busy, so the next item waits in queue.
+    busy = asyncio.create_task(batcher.submit(0))
+    gone = asyncio.create_task(batcher.submit(1))
+    await asyncio.sleep(0.01)
+    gone.cancel()
+    assert await batcher.submit(2) == 20
+    assert await busy == 0
+    await batcher.close()
+
+    assert model.batches == [[0], [2]]
@@ -0,0 +1,187 @@
+"""Vectorized geometry of oriented boxes against the legacy Python loop."""
+
+import math
+
+import numpy as np
+import pytest
+
+from app.pkg.detection import (
+    box_overlap,
+    corners_to_xywhr,
+    pairwise_overlap,
+    rotated_nms,
+    xywhr_to_corners,
+)
+from benchmarks.rotated_nms import (
+    clustered_boxes,
+    legacy_polygon_iou,
+    legacy_rotated_nms,
+)
+
+#: float: Max allowed difference of overlap from the legacy implementation.
+TOLERANCE = 1e-9
+
+#: np.ndarray: Pairs of boxes: identical, nested, sharing an edge, disjoint,
+#  the same box rotated by pi, degenerate and crossed.
+SPECIAL_PAIRS = np.array(
+    [
+        [[50, 50, 40, 10, 0.3], [50, 50, 40, 10, 0.3]],
+        [[50, 50, 40, 10, 0.0], [50, 50, 20, 4, 0.0]],
+        [[50, 50, 40, 10, 0.0], [50, 60, 40, 10, 0.0]],
+        [[50, 50, 40, 10, 0.0], [150, 50, 40, 10, 0.0]],
+        [[50, 50, 40, 10, 0.0], [50, 50, 40, 10, math.pi]],
+        [[50, 50, 40, 0, 0.0], [50, 50, 40, 10, 0.0]],
+        [[50, 50, 40, 10, 0.0], [50, 50, 40, 10, math.pi / 2]],
+    ],
+)
+
+
+def random_boxes(rng: np.random.Generator, count: int, scene: float) -> np.ndarray:
+    length = rng.uniform(15, 150, count)
+    return np.stack(
+        (
+            rng.uniform(0, scene, count),
+            rng.uniform(0, scene, count),
+            length,
+            length / rng.uniform(2, 8, count),
+            rng.uniform(-math.pi, math.pi, count),
+        ),
+        axis=1,
+    )
+
+
+def random_pairs(rng: np.random.Generator, count: int):
+    """Pairs of boxes from disjoint to identical."""
+
+    first = random_boxes(rng, count, scene=100.0)
+    second = first.copy()
+    second[:, :2] += rng.normal(0, 15, (count, 2))
+    second[:, 2:4] *= rng.uniform(0.3, 1.5, (count, 2))
+    second[:, 4] += rng.normal(0, 0.5, count)
+    return first, second
+
+
+def legacy_overlap(first: np.ndarray, second: np.ndarray, metric: str) -> np.ndarray:
+    return np.array(
+        [
+            legacy_polygon_iou(a, b, wa, wb, metric)
+            for a, b, wa, wb in zip(
+                xywhr_to_corners(first),
+                xywhr_to_corners(second),
+                first[:, 2] * first[:, 3],
+                second[:, 2] * second[:, 3],
+            )
+        ],
+    )
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_corners_round_trip(seed):
+    boxes = random_boxes(np.random.default_rng(seed), 1000, scene=1000.0)
+
+    corners = xywhr_to_corners(boxes)
+    restored = corners_to_xywhr(corners)
+
+    # Corners may start from another vertex, so boxes are compared by IoU.
+    np.testing.assert_allclose(box_overlap(restored, boxes), 1.0, atol=1e-9)
+    np.testing.assert_allclose(restored[:, :2], boxes[:, :2], atol=1e-9)
+    np.testing.assert_allclose(
+        restored[:, 2] * restored[:, 3],
+        boxes[:, 2] * boxes[:, 3],
+        rtol=1e-9,
+    )
+    again = xywhr_to_corners(restored)
+    np.testing.assert_allclose(
+        np.sort(again.reshape(-1, 8), axis=1),
+        np.sort(corners.reshape(-1, 8), axis=1),
+        atol=1e-9,
+    )
+
+
+def test_corners_are_clockwise_in_image_coordinates():
+    corners = xywhr_to_corners(np.array([10.0, 20.0, 4.0, 2.0, 0.0]))
+
+    np.testing.assert_allclose(corners, [[8, 19], [12, 19], [12, 21], [8, 21]])
+
+
+def test_corners_of_labels_are_enclosed_by_rectangle():
+    # A quadrilateral which is not a rectangle gets its min-area rectangle.
+    corners = np.array([[[0.0, 0.0], [10.0, 0.0], [10.0, 4.0], [0.0, 5.0]]])
+
+    box = corners_to_xywhr(corners)[0]
+
+    assert box[2] * box[3] == pytest.approx(50.0)
+    assert box_overlap(box[None], corners_to_xywhr(corners))[0] == pytest.approx(1.0)
+
+
+@pytest.mark.parametrize("metric", ["iou", "ios"])
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_box_overlap_matches_legacy(metric, seed):
+    first, second = random_pairs(np.random.default_rng(seed), 2000)
+
+    actual = box_overlap(first, second, metric)
+
+    expected = legacy_overlap(first, second, metric)
+    np.testing.assert_allclose(actual, expected, rtol=0, atol=TOLERANCE)
+
+
+@pytest.mark.parametrize("metric", ["iou", "ios"])
+def test_box_overlap_of_special_pairs(metric):
+    first, second = SPECIAL_PAIRS[:, 0], SPECIAL_PAIRS[:, 1]
+
+    actual = box_overlap(first, second, metric)
+
+    np.testing.assert_allclose(
+        actual,
+        legacy_overlap(first, second, metric),
+        rtol=0,
+        atol=TOLERANCE,
+    )
+    assert actual[0] == pytest.approx(1.0)
+    assert actual[3] == 0.0
+    assert actual[4] == pytest.approx(1.0)
+    assert actual[5] == 0.0
+
+
+def test_pairwise_overlap_matches_box_overlap():
+    rng = np.random.default_rng(3)
+    first = random_boxes(rng, 40, scene=200.0)
+    second = random_boxes(rng, 30, scene=200.0)
+
+    matrix = pairwise_overlap(first, second)
+
+    i, j = np.meshgrid(np.arange(len(first)), np.arange(len(second)), indexing="ij")
+    expected = box_overlap(first[i.ravel()], second[j.ravel()])
+    np.testing.assert_allclose(matrix.ravel(), expected, rtol=0, atol=TOLERANCE)
+
+
+@pytest.mark.parametrize("metric", ["iou", "ios"])
+@pytest.mark.parametrize("threshold", [0.3, 0.7])
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_rotated_nms_matches_legacy(seed, threshold, metric):
+    boxes, scores = clustered_boxes(np.random.default_rng(seed), 400, per_ship=10)
+
+    keep = rotated_nms(boxes, scores, threshold, metric)
+
+    np.testing.assert_array_equal(
+        keep,
+        legacy_rotated_nms(boxes, scores, threshold, metric),
+    )
+
+
+def test_rotated_nms_keeps_equal_scores_in_input_order():
+    boxes = np.array([[10, 10, 20, 5, 0.0]] * 3 + [[100, 100, 20, 5, 0.0]])
+
+    keep = rotated_nms(boxes, np.ones(4), 0.5)
+
+    np.testing.assert_array_equal(keep, [0, 3])
+
+
+@pytest.mark.parametrize("count", [0, 1])
+def test_rotated_nms_of_few_boxes(count):
+    boxes = np.zeros((count, 5)) + [10, 10, 20, 5, 0]
+
+    keep = rotated_nms(boxes, np.ones(count), 0.5)
+
+    np.testing.assert_array_equal(keep, np.arange(count))
+    assert keep.dtype == np.int64
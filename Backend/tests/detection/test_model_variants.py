@@ -0,0 +1,112 @@
+"""mAP50 of the model variants benchmark on hand-built boxes."""
+
+import math
+
+import numpy as np
+import pytest
+
+from app.pkg.detection import Detections
+from benchmarks.model_variants import average_precision, match, mean_average_precision
+
+#: float: AP of perfect detections, the last of 101 points has precision 0.
+PERFECT_AP = 0.995
+
+
+def detections(boxes, scores, class_ids) -> Detections:
+    return Detections(
+        np.array(boxes, dtype=np.float64).reshape(-1, 5),
+        np.array(scores, dtype=np.float32),
+        np.array(class_ids, dtype=np.int64),
+    )
+
+
+LABELS = np.array([[50, 50, 40, 10, 0.0], [150, 50, 40, 10, math.pi / 4]])
+LABEL_CLASSES = np.array([0, 1])
+
+
+def test_match_takes_every_label_once_by_score():
+    found = detections(
+        [[50, 50, 40, 10, 0.0], [51, 50, 40, 10, 0.0], [150, 50, 40, 10, math.pi / 4]],
+        [0.6, 0.9, 0.8],
+        [0, 0, 1],
+    )
+
+    # The duplicate of lower score finds its label taken.
+    assert match(found, LABELS, LABEL_CLASSES).tolist() == [False, True, True]
+
+
+def test_match_requires_class_and_iou():
+    found = detections(
+        [[150, 50, 40, 10, math.pi / 4], [50, 50, 40, 10, math.pi / 2]],
+        [0.9, 0.9],
+        [0, 0],
+    )
+
+    # The first box is of another class, the second one crosses its label.
+    assert match(found, LABELS, LABEL_CLASSES).tolist() == [False, False]
+
+
+@pytest.mark.parametrize("shift, matched", [(10, True), (15, False)])
+def test_match_by_iou_threshold(shift: float, matched: bool):
+    # IoU of the label shifted along its length is 0.6 and 0.45.
+    found = detections([[50 + shift, 50, 40, 10, 0.0]], [0.9], [0])
+
+    assert match(found, LABELS, LABEL_CLASSES).tolist() == [matched]
+
+
+def test_match_without_detections_or_labels():
+    found = detections([[50, 50, 40, 10, 0.0]], [0.9], [0])
+
+    assert match(Detections.empty(), LABELS, LABEL_CLASSES).shape == (0,)
+    no_labels = np.zeros((0, 5)), np.zeros(0, dtype=np.int64)
+    assert match(found, *no_labels).tolist() == [False]
+
+
+@pytest.mark.parametrize(
+    "recall, precision, expected",
+    [
+        ([1.0], [1.0], PERFECT_AP),
+        ([0.5], [1.0], 0.75),
+        ([0.0, 0.0], [0.0, 0.0], 0.0),
+    ],
+)
+def test_average_precision(recall, precision, expected: float):
+    assert average_precision(np.array(recall), np.array(precision)) == pytest.approx(
+        expected,
+    )
+
+
+def test_mean_average_precision_of_perfect_detections():
+    assert mean_average_precision(
+        np.array([0.9, 0.8]),
+        np.array([0, 1]),
+        np.array([True, True]),
+        LABEL_CLASSES,
+    ) == pytest.approx(PERFECT_AP)
+
+
+def test_class_without_detections_has_zero_ap():
+    assert mean_average_precision(
+        np.array([0.9]),
+        np.array([0]),
+        np.array([True]),
+        LABEL_CLASSES,
+    ) == pytest.approx(PERFECT_AP / 2)
+
+
+def test_detections_of_classes_without_labels_are_ignored():
+    assert mean_average_precision(
+        np.array([0.95, 0.9, 0.8]),
+        np.array([2, 0, 1]),
+        np.array([False, True, True]),
+        LABEL_CLASSES,
+    ) == pytest.approx(PERFECT_AP)
+
+
+def test_no_labels():
+    assert mean_average_precision(
+        np.array([0.9]),
+        np.array([0]),
+        np.array([False]),
+        np.zeros(0, dtype=np.int64),
+    ) == 0.0
@@ -0,0 +1,198 @@
+"""Screen of tiles and skipping of screened tiles by the tiled detector."""
+
+from typing import List, Optional
+
+import numpy as np
+import pytest
+
+from app.pkg.detection import Detections, TiledDetector, TileFilter, tile_windows
+
+#: int: Side of a tile of test scenes.
+TILE = 64
+
+#: int: Brightness of flat water of test scenes.
+WATER = 100
+
+
+def flat_tile(rng: np.random.Generator, side: int = TILE) -> np.ndarray:
+    """Water with sensor noise well below thresholds of the filter."""
+
+    noise = rng.normal(0, 0.5, (side, side, 1))
+    return np.clip(WATER + noise, 0, 255).repeat(3, axis=2).astype(np.uint8)
+
+
+def add_ship(tile: np.ndarray, x: int, y: int) -> np.ndarray:
+    """Bright hull of 12x4 pixels at ``x, y``."""
+
+    tile[y : y + 4, x : x + 12] = 255
+    return tile
+
+
+class FakeDetector:
+    """One box at the centre of every tile run through it."""
+
+    imgsz = TILE
+
+    def __init__(self):
+        self.runs: List[int] = []
+
+    def detect_batch(
+        self,
+        images: List[np.ndarray],
+        conf: Optional[float] = None,
+        scaleup: bool = True,
+    ) -> List[Detections]:
+        self.runs.append(len(images))
+        return [
+            Detections(
+                np.array([[image.shape[1] / 2, image.shape[0] / 2, 4, 2, 0]], float),
+                np.ones(1, dtype=np.float32),
+                np.zeros(1, dtype=np.int64),
+            )
+            for image in images
+        ]
+
+
+def test_keep_skips_only_flat_tiles():
+    rng = np.random.default_rng(0)
+    tiles = [
+        flat_tile(rng),
+        add_ship(flat_tile(rng), 20, 30),
+        np.zeros((TILE, TILE, 3), dtype=np.uint8),
+        add_ship(flat_tile(rng), 0, 0),
+        flat_tile(rng, side=1),
+        flat_tile(rng, side=TILE // 2),
+    ]
+
+    keep = TileFilter().keep(tiles)
+
+    # A tile too small for edges is never skipped.
+    np.testing.assert_array_equal(keep, [False, True, False, True, True, False])
+
+
+def test_keep_of_no_tiles():
+    assert TileFilter().keep([]).shape == (0,)
+
+
+def test_keep_by_std_or_edges():
+    rng = np.random.default_rng(0)
+    gradient = np.tile(np.linspace(0, 200, TILE, dtype=np.uint8), (TILE, 1))
+    tiles = [
+        np.repeat(gradient[:, :, None], 3, axis=2),
+        add_ship(flat_tile(rng), 8, 8),
+    ]
+
+    std, edges = TileFilter().scores(tiles)
+
+    # Smooth gradient varies without edges, a small ship is the opposite.
+    assert std[0] > 2.0 and edges[0] == 0
+    assert std[1] < 20.0 and edges[1] > 5e-4
+    by_std = TileFilter(min_std=20.0, min_edge_density=1.0)
+    by_edges = TileFilter(min_std=np.inf)
+    assert by_std.keep(tiles).tolist() == [True, False]
+    assert by_edges.keep(tiles).tolist() == [False, True]
+
+
+def brute_force_on_land(
+    land_mask: np.ndarray,
+    windows: np.ndarray,
+    width: int,
+    height: int,
+    max_land_share: float,
+) -> np.ndarray:
+    """Share of land of mask cells touched by every window, without sums."""
+
+    mask_height, mask_width = land_mask.shape
+    columns = np.arange(mask_width + 1) * width / mask_width
+    rows = np.arange(mask_height + 1) * height / mask_height
+    result = []
+    for x0, y0, x1, y1 in windows:
+        touched = land_mask[
+            (rows[:-1] < y1) & (rows[1:] > y0),
+        ][:, (columns[:-1] < x1) & (columns[1:] > x0)]
+        result.append(touched.sum() >= max_land_share * touched.size)
+    return np.array(result)
+
+
+@pytest.mark.parametrize("mask_shape", [(7, 11), (70, 100), (3, 2), (140, 160)])
+@pytest.mark.parametrize("max_land_share", [1.0, 0.5, 0.25])
+def test_on_land_equals_brute_force(mask_shape, max_land_share: float):
+    width, height = 100, 70
+    rng = np.random.default_rng(mask_shape[0])
+    land_mask = rng.random(mask_shape) < 0.6
+    land_mask[: mask_shape[0] // 2, : mask_shape[1] // 2] = True
+    windows = tile_windows(width, height, 24, 7)
+
+    on_land = TileFilter(max_land_share=max_land_share).on_land(
+        land_mask,
+        windows,
+        width,
+        height,
+    )
+
+    np.testing.assert_array_equal(
+        on_land,
+        brute_force_on_land(land_mask, windows, width, height, max_land_share),
+    )
+
+
+def test_on_land_of_mask_of_scene_size():
+    land_mask = np.zeros((128, 192), dtype=np.uint8)
+    land_mask[:, :64] = 255
+    land_mask[:64, 64:128] = 1
+    windows = tile_windows(192, 128, TILE, 0)
+
+    on_land = TileFilter().on_land(land_mask, windows, 192, 128)
+
+    np.testing.assert_array_equal(on_land, [True, True, False, True, False, False])
+
+
+@pytest.mark.parametrize("batch_size, workers", [(4, 1), (5, 2), (12, 1), (1, 3)])
+def test_detect_runs_only_kept_tiles(batch_size: int, workers: int):
+    rng = np.random.default_rng(0)
+    columns, rows = 4, 3
+    tiles = [[flat_tile(rng) for _ in range(columns)] for _ in range(rows)]
+    ships = {(0, 1), (1, 0), (1, 3), (2, 2), (2, 3)}
+    for row, column in ships:
+        add_ship(tiles[row][column], 10 + row, 20 + column)
+    scene = np.concatenate([np.concatenate(line, axis=1) for line in tiles], axis=0)
+    # The left half of the middle row is land, one of its tiles has a ship.
+    land_mask = np.zeros((rows, columns), dtype=bool)
+    land_mask[1, :2] = True
+
+    detector = FakeDetector()
+    tiled = TiledDetector(
+        detector,
+        overlap=0,
+        batch_size=batch_size,
+        workers=workers,
+        tile_filter=TileFilter(),
+    )
+    detections = tiled.detect(scene, land_mask=land_mask)
+    tiled.close()
+
+    kept = ships - {(1, 0)}
+    centres = {(int(y // TILE), int(x // TILE)) for x, y in detections.boxes[:, :2]}
+    assert centres == kept
+    np.testing.assert_allclose(
+        np.sort(detections.boxes[:, 0] % TILE),
+        np.full(len(kept), TILE / 2),
+    )
+    assert sum(detector.runs) == len(kept)
+    assert detections.tiles == rows * columns
+    assert detections.skipped_tiles == rows * columns - len(kept)
+
+
+def test_detect_without_filter_runs_every_tile():
+    rng = np.random.default_rng(0)
+    scene = np.concatenate([flat_tile(rng) for _ in range(3)], axis=1)
+
+    detector = FakeDetector()
+    detections = TiledDetector(detector, overlap=0).detect(
+        scene,
+        land_mask=np.ones((1, 3), dtype=bool),
+    )
+
+    assert sum(detector.runs) == 3
+    assert len(detections) == 3
+    assert detections.skipped_tiles == 0
@@ -0,0 +1,209 @@
+"""Windows of image sources against the fully decoded image."""
+
+import io
+import zlib
+
+import numpy as np
+import pytest
+from PIL import Image
+from PIL.TiffImagePlugin import ImageFileDirectory_v2
+
+from app.pkg.detection import (
+    RasterSource,
+    TiffSource,
+    decode_image,
+    open_image,
+    tile_windows,
+)
+
+#: int: Sides of test images, not multiples of tiles or JPEG blocks.
+WIDTH, HEIGHT = 397, 263
+
+#: Dict[str, int]: Samples of a pixel by modes of Pillow.
+CHANNELS = {"L": 1, "RGB": 3, "RGBA": 4}
+
+#: List[Tuple[str, bool]]: Compressions of Pillow and whether horizontal
+#  predictor is used. Uncompressed TIFF has no predictor.
+COMPRESSIONS = [
+    ("raw", False),
+    ("tiff_adobe_deflate", False),
+    ("tiff_adobe_deflate", True),
+]
+
+
+def random_pixels(mode: str) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    shape = (HEIGHT, WIDTH, CHANNELS[mode])
+    return rng.integers(0, 256, shape, dtype=np.uint8)
+
+
+def to_image(pixels: np.ndarray, mode: str) -> Image.Image:
+    return Image.fromarray(pixels.squeeze(axis=2) if mode == "L" else pixels, mode)
+
+
+def encode(mode: str, image_format: str) -> bytes:
+    output = io.BytesIO()
+    to_image(random_pixels(mode), mode).save(output, image_format)
+    return output.getvalue()
+
+
+def encode_striped(mode: str, compression: str, predictor: bool, rows: int) -> bytes:
+    tiffinfo = {278: rows, 317: 2} if predictor else {278: rows}
+    output = io.BytesIO()
+    to_image(random_pixels(mode), mode).save(
+        output,
+        "TIFF",
+        compression=compression,
+        tiffinfo=tiffinfo,
+    )
+    return output.getvalue()
+
+
+def encode_tiled(mode: str, compression: str, predictor: bool, tile: int) -> bytes:
+    """Tiled TIFF. Pillow reads tiles, but writes only strips, so tiles are
+    written here and only the directory is written by Pillow."""
+
+    pixels = random_pixels(mode)
+    across, down = -(-WIDTH // tile), -(-HEIGHT // tile)
+    padded = np.zeros((down * tile, across * tile, pixels.shape[2]), np.uint8)
+    padded[:HEIGHT, :WIDTH] = pixels
+
+    output = io.BytesIO(b"II*\0\0\0\0\0")
+    output.seek(0, io.SEEK_END)
+    offsets, counts = [], []
+    for row in range(down):
+        for column in range(across):
+            top, left = row * tile, column * tile
+            block = padded[top : top + tile, left : left + tile]
+            if predictor:
+                block = np.diff(block, axis=1, prepend=0).astype(np.uint8)
+            data = block.tobytes()
+            if compression != "raw":
+                data = zlib.compress(data)
+            offsets.append(output.tell())
+            counts.append(len(data))
+            output.write(data)
+
+    short, long = 3, 4
+    directory = ImageFileDirectory_v2()
+    for tag, value, kind in [
+        (256, WIDTH, long),
+        (257, HEIGHT, long),
+        (258, (8,) * pixels.shape[2], short),
+        (259, 1 if compression == "raw" else 8, short),
+        (262, 1 if mode == "L" else 2, short),
+        (277, pixels.shape[2], short),
+        (284, 1, short),
+        (317, 2 if predictor else 1, short),
+        (322, tile, long),
+        (323, tile, long),
+        (324, tuple(offsets), long),
+        (325, tuple(counts), long),
+    ]:
+        directory[tag] = value
+        directory.tagtype[tag] = kind
+    if mode == "RGBA":
+        # Unassociated alpha.
+        directory[338] = 2
+        directory.tagtype[338] = short
+    at = output.tell()
+    output.write(directory.tobytes(at))
+    output.seek(4)
+    output.write(at.to_bytes(4, "little"))
+    return output.getvalue()
+
+
+def assert_windows_equal(source, expected: np.ndarray, tile: int, overlap: int):
+    assert (source.width, source.height) == (WIDTH, HEIGHT)
+    for x0, y0, x1, y1 in tile_windows(WIDTH, HEIGHT, tile, overlap):
+        window = source.read_window(x0, y0, x1 - x0, y1 - y0)
+        assert window.dtype == np.uint8
+        np.testing.assert_array_equal(window, expected[y0:y1, x0:x1])
+
+
+@pytest.mark.parametrize(
+    "mode, image_format",
+    [
+        ("RGB", "JPEG"),
+        ("L", "JPEG"),
+        ("RGB", "PNG"),
+        ("L", "PNG"),
+        ("RGBA", "PNG"),
+        ("RGB", "GIF"),
+    ],
+)
+@pytest.mark.parametrize("tile, overlap", [(128, 16), (100, 0), (512, 0)])
+def test_windows_equal_decoded_image(
+    tmp_path,
+    mode: str,
+    image_format: str,
+    tile: int,
+    overlap: int,
+):
+    data = encode(mode, image_format)
+    expected = decode_image(data)
+
+    with open_image(data, raster_above=0, directory=tmp_path) as source:
+        assert isinstance(source, RasterSource)
+        assert_windows_equal(source, expected, tile, overlap)
+
+
+@pytest.mark.parametrize("mode", ["L", "RGB", "RGBA"])
+@pytest.mark.parametrize("compression, predictor", COMPRESSIONS)
+@pytest.mark.parametrize("rows", [16, 100, HEIGHT])
+def test_striped_tiff_windows_equal_decoded_image(
+    mode: str,
+    compression: str,
+    predictor: bool,
+    rows: int,
+):
+    data = encode_striped(mode, compression, predictor, rows)
+    expected = decode_image(data)
+
+    with open_image(data) as source:
+        assert isinstance(source, TiffSource)
+        assert (source.block_height, source.predictor) == (rows, 2 if predictor else 1)
+        assert_windows_equal(source, expected, 128, 16)
+
+
+@pytest.mark.parametrize("mode", ["L", "RGB", "RGBA"])
+@pytest.mark.parametrize("compression, predictor", COMPRESSIONS)
+@pytest.mark.parametrize("tile", [64, 128, 512])
+def test_tiled_tiff_windows_equal_decoded_image(
+    mode: str,
+    compression: str,
+    predictor: bool,
+    tile: int,
+):
+    data = encode_tiled(mode, compression, predictor, tile)
+    expected = decode_image(data)
+
+    with open_image(data) as source:
+        assert isinstance(source, TiffSource)
+        assert (source.block_width, source.block_height) == (tile, tile)
+        # Windows inside one tile and across several ones.
+        assert_windows_equal(source, expected, 48, 0)
+        assert_windows_equal(source, expected, 128, 16)
+
+
+def test_tiff_file_is_mapped(tmp_path):
+    path = tmp_path / "scene.tif"
+    path.write_bytes(encode_tiled("RGB", "tiff_adobe_deflate", True, 64))
+    expected = decode_image(path.read_bytes())
+
+    with open(path, "rb") as file, open_image(file) as source:
+        assert isinstance(source, TiffSource)
+        assert_windows_equal(source, expected, 100, 10)
+
+
+def test_file_is_deleted_on_close(tmp_path):
+    with open_image(encode("RGB", "PNG"), raster_above=0, directory=tmp_path):
+        pass
+
+    assert not list(tmp_path.iterdir())
+
+
+def test_window_out_of_image_is_rejected(tmp_path):
+    with open_image(encode("RGB", "PNG"), raster_above=0, directory=tmp_path) as source:
+        with pytest.raises(ValueError):
+            source.read_window(WIDTH - 10, 0, 20, 20)
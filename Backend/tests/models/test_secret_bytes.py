@@ -0,0 +1,120 @@
+"""Password of commands is hashed by bcrypt exactly once."""
+
+import asyncio
+
+import bcrypt
+import pytest
+
+from app.pkg import models
+from app.pkg.models.base import BaseModel
+from app.pkg.models.types import EncryptedSecretBytes
+from app.pkg.settings import settings
+
+EMAIL = "user@example.com"
+PASSWORD = "Secure1"
+
+
+class ChangePasswordCommand(BaseModel):
+    password: EncryptedSecretBytes
+
+
+@pytest.fixture()
+def hashpw(monkeypatch):
+    """Count calls of ``bcrypt.hashpw`` and hash with the lowest cost."""
+
+    calls = []
+    original = bcrypt.hashpw
+
+    def counted(password, salt):
+        calls.append(password)
+        return original(password, salt)
+
+    monkeypatch.setattr(bcrypt, "hashpw", counted)
+    monkeypatch.setattr(EncryptedSecretBytes, "rounds", 4)
+    return calls
+
+
+def test_validation_does_not_hash(hashpw):
+    cmd = models.CreateUserCommand(email=EMAIL, password=PASSWORD)
+
+    assert not cmd.password.is_hashed
+    assert hashpw == []
+
+
+def test_reads_of_secret_hash_once(hashpw):
+    cmd = models.CreateUserCommand(email=EMAIL, password=PASSWORD)
+
+    first = cmd.password.get_secret_value()
+    assert cmd.password.get_secret_value() == first
+    assert cmd.to_dict(show_secrets=True)["password"] == first.decode()
+    assert bcrypt.checkpw(PASSWORD.encode(), first)
+    assert len(hashpw) == 1
+
+
+def test_validate_assignment_keeps_hash(hashpw):
+    cmd = models.CreateUserCommand(email=EMAIL, password=PASSWORD)
+    hashed = cmd.password.get_secret_value()
+
+    cmd.password = cmd.password
+    cmd.email = "other@example.com"
+
+    assert cmd.password.get_secret_value() == hashed
+    assert len(hashpw) == 1
+
+
+def test_model_copy_keeps_hash(hashpw):
+    cmd = models.CreateUserCommand(email=EMAIL, password=PASSWORD)
+
+    copies = [
+        cmd.model_copy(),
+        cmd.model_copy(deep=True),
+        cmd.model_copy(update={"email": "other@example.com"}),
+    ]
+
+    hashed = cmd.password.get_secret_value()
+    assert [c.password.get_secret_value() for c in copies] == [hashed] * 3
+    assert len(hashpw) == 1
+
+
+def test_conversion_between_commands_keeps_hash(hashpw):
+    cmd = models.CreateUserCommand(email=EMAIL, password=PASSWORD)
+
+    changed = ChangePasswordCommand.model_validate(cmd.model_dump())
+    created = models.CreateUserCommand(email=EMAIL, password=changed.password)
+    validated = models.CreateUserCommand.model_validate(created)
+
+    hashed = validated.password.get_secret_value()
+    assert cmd.password.get_secret_value() == hashed
+    assert changed.password.get_secret_value() == hashed
+    assert len(hashpw) == 1
+
+
+async def test_hash_with_hashes_once(hashpw):
+    calls = []
+
+    async def hash_fn(password: bytes) -> bytes:
+        calls.append(password)
+        await asyncio.sleep(0)
+        return bcrypt.hashpw(password, bcrypt.gensalt(rounds=4))
+
+    cmd = models.CreateUserCommand(email=EMAIL, password=PASSWORD)
+    copy = ChangePasswordCommand(password=cmd.password)
+    await asyncio.gather(
+        cmd.password.hash_with(hash_fn),
+        copy.password.hash_with(hash_fn),
+    )
+    await cmd.password.hash_with(hash_fn)
+
+    assert copy.password.get_secret_value() == cmd.password.get_secret_value()
+    assert len(calls) == 1
+    assert len(hashpw) == 1
+
+
+def test_rounds_default_to_settings(hashpw, monkeypatch):
+    monkeypatch.setattr(EncryptedSecretBytes, "rounds", None)
+    monkeypatch.setattr(settings.PASSWORD, "BCRYPT_ROUNDS", 5)
+
+    hashed = EncryptedSecretBytes(PASSWORD).get_secret_value()
+
+    assert hashed.startswith(b"$2b$05$")
+    assert len(hashpw) == 1
@@ -0,0 +1,133 @@
+"""Refill, burst and rejection of token buckets of every backend."""
+
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
+
+import aiopg
+import psycopg2
+import pytest
+
+from app.internal.pkg import rate_limit
+from app.internal.pkg.rate_limit import PostgresRateLimiter
+from app.internal.repository.postgresql.connection import acquire_connection
+from app.pkg.ratelimit import InMemoryRateLimiter, memory
+from app.pkg.settings import settings
+
+
+class Clock:
+    """Monotonic time moved by tests."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture()
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(memory.time, "monotonic", clock)
+    return clock
+
+
+async def test_new_bucket_allows_burst(clock: Clock):
+    limiter = InMemoryRateLimiter()
+
+    decisions = [await limiter.acquire("key", rate=2, burst=3) for _ in range(4)]
+
+    assert [d.allowed for d in decisions] == [True, True, True, False]
+    assert [d.remaining for d in decisions] == [2, 1, 0, 0]
+    assert decisions[-1].retry_after == pytest.approx(0.5)
+
+
+async def test_bucket_is_refilled_by_rate_up_to_burst(clock: Clock):
+    limiter = InMemoryRateLimiter()
+    for _ in range(3):
+        await limiter.acquire("key", rate=2, burst=3)
+
+    clock.now += 1.0
+    refilled = await limiter.acquire("key", rate=2, burst=3)
+    clock.now += 3600
+    full = await limiter.acquire("key", rate=2, burst=3)
+
+    assert refilled.allowed and refilled.remaining == pytest.approx(1)
+    assert full.allowed and full.remaining == pytest.approx(2)
+
+
+async def test_cost_and_independent_buckets(clock: Clock):
+    limiter = InMemoryRateLimiter()
+
+    expensive = await limiter.acquire("a", rate=1, burst=5, cost=4)
+    rejected = await limiter.acquire("a", rate=1, burst=5, cost=4)
+    other = await limiter.acquire("b", rate=1, burst=5, cost=4)
+
+    assert expensive.allowed and not rejected.allowed and other.allowed
+    assert rejected.retry_after == pytest.approx(3)
+
+
+async def test_postgres_limiter_falls_back_when_database_fails(monkeypatch):
+    @asynccontextmanager
+    async def unavailable():
+        raise OSError("connection refused")
+        yield  # pragma: no cover
+
+    monkeypatch.setattr(rate_limit, "get_connection", unavailable)
+    limiter = PostgresRateLimiter()
+
+    decisions = [await limiter.acquire("key", rate=1, burst=2) for _ in range(3)]
+
+    assert [d.allowed for d in decisions] == [True, True, False]
+
+
+@pytest.fixture()
+async def postgres(monkeypatch):
+    """Limiter on ``rate_limit_buckets`` of the database of settings."""
+
+    try:
+        pool = await aiopg.create_pool(str(settings.POSTGRES.DSN), maxsize=2, timeout=3)
+    except (OSError, psycopg2.Error, asyncio.TimeoutError) as error:
+        pytest.skip(f"Postgresql is not available: {error}")
+    monkeypatch.setattr(rate_limit, "get_connection", lambda: acquire_connection(pool))
+    key = f"test:{uuid.uuid4()}"
+    try:
+        yield PostgresRateLimiter(fallback=_Failing()), key
+    finally:
+        async with acquire_connection(pool) as cur:
+            await cur.execute(
+                "delete from rate_limit_buckets where bucket_key = %s",
+                (key,),
+            )
+        pool.close()
+        await pool.wait_closed()
+
+
+class _Failing(InMemoryRateLimiter):
+    async def acquire(self, *args, **kwargs):
+        raise AssertionError("Database is not used")
+
+
+async def test_postgres_bucket_burst_and_refill(postgres):
+    limiter, key = postgres
+
+    decisions = [await limiter.acquire(key, rate=20, burst=3) for _ in range(4)]
+    await asyncio.sleep(0.2)
+    refilled = await limiter.acquire(key, rate=20, burst=3)
+
+    assert [d.allowed for d in decisions] == [True, True, True, False]
+    assert decisions[0].remaining == pytest.approx(2, abs=0.1)
+    assert 0 < decisions[-1].retry_after <= 1 / 20
+    # Four tokens are refilled in 0.2 s, but the bucket holds three.
+    assert refilled.allowed and refilled.remaining == pytest.approx(2, abs=0.1)
+
+
+async def test_postgres_bucket_is_shared_by_limiters(postgres):
+    limiter, key = postgres
+    other = PostgresRateLimiter(fallback=_Failing())
+
+    first = await limiter.acquire(key, rate=0.01, burst=1)
+    second = await other.acquire(key, rate=0.01, burst=1)
+
+    assert first.allowed and not second.allowed
+    assert second.retry_after == pytest.approx(100, rel=0.01)
@@ -0,0 +1,30 @@
+"""Cursors of pages of cities are checked before the service is called."""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import create_app
+from app.pkg.settings import settings
+from app.pkg.utils.cursor import encode_cursor
+
+
+@pytest.fixture(scope="module")
+def client() -> TestClient:
+    # Without lifespan, so nothing connects to database.
+    return TestClient(create_app())
+
+
+@pytest.mark.parametrize("path", ["/city/", "/city/1/"])
+@pytest.mark.parametrize(
+    "cursor",
+    ["!!!", encode_cursor(id=42)[:-2], encode_cursor(id=-1), encode_cursor(id="x")],
+)
+def test_invalid_cursor_is_bad_request(client: TestClient, path: str, cursor: str):
+    response = client.get(
+        path,
+        params={"cursor": cursor},
+        headers={"X-ACCESS-TOKEN": settings.API.X_ACCESS_TOKEN.get_secret_value()},
+    )
+
+    assert response.status_code == 400
+    assert response.json() == {"message": "Invalid pagination cursor."}
@@ -0,0 +1,48 @@
+"""Requests above the budget of an API key are answered with 429."""
+
+import pytest
+from dependency_injector import providers
+from fastapi.testclient import TestClient
+
+from app import create_app
+from app.internal.services import Services
+from app.internal.services.api_key import ApiKeyService
+from app.pkg.ratelimit import InMemoryRateLimiter
+from app.pkg.settings import settings
+
+
+@pytest.fixture()
+def client() -> TestClient:
+    api_key_service = ApiKeyService(
+        api_key_repository=None,
+        rate_limiter=InMemoryRateLimiter(),
+        settings_key=settings.API.X_ACCESS_TOKEN.get_secret_value(),
+        read_rate=0.5,
+        read_burst=1,
+        expensive_rate=0.5,
+        expensive_burst=1,
+    )
+    with Services.api_key_service.override(providers.Object(api_key_service)):
+        # Without lifespan, so nothing connects to database.
+        yield TestClient(create_app())
+
+
+def test_request_above_burst_is_too_many_requests(client: TestClient):
+    headers = {"X-ACCESS-TOKEN": settings.API.X_ACCESS_TOKEN.get_secret_value()}
+
+    first = client.get("/city/cache/stats/", headers=headers)
+    second = client.get("/city/cache/stats/", headers=headers)
+
+    assert first.status_code == 200
+    assert second.status_code == 429
+    assert second.headers["Retry-After"] == "2"
+
+
+def test_unknown_key_is_forbidden_before_rate_limit(client: TestClient):
+    for _ in range(2):
+        response = client.get(
+            "/city/cache/stats/",
+            headers={"X-ACCESS-TOKEN": "unknown"},
+        )
+
+        assert response.status_code == 403
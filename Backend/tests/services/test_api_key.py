@@ -0,0 +1,100 @@
+"""Reload of API keys from database and their rate limits."""
+
+from typing import List, Optional
+
+import psycopg2
+import pytest
+
+from app.internal.services.api_key import ApiKeyService, hash_api_key
+from app.pkg import models
+from app.pkg.models.exceptions.repository import DriverError, EmptyResult
+from app.pkg.models.exceptions.token_verification import (
+    InvalidCredentials,
+    RateLimitExceeded,
+)
+from app.pkg.ratelimit import InMemoryRateLimiter
+
+SETTINGS_KEY = "settings-key"
+
+
+class ApiKeyRepository:
+    """Active keys in memory, read as ``ApiKeyRepository`` does."""
+
+    def __init__(self, keys: List[str]):
+        self.keys = keys
+        self.error: Optional[Exception] = None
+
+    async def read_all_active(self) -> List[models.ApiKey]:
+        if self.error is not None:
+            raise self.error
+        if not self.keys:
+            raise EmptyResult
+        return [
+            models.ApiKey(id=i, name=key, key_hash=hash_api_key(key))
+            for i, key in enumerate(self.keys, start=1)
+        ]
+
+
+def service(repository: ApiKeyRepository, burst: int = 10) -> ApiKeyService:
+    return ApiKeyService(
+        api_key_repository=repository,
+        rate_limiter=InMemoryRateLimiter(),
+        settings_key=SETTINGS_KEY,
+        read_rate=1.0,
+        read_burst=burst,
+        expensive_rate=1.0,
+        expensive_burst=burst,
+    )
+
+
+async def test_revoked_keys_are_rejected_after_reload():
+    repository = ApiKeyRepository(["first", "second"])
+    api_keys = service(repository)
+    assert await api_keys.load()
+
+    repository.keys = ["second"]
+    assert await api_keys.load()
+    assert api_keys.lookup("first") is None
+    assert api_keys.lookup("second") is not None
+
+
+async def test_revoking_the_last_key():
+    repository = ApiKeyRepository(["last"])
+    api_keys = service(repository)
+    assert await api_keys.load()
+
+    repository.keys = []
+    assert await api_keys.load()
+
+    with pytest.raises(InvalidCredentials):
+        await api_keys.authorize("last", models.RateLimitScope.READ)
+    # The key from settings is always valid.
+    await api_keys.authorize(SETTINGS_KEY, models.RateLimitScope.READ)
+
+
+@pytest.mark.parametrize(
+    "error",
+    [OSError("refused"), psycopg2.OperationalError("gone"), DriverError()],
+)
+async def test_errors_of_database_keep_previous_keys(error: Exception):
+    repository = ApiKeyRepository(["kept"])
+    api_keys = service(repository)
+    assert await api_keys.load()
+
+    repository.error = error
+    assert not await api_keys.load()
+    assert api_keys.lookup("kept") is not None
+
+
+async def test_request_above_burst_is_rate_limited():
+    api_keys = service(ApiKeyRepository(["key"]), burst=2)
+    await api_keys.load()
+
+    for _ in range(2):
+        await api_keys.authorize("key", models.RateLimitScope.READ)
+    with pytest.raises(RateLimitExceeded) as error:
+        await api_keys.authorize("key", models.RateLimitScope.READ)
+
+    assert error.value.headers == {"Retry-After": "1"}
+    # Buckets of scopes are independent.
+    await api_keys.authorize("key", models.RateLimitScope.EXPENSIVE)
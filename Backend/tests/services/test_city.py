@@ -0,0 +1,116 @@
+"""Keyset pages of cities and cursors of their next pages."""
+
+from typing import List
+
+import pytest
+
+from app.internal.services.city import CityService
+from app.pkg import models
+from app.pkg.cache import LRUCache
+from app.pkg.connectors.postgresql.replicas import RecentWrites
+from app.pkg.models.exceptions.city import CityNotFound, NoCityFoundForCountry
+from app.pkg.models.exceptions.repository import EmptyResult
+from app.pkg.utils.cursor import decode_cursor
+
+
+class CityRepository:
+    """Cities in memory, queried as ``city.CityRepository`` does."""
+
+    def __init__(self, cities: List[models.City]):
+        self.cities = sorted(cities, key=lambda city: city.id)
+
+    async def read_all(self, query, route) -> List[models.City]:
+        return self.__page(self.cities, query)
+
+    async def read_by_country(self, query, route) -> List[models.City]:
+        cities = [c for c in self.cities if c.country_id == query.country_id]
+        return self.__page(cities, query)
+
+    @staticmethod
+    def __page(cities: List[models.City], query) -> List[models.City]:
+        page = [c for c in cities if c.id > query.after_id][: query.limit]
+        if not page:
+            raise EmptyResult
+        return page
+
+
+def city(city_id: int, country_id: int = 1) -> models.City:
+    return models.City(
+        id=city_id,
+        name=f"City {city_id}",
+        code="ABC",
+        country_id=country_id,
+    )
+
+
+def service(cities: List[models.City]) -> CityService:
+    return CityService(
+        city_repository=CityRepository(cities),
+        cache=LRUCache(max_size=100, ttl=60),
+        recent_writes=RecentWrites(window=0),
+    )
+
+
+async def read_pages(city_service: CityService, limit: int) -> List[models.CityPage]:
+    pages = []
+    cursor = None
+    while True:
+        page = await city_service.read_all_cities(
+            query=models.ReadAllCitiesQuery(
+                after_id=decode_cursor(cursor, models.CityCursor).id,
+                limit=limit,
+            ),
+        )
+        pages.append(page)
+        if page.next_cursor is None:
+            return pages
+        cursor = page.next_cursor
+
+
+@pytest.mark.parametrize("count, limit", [(1, 3), (7, 3), (5, 2), (5, 10)])
+async def test_pages_walk_all_cities_once(count: int, limit: int):
+    # Gaps of ids, as after deletes.
+    ids = [i * 3 + 1 for i in range(count)]
+
+    pages = await read_pages(service([city(i) for i in ids]), limit)
+
+    assert [c.id for page in pages for c in page.items] == ids
+    assert all(len(page.items) == limit for page in pages[:-1])
+    assert 0 < len(pages[-1].items) < limit
+    assert pages[-1].next_cursor is None
+
+
+async def test_last_full_page_is_followed_by_empty_page():
+    pages = await read_pages(service([city(i) for i in range(1, 7)]), 3)
+
+    assert [len(page.items) for page in pages] == [3, 3, 0]
+    assert decode_cursor(pages[1].next_cursor, models.CityCursor).id == 6
+    assert pages[-1].next_cursor is None
+
+
+async def test_empty_first_page_is_not_found():
+    with pytest.raises(CityNotFound):
+        await service([]).read_all_cities(query=models.ReadAllCitiesQuery())
+    with pytest.raises(NoCityFoundForCountry):
+        await service([city(1, country_id=2)]).read_cities_by_country(
+            query=models.ReadCityByCountryQuery(country_id=1),
+        )
+
+
+async def test_pages_of_country():
+    city_service = service([city(i, country_id=i % 2 + 1) for i in range(1, 10)])
+
+    first = await city_service.read_cities_by_country(
+        query=models.ReadCityByCountryQuery(country_id=1, limit=3),
+    )
+    last = await city_service.read_cities_by_country(
+        query=models.ReadCityByCountryQuery(
+            country_id=1,
+            after_id=decode_cursor(first.next_cursor, models.CityCursor).id,
+            limit=3,
+        ),
+    )
+
+    assert [c.id for c in first.items] == [2, 4, 6]
+    assert [c.id for c in last.items] == [8]
+    assert last.next_cursor is None
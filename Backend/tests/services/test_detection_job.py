@@ -0,0 +1,247 @@
+"""Images of detection jobs in storage: saved by the API, run and deleted by
+workers."""
+
+import asyncio
+import hashlib
+import io
+import uuid
+from datetime import datetime, timezone
+from typing import Any, List, Optional, Tuple
+
+import pytest
+
+from app.internal.pkg.storage import FileStorage
+from app.internal.services.detection_job import DetectionJobService
+from app.internal.services.detection_worker import DetectionWorker
+from app.pkg import models
+from app.pkg.models.exceptions.detection import InvalidImage
+from app.pkg.models.exceptions.repository import DriverError, EmptyResult
+
+IMAGE = b"encoded image"
+
+
+class DetectionJobRepository:
+    """Jobs in memory, changed as ``DetectionJobRepository`` does."""
+
+    def __init__(self, stop: Optional[asyncio.Event] = None):
+        self.stop = stop
+        self.created: List[models.CreateDetectionJobCommand] = []
+        self.queued: List[models.DetectionJobInput] = []
+        self.finished: List[Tuple[str, Any]] = []
+        self.stale: List[models.DetectionJobImage] = []
+        self.expired: List[models.DetectionJobImage] = []
+        self.error: Optional[Exception] = None
+
+    async def create(self, cmd: models.CreateDetectionJobCommand):
+        if self.error is not None:
+            raise self.error
+        self.created.append(cmd)
+        return models.CreateDetectionJobResponse(
+            id=uuid.uuid4(),
+            status=models.DetectionJobStatus.QUEUED,
+            created_at=datetime.now(timezone.utc),
+        )
+
+    async def claim(self, cmd: models.ClaimDetectionJobCommand):
+        if not self.queued:
+            # Every job is run, the worker stops.
+            self.stop.set()
+            raise EmptyResult
+        return self.queued.pop(0)
+
+    async def update_progress(self, cmd):
+        return models.ReadDetectionJobQuery(id=cmd.id)
+
+    async def complete(self, cmd: models.CompleteDetectionJobCommand):
+        self.finished.append((models.DetectionJobStatus.SUCCEEDED, cmd))
+        return models.ReadDetectionJobQuery(id=cmd.id)
+
+    async def fail(self, cmd: models.FailDetectionJobCommand):
+        status = models.DetectionJobStatus.QUEUED
+        if not cmd.retry:
+            status = models.DetectionJobStatus.FAILED
+        self.finished.append((status, cmd))
+        return models.ReadDetectionJobQuery(id=cmd.id)
+
+    async def requeue_stale(self, cmd):
+        if not self.stale:
+            raise EmptyResult
+        stale, self.stale = self.stale, []
+        return stale
+
+    async def delete_finished(self, cmd):
+        if not self.expired:
+            raise EmptyResult
+        expired, self.expired = self.expired, []
+        return expired
+
+
+class DetectionService:
+    """Detection which reads the whole image and records it."""
+
+    available = True
+
+    def __init__(self, error: Optional[Exception] = None):
+        self.error = error
+        self.images: List[Tuple[bytes, Optional[bytes]]] = []
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def detect(self, image, conf=None, progress=None, digest=None):
+        self.images.append((image.read(), digest))
+        if self.error is not None:
+            raise self.error
+        return models.DetectionResponse(
+            width=1,
+            height=1,
+            model_version="test",
+            detections=[],
+        )
+
+
+@pytest.fixture()
+def storage(tmp_path) -> FileStorage:
+    return FileStorage(tmp_path / "jobs")
+
+
+async def test_job_keeps_name_of_saved_image(storage: FileStorage):
+    repository = DetectionJobRepository()
+    service = DetectionJobService(repository, storage)
+    digest = hashlib.sha256(IMAGE).digest()
+
+    await service.create_job(io.BytesIO(IMAGE), digest=digest, conf=0.5)
+
+    (cmd,) = repository.created
+    assert (cmd.image_sha256, cmd.conf) == (digest, 0.5)
+    assert storage.path(cmd.image_path).read_bytes() == IMAGE
+    # Nothing but the saved image, no partial files.
+    assert [p.name for p in storage.root.iterdir()] == [cmd.image_path]
+
+
+async def test_image_is_deleted_if_job_is_not_saved(storage: FileStorage):
+    repository = DetectionJobRepository()
+    repository.error = DriverError()
+    service = DetectionJobService(repository, storage)
+
+    with pytest.raises(DriverError):
+        await service.create_job(io.BytesIO(IMAGE), digest=b"0" * 32)
+
+    assert not list(storage.root.iterdir())
+
+
+@pytest.mark.parametrize("name", ["", ".", "..", "../jobs", "a/b", ".a.partial"])
+def test_names_outside_of_storage_are_rejected(storage: FileStorage, name: str):
+    with pytest.raises(ValueError):
+        storage.path(name)
+
+
+async def job(storage: FileStorage, attempts: int = 1) -> models.DetectionJobInput:
+    return models.DetectionJobInput(
+        id=uuid.uuid4(),
+        attempts=attempts,
+        image_path=await storage.save(io.BytesIO(IMAGE)),
+        image_sha256=hashlib.sha256(IMAGE).digest(),
+    )
+
+
+async def run_worker(
+    storage: FileStorage,
+    repository: DetectionJobRepository,
+    detection_service: DetectionService,
+) -> None:
+    repository.stop = asyncio.Event()
+    worker = DetectionWorker(
+        detection_service,
+        repository,
+        storage,
+        max_attempts=2,
+        heartbeat_interval=60,
+    )
+    await asyncio.wait_for(worker.run(repository.stop), timeout=5)
+
+
+@pytest.mark.parametrize(
+    "error, status",
+    [
+        (None, models.DetectionJobStatus.SUCCEEDED),
+        (InvalidImage, models.DetectionJobStatus.FAILED),
+        (RuntimeError("session failed"), models.DetectionJobStatus.QUEUED),
+    ],
+)
+async def test_worker_reads_image_from_storage(
+    storage: FileStorage,
+    error: Optional[Exception],
+    status: str,
+):
+    repository = DetectionJobRepository()
+    claimed = await job(storage)
+    repository.queued.append(claimed)
+    detection_service = DetectionService(error)
+
+    await run_worker(storage, repository, detection_service)
+
+    assert detection_service.images == [(IMAGE, claimed.image_sha256)]
+    assert [finished[0] for finished in repository.finished] == [status]
+    # Only a job queued again keeps its image.
+    kept = status == models.DetectionJobStatus.QUEUED
+    assert storage.path(claimed.image_path).exists() == kept
+
+
+async def test_last_attempt_deletes_image(storage: FileStorage):
+    repository = DetectionJobRepository()
+    claimed = await job(storage, attempts=2)
+    repository.queued.append(claimed)
+
+    await run_worker(storage, repository, DetectionService(RuntimeError()))
+
+    assert repository.finished[0][0] == models.DetectionJobStatus.FAILED
+    assert not storage.path(claimed.image_path).exists()
+
+
+async def test_job_without_image_fails_at_once(storage: FileStorage):
+    repository = DetectionJobRepository()
+    claimed = await job(storage)
+    await storage.delete(claimed.image_path)
+    repository.queued.append(claimed)
+    detection_service = DetectionService()
+
+    await run_worker(storage, repository, detection_service)
+
+    [(status, cmd)] = repository.finished
+    assert status == models.DetectionJobStatus.FAILED
+    assert cmd.error == "Image of job is not found."
+    assert not detection_service.images
+
+
+async def test_maintenance_deletes_images_of_failed_and_expired_jobs(
+    storage: FileStorage,
+):
+    repository = DetectionJobRepository()
+    requeued, failed, expired = [await job(storage) for _ in range(3)]
+    repository.stale = [
+        models.DetectionJobImage(
+            id=requeued.id,
+            status=models.DetectionJobStatus.QUEUED,
+            image_path=requeued.image_path,
+        ),
+        models.DetectionJobImage(
+            id=failed.id,
+            status=models.DetectionJobStatus.FAILED,
+            image_path=failed.image_path,
+        ),
+    ]
+    repository.expired = [
+        models.DetectionJobImage(
+            id=expired.id,
+            status=models.DetectionJobStatus.SUCCEEDED,
+            image_path=expired.image_path,
+        ),
+    ]
+
+    await run_worker(storage, repository, DetectionService())
+
+    assert [p.name for p in storage.root.iterdir()] == [requeued.image_path]
@@ -0,0 +1,33 @@
+"""Keys of JWT are required, there are no publicly known defaults."""
+
+import pydantic
+import pytest
+
+from app.pkg.settings.settings import JWTAuthentication
+
+SECRET = "0123456789abcdef0123456789abcdef"
+
+
+@pytest.fixture(autouse=True)
+def no_env(monkeypatch):
+    for name in ("ALGORITHM", "SECRET_KEY", "PRIVATE_KEY", "PUBLIC_KEY"):
+        monkeypatch.delenv(name, raising=False)
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        {},
+        {"SECRET_KEY": "too-short"},
+        {"ALGORITHM": "EdDSA"},
+        {"ALGORITHM": "EdDSA", "SECRET_KEY": SECRET},
+    ],
+)
+def test_missing_keys_are_rejected(values):
+    with pytest.raises(pydantic.ValidationError):
+        JWTAuthentication(**values)
+
+
+def test_keys_of_algorithm():
+    assert JWTAuthentication(SECRET_KEY=SECRET).SECRET_KEY.get_secret_value() == SECRET
+    assert JWTAuthentication(ALGORITHM="EdDSA", PUBLIC_KEY="...").SECRET_KEY is None
@@ -0,0 +1,50 @@
+"""Opaque cursors of keyset pagination."""
+
+import base64
+
+import pytest
+
+from app.pkg import models
+from app.pkg.models.exceptions.pagination import InvalidCursor
+from app.pkg.utils.cursor import decode_cursor, encode_cursor
+
+
+def b64(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+@pytest.mark.parametrize("last_id", [1, 42, 2**31 - 1, 10**12])
+def test_round_trip(last_id: int):
+    cursor = encode_cursor(id=last_id)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor, models.CityCursor).id == last_id
+
+
+@pytest.mark.parametrize("cursor", [None, ""])
+def test_no_cursor_is_the_first_page(cursor):
+    assert decode_cursor(cursor, models.CityCursor).id == 0
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "!!!",
+        "a",
+        "ключ",
+        b64(b"not json"),
+        b64(b"\xff\xfe"),
+        # Truncated ``{"id":42}``.
+        encode_cursor(id=42)[:-2],
+        b64(b"[42]"),
+        b64(b"42"),
+        b64(b"null"),
+        b64(b'{"id":-1}'),
+        b64(b'{"id":"forty two"}'),
+        b64(b'{"id":1.5}'),
+        b64(b'{"id":null}'),
+    ],
+)
+def test_invalid_cursor_is_rejected(cursor: str):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, models.CityCursor)